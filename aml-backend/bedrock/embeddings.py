@@ -1,3 +1,4 @@
+import asyncio
 import json
 import os
 import logging
@@ -132,6 +133,10 @@ def get_embedding_model():
     return _embedding_model
 
 
+def _predict(text: str) -> List[float]:
+    return get_embedding_model().predict(text)
+
+
 async def get_embedding(text: str) -> List[float]:
     """
     Generate embeddings for the given text using Amazon Bedrock Titan model.
@@ -147,8 +152,8 @@ async def get_embedding(text: str) -> List[float]:
         Exception: If there's an error generating the embeddings.
     """
     try:
-        model = get_embedding_model()
-        embeddings = model.predict(text)
+        # boto3 is blocking: keep the Bedrock call off the event loop
+        embeddings = await asyncio.to_thread(_predict, text)
         logger.info(f"Generated embeddings for text: '{text[:50]}...' (length: {len(embeddings)})")
         return embeddings
     except Exception as e:
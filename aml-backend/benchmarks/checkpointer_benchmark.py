@@ -0,0 +1,160 @@
+"""
+Benchmark: MongoDBSaver vs AsyncMongoDBCheckpointSaver on a long investigation.
+
+Runs a synthetic graph shaped like the investigation pipeline (triage ->
+4-way data-gathering fan-out -> analysis -> N sub-investigations -> narrative
+-> finalize) with realistically sized state payloads, once per checkpointer,
+and reports wall time, worst event-loop stall, checkpoint bytes and the
+number of write round trips.
+
+Usage (from aml-backend/):
+    MONGODB_URI=... python -m benchmarks.checkpointer_benchmark --runs 5 --subs 8
+"""
+
+import argparse
+import asyncio
+import operator
+import os
+import statistics
+import time
+import uuid
+from typing import Annotated, TypedDict
+
+from langgraph.checkpoint.mongodb import MongoDBSaver
+from langgraph.graph import END, START, StateGraph
+from langgraph.types import Send
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import MongoClient
+
+from services.agents.checkpoint import AsyncMongoDBCheckpointSaver
+
+MONGODB_URI = os.getenv("MONGODB_URI", "mongodb://localhost:27017")
+BENCH_DB = os.getenv("BENCH_DB_NAME", "threatsight360_bench")
+
+
+def _merge(a: dict, b: dict) -> dict:
+    return {**a, **b}
+
+
+class BenchState(TypedDict, total=False):
+    alert_data: dict
+    gathered_data: Annotated[dict, _merge]
+    analysis: dict
+    sub_investigation_findings: Annotated[dict, _merge]
+    narrative: dict
+    agent_audit_log: Annotated[list, operator.add]
+
+
+def _blob(n_items: int) -> list:
+    return [
+        {"transaction_id": f"TX-{i:06d}", "amount": i * 13.7, "counterparty": f"E-{i % 97}",
+         "tags": ["wire", "cross_border"], "memo": "payment for services rendered " * 3}
+        for i in range(n_items)
+    ]
+
+
+def build_graph(n_subs: int):
+    async def triage(state):
+        return {"agent_audit_log": [{"agent": "triage"}]}
+
+    def dispatch(state):
+        return [Send("gather", {"task": t}) for t in ("profile", "transactions", "network", "watchlist")]
+
+    async def gather(state):
+        return {"gathered_data": {state["task"]: _blob(400)}, "agent_audit_log": [{"agent": state["task"]}]}
+
+    async def analyse(state):
+        return {"analysis": {"edges": _blob(300)}, "agent_audit_log": [{"agent": "analysis"}]}
+
+    def dispatch_subs(state):
+        return [Send("sub", {"entity": f"E-{i}"}) for i in range(n_subs)]
+
+    async def sub(state):
+        return {"sub_investigation_findings": {state["entity"]: {"evidence": _blob(150)}},
+                "agent_audit_log": [{"agent": f"mini_investigate:{state['entity']}"}]}
+
+    async def narrative(state):
+        return {"narrative": {"text": "lorem ipsum " * 2000}, "agent_audit_log": [{"agent": "narrative"}]}
+
+    async def finalize(state):
+        return {"agent_audit_log": [{"agent": "finalize"}]}
+
+    builder = StateGraph(BenchState)
+    for name, fn in (("triage", triage), ("gather", gather), ("analyse", analyse),
+                     ("sub", sub), ("narrative", narrative), ("finalize", finalize)):
+        builder.add_node(name, fn)
+    builder.add_edge(START, "triage")
+    builder.add_conditional_edges("triage", dispatch, ["gather"])
+    builder.add_edge("gather", "analyse")
+    builder.add_conditional_edges("analyse", dispatch_subs, ["sub"])
+    builder.add_edge("sub", "narrative")
+    builder.add_edge("narrative", "finalize")
+    builder.add_edge("finalize", END)
+    return builder
+
+
+async def _loop_lag_probe(stop: asyncio.Event, samples: list) -> None:
+    """Measure how late a 5 ms ticker fires -- a proxy for event-loop blocking."""
+    interval = 0.005
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append((time.perf_counter() - t0 - interval) * 1000)
+
+
+async def run_once(graph) -> dict:
+    stop = asyncio.Event()
+    lag: list = []
+    probe = asyncio.create_task(_loop_lag_probe(stop, lag))
+    config = {"configurable": {"thread_id": f"bench-{uuid.uuid4().hex[:10]}"}, "recursion_limit": 100}
+    t0 = time.perf_counter()
+    async for _ in graph.astream({"alert_data": {"entity_id": "E-0"}}, config=config, stream_mode="updates"):
+        pass
+    elapsed = (time.perf_counter() - t0) * 1000
+    stop.set()
+    await probe
+    return {"elapsed_ms": elapsed, "max_lag_ms": max(lag or [0]), "thread_id": config["configurable"]["thread_id"]}
+
+
+def _summary(label: str, results: list, extra: str = "") -> None:
+    elapsed = [r["elapsed_ms"] for r in results]
+    lag = [r["max_lag_ms"] for r in results]
+    print(f"{label:<28} median {statistics.median(elapsed):8.1f} ms   "
+          f"p-max loop stall {max(lag):7.1f} ms   {extra}")
+
+
+async def main(runs: int, n_subs: int) -> None:
+    sync_client = MongoClient(MONGODB_URI)
+    async_client = AsyncIOMotorClient(MONGODB_URI)
+    sync_client.drop_database(BENCH_DB)
+
+    builder = build_graph(n_subs)
+
+    sync_saver = MongoDBSaver(sync_client[BENCH_DB])
+    sync_graph = builder.compile(checkpointer=sync_saver)
+    sync_results = [await run_once(sync_graph) for _ in range(runs)]
+    sync_bytes = sync_client[BENCH_DB].command("collstats", "checkpoints")["size"]
+
+    async_saver = AsyncMongoDBCheckpointSaver(async_client[BENCH_DB])
+    async_graph = builder.compile(checkpointer=async_saver)
+    async_results = [await run_once(async_graph) for _ in range(runs)]
+    async_bytes = sync_client[BENCH_DB].command("collstats", "checkpoints_aio")["size"]
+
+    print(f"\n{runs} runs, {n_subs} sub-investigations per run\n")
+    _summary("MongoDBSaver", sync_results, f"checkpoint bytes {sync_bytes:,}")
+    _summary("AsyncMongoDBCheckpointSaver", async_results,
+             f"checkpoint bytes {async_bytes:,}   write batches {async_saver.stats['write_batches']}"
+             f" for {async_saver.stats['writes_flushed']} writes")
+
+    pruned = sum([await async_saver.aprune_thread(r["thread_id"]) for r in async_results])
+    print(f"\nPruning finalised threads removed {pruned} checkpoints")
+
+    sync_client.drop_database(BENCH_DB)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--subs", type=int, default=8)
+    args = parser.parse_args()
+    asyncio.run(main(args.runs, args.subs))
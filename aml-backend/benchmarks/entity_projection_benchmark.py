@@ -0,0 +1,95 @@
+"""
+Benchmark: payload size and latency of entity reads per projection preset.
+
+Compares what /entities/{id} used to return (detail + all three embeddings,
+i.e. the with_vectors preset) against the summary / profile / detail presets,
+for both the repository read path (Motor aggregation) and the agent
+get_entity_profile tool (pymongo find_one).
+
+Usage (from aml-backend/):
+    MONGODB_URI=... python -m benchmarks.entity_projection_benchmark --sample 200
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+
+import bson
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import MongoClient
+
+from models.database.entity_projections import ENTITY_PROJECTION_PRESETS, build_entity_projection
+
+MONGODB_URI = os.getenv("MONGODB_URI", "mongodb://localhost:27017")
+DB_NAME = os.getenv("DB_NAME", "fsi-threatsight360")
+
+
+def _json_bytes(doc: dict) -> int:
+    return len(json.dumps(doc, default=str).encode())
+
+
+def _report(label: str, latencies: list, bson_sizes: list, json_sizes: list) -> None:
+    print(f"{label:<34} p50 {statistics.median(latencies):7.2f} ms   "
+          f"p95 {sorted(latencies)[int(len(latencies) * 0.95) - 1]:7.2f} ms   "
+          f"avg BSON {statistics.mean(bson_sizes) / 1024:8.1f} KiB   "
+          f"avg JSON {statistics.mean(json_sizes) / 1024:8.1f} KiB")
+
+
+async def bench_route_path(entity_ids: list) -> None:
+    collection = AsyncIOMotorClient(MONGODB_URI)[DB_NAME]["entities"]
+    print("\n/entities/{id} read path (aggregation $project)")
+    for view in ENTITY_PROJECTION_PRESETS:
+        projection = build_entity_projection(view)
+        latencies, bson_sizes, json_sizes = [], [], []
+        for entity_id in entity_ids:
+            t0 = time.perf_counter()
+            docs = await collection.aggregate([
+                {"$match": {"entityId": entity_id}}, {"$limit": 1}, {"$project": projection}
+            ]).to_list(1)
+            latencies.append((time.perf_counter() - t0) * 1000)
+            if docs:
+                bson_sizes.append(len(bson.encode(docs[0])))
+                json_sizes.append(_json_bytes(docs[0]))
+        _report(f"view={view}", latencies, bson_sizes or [0], json_sizes or [0])
+
+
+def bench_tool_path(entity_ids: list) -> None:
+    collection = MongoClient(MONGODB_URI)[DB_NAME]["entities"]
+    print("\nget_entity_profile tool path (find_one)")
+    for label, projection in (("full document", None),
+                              ("with_vectors", build_entity_projection("with_vectors")),
+                              ("profile (tool default)", build_entity_projection("profile"))):
+        latencies, bson_sizes, json_sizes = [], [], []
+        for entity_id in entity_ids:
+            t0 = time.perf_counter()
+            doc = collection.find_one({"entityId": entity_id}, projection)
+            latencies.append((time.perf_counter() - t0) * 1000)
+            if doc:
+                bson_sizes.append(len(bson.encode(doc)))
+                json_sizes.append(_json_bytes(doc))
+        _report(label, latencies, bson_sizes or [0], json_sizes or [0])
+
+
+def main(sample: int) -> None:
+    collection = MongoClient(MONGODB_URI)[DB_NAME]["entities"]
+    entity_ids = [d["entityId"] for d in collection.aggregate([
+        {"$match": {"identifierEmbedding": {"$exists": True}}},
+        {"$sample": {"size": sample}},
+        {"$project": {"_id": 0, "entityId": 1}},
+    ])]
+    if not entity_ids:
+        print("No entities with embeddings found")
+        return
+    print(f"Sampled {len(entity_ids)} entities with embeddings")
+    asyncio.run(bench_route_path(entity_ids))
+    bench_tool_path(entity_ids)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sample", type=int, default=200)
+    args = parser.parse_args()
+    main(args.sample)
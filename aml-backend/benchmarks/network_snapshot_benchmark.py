@@ -0,0 +1,155 @@
+"""
+Benchmark: per-request Pydantic network construction vs the GraphSnapshot path.
+
+Builds synthetic $graphLookup output (relationship documents plus entity
+documents) for networks of the requested sizes and times, in-process and
+without MongoDB:
+
+- legacy:   validated NetworkEdge / NetworkNode per element, connection counts
+            by scanning every edge per node, per-model styling, dict
+            conversion and stdlib json.dumps (what /network/{id} used to do)
+- snapshot: GraphSnapshot columns, one-pass degrees, table styling,
+            to_frontend() and utils.fast_json.dumps (orjson when installed)
+
+Reports wall time, peak traced memory and payload size per phase.
+
+Usage (from aml-backend/):
+    python -m benchmarks.network_snapshot_benchmark --sizes 1000 10000 --edge-factor 2.5
+"""
+
+import argparse
+import json
+import random
+import statistics
+import time
+import tracemalloc
+
+from models.core.network import NetworkEdge, NetworkNode, NetworkRiskLevel
+from models.core.network_snapshot import GraphSnapshot, relationship_risk_weight, strength_from_score
+from utils.fast_json import dumps, orjson
+
+_REL_TYPES = ["business_associate_suspected", "director_of", "household_member",
+              "transactional_counterparty_high_risk", "ubo_of", "potential_duplicate"]
+_LEVELS = ["low", "medium", "high", "critical"]
+_RISK_COLORS = {"critical": "#DC2626", "high": "#EA580C", "medium": "#F59E0B", "low": "#16A34A", "unknown": "#6B7280"}
+
+
+def _synthetic_network(n_nodes: int, edge_factor: float, seed: int = 7):
+    rng = random.Random(seed)
+    ids = [f"ENT-{i:06d}" for i in range(n_nodes)]
+    relationships = []
+    for k in range(int(n_nodes * edge_factor)):
+        s, t = rng.sample(ids, 2)
+        relationships.append({
+            "_id": f"rel-{k}",
+            "source": {"entityId": s},
+            "target": {"entityId": t},
+            "type": rng.choice(_REL_TYPES),
+            "strength": rng.random(),
+            "confidence": rng.random(),
+            "verified": rng.random() < 0.4,
+            "direction": "bidirectional" if rng.random() < 0.3 else "directed",
+        })
+    entities = [{
+        "entityId": entity_id,
+        "name": {"full": f"Entity {entity_id}"},
+        "entityType": rng.choice(["individual", "organization"]),
+        "riskAssessment": {"overall": {"level": rng.choice(_LEVELS), "score": rng.uniform(0, 100)}},
+    } for entity_id in ids]
+    return ids[0], relationships, entities
+
+
+def legacy_path(center: str, relationships: list, entities: list) -> bytes:
+    edges = []
+    entity_ids = set()
+    for rel in relationships:
+        source_id, target_id = rel["source"]["entityId"], rel["target"]["entityId"]
+        entity_ids.update((source_id, target_id))
+        edges.append(NetworkEdge(
+            source_id=source_id, target_id=target_id, relationship_type=rel["type"],
+            weight=rel["strength"], confidence=rel["confidence"], verified=rel["verified"],
+            strength=strength_from_score(rel["strength"]), direction=rel["direction"],
+        ))
+    lookup = {e["entityId"]: e for e in entities}
+    nodes = []
+    for entity_id in entity_ids:
+        entity = lookup.get(entity_id, {})
+        overall = entity.get("riskAssessment", {}).get("overall", {})
+        connection_count = sum(1 for edge in edges if edge.source_id == entity_id or edge.target_id == entity_id)
+        nodes.append(NetworkNode(
+            entity_id=entity_id, entity_name=entity["name"]["full"], entity_type=entity["entityType"],
+            risk_level=NetworkRiskLevel(overall["level"]), risk_score=overall["score"] / 100.0,
+            connection_count=connection_count, size=max(10, min(50, connection_count * 5)),
+        ))
+    for node in nodes:
+        node.color = _RISK_COLORS.get(node.risk_level.value, _RISK_COLORS["unknown"])
+        node.size = int(min(20 * (1 + node.risk_score * 2), 60))
+    payload = {
+        "nodes": [{
+            "id": n.entity_id, "label": n.entity_name, "type": n.entity_type,
+            "riskLevel": n.risk_level.value, "riskScore": n.risk_score * 100,
+            "isCenter": n.entity_id == center, "connectionCount": n.connection_count,
+            "connections": n.connection_count, "size": n.size, "entityType": n.entity_type,
+        } for n in nodes],
+        "edges": [{
+            "id": f"{e.source_id}-{e.target_id}-{e.relationship_type}-{j}", "source": e.source_id,
+            "target": e.target_id, "relationshipType": e.relationship_type, "confidence": e.confidence,
+            "weight": e.weight, "verified": e.verified, "riskWeight": relationship_risk_weight(e.relationship_type),
+            "bidirectional": e.direction == "bidirectional", "direction": e.direction,
+        } for j, e in enumerate(edges, 1)],
+    }
+    return json.dumps(payload).encode()
+
+
+def snapshot_path(center: str, relationships: list, entities: list) -> bytes:
+    snapshot = GraphSnapshot(center_entity_id=center)
+    for rel in relationships:
+        snapshot.add_edge(rel["source"]["entityId"], rel["target"]["entityId"], rel["type"],
+                          rel["strength"], rel["confidence"], rel["verified"], rel["direction"])
+    for entity in entities:
+        overall = entity["riskAssessment"]["overall"]
+        snapshot.set_node(entity["entityId"], entity["name"], entity["entityType"],
+                          overall["level"], overall["score"])
+    snapshot.finalize()
+    snapshot.apply_styling(_RISK_COLORS, {})
+    return dumps(snapshot.to_frontend())
+
+
+def _measure(fn, args, runs: int):
+    times = []
+    peak = 0
+    payload = b""
+    for _ in range(runs):
+        tracemalloc.start()
+        t0 = time.perf_counter()
+        payload = fn(*args)
+        times.append((time.perf_counter() - t0) * 1000)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return statistics.median(times), peak, len(payload)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--edge-factor", type=float, default=2.5, help="edges per node")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--skip-legacy-above", type=int, default=10000,
+                        help="skip the O(N*E) legacy path for larger networks")
+    args = parser.parse_args()
+
+    print(f"JSON encoder: {'orjson' if orjson is not None else 'stdlib json (install orjson for the fast path)'}")
+    for size in args.sizes:
+        center, relationships, entities = _synthetic_network(size, args.edge_factor)
+        print(f"\n{size} nodes / {len(relationships)} edges")
+        paths = [("snapshot", snapshot_path)]
+        if size <= args.skip_legacy_above:
+            paths.insert(0, ("legacy", legacy_path))
+        for label, fn in paths:
+            median_ms, peak, nbytes = _measure(fn, (center, relationships, entities), args.runs)
+            print(f"  {label:<9} p50 {median_ms:10.1f} ms   peak mem {peak / 2**20:7.1f} MiB   "
+                  f"payload {nbytes / 1024:8.1f} KiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -108,6 +108,44 @@ async def startup_event():
     logger.info(f"Code includes behavioral embedding support: YES")
     logger.info("=" * 80)
 
+    from dependencies import get_database
+    from services.agents.analytics import start_reconcile_job
+    from services.agents.worker_pool import get_worker_pool
+    from repositories.impl.network_cache import get_network_cache
+    from services.network.network_features import start_network_features_job
+    from services.core.name_index import start_name_index_backfill
+    from services.agents.policy_index import get_policy_index
+    from services.agents.risk_summary import get_risk_summary_maintainer
+    from services.pdf_generation_service import start_report_retention_job
+    start_reconcile_job(get_database())
+    get_worker_pool().start()
+    get_network_cache().start(get_database())
+    start_network_features_job()
+    start_name_index_backfill()
+    get_policy_index().start(get_database())
+    get_risk_summary_maintainer().start(get_database())
+    start_report_retention_job()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the investigation workers, shared change-stream cursors and background jobs"""
+    from services.agents.analytics import stop_reconcile_job
+    from services.agents.event_bus import get_event_bus
+    from services.agents.worker_pool import get_worker_pool
+    from repositories.impl.network_cache import get_network_cache
+    from services.network.network_features import stop_network_features_job
+    from services.agents.policy_index import get_policy_index
+    from services.agents.risk_summary import get_risk_summary_maintainer
+    from services.pdf_generation_service import stop_report_retention_job
+    await get_worker_pool().stop()
+    await get_event_bus().stop()
+    await get_network_cache().stop()
+    await get_policy_index().stop()
+    await get_risk_summary_maintainer().stop()
+    await stop_reconcile_job()
+    await stop_network_features_job()
+    await stop_report_retention_job()
+
 @app.get("/")
 async def root():
     """Root endpoint to check API status"""
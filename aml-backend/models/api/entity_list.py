@@ -76,6 +76,7 @@ class EntityListResponse(BaseModel):
     page: Optional[int] = None
     has_next: bool = False
     has_previous: bool = False
+    next_cursor: Optional[str] = Field(None, description="Opaque keyset token for the next page")
     
     # Additional metadata
     scenario_keys: Optional[List[str]] = None
@@ -100,7 +101,10 @@ def create_entity_list_response(
     limit: int = 20,
     offset: int = 0,
     available_filters: Optional[Dict[str, List[str]]] = None,
-    processing_time_ms: Optional[float] = None
+    processing_time_ms: Optional[float] = None,
+    next_cursor: Optional[str] = None,
+    has_next: Optional[bool] = None,
+    has_previous: Optional[bool] = None
 ) -> EntityListResponse:
     """Create EntityListResponse from database results"""
     
@@ -135,9 +139,11 @@ def create_entity_list_response(
         
         entity_items.append(EntityListItem(**entity_dict))
     
-    # Calculate pagination
-    has_next = (offset + len(entities)) < total_count
-    has_previous = offset > 0
+    # Calculate pagination (keyset pages pass has_next explicitly)
+    if has_next is None:
+        has_next = (offset + len(entities)) < total_count
+    if has_previous is None:
+        has_previous = offset > 0
     
     return EntityListResponse(
         success=True,
@@ -146,6 +152,7 @@ def create_entity_list_response(
         page=page,
         has_next=has_next,
         has_previous=has_previous,
+        next_cursor=next_cursor,
         available_filters=available_filters,
         processing_time_ms=processing_time_ms
     )
\ No newline at end of file
@@ -229,6 +229,33 @@ class BatchResolutionRequest(BaseModel):
     batch_description: Optional[str] = None
 
 
+class BatchDeduplicationRequest(BaseModel):
+    """Request to deduplicate stored entities in bulk (blocking + vectorised scoring)"""
+    
+    # Entities to resolve against each other (default: all unresolved entities)
+    entity_filter: Dict[str, Any] = Field(default_factory=dict)
+    
+    # Resume an interrupted run from its last checkpoint
+    resume_run_id: Optional[str] = None
+    
+    # Score and cluster without writing resolution updates
+    dry_run: bool = False
+    max_block_size: int = Field(200, ge=2, le=5000)
+
+
+class BulkMergeRequest(BaseModel):
+    """Request to merge one or more source entities into a master entity"""
+    
+    master_entity_id: str
+    source_entity_ids: List[str] = Field(..., min_items=1, max_items=500)
+    
+    # Recorded on the source resolutions and confirmed_same_entity relationships
+    match_confidence: float = Field(1.0, ge=0.0, le=1.0)
+    matched_attributes: List[str] = Field(default_factory=list)
+    resolved_by: str = "analyst"
+    notes: Optional[str] = None
+
+
 # ==================== NETWORK REQUEST MODELS ====================
 
 class NetworkDiscoveryRequest(BaseModel):
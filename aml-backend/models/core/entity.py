@@ -174,7 +174,7 @@ class Entity(BaseModel):
     last_reviewed: Optional[datetime] = None
     
     # Search and matching fields (populated by system)
-    phonetic_codes: Optional[Dict[str, str]] = None
+    phonetic_codes: Optional[Dict[str, Any]] = None
     
     # Embedding fields (all at the end of document)
     # Legacy fields (kept for backward compatibility, hidden in UI)
@@ -0,0 +1,296 @@
+"""
+Graph Snapshot - Compact internal representation of an entity network
+
+Network building used to create a validated NetworkNode / NetworkEdge Pydantic
+model per node and edge, walk every document to stringify ObjectIds, and then
+restyle each model in its own coroutine. For networks of thousands of nodes
+that validation and dict churn dominated the request.
+
+GraphSnapshot keeps the network column-wise instead: entity IDs are interned to
+integer indexes, numeric attributes live in typed arrays, and repeated strings
+(entity types, risk levels, relationship types, directions) are interned. It
+only becomes Pydantic models (`to_models`) or a JSON-ready dict
+(`to_frontend`) at the API boundary.
+"""
+
+import sys
+from array import array
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+from models.core.network import NetworkEdge, NetworkNode, NetworkRiskLevel, RelationshipStrength
+
+
+_RISK_LEVELS = {level.value for level in NetworkRiskLevel}
+
+# Relationship risk weights used by the network view
+_HIGH_RISK_TYPES = frozenset({
+    "confirmed_same_entity", "business_associate_suspected",
+    "potential_beneficial_owner_of", "transactional_counterparty_high_risk",
+})
+_MEDIUM_RISK_TYPES = frozenset({"director_of", "ubo_of", "parent_of_subsidiary", "potential_duplicate"})
+_LOW_RISK_TYPES = frozenset({"household_member", "professional_colleague_public", "social_media_connection_public"})
+
+
+def relationship_risk_weight(relationship_type: str) -> float:
+    """Risk weight shown on network edges for a relationship type"""
+    if relationship_type in _HIGH_RISK_TYPES:
+        return 0.9
+    if relationship_type in _MEDIUM_RISK_TYPES:
+        return 0.7
+    if relationship_type in _LOW_RISK_TYPES:
+        return 0.3
+    return 0.5
+
+
+def strength_from_score(value: Any) -> RelationshipStrength:
+    """Map a numeric relationship strength to its RelationshipStrength bucket"""
+    if not isinstance(value, (int, float)):
+        return RelationshipStrength.POSSIBLE
+    if value >= 0.8:
+        return RelationshipStrength.CONFIRMED
+    if value >= 0.6:
+        return RelationshipStrength.LIKELY
+    if value >= 0.4:
+        return RelationshipStrength.POSSIBLE
+    return RelationshipStrength.SUSPECTED
+
+
+class GraphSnapshot:
+    """Column-oriented network with interned entity IDs"""
+
+    __slots__ = (
+        "center_entity_id", "ids", "_index",
+        "names", "types", "risk_levels", "risk_scores", "sizes", "colors",
+        "edge_ids", "edge_src", "edge_dst", "edge_types", "edge_weight", "edge_confidence",
+        "edge_verified", "edge_direction", "edge_colors", "edge_widths",
+        "_degree",
+    )
+
+    def __init__(self, center_entity_id: Optional[str] = None):
+        self.center_entity_id = center_entity_id
+        # Nodes
+        self.ids: List[str] = []
+        self._index: Dict[str, int] = {}
+        self.names: List[str] = []
+        self.types: List[str] = []
+        self.risk_levels: List[str] = []
+        self.risk_scores = array("d")  # 0-1 scale
+        self.sizes = array("d")
+        self.colors: Optional[List[str]] = None
+        # Edges
+        self.edge_ids: List[str] = []  # relationship document _id (as str)
+        self.edge_src = array("i")
+        self.edge_dst = array("i")
+        self.edge_types: List[str] = []
+        self.edge_weight = array("d")
+        self.edge_confidence = array("d")
+        self.edge_verified = bytearray()
+        self.edge_direction: List[str] = []
+        self.edge_colors: Optional[List[str]] = None
+        self.edge_widths: Optional[array] = None
+        self._degree: Optional[array] = None
+
+    # ==================== BUILDING ====================
+
+    @property
+    def node_count(self) -> int:
+        return len(self.ids)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.edge_src)
+
+    def intern(self, entity_id: str) -> int:
+        """Return the index for an entity ID, adding a placeholder node if new"""
+        idx = self._index.get(entity_id)
+        if idx is None:
+            idx = len(self.ids)
+            self._index[entity_id] = idx
+            self.ids.append(entity_id)
+            self.names.append("Unknown")
+            self.types.append("unknown")
+            self.risk_levels.append("low")
+            self.risk_scores.append(0.0)
+            self.sizes.append(10.0)
+        return idx
+
+    def index_of(self, entity_id: str) -> Optional[int]:
+        return self._index.get(entity_id)
+
+    def add_edge(self, source_id: str, target_id: str, relationship_type: str,
+                 weight: float, confidence: float, verified: bool, direction: str,
+                 edge_id: str = "") -> None:
+        self.edge_ids.append(edge_id)
+        self.edge_src.append(self.intern(source_id))
+        self.edge_dst.append(self.intern(target_id))
+        self.edge_types.append(sys.intern(str(relationship_type or "unknown")))
+        self.edge_weight.append(float(weight))
+        self.edge_confidence.append(float(confidence))
+        self.edge_verified.append(1 if verified else 0)
+        self.edge_direction.append(sys.intern(str(direction or "directed")))
+        self._degree = None
+
+    def set_node(self, entity_id: str, name: Any, entity_type: Any,
+                 risk_level: Any, risk_score_raw: Any) -> None:
+        """Fill node attributes from an entity document's fields"""
+        idx = self.intern(entity_id)
+        if isinstance(name, dict):
+            name = name.get("full", name.get("display", "Unknown"))
+        self.names[idx] = str(name or "Unknown")
+        self.types[idx] = sys.intern(str(entity_type or "unknown"))
+        level = str(risk_level or "low").lower()
+        self.risk_levels[idx] = sys.intern(level if level in _RISK_LEVELS else "low")
+        try:
+            score = float(risk_score_raw or 0) / 100.0
+        except (TypeError, ValueError):
+            score = 0.0
+        self.risk_scores[idx] = min(1.0, max(0.0, score))
+
+    def finalize(self) -> "GraphSnapshot":
+        """Compute degree-based node sizes once all edges are in"""
+        degree = self.degrees()
+        for i in range(self.node_count):
+            self.sizes[i] = max(10, min(50, degree[i] * 5))
+        return self
+
+    def fork(self) -> "GraphSnapshot":
+        """
+        Copy that shares the structural columns but owns its styling columns,
+        so a cached snapshot can be restyled per request without mutating it
+        """
+        clone = GraphSnapshot.__new__(GraphSnapshot)
+        for slot in GraphSnapshot.__slots__:
+            setattr(clone, slot, getattr(self, slot))
+        clone.sizes = array("d", self.sizes)
+        clone.colors = None
+        clone.edge_colors = None
+        clone.edge_widths = None
+        return clone
+
+    # ==================== DERIVED METRICS ====================
+
+    def degrees(self) -> array:
+        """Connection count per node in one pass over the edges"""
+        if self._degree is None:
+            degree = array("i", bytes(4 * self.node_count))
+            for s in self.edge_src:
+                degree[s] += 1
+            for d in self.edge_dst:
+                degree[d] += 1
+            self._degree = degree
+        return self._degree
+
+    def counts(self) -> Dict[str, Any]:
+        """Type / risk / relationship / verification histograms"""
+        verified = sum(self.edge_verified)
+        return {
+            "node_types": dict(Counter(self.types)),
+            "risk_distribution": dict(Counter(self.risk_levels)),
+            "relationship_types": dict(Counter(self.edge_types)),
+            "verification_status": {"verified": verified, "unverified": self.edge_count - verified},
+            "bidirectional_count": sum(1 for d in self.edge_direction if d == "bidirectional"),
+        }
+
+    # ==================== STYLING ====================
+
+    def apply_styling(self, risk_colors: Dict[str, str], relationship_colors: Dict[str, str]) -> None:
+        """Colour/size nodes by risk and colour/width edges by type and confidence"""
+        # Key the lookup tables by plain strings (str-Enum members hash by name)
+        node_table = {getattr(k, "value", k): v for k, v in risk_colors.items()}
+        edge_table = {getattr(k, "value", k): v for k, v in relationship_colors.items()}
+
+        unknown_node = node_table.get("unknown")
+        self.colors = [node_table.get(level, unknown_node) for level in self.risk_levels]
+        for i, score in enumerate(self.risk_scores):
+            self.sizes[i] = min(20 * (1 + score * 2), 60)
+
+        unknown_edge = edge_table.get("unknown")
+        self.edge_colors = [edge_table.get(t, unknown_edge) for t in self.edge_types]
+        self.edge_widths = array("d", (1 + c * 4 for c in self.edge_confidence))
+
+    # ==================== API BOUNDARY ====================
+
+    def to_models(self) -> Tuple[List[NetworkNode], List[NetworkEdge]]:
+        """Materialise NetworkNode / NetworkEdge models (unvalidated; values are already clean)"""
+        degree = self.degrees()
+        colors = self.colors
+        nodes = [
+            NetworkNode.model_construct(
+                entity_id=self.ids[i],
+                entity_name=self.names[i],
+                entity_type=self.types[i],
+                risk_level=NetworkRiskLevel(self.risk_levels[i]),
+                risk_score=self.risk_scores[i],
+                centrality_score=None,
+                connection_count=degree[i],
+                size=int(self.sizes[i]),
+                color=colors[i] if colors else None,
+                attributes={"is_center": self.ids[i] == self.center_entity_id},
+            )
+            for i in range(self.node_count)
+        ]
+        edge_colors, edge_widths = self.edge_colors, self.edge_widths
+        edges = [
+            NetworkEdge.model_construct(
+                source_id=self.ids[self.edge_src[j]],
+                target_id=self.ids[self.edge_dst[j]],
+                relationship_type=self.edge_types[j],
+                strength=strength_from_score(self.edge_weight[j]),
+                confidence=self.edge_confidence[j],
+                weight=self.edge_weight[j],
+                color=edge_colors[j] if edge_colors else None,
+                thickness=int(edge_widths[j]) if edge_widths else None,
+                verified=bool(self.edge_verified[j]),
+                evidence_count=0,
+                direction=self.edge_direction[j],
+            )
+            for j in range(self.edge_count)
+        ]
+        return nodes, edges
+
+    def to_frontend(self, node_enhancements: Optional[Dict[str, Dict[str, float]]] = None) -> Dict[str, List[dict]]:
+        """Nodes and edges in the shape the network graph UI consumes"""
+        enhancements = node_enhancements or {}
+        degree = self.degrees()
+        center = self.center_entity_id
+        nodes = []
+        for i, entity_id in enumerate(self.ids):
+            extra = enhancements.get(entity_id, {})
+            risk = min(1.0, self.risk_scores[i] + extra.get("networkRiskScore", 0.0) * 0.1)
+            nodes.append({
+                "id": entity_id,
+                "label": self.names[i],
+                "type": self.types[i],
+                "riskLevel": self.risk_levels[i],
+                "riskScore": risk * 100,
+                "centrality": extra.get("centrality", 0),
+                "betweenness": extra.get("betweenness", 0),
+                "isCenter": entity_id == center,
+                "connectionCount": degree[i],
+                "connections": degree[i],
+                "size": self.sizes[i],
+                "verified": True,
+                "active": True,
+                "entityType": self.types[i],
+            })
+
+        edges = []
+        ids = self.ids
+        for j in range(self.edge_count):
+            source, target, rel_type = ids[self.edge_src[j]], ids[self.edge_dst[j]], self.edge_types[j]
+            direction = self.edge_direction[j]
+            edges.append({
+                "id": f"{source}-{target}-{rel_type}-{j + 1}",
+                "source": source,
+                "target": target,
+                "relationshipType": rel_type,
+                "confidence": self.edge_confidence[j],
+                "weight": self.edge_weight[j],
+                "verified": bool(self.edge_verified[j]),
+                "active": True,
+                "riskWeight": relationship_risk_weight(rel_type),
+                "bidirectional": direction == "bidirectional",
+                "direction": direction,
+            })
+        return {"nodes": nodes, "edges": edges}
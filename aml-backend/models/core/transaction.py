@@ -65,6 +65,7 @@ class TransactionNetworkEdge(BaseModel):
     # Latest transaction info
     latest_transaction: datetime
     primary_transaction_type: str
+    transaction_type_counts: Dict[str, int] = Field(default_factory=dict, description="Transaction count per transaction type")
 
 
 class TransactionNetwork(BaseModel):
@@ -84,6 +85,11 @@ class TransactionNetwork(BaseModel):
     
     max_depth: int
     
+    # Pruning applied to stay within node/edge caps (top-K by volume)
+    truncated: bool = Field(default=False, description="True when nodes or edges were pruned to fit the caps")
+    pruned_node_count: int = Field(default=0, description="Reachable entities dropped by the node cap")
+    pruned_edge_count: int = Field(default=0, description="Entity pairs dropped by the edge cap")
+    
     # Generation metadata
     generated_at: datetime = Field(default_factory=datetime.utcnow)
 
@@ -95,4 +101,6 @@ class TransactionActivityResponse(BaseModel):
     transactions: List[TransactionActivity]
     total_count: int
     page_size: int
-    current_page: int
\ No newline at end of file
+    current_page: int
+    has_more: bool = False
+    next_cursor: Optional[str] = Field(default=None, description="Opaque keyset token for the next page")
\ No newline at end of file
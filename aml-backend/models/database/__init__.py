@@ -5,10 +5,16 @@ from .collections import (
     RelationshipCollection,
     AuditLogCollection
 )
+from .entity_projections import (
+    ENTITY_PROJECTION_PRESETS,
+    build_entity_projection
+)
 
 __all__ = [
     "EntityCollection",
     "ResolutionHistoryCollection", 
     "RelationshipCollection",
-    "AuditLogCollection"
+    "AuditLogCollection",
+    "ENTITY_PROJECTION_PRESETS",
+    "build_entity_projection"
 ]
\ No newline at end of file
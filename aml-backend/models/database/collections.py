@@ -49,9 +49,9 @@ class EntityCollection(CollectionConfig):
         {"key": [("identifiers.ein", 1)], "name": "identifiers_ein_1", "sparse": True},
         
         # Phonetic indexes for name matching
-        {"key": [("phonetic_codes.metaphone", 1)], "name": "phonetic_metaphone_1", "sparse": True},
+        {"key": [("phonetic_codes.double_metaphone", 1)], "name": "phonetic_double_metaphone_1", "sparse": True},
         {"key": [("phonetic_codes.soundex", 1)], "name": "phonetic_soundex_1", "sparse": True},
-        {"key": [("phonetic_codes.nysiis", 1)], "name": "phonetic_nysiis_1", "sparse": True},
+        {"key": [("phonetic_codes.signature", 1)], "name": "phonetic_signature_1", "sparse": True},
         
         # Compound indexes for common queries
         {
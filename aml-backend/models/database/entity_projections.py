@@ -0,0 +1,144 @@
+"""
+Entity Projections - Named field presets for entity reads
+
+Entity documents carry three embeddings (profileEmbedding, identifierEmbedding,
+behavioralEmbedding) of ~1k floats each. Most readers (profile pages, agent
+tools, network views) never use them, so reads go through a named preset and
+only "with_vectors" ships the raw arrays. The "detail" preset reports embedding
+dimensions instead, computed server-side.
+
+Presets can be narrowed with `fields` (include-only) or trimmed with `exclude`.
+"""
+
+import re
+from typing import Dict, Any, Iterable, Optional
+
+
+EMBEDDING_FIELDS = ("profileEmbedding", "identifierEmbedding", "behavioralEmbedding")
+
+_SUMMARY = {
+    "_id": 1,
+    "entityId": 1,
+    "scenarioKey": 1,
+    "name": 1,
+    "entityType": 1,
+    "status": 1,
+    "riskAssessment.overall": 1,
+    "created_date": "$createdAt",
+    "updated_date": "$updatedAt"
+}
+
+# Field set used by the agent get_entity_profile tool
+_PROFILE = {
+    "_id": 0,
+    "entityId": 1,
+    "entityType": 1,
+    "scenarioKey": 1,
+    "status": 1,
+    "name": 1,
+    "dateOfBirth": 1,
+    "addresses": 1,
+    "identifiers": 1,
+    "contactInfo": 1,
+    "customerInfo": 1,
+    "uboInfo": 1,
+    "riskAssessment": 1,
+    "watchlistMatches": 1
+}
+
+_DETAIL = {
+    "_id": 1,
+    "entityId": 1,
+    "scenarioKey": 1,
+    "name": 1,  # Return full name object
+    "entityType": 1,
+    "status": 1,
+    "dateOfBirth": 1,
+    "addresses": 1,
+    "identifiers": 1,
+    "riskAssessment": 1,  # Return full risk assessment object
+    "watchlistMatches": 1,
+    "profileSummaryText": 1,
+    "behavioral_analytics": 1,  # Behavioral analytics for transaction simulator and UI
+    "account_info": 1,  # Account info for transaction simulator
+    "identifierText": 1,  # Identifier text representation
+    "behavioralText": 1,  # Behavioral text representation
+    "resolution": 1,
+    "customerInfo": 1,
+    # Dimensions only - the UI shows availability without downloading the vectors
+    "embeddingDimensions": {
+        "profile": {"$size": {"$ifNull": ["$profileEmbedding", []]}},
+        "identifier": {"$size": {"$ifNull": ["$identifierEmbedding", []]}},
+        "behavioral": {"$size": {"$ifNull": ["$behavioralEmbedding", []]}}
+    },
+    "created_date": "$createdAt",
+    "updated_date": "$updatedAt"
+}
+
+_WITH_VECTORS = {
+    **{k: v for k, v in _DETAIL.items() if k != "embeddingDimensions"},
+    **{field: 1 for field in EMBEDDING_FIELDS}
+}
+
+ENTITY_PROJECTION_PRESETS: Dict[str, Dict[str, Any]] = {
+    "summary": _SUMMARY,
+    "profile": _PROFILE,
+    "detail": _DETAIL,
+    "with_vectors": _WITH_VECTORS
+}
+
+DEFAULT_ENTITY_VIEW = "detail"
+
+_FIELD_PATTERN = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z0-9_]+)*$")
+
+
+def _parse_fields(fields: Optional[Iterable[str]]) -> list:
+    if fields is None:
+        return []
+    if isinstance(fields, str):
+        fields = fields.split(",")
+    parsed = [f.strip() for f in fields if f and f.strip()]
+    for field in parsed:
+        if not _FIELD_PATTERN.match(field):
+            raise ValueError(f"Invalid field name: {field!r}")
+    return parsed
+
+
+def build_entity_projection(view: str = DEFAULT_ENTITY_VIEW,
+                            fields: Optional[Iterable[str]] = None,
+                            exclude: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+    """
+    Build a $project spec for an entity read
+
+    Args:
+        view: Preset name (summary, profile, detail, with_vectors)
+        fields: Optional include-only field list (comma string or iterable); replaces the preset
+        exclude: Optional fields to drop from the preset / field list
+
+    Returns:
+        Dict: Inclusion projection usable in find() or a $project stage
+
+    Raises:
+        ValueError: Unknown preset or invalid field name
+    """
+    if view not in ENTITY_PROJECTION_PRESETS:
+        raise ValueError(
+            f"Unknown entity view '{view}'. Expected one of: {', '.join(ENTITY_PROJECTION_PRESETS)}"
+        )
+
+    preset = ENTITY_PROJECTION_PRESETS[view]
+    include = _parse_fields(fields)
+    if include:
+        projection: Dict[str, Any] = {"_id": preset.get("_id", 1), "entityId": 1}
+        projection.update({field: 1 for field in include})
+    else:
+        projection = dict(preset)
+
+    for field in _parse_fields(exclude):
+        if field == "entityId":
+            continue  # Always returned so callers can key the result
+        if field == "_id":
+            projection["_id"] = 0
+            continue
+        projection.pop(field, None)
+    return projection
@@ -10,6 +10,7 @@ import os
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any
 from bson import ObjectId
+from pymongo.errors import OperationFailure
 
 from repositories.interfaces.entity_repository import EntityRepositoryInterface
 from reference.mongodb_core_lib import (
@@ -17,6 +18,11 @@ from reference.mongodb_core_lib import (
     SearchOptions, VectorSearchOptions
 )
 from models.core.entity import Entity, validate_entity_data
+from models.database.entity_projections import DEFAULT_ENTITY_VIEW, build_entity_projection
+from utils.pagination import (
+    CountCache, InvalidCursorError, count_cache, encode_cursor, keyset_condition
+)
+from utils.name_matching import name_index_fields
 
 
 logger = logging.getLogger(__name__)
@@ -55,6 +61,7 @@ class EntityRepository(EntityRepositoryInterface):
         
         # Lazy initialization for AI features (only when needed)
         self._ai_search = None
+        self._supports_transactions: Optional[bool] = None
     
     @property
     def ai_search(self):
@@ -102,10 +109,13 @@ class EntityRepository(EntityRepositoryInterface):
             
             # Generate phonetic codes for name matching
             if "name" in validated_data:
-                validated_data["phonetic_codes"] = self._generate_phonetic_codes(validated_data["name"])
+                validated_data["phonetic_codes"] = self._generate_phonetic_codes(
+                    validated_data["name"], validated_data.get("alternate_names")
+                )
             
             # Insert entity
             result = await self.collection.insert_one(validated_data)
+            count_cache.invalidate(self.collection_name)
             
             logger.info(f"Created entity with ID: {result.inserted_id}")
             return str(result.inserted_id)
@@ -126,55 +136,37 @@ class EntityRepository(EntityRepositoryInterface):
             logger.error(f"Failed to find entity {entity_id}: {e}")
             return None
     
-    async def find_by_entity_id(self, entity_id: str) -> Optional[Dict[str, Any]]:
-        """Find entity by entityId field"""
+    async def find_by_entity_id(self, entity_id: str, view: str = DEFAULT_ENTITY_VIEW,
+                                fields: Optional[List[str]] = None,
+                                exclude: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Find entity by entityId field
+        
+        Args:
+            entity_id: Business entity identifier
+            view: Projection preset (summary, profile, detail, with_vectors)
+            fields: Optional include-only field list replacing the preset
+            exclude: Optional fields to drop from the projection
+        
+        Raises:
+            ValueError: Unknown view or invalid field name
+        """
+        # Validate the projection before the try block so callers get a 400, not a silent None
+        projection = build_entity_projection(view, fields=fields, exclude=exclude)
         try:
             # Use aggregation to find and transform the entity data to match frontend expectations
             pipeline = [
                 {"$match": {"entityId": entity_id}},
                 {"$limit": 1},
-                {"$project": {
-                    "_id": 1,
-                    "entityId": 1,
-                    "scenarioKey": 1,
-                    "name": 1,  # Return full name object
-                    "entityType": 1,
-                    "status": 1,
-                    "dateOfBirth": 1,
-                    "addresses": 1,
-                    "identifiers": 1,
-                    "riskAssessment": 1,  # Return full risk assessment object
-                    "watchlistMatches": 1,
-                    "profileSummaryText": 1,
-                    "profileEmbedding": 1,  # Legacy embedding
-                    "behavioral_analytics": 1,  # Behavioral analytics for transaction simulator and UI
-                    "account_info": 1,  # Account info for transaction simulator
-                    "identifierEmbedding": 1,  # New identifier embedding
-                    "behavioralEmbedding": 1,  # New behavioral embedding
-                    "identifierText": 1,  # Identifier text representation
-                    "behavioralText": 1,  # Behavioral text representation
-                    "resolution": 1,
-                    "customerInfo": 1,
-                    "created_date": "$createdAt",
-                    "updated_date": "$updatedAt"
-                }}
+                {"$project": projection}
             ]
             
             results = await self.repo.execute_pipeline(self.collection_name, pipeline)
 
             if results and len(results) > 0:
                 result = results[0]
-                result["_id"] = str(result["_id"])
-
-                # Debug logging for behavioral/identifier embeddings
-                has_behavioral = "behavioralEmbedding" in result and result["behavioralEmbedding"] is not None
-                has_identifier = "identifierEmbedding" in result and result["identifierEmbedding"] is not None
-                logger.info(f"Entity {entity_id} - behavioralEmbedding present: {has_behavioral}, identifierEmbedding present: {has_identifier}")
-                if has_behavioral:
-                    logger.debug(f"Entity {entity_id} - behavioralEmbedding length: {len(result['behavioralEmbedding']) if isinstance(result['behavioralEmbedding'], list) else 'not a list'}")
-                if has_identifier:
-                    logger.debug(f"Entity {entity_id} - identifierEmbedding length: {len(result['identifierEmbedding']) if isinstance(result['identifierEmbedding'], list) else 'not a list'}")
-
+                if "_id" in result:
+                    result["_id"] = str(result["_id"])
                 return result
 
             return None
@@ -215,6 +207,19 @@ class EntityRepository(EntityRepositoryInterface):
             # Add update metadata
             update_data["updated_date"] = datetime.utcnow()
             
+            # Keep the indexed name codes in step with the name and aliases,
+            # taking whichever of the two the update omits from the stored entity
+            if "name" in update_data or "alternate_names" in update_data:
+                stored = {}
+                if "name" not in update_data or "alternate_names" not in update_data:
+                    stored = await self.collection.find_one(
+                        {"_id": ObjectId(entity_id)}, {"name": 1, "alternate_names": 1}
+                    ) or {}
+                update_data["phonetic_codes"] = self._generate_phonetic_codes(
+                    update_data.get("name", stored.get("name")),
+                    update_data.get("alternate_names", stored.get("alternate_names"))
+                )
+            
             # Increment version for optimistic locking
             update_operation = {
                 "$set": update_data,
@@ -261,12 +266,13 @@ class EntityRepository(EntityRepositoryInterface):
             return False
     
     async def get_entities_paginated(self, skip: int = 0, limit: int = 20, 
-                                   filters: Optional[Dict[str, Any]] = None) -> tuple[List[Dict[str, Any]], int]:
+                                   filters: Optional[Dict[str, Any]] = None,
+                                   cursor: Optional[str] = None) -> tuple[List[Dict[str, Any]], int]:
         """Get paginated list of entities with optional filtering"""
         try:
             # Use existing find_by_criteria method
             filters = filters or {}
-            result = await self.find_by_criteria(filters, limit=limit, offset=skip)
+            result = await self.find_by_criteria(filters, limit=limit, offset=skip, cursor=cursor)
             
             # Return as tuple format expected by routes
             return result["entities"], result["total_count"]
@@ -320,8 +326,18 @@ class EntityRepository(EntityRepositoryInterface):
     # ==================== SEARCH AND DISCOVERY ====================
     
     async def find_by_criteria(self, criteria: Dict[str, Any], 
-                             limit: int = 20, offset: int = 0) -> Dict[str, Any]:
-        """Find entities using optimized aggregation pipeline"""
+                             limit: int = 20, offset: int = 0,
+                             cursor: Optional[str] = None,
+                             count_mode: str = "cached") -> Dict[str, Any]:
+        """
+        Find entities using optimized aggregation pipeline
+        
+        Pages with either offset (skip/limit) or an opaque keyset cursor on
+        (createdAt, _id). Every response carries next_cursor so clients can
+        switch to keyset paging after the first page. Totals come from the
+        shared count cache unless count_mode is "exact" (or "estimated" for
+        unfiltered listings, which uses the collection metadata count).
+        """
         try:
             # Build efficient aggregation pipeline
             builder = self.aggregation()
@@ -331,18 +347,20 @@ class EntityRepository(EntityRepositoryInterface):
             if match_conditions:
                 builder.match(match_conditions)
             
-            # Get total count for pagination
-            count_pipeline = builder.build() + [{"$count": "total"}]
-            count_result = await self.repo.execute_pipeline(self.collection_name, count_pipeline)
-            total_count = count_result[0]["total"] if count_result else 0
+            total_count = await self._count_entities(match_conditions, count_mode)
+            
+            # Keyset pagination resumes after the cursor instead of skipping
+            if cursor:
+                builder.match(keyset_condition("createdAt", cursor))
             
             # Get paginated results with proper field mapping based on actual database schema
             # Note: MongoDB projection only includes fields that exist in documents
             # So we filter for entities with behavioral_analytics above
+            builder.sort({"createdAt": -1, "_id": -1})  # _id tiebreak keeps pages stable
+            if not cursor and offset:
+                builder.skip(offset)
             results_pipeline = (builder
-                              .sort({"createdAt": -1})  # Use actual field name
-                              .skip(offset)
-                              .limit(limit)
+                              .limit(limit + 1)  # One extra row tells us whether another page exists
                               .project({
                                   "_id": 1,
                                   "entityId": 1,
@@ -370,16 +388,19 @@ class EntityRepository(EntityRepositoryInterface):
             
             logger.debug(f"Executing pipeline with projection including behavioral_analytics")
             entities = await self.repo.execute_pipeline(self.collection_name, results_pipeline)
+            has_more = len(entities) > limit
+            entities = entities[:limit]
 
             # Log sample entity to verify projection
             if entities and len(entities) > 0:
                 sample_keys = list(entities[0].keys())
                 logger.debug(f"Sample entity keys after projection: {sample_keys}")
                 logger.debug(f"Has behavioral_analytics: {'behavioral_analytics' in entities[0]}")
-                # Additional logging for embedding fields
-                has_behavioral_emb = "behavioralEmbedding" in entities[0] and entities[0]["behavioralEmbedding"] is not None
-                has_identifier_emb = "identifierEmbedding" in entities[0] and entities[0]["identifierEmbedding"] is not None
-                logger.info(f"Pagination query - Sample entity has behavioralEmbedding: {has_behavioral_emb}, identifierEmbedding: {has_identifier_emb}")
+            
+            next_cursor = None
+            if has_more and entities:
+                last = entities[-1]
+                next_cursor = encode_cursor(last.get("created_date"), last["_id"])
             
             # Convert ObjectIds to strings
             for entity in entities:
@@ -388,14 +409,30 @@ class EntityRepository(EntityRepositoryInterface):
             return {
                 "entities": entities,
                 "total_count": total_count,
-                "has_more": offset + len(entities) < total_count,
+                "has_more": has_more,
+                "next_cursor": next_cursor,
                 "limit": limit,
                 "offset": offset
             }
             
+        except InvalidCursorError:
+            raise
         except Exception as e:
             logger.error(f"Failed to find entities by criteria: {e}")
-            return {"entities": [], "total_count": 0, "has_more": False, "limit": limit, "offset": offset}
+            return {"entities": [], "total_count": 0, "has_more": False, "next_cursor": None, "limit": limit, "offset": offset}
+    
+    async def _count_entities(self, match_conditions: Dict[str, Any], count_mode: str) -> int:
+        """Pagination total honoring count_mode (exact, cached, estimated)"""
+        async def exact_count() -> int:
+            return await self.collection.count_documents(match_conditions)
+        
+        if count_mode == "exact":
+            return await exact_count()
+        if count_mode == "estimated" and not match_conditions:
+            return await self.collection.estimated_document_count()
+        return await count_cache.get_or_compute(
+            CountCache.make_key(self.collection_name, match_conditions), exact_count
+        )
     
     async def find_by_identifiers(self, identifiers: Dict[str, str]) -> List[Dict[str, Any]]:
         """Find entities by unique identifiers using optimized query"""
@@ -431,25 +468,47 @@ class EntityRepository(EntityRepositoryInterface):
             logger.error(f"Failed to find entities by identifiers: {e}")
             return []
     
-    async def find_by_phonetic_codes(self, phonetic_codes: Dict[str, str]) -> List[Dict[str, Any]]:
-        """Find entities by phonetic name codes"""
+    async def find_by_phonetic_codes(self, phonetic_codes: Dict[str, Any],
+                                     entity_type: Optional[str] = None,
+                                     limit: Optional[int] = 50,
+                                     exclude_ids: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Find entities sharing any indexed phonetic name code (blocking step)
+        
+        Args:
+            phonetic_codes: Algorithm -> code or list of codes, e.g. the
+                            `double_metaphone` / `signature` fields of name_index_fields()
+            entity_type: Optional entity type restriction
+            limit: Maximum candidates returned (None for no cap)
+            exclude_ids: Entity `_id`s already fetched by an earlier blocking query
+        """
         try:
             # Build OR conditions for phonetic matching
             or_conditions = []
-            for algorithm, code in phonetic_codes.items():
-                or_conditions.append({f"phonetic_codes.{algorithm}": code})
+            for algorithm, codes in phonetic_codes.items():
+                codes = [codes] if isinstance(codes, str) else list(codes or [])
+                if codes:
+                    or_conditions.append({f"phonetic_codes.{algorithm}": {"$in": codes}})
             
             if not or_conditions:
                 return []
             
-            pipeline = (self.aggregation()
-                       .match({"$or": or_conditions})
+            match: Dict[str, Any] = {"$or": or_conditions}
+            if entity_type:
+                match["entityType"] = entity_type
+            if exclude_ids:
+                match["_id"] = {"$nin": [ObjectId(i) if ObjectId.is_valid(i) else i for i in exclude_ids]}
+            
+            builder = (self.aggregation()
+                       .match(match)
                        .project({
-                           "_id": 1, "name": 1, "alternate_names": 1, "entity_type": 1,
-                           "phonetic_codes": 1, "created_date": 1
-                       })
-                       .limit(50)  # Limit phonetic matches
-                       .build())
+                           "_id": 1, "entityId": 1, "name": 1, "alternate_names": 1,
+                           "entityType": 1, "entity_type": 1, "status": 1,
+                           "riskAssessment.overall": 1, "phonetic_codes": 1
+                       }))
+            if limit is not None:
+                builder = builder.limit(limit)
+            pipeline = builder.build()
             
             results = await self.repo.execute_pipeline(self.collection_name, pipeline)
             
@@ -554,6 +613,77 @@ class EntityRepository(EntityRepositoryInterface):
             logger.error(f"Failed to get linked entities for {entity_id}: {e}")
             return []
     
+    # ==================== MERGE OPERATIONS ====================
+    
+    async def find_for_merge(self, entity_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Load full entity documents for a merge in one query, keyed by entityId"""
+        cursor = self.collection.find({"entityId": {"$in": list(entity_ids)}}, {"profileEmbedding": 0,
+                                      "identifierEmbedding": 0, "behavioralEmbedding": 0})
+        return {doc["entityId"]: doc async for doc in cursor}
+    
+    async def supports_transactions(self) -> bool:
+        """True when connected to a replica set or sharded cluster (cached per repository)"""
+        if self._supports_transactions is None:
+            try:
+                hello = await self.repo.db.command("hello")
+                self._supports_transactions = bool(hello.get("setName") or hello.get("msg") == "isdbgrid")
+            except Exception as e:
+                logger.warning(f"Could not determine transaction support: {e}")
+                self._supports_transactions = False
+        return self._supports_transactions
+    
+    async def apply_merge(self, entity_operations: List[Any],
+                          repoint_filter: Optional[Dict[str, Any]],
+                          repoint_update: Optional[Dict[str, Any]],
+                          relationship_documents: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Apply a planned merge as one unit of work
+        
+        Runs the master/source `bulk_write`, the linked-entity `update_many`
+        repoint and the relationship `insert_many` inside a multi-document
+        transaction when the deployment supports it (retried on transient
+        errors by `with_transaction`); on a standalone server the same three
+        writes run in order without one.
+        
+        Args:
+            entity_operations: pymongo UpdateOne operations for master and sources
+            repoint_filter: Filter selecting linked entities to move to the master
+            repoint_update: Update applied to them
+            relationship_documents: Merge relationship documents to insert
+        """
+        relationships = self.repo.collection(os.getenv("RELATIONSHIPS_COLLECTION", "relationships"))
+        
+        async def write(session=None) -> Dict[str, Any]:
+            outcome = {"entities_modified": 0, "linked_repointed": 0, "relationship_ids": []}
+            if entity_operations:
+                result = await self.collection.bulk_write(entity_operations, ordered=True, session=session)
+                outcome["entities_modified"] = result.modified_count
+            if repoint_filter:
+                result = await self.collection.update_many(repoint_filter, repoint_update, session=session)
+                outcome["linked_repointed"] = result.modified_count
+            if relationship_documents:
+                result = await relationships.insert_many(relationship_documents, ordered=True, session=session)
+                outcome["relationship_ids"] = [str(oid) for oid in result.inserted_ids]
+            return outcome
+        
+        transactional = await self.supports_transactions()
+        try:
+            if transactional:
+                async with await self.repo.client.start_session() as session:
+                    outcome = await session.with_transaction(write)
+            else:
+                outcome = await write()
+        except OperationFailure as e:
+            # IllegalOperation: transactions need a replica set member or mongos
+            if not transactional or e.code != 20:
+                raise RepositoryError(f"Merge failed: {e}")
+            logger.warning("Transactions unavailable on this deployment; applying merge without one")
+            self._supports_transactions = transactional = False
+            outcome = await write()
+        
+        count_cache.invalidate(self.collection_name)
+        return {**outcome, "transactional": transactional}
+    
     # ==================== EMBEDDING AND AI OPERATIONS ====================
     
     async def update_embedding(self, entity_id: str, embedding: List[float]) -> bool:
@@ -671,11 +801,9 @@ class EntityRepository(EntityRepositoryInterface):
                 matched[id_type] = search_value
         return matched
     
-    def _generate_phonetic_codes(self, name: str) -> Dict[str, str]:
-        """Generate phonetic codes for name matching"""
-        # This would use jellyfish or similar library
-        # For now, return empty dict
-        return {}
+    def _generate_phonetic_codes(self, name: Any, alternate_names: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Generate the indexed phonetic codes / token signature for name matching"""
+        return name_index_fields(name, alternate_names)
     
     # ==================== ADDITIONAL INTERFACE METHODS ====================
     # (Implementing remaining interface methods for completeness)
@@ -840,12 +968,16 @@ class EntityRepository(EntityRepositoryInterface):
                     "created_date": datetime.utcnow(),
                     "updated_date": datetime.utcnow(),
                     "version": 1,
-                    "status": validated_data.get("status", "active")
+                    "status": validated_data.get("status", "active"),
+                    "phonetic_codes": self._generate_phonetic_codes(
+                        validated_data["name"], validated_data.get("alternate_names")
+                    )
                 })
                 prepared_entities.append(validated_data)
             
             # Bulk insert
             result = await self.collection.insert_many(prepared_entities)
+            count_cache.invalidate(self.collection_name)
             return [str(oid) for oid in result.inserted_ids]
             
         except Exception as e:
@@ -0,0 +1,336 @@
+"""
+Network View Cache - Shared results for repeated entity network builds
+
+Analysts flip between the network, visualization, centrality, communities and
+statistics tabs for the same entity, and each tab used to re-run the same
+$graphLookup build. NetworkViewCache keeps built NetworkDataResponse objects
+keyed by (center entity, depth, filters and limits):
+
+- single-flight: concurrent identical builds share one in-flight task
+- precise invalidation: change streams on the relationships and entities
+  collections drop only the cached networks whose member entities or
+  relationship IDs were touched; a build that races an invalidation for one
+  of its members is returned but not cached
+- bounded LRU with a TTL safety net for deployments without change streams
+
+Callers always receive a copy (own statistics dict and styling columns), so
+per-request styling never leaks into the cached entry.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict, deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterable, Optional, Set, Tuple
+
+from pymongo.errors import OperationFailure
+
+from repositories.interfaces.network_repository import NetworkDataResponse, NetworkQueryParams
+
+
+logger = logging.getLogger(__name__)
+
+
+def _safe_int(env_key: str, default: int) -> int:
+    try:
+        return int(os.getenv(env_key, str(default)))
+    except (ValueError, TypeError):
+        return default
+
+
+CACHE_MAX_ENTRIES = _safe_int("NETWORK_CACHE_MAX_ENTRIES", 256)
+CACHE_TTL_SECONDS = _safe_int("NETWORK_CACHE_TTL_SECONDS", 600)
+_RECENT_INVALIDATIONS = 1024
+_MAX_BACKOFF_SECONDS = 30
+_CHANGE_STREAMS_UNSUPPORTED = 40573  # standalone server (no replica set)
+
+CacheKey = Tuple[Any, ...]
+
+
+def cache_key(params: NetworkQueryParams) -> CacheKey:
+    """Normalised key for a network query (filter lists are order-insensitive)"""
+    def _sorted(values: Optional[Iterable[Any]]) -> Optional[Tuple[str, ...]]:
+        if not values:
+            return None
+        return tuple(sorted(str(getattr(v, "value", v)) for v in values))
+
+    return (
+        params.center_entity_id,
+        params.max_depth,
+        _sorted(params.relationship_types),
+        round(float(params.min_confidence or 0), 4),
+        bool(params.only_verified),
+        bool(params.only_active),
+        _sorted(params.include_entity_types),
+        _sorted(params.exclude_entity_types),
+        params.max_entities,
+        params.max_relationships,
+    )
+
+
+class _Entry:
+    __slots__ = ("response", "members", "relationship_ids", "built_at")
+
+    def __init__(self, response: NetworkDataResponse, members: Set[str], relationship_ids: Set[str]):
+        self.response = response
+        self.members = members
+        self.relationship_ids = relationship_ids
+        self.built_at = time.monotonic()
+
+
+class NetworkViewCache:
+    """LRU cache of built entity networks with change-stream invalidation"""
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, ttl_seconds: int = CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[CacheKey, _Entry]" = OrderedDict()
+        self._by_entity: Dict[str, Set[CacheKey]] = {}
+        self._by_relationship: Dict[str, Set[CacheKey]] = {}
+        self._inflight: Dict[CacheKey, asyncio.Task] = {}
+        # (epoch, entity ids, relationship ids, flush_all) of recent invalidations
+        self._epoch = 0
+        self._recent: Deque[Tuple[int, Set[str], Set[str], bool]] = deque(maxlen=_RECENT_INVALIDATIONS)
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._resume_tokens: Dict[str, Any] = {}
+        self.stats = {
+            "hits": 0, "misses": 0, "coalesced": 0, "builds": 0, "build_ms_total": 0.0,
+            "build_ms_max": 0.0, "not_cached_raced": 0, "invalidations": 0,
+            "entries_invalidated": 0, "evictions": 0, "expired": 0, "stream_restarts": 0,
+        }
+
+    # ==================== LOOKUP ====================
+
+    async def get_or_build(self, params: NetworkQueryParams,
+                           builder: Callable[[NetworkQueryParams], Awaitable[NetworkDataResponse]]) -> NetworkDataResponse:
+        key = cache_key(params)
+        entry = self._entries.get(key)
+        if entry is not None:
+            if time.monotonic() - entry.built_at <= self.ttl_seconds:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return entry.response.copy()
+            self.stats["expired"] += 1
+            self._drop(key)
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.stats["coalesced"] += 1
+        else:
+            self.stats["misses"] += 1
+            task = asyncio.ensure_future(self._build(key, params, builder))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _t, k=key: self._inflight.pop(k, None))
+        # shield: a cancelled caller must not cancel the build other callers share
+        response = await asyncio.shield(task)
+        return response.copy()
+
+    async def _build(self, key: CacheKey, params: NetworkQueryParams,
+                     builder: Callable[[NetworkQueryParams], Awaitable[NetworkDataResponse]]) -> NetworkDataResponse:
+        start_epoch = self._epoch
+        t0 = time.perf_counter()
+        response = await builder(params)
+        elapsed_ms = (time.perf_counter() - t0) * 1000
+        self.stats["builds"] += 1
+        self.stats["build_ms_total"] += elapsed_ms
+        self.stats["build_ms_max"] = max(self.stats["build_ms_max"], elapsed_ms)
+
+        # Failed builds come back with empty statistics; never cache them
+        if not response.statistics or response.snapshot is None:
+            return response
+
+        snapshot = response.snapshot
+        members = set(snapshot.ids) | {params.center_entity_id}
+        relationship_ids = {rid for rid in snapshot.edge_ids if rid}
+        if self._invalidated_since(start_epoch, members, relationship_ids):
+            self.stats["not_cached_raced"] += 1
+            return response
+
+        self._store(key, _Entry(response, members, relationship_ids))
+        return response
+
+    def _invalidated_since(self, epoch: int, members: Set[str], relationship_ids: Set[str]) -> bool:
+        if epoch == self._epoch:
+            return False
+        if not self._recent or self._recent[0][0] > epoch + 1:
+            return True  # history no longer covers the build window
+        for event_epoch, entity_ids, rel_ids, flush_all in self._recent:
+            if event_epoch <= epoch:
+                continue
+            if flush_all or not members.isdisjoint(entity_ids) or not relationship_ids.isdisjoint(rel_ids):
+                return True
+        return False
+
+    def _store(self, key: CacheKey, entry: _Entry) -> None:
+        self._drop(key)
+        self._entries[key] = entry
+        for entity_id in entry.members:
+            self._by_entity.setdefault(entity_id, set()).add(key)
+        for rel_id in entry.relationship_ids:
+            self._by_relationship.setdefault(rel_id, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            oldest = next(iter(self._entries))
+            self._drop(oldest)
+            self.stats["evictions"] += 1
+
+    def _drop(self, key: CacheKey) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for index, ids in ((self._by_entity, entry.members), (self._by_relationship, entry.relationship_ids)):
+            for item in ids:
+                keys = index.get(item)
+                if keys is not None:
+                    keys.discard(key)
+                    if not keys:
+                        del index[item]
+
+    # ==================== INVALIDATION ====================
+
+    def invalidate(self, entity_ids: Iterable[str] = (), relationship_ids: Iterable[str] = ()) -> int:
+        """Drop cached networks containing any of the given entities or relationships"""
+        entity_ids = {e for e in entity_ids if e}
+        relationship_ids = {r for r in relationship_ids if r}
+        if not entity_ids and not relationship_ids:
+            return 0
+        self._epoch += 1
+        self._recent.append((self._epoch, entity_ids, relationship_ids, False))
+        keys: Set[CacheKey] = set()
+        for entity_id in entity_ids:
+            keys |= self._by_entity.get(entity_id, set())
+        for rel_id in relationship_ids:
+            keys |= self._by_relationship.get(rel_id, set())
+        for key in keys:
+            self._drop(key)
+        self.stats["invalidations"] += 1
+        self.stats["entries_invalidated"] += len(keys)
+        return len(keys)
+
+    def clear(self) -> int:
+        """Drop every cached network"""
+        dropped = len(self._entries)
+        self._epoch += 1
+        self._recent.append((self._epoch, set(), set(), True))
+        self._entries.clear()
+        self._by_entity.clear()
+        self._by_relationship.clear()
+        self.stats["invalidations"] += 1
+        self.stats["entries_invalidated"] += dropped
+        return dropped
+
+    def start(self, db, relationship_collection: Optional[str] = None,
+              entity_collection: Optional[str] = None) -> None:
+        """Watch the relationships and entities collections for invalidations"""
+        if self._tasks:
+            return
+        relationship_collection = relationship_collection or os.getenv("RELATIONSHIPS_COLLECTION", "relationships")
+        entity_collection = entity_collection or os.getenv("ENTITIES_COLLECTION", "entities")
+        self._tasks[relationship_collection] = asyncio.create_task(
+            self._watch(db[relationship_collection], self._on_relationship_change))
+        self._tasks[entity_collection] = asyncio.create_task(
+            self._watch(db[entity_collection], self._on_entity_change))
+        logger.info("Network view cache watching %s and %s", relationship_collection, entity_collection)
+
+    async def stop(self) -> None:
+        for task in self._tasks.values():
+            task.cancel()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+        self._tasks.clear()
+
+    async def _watch(self, collection, handler: Callable[[dict], None]) -> None:
+        pipeline = [{"$project": {
+            "operationType": 1,
+            "documentKey": 1,
+            "fullDocument.entityId": 1,
+            "fullDocument.source.entityId": 1,
+            "fullDocument.target.entityId": 1,
+            "fullDocumentBeforeChange.entityId": 1,
+        }}]
+        backoff = 1
+        while True:
+            try:
+                async with collection.watch(
+                    pipeline=pipeline,
+                    full_document="updateLookup",
+                    full_document_before_change="whenAvailable",
+                    resume_after=self._resume_tokens.get(collection.name),
+                ) as stream:
+                    backoff = 1
+                    async for change in stream:
+                        self._resume_tokens[collection.name] = stream.resume_token
+                        handler(change)
+            except asyncio.CancelledError:
+                raise
+            except OperationFailure as exc:
+                if exc.code == _CHANGE_STREAMS_UNSUPPORTED:
+                    logger.warning("Change streams unavailable on %s; network cache relies on its %ss TTL",
+                                   collection.name, self.ttl_seconds)
+                    return
+                await self._restart_after(collection.name, exc, backoff)
+                backoff = min(backoff * 2, _MAX_BACKOFF_SECONDS)
+            except Exception as exc:
+                await self._restart_after(collection.name, exc, backoff)
+                backoff = min(backoff * 2, _MAX_BACKOFF_SECONDS)
+
+    async def _restart_after(self, collection_name: str, exc: Exception, backoff: int) -> None:
+        self.stats["stream_restarts"] += 1
+        # Events may have been missed while the cursor was down
+        self.clear()
+        logger.warning("Network cache change stream on %s interrupted (%s); resuming in %ss",
+                       collection_name, exc, backoff)
+        await asyncio.sleep(backoff)
+
+    def _on_relationship_change(self, change: dict) -> None:
+        if change.get("operationType") in ("drop", "rename", "dropDatabase", "invalidate"):
+            self.clear()
+            return
+        doc = change.get("fullDocument") or {}
+        rel_id = (change.get("documentKey") or {}).get("_id")
+        entity_ids = [
+            (doc.get("source") or {}).get("entityId"),
+            (doc.get("target") or {}).get("entityId"),
+        ]
+        self.invalidate(entity_ids=entity_ids, relationship_ids=[str(rel_id)] if rel_id is not None else [])
+
+    def _on_entity_change(self, change: dict) -> None:
+        if change.get("operationType") in ("drop", "rename", "dropDatabase", "invalidate"):
+            self.clear()
+            return
+        doc = change.get("fullDocument") or change.get("fullDocumentBeforeChange") or {}
+        entity_id = doc.get("entityId")
+        if entity_id:
+            self.invalidate(entity_ids=[entity_id])
+        elif self._entries:
+            # Deleted without a pre-image: we cannot tell which networks it belonged to
+            self.clear()
+
+    # ==================== METRICS ====================
+
+    def metrics(self) -> Dict[str, Any]:
+        lookups = self.stats["hits"] + self.stats["misses"] + self.stats["coalesced"]
+        builds = self.stats["builds"]
+        return {
+            **self.stats,
+            "build_ms_total": round(self.stats["build_ms_total"], 1),
+            "build_ms_max": round(self.stats["build_ms_max"], 1),
+            "build_ms_avg": round(self.stats["build_ms_total"] / builds, 1) if builds else None,
+            "hit_rate": round((self.stats["hits"] + self.stats["coalesced"]) / lookups, 4) if lookups else None,
+            "entries": len(self._entries),
+            "inflight": len(self._inflight),
+            "indexed_entities": len(self._by_entity),
+            "watching": sorted(name for name, task in self._tasks.items() if not task.done()),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+        }
+
+
+_cache: Optional[NetworkViewCache] = None
+
+
+def get_network_cache() -> NetworkViewCache:
+    """Process-wide network view cache singleton"""
+    global _cache
+    if _cache is None:
+        _cache = NetworkViewCache()
+    return _cache
@@ -10,7 +10,6 @@ import math
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any, Set, Tuple
 from collections import deque
-from bson import ObjectId
 
 from repositories.interfaces.network_repository import (
     NetworkRepositoryInterface, NetworkQueryParams, NetworkDataResponse, 
@@ -21,10 +20,29 @@ from models.core.network import (
     EntityNetwork, NetworkNode, NetworkEdge, 
     RelationshipType, NetworkRiskLevel
 )
+from models.core.network_snapshot import GraphSnapshot
+from repositories.impl.network_cache import get_network_cache
 
 
 logger = logging.getLogger(__name__)
 
+# Entity fields needed to render a network node (skips embeddings and profile data)
+_NODE_PROJECTION = {
+    "_id": 0,
+    "entityId": 1,
+    "name": 1,
+    "entityType": 1,
+    "riskAssessment.overall.level": 1,
+    "riskAssessment.overall.score": 1,
+}
+
+_NODE_COLORS = {
+    "low": "#4CAF50",       # Green
+    "medium": "#FF9800",    # Orange
+    "high": "#F44336",      # Red
+    "critical": "#9C27B0",  # Purple
+}
+
 
 class NetworkRepository(NetworkRepositoryInterface):
     """
@@ -57,100 +75,43 @@ class NetworkRepository(NetworkRepositoryInterface):
     # ==================== CORE NETWORK OPERATIONS ====================
     
     async def build_entity_network(self, params: NetworkQueryParams) -> NetworkDataResponse:
-        """Build entity network around a center entity"""
+        """Build entity network around a center entity (served from the network view cache)"""
+        return await get_network_cache().get_or_build(params, self._build_entity_network)
+    
+    async def _build_entity_network(self, params: NetworkQueryParams) -> NetworkDataResponse:
+        """Build entity network around a center entity from MongoDB"""
         start_time = datetime.utcnow()
         
         try:
             # Get network relationships using native MongoDB $graphLookup
             network_data = await self._build_network_graph(params)
             
-            # Convert to NetworkNode and NetworkEdge objects
-            nodes = []
-            edges = []
-            entity_ids = set()
-            
-            # Process relationships to build network
+            # Build the compact graph snapshot (models are only created at the API boundary)
+            snapshot = GraphSnapshot(center_entity_id=params.center_entity_id)
             for relationship in network_data["relationships"]:
-                # Use new schema field mappings
-                source_id = str(relationship["source"]["entityId"])
-                target_id = str(relationship["target"]["entityId"])
-                
-                entity_ids.add(source_id)
-                entity_ids.add(target_id)
-                
-                # Create edge with new schema fields and correct field mappings
-                from models.core.network import RelationshipStrength
-                
-                # Map strength value to enum
-                strength_value = relationship.get("strength", 0.5)
-                if isinstance(strength_value, (int, float)):
-                    if strength_value >= 0.8:
-                        strength_enum = RelationshipStrength.CONFIRMED
-                    elif strength_value >= 0.6:
-                        strength_enum = RelationshipStrength.LIKELY
-                    elif strength_value >= 0.4:
-                        strength_enum = RelationshipStrength.POSSIBLE
-                    else:
-                        strength_enum = RelationshipStrength.SUSPECTED
-                else:
-                    strength_enum = RelationshipStrength.POSSIBLE
-                
-                # Use original relationship type string directly for display
-                relationship_type_str = relationship.get("type", "unknown")
-                
-                edge = NetworkEdge(
-                    source_id=source_id,
-                    target_id=target_id,
-                    relationship_type=relationship_type_str,  # Store original type directly
+                snapshot.add_edge(
+                    source_id=str(relationship["source"]["entityId"]),
+                    target_id=str(relationship["target"]["entityId"]),
+                    relationship_type=relationship.get("type", "unknown"),  # Original type string for display
                     weight=relationship.get("strength", 0.5),
                     confidence=relationship.get("confidence", 0.5),
                     verified=relationship.get("verified", False),
-                    strength=strength_enum,
-                    direction=relationship.get("direction", "directed")
+                    direction=relationship.get("direction", "directed"),
+                    edge_id=str(relationship.get("_id", ""))
                 )
-                edges.append(edge)
-            
-            # Get entity details in batch
-            entities = await self._get_entities_batch(list(entity_ids))
-            entity_lookup = {entity["entityId"]: entity for entity in entities}
             
-            # Create nodes
-            for entity_id in entity_ids:
-                entity = entity_lookup.get(entity_id, {})
-                
-                # Handle entity name
-                entity_name = entity.get("name", "Unknown")
-                if isinstance(entity_name, dict):
-                    entity_name = entity_name.get("full", entity_name.get("display", "Unknown"))
-                
-                # Map risk level and score
-                risk_assessment = entity.get("riskAssessment", {}).get("overall", {})
-                risk_level_str = risk_assessment.get("level", "low")
-                risk_score_raw = risk_assessment.get("score", 0)
-                
-                try:
-                    risk_level = NetworkRiskLevel(risk_level_str.lower())
-                except ValueError:
-                    risk_level = NetworkRiskLevel.LOW
-                
-                # Convert risk score to 0-1 scale (assuming backend scores are 0-100)
-                risk_score = min(1.0, max(0.0, float(risk_score_raw) / 100.0))
-                
-                # Count connections for this entity
-                connection_count = sum(1 for edge in edges 
-                                     if edge.source_id == entity_id or edge.target_id == entity_id)
-                
-                node = NetworkNode(
-                    entity_id=entity_id,
-                    entity_name=str(entity_name),
+            # Get entity details in batch (only the fields a node needs)
+            entity_ids = list(snapshot.ids)
+            for entity in await self._get_entities_batch(entity_ids, projection=_NODE_PROJECTION):
+                risk_assessment = (entity.get("riskAssessment") or {}).get("overall") or {}
+                snapshot.set_node(
+                    entity_id=entity["entityId"],
+                    name=entity.get("name", "Unknown"),
                     entity_type=entity.get("entityType", "unknown"),
-                    risk_level=risk_level,
-                    risk_score=risk_score,  # Include actual risk score
-                    is_center=(entity_id == params.center_entity_id),
-                    connection_count=connection_count,
-                    size=max(10, min(50, connection_count * 5))  # Scale node size
+                    risk_level=risk_assessment.get("level", "low"),
+                    risk_score_raw=risk_assessment.get("score", 0)  # Backend scores are 0-100
                 )
-                nodes.append(node)
+            snapshot.finalize()
             
             # ==================== NEW: MONGODB AGGREGATION PIPELINE MIGRATION ====================
             # Phase 1: Add comprehensive statistics calculation using MongoDB $facet operations
@@ -160,7 +121,7 @@ class NetworkRepository(NetworkRepositoryInterface):
             
             # Step 1: SIMPLIFIED statistics using ACTUAL entity model fields
             stats_pipeline = [
-                {"$match": {"entityId": {"$in": list(entity_ids)}}},
+                {"$match": {"entityId": {"$in": entity_ids}}},
                 {"$addFields": {
                     # Calculate simple centrality based on connected_entities count
                     "connection_count": {"$size": {"$ifNull": ["$connected_entities", []]}},
@@ -204,6 +165,7 @@ class NetworkRepository(NetworkRepositoryInterface):
                         {"$sort": {"connection_count": -1}},
                         {"$limit": 5},
                         {"$project": {
+                            "_id": 0,
                             "entityId": 1,
                             "name": 1,
                             "connection_count": 1,
@@ -224,6 +186,7 @@ class NetworkRepository(NetworkRepositoryInterface):
                         {"$sort": {"prominence_score": -1}},
                         {"$limit": 5},
                         {"$project": {
+                            "_id": 0,
                             "entityId": 1,
                             "name": 1,
                             "prominence_score": 1,
@@ -237,69 +200,41 @@ class NetworkRepository(NetworkRepositoryInterface):
             # Execute statistics pipeline on entities
             stats_results = await self.repo.execute_pipeline("entities", stats_pipeline)
             
-            # Step 2: Calculate relationship distribution during edge processing
-            relationship_ids = [str(rel.get("_id", "")) for rel in network_data["relationships"]]
-            if relationship_ids:
-                # Convert string IDs back to ObjectIds for MongoDB query
-                valid_object_ids = []
-                for rel_id in relationship_ids:
-                    if rel_id:
-                        try:
-                            valid_object_ids.append(ObjectId(rel_id))
-                        except Exception:
-                            logger.warning(f"Invalid ObjectId: {rel_id}")
-                
-                if valid_object_ids:
-                    relationship_dist_pipeline = [
-                        {"$match": {"_id": {"$in": valid_object_ids}}},
-                        {"$group": {
-                            "_id": "$type",
-                            "count": {"$sum": 1},
-                            "avg_confidence": {"$avg": "$confidence"},
-                            "verified_count": {"$sum": {"$cond": ["$verified", 1, 0]}},
-                            "bidirectional_count": {"$sum": {"$cond": [{"$eq": ["$direction", "bidirectional"]}, 1, 0]}}
-                        }},
-                        {"$sort": {"count": -1}}
-                    ]
-                    
-                    rel_dist_results = await self.repo.execute_pipeline("relationships", relationship_dist_pipeline)
-                else:
-                    rel_dist_results = []
-            else:
-                rel_dist_results = []
+            # Step 2: Relationship distribution straight from the snapshot's edge columns
+            rel_dist = {}
+            for j, rel_type in enumerate(snapshot.edge_types):
+                bucket = rel_dist.setdefault(rel_type, [0, 0.0, 0, 0])
+                bucket[0] += 1
+                bucket[1] += snapshot.edge_confidence[j]
+                bucket[2] += snapshot.edge_verified[j]
+                bucket[3] += snapshot.edge_direction[j] == "bidirectional"
+            rel_dist_results = sorted(
+                ({"_id": rel_type, "count": count, "avg_confidence": conf_sum / count,
+                  "verified_count": verified, "bidirectional_count": bidirectional}
+                 for rel_type, (count, conf_sum, verified, bidirectional) in rel_dist.items()),
+                key=lambda item: item["count"], reverse=True
+            )
 
             # Calculate network density
-            total_nodes = len(nodes)
-            total_edges = len(edges)
+            total_nodes = snapshot.node_count
+            total_edges = snapshot.edge_count
             network_density = 0
             if total_nodes > 1:
                 max_possible_edges = (total_nodes * (total_nodes - 1)) / 2
                 network_density = total_edges / max_possible_edges if max_possible_edges > 0 else 0
 
             # Calculate additional metrics
-            bidirectional_count = sum(1 for edge in edges if getattr(edge, 'direction', 'directed') == 'bidirectional')
+            bidirectional_count = sum(1 for direction in snapshot.edge_direction if direction == 'bidirectional')
             bidirectional_ratio = bidirectional_count / total_edges if total_edges > 0 else 0
-            connection_counts = [node.connection_count for node in nodes]
+            connection_counts = snapshot.degrees()
             max_connections = max(connection_counts) if connection_counts else 0
             avg_connections = sum(connection_counts) / len(connection_counts) if connection_counts else 0
 
-            # Helper function to clean ObjectIds from data structures
-            def clean_objectids(obj):
-                """Recursively convert ObjectIds to strings in data structures"""
-                if isinstance(obj, ObjectId):
-                    return str(obj)
-                elif isinstance(obj, dict):
-                    return {key: clean_objectids(value) for key, value in obj.items()}
-                elif isinstance(obj, list):
-                    return [clean_objectids(item) for item in obj]
-                else:
-                    return obj
-
             # Build comprehensive statistics response
             statistics = {}
             
             if stats_results and len(stats_results) > 0:
-                stats_data = clean_objectids(stats_results[0])  # Clean ObjectIds
+                stats_data = stats_results[0]  # Facets project out _id, so no ObjectIds remain
                 
                 # Basic metrics using SIMPLIFIED approach
                 basic_stats = stats_data.get("basic_stats", [{}])[0] if stats_data.get("basic_stats") else {}
@@ -335,7 +270,7 @@ class NetworkRepository(NetworkRepositoryInterface):
                 statistics["bridge_entities"] = []  # Simplified: use hub entities for bridges too
                 statistics["prominent_entities"] = stats_data.get("prominent_entities", [])
                 
-                # Relationship distribution (clean ObjectIds)
+                # Relationship distribution
                 statistics["relationship_distribution"] = [
                     {
                         "type": item["_id"],
@@ -344,7 +279,7 @@ class NetworkRepository(NetworkRepositoryInterface):
                         "verified_count": item["verified_count"],
                         "bidirectional_count": item.get("bidirectional_count", 0)
                     }
-                    for item in clean_objectids(rel_dist_results)
+                    for item in rel_dist_results
                 ]
                 
             else:
@@ -381,14 +316,13 @@ class NetworkRepository(NetworkRepositoryInterface):
             
             # Create response with statistics
             response = NetworkDataResponse(
-                nodes=nodes,
-                edges=edges,
                 center_entity_id=params.center_entity_id,
-                total_entities=len(nodes),
-                total_relationships=len(edges),
+                total_entities=total_nodes,
+                total_relationships=total_edges,
                 max_depth_reached=network_data["max_depth"],
                 query_time_ms=query_time,
-                statistics=statistics  # Include statistics directly
+                statistics=statistics,  # Include statistics directly
+                snapshot=snapshot
             )
             
             return response
@@ -941,6 +875,60 @@ class NetworkRepository(NetworkRepositoryInterface):
             import traceback
             traceback.print_exc()
             return []
+
+    async def get_precomputed_hubs(self, min_connections: int = 5, limit: int = 20) -> List[Dict[str, Any]]:
+        """Hub entities ranked by the nightly networkFeatures degree (no relationship scan)"""
+        try:
+            cursor = self.entity_collection.find(
+                {"networkFeatures.degree": {"$gte": min_connections}},
+                {"_id": 0, "entityId": 1, "name": 1, "entityType": 1,
+                 "riskAssessment.overall": 1, "networkFeatures": 1}
+            ).sort("networkFeatures.degree", -1).limit(limit)
+
+            hubs = []
+            async for entity in cursor:
+                features = entity["networkFeatures"]
+                overall = entity.get("riskAssessment", {}).get("overall", {})
+                entity_name = entity.get("name", "Unknown")
+                if isinstance(entity_name, dict):
+                    entity_name = entity_name.get("full", entity_name.get("display", "Unknown"))
+                hubs.append({
+                    "entity_id": entity["entityId"],
+                    "entity_name": str(entity_name),
+                    "entity_type": entity.get("entityType", "unknown"),
+                    "total_connections": features.get("degree", 0),
+                    "connection_count": features.get("degree", 0),
+                    "weighted_degree": features.get("weightedDegree", 0.0),
+                    "pagerank": features.get("pagerank", 0.0),
+                    "pagerank_percentile": features.get("pagerankPercentile", 0.0),
+                    "community_id": features.get("communityId"),
+                    "k_core": features.get("kCore", 0),
+                    "propagated_risk": features.get("propagatedRisk", 0.0),
+                    "risk_level": overall.get("level", "unknown"),
+                    "risk_score": overall.get("score", 0.0),
+                    "features_version": features.get("version"),
+                })
+            return hubs
+
+        except Exception as e:
+            logger.error(f"Failed to read precomputed hub entities: {e}")
+            return []
+
+    async def get_latest_feature_run(self) -> Optional[Dict[str, Any]]:
+        """Most recent completed run of the network features job"""
+        try:
+            return await self.repo.collection("network_feature_runs").find_one(
+                {"status": "completed"}, sort=[("finished_at", -1)]
+            )
+        except Exception as e:
+            logger.error(f"Failed to read network feature runs: {e}")
+            return None
+
+    async def get_feature_runs(self, limit: int = 5) -> Dict[str, Any]:
+        """Recent runs of the network features job (newest first) plus the lease document"""
+        runs = self.repo.collection("network_feature_runs")
+        cursor = runs.find({"_id": {"$ne": "lease"}}).sort("started_at", -1).limit(limit)
+        return {"runs": await cursor.to_list(limit), "lease": await runs.find_one({"_id": "lease"})}
     
     # ==================== RISK PROPAGATION ====================
     
@@ -1057,6 +1045,8 @@ class NetworkRepository(NetworkRepositoryInterface):
                 return {"error": "Entity not found"}
             
             base_risk = entity.get("riskAssessment", {}).get("overall", {}).get("score", 0.0)
+            # Whole-graph features from the nightly job (degree, PageRank, k-core, propagated risk)
+            network_features = entity.get("networkFeatures")
             
             # Analyze network connections
             connections = await self.get_entity_connections(entity_id, max_depth=analysis_depth)
@@ -1069,7 +1059,8 @@ class NetworkRepository(NetworkRepositoryInterface):
                     "connection_risk_factor": 0.0,
                     "high_risk_connections": 0,
                     "total_connections": 0,
-                    "analysis_depth": analysis_depth
+                    "analysis_depth": analysis_depth,
+                    "network_features": network_features
                 }
             
             # Calculate connection risk factors
@@ -1099,7 +1090,8 @@ class NetworkRepository(NetworkRepositoryInterface):
                 "analysis_depth": analysis_depth,
                 "risk_level": "critical" if network_risk_score >= 80 else 
                             "high" if network_risk_score >= 60 else
-                            "medium" if network_risk_score >= 40 else "low"
+                            "medium" if network_risk_score >= 40 else "low",
+                "network_features": network_features
             }
             
         except Exception as e:
@@ -1220,36 +1212,38 @@ class NetworkRepository(NetworkRepositoryInterface):
             # Build network data
             network_response = await self.build_entity_network(params)
             
-            # Prepare visualization-ready data
-            viz_nodes = []
-            for node in network_response.nodes:
-                viz_node = {
-                    "id": node.entity_id,
-                    "name": node.entity_name,
-                    "type": node.entity_type,
-                    "riskLevel": node.risk_level.value,
-                    "size": node.size,
-                    "isCenter": node.is_center,
-                    "connectionCount": node.connection_count,
+            # Prepare visualization-ready data from the snapshot columns
+            snapshot = network_response.snapshot or GraphSnapshot(params.center_entity_id)
+            degree = snapshot.degrees()
+            viz_nodes = [
+                {
+                    "id": entity_id,
+                    "name": snapshot.names[i],
+                    "type": snapshot.types[i],
+                    "riskLevel": snapshot.risk_levels[i],
+                    "size": snapshot.sizes[i],
+                    "isCenter": entity_id == params.center_entity_id,
+                    "connectionCount": degree[i],
                     "x": 0,  # Simplified positioning
                     "y": 0,
-                    "color": self._get_node_color(node.risk_level)
+                    "color": _NODE_COLORS.get(snapshot.risk_levels[i], "#757575")
                 }
-                viz_nodes.append(viz_node)
-            
-            viz_edges = []
-            for edge in network_response.edges:
-                viz_edge = {
-                    "source": edge.source_id,
-                    "target": edge.target_id,
-                    "type": edge.relationship_type.value,
-                    "weight": edge.weight,
-                    "confidence": edge.confidence,
-                    "verified": edge.verified,
-                    "color": self._get_edge_color(edge.confidence),
-                    "thickness": max(1, edge.confidence * 5)
+                for i, entity_id in enumerate(snapshot.ids)
+            ]
+            
+            viz_edges = [
+                {
+                    "source": snapshot.ids[snapshot.edge_src[j]],
+                    "target": snapshot.ids[snapshot.edge_dst[j]],
+                    "type": snapshot.edge_types[j],
+                    "weight": snapshot.edge_weight[j],
+                    "confidence": snapshot.edge_confidence[j],
+                    "verified": bool(snapshot.edge_verified[j]),
+                    "color": self._get_edge_color(snapshot.edge_confidence[j]),
+                    "thickness": max(1, snapshot.edge_confidence[j] * 5)
                 }
-                viz_edges.append(viz_edge)
+                for j in range(snapshot.edge_count)
+            ]
             
             return {
                 "nodes": viz_nodes,
@@ -1278,7 +1272,7 @@ class NetworkRepository(NetworkRepositoryInterface):
             # Simple circular layout
             for i, node in enumerate(nodes):
                 angle = 2 * math.pi * i / len(nodes)
-                radius = 150 if not node.is_center else 0
+                radius = 150 if not node.attributes.get("is_center") else 0
                 positions[node.entity_id] = (
                     radius * math.cos(angle),
                     radius * math.sin(angle)
@@ -1422,16 +1416,18 @@ class NetworkRepository(NetworkRepositoryInterface):
             logger.error(f"❌ MIGRATION: Native $graphLookup failed: {e}")
             return {"relationships": [], "max_depth": 0}
     
-    async def _get_entities_batch(self, entity_ids: List[str]) -> List[Dict[str, Any]]:
+    async def _get_entities_batch(self, entity_ids: List[str],
+                                  projection: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
         """Get entity details in batch"""
         try:
             entities = await self.entity_collection.find(
-                {"entityId": {"$in": entity_ids}}
+                {"entityId": {"$in": entity_ids}}, projection
             ).to_list(None)
             
             # Ensure consistent string representation
             for entity in entities:
-                entity["_id"] = str(entity["_id"])
+                if "_id" in entity:
+                    entity["_id"] = str(entity["_id"])
             
             return entities
             
@@ -1441,13 +1437,7 @@ class NetworkRepository(NetworkRepositoryInterface):
     
     def _get_node_color(self, risk_level: NetworkRiskLevel) -> str:
         """Get color for node based on risk level"""
-        color_map = {
-            NetworkRiskLevel.LOW: "#4CAF50",      # Green
-            NetworkRiskLevel.MEDIUM: "#FF9800",   # Orange  
-            NetworkRiskLevel.HIGH: "#F44336",     # Red
-            NetworkRiskLevel.CRITICAL: "#9C27B0"  # Purple
-        }
-        return color_map.get(risk_level, "#757575")  # Default gray
+        return _NODE_COLORS.get(getattr(risk_level, "value", risk_level), "#757575")  # Default gray
     
     def _get_edge_color(self, confidence_score: float) -> str:
         """Get color for edge based on confidence score"""
@@ -18,6 +18,11 @@ from models.core.transaction import (
     TransactionNetworkEdge,
     TransactionActivityResponse
 )
+from utils.pagination import CountCache, count_cache, encode_cursor, keyset_condition
+
+
+# Upper bound for count_mode="estimated" on high-volume entities
+ESTIMATED_COUNT_CAP = 10000
 
 
 class TransactionRepository:
@@ -30,21 +35,36 @@ class TransactionRepository:
         self,
         entity_id: str,
         limit: int = 50,
-        skip: int = 0
+        skip: int = 0,
+        cursor: Optional[str] = None,
+        count_mode: str = "cached"
     ) -> TransactionActivityResponse:
-        """Get transaction activity for entity using existing indexes"""
+        """Get transaction activity for entity using existing indexes
+        
+        Pages by offset or by an opaque keyset cursor on (timestamp, _id). The
+        total comes from the shared count cache; count_mode="estimated" caps the
+        count at ESTIMATED_COUNT_CAP for very high-volume entities.
+        """
+        
+        entity_match = {
+            "$or": [
+                {"fromEntityId": entity_id},
+                {"toEntityId": entity_id}
+            ]
+        }
+        page_match = {"$and": [entity_match, keyset_condition("timestamp", cursor)]} if cursor else entity_match
         
         # Build aggregation pipeline to get transactions with counterparty info
         pipeline = [
             # Match transactions involving this entity (uses compound indexes)
-            {
-                "$match": {
-                    "$or": [
-                        {"fromEntityId": entity_id},
-                        {"toEntityId": entity_id}
-                    ]
-                }
-            },
+            {"$match": page_match},
+            
+            # Sort by timestamp descending (uses timestamp index); _id tiebreak keeps pages stable
+            {"$sort": {"timestamp": -1, "_id": -1}},
+            
+            # Pagination (keyset pages resume after the cursor instead of skipping)
+            *([] if cursor or not skip else [{"$skip": skip}]),
+            {"$limit": limit + 1},
             
             # Add computed fields for direction and counterparty
             {
@@ -78,35 +98,32 @@ class TransactionRepository:
                         ]
                     }
                 }
-            },
-            
-            # Sort by timestamp descending (uses timestamp index)
-            {"$sort": {"timestamp": -1}},
-            
-            # Pagination
-            {"$skip": skip},
-            {"$limit": limit}
+            }
         ]
         
         # Execute aggregation
-        cursor = self.transactions_collection.aggregate(pipeline)
-        transactions_data = await cursor.to_list(length=None)
+        cursor_result = self.transactions_collection.aggregate(pipeline)
+        transactions_data = await cursor_result.to_list(length=None)
+        has_more = len(transactions_data) > limit
+        transactions_data = transactions_data[:limit]
+        
+        next_cursor = None
+        if has_more and transactions_data:
+            last = transactions_data[-1]
+            next_cursor = encode_cursor(last["timestamp"], last["_id"])
         
         # Get total count for pagination
-        count_pipeline = [
-            {
-                "$match": {
-                    "$or": [
-                        {"fromEntityId": entity_id},
-                        {"toEntityId": entity_id}
-                    ]
-                }
-            },
-            {"$count": "total"}
-        ]
+        async def count_transactions() -> int:
+            count_kwargs = {"limit": ESTIMATED_COUNT_CAP} if count_mode == "estimated" else {}
+            return await self.transactions_collection.count_documents(entity_match, **count_kwargs)
         
-        count_result = await self.transactions_collection.aggregate(count_pipeline).to_list(length=1)
-        total_count = count_result[0]["total"] if count_result else 0
+        if count_mode == "exact":
+            total_count = await count_transactions()
+        else:
+            total_count = await count_cache.get_or_compute(
+                CountCache.make_key(f"{self.transactions_collection.name}:{count_mode}", entity_match),
+                count_transactions
+            )
         
         # Convert to TransactionActivity objects
         transactions = []
@@ -136,209 +153,224 @@ class TransactionRepository:
             transactions=transactions,
             total_count=total_count,
             page_size=limit,
-            current_page=(skip // limit) + 1
+            current_page=(skip // limit) + 1,
+            has_more=has_more,
+            next_cursor=next_cursor
         )
     
     async def build_transaction_network(
         self,
         entity_id: str,
-        max_depth: int = 1
+        max_depth: int = 1,
+        max_nodes: Optional[int] = None,
+        max_edges: Optional[int] = None
     ) -> TransactionNetwork:
-        """Build transaction network using proper entity-based traversal"""
+        """Build transaction network with frontier expansion and server-side rollups.
         
-        # Step 1: Find entities connected to center entity by depth
-        connected_entities = set([entity_id])  # Start with center entity
+        Each hop only queries the entities discovered in the previous hop. Node
+        and edge metrics are computed by a $group on the server over every
+        transaction inside the network. When max_nodes / max_edges are given the
+        graph keeps the highest-volume members and reports what was pruned;
+        by default it is not capped.
+        """
+        
+        # Step 1: Expand only the new frontier per hop, ranking counterparties by volume
+        network_entities = {entity_id}
+        frontier = [entity_id]
+        pruned_ids = set()
         
         for depth in range(max_depth):
-            # Find entities connected to current level entities
-            current_level_entities = list(connected_entities)
+            if not frontier:
+                break
             
-            # Get transactions involving current level entities
-            level_pipeline = [
+            hop_pipeline = [
                 {
                     "$match": {
                         "$or": [
-                            {"fromEntityId": {"$in": current_level_entities}},
-                            {"toEntityId": {"$in": current_level_entities}}
+                            {"fromEntityId": {"$in": frontier}},
+                            {"toEntityId": {"$in": frontier}}
                         ]
                     }
                 },
+                {"$project": {"_id": 0, "amount": 1, "ids": ["$fromEntityId", "$toEntityId"]}},
+                {"$unwind": "$ids"},
+                {"$match": {"ids": {"$nin": list(network_entities)}}},
+                {"$group": {"_id": "$ids", "volume": {"$sum": "$amount"}}},
+                {"$sort": {"volume": -1, "_id": 1}}
+            ]
+            
+            discovered = await self.transactions_collection.aggregate(hop_pipeline).to_list(length=None)
+            budget = len(discovered) if max_nodes is None else max(max_nodes - len(network_entities), 0)
+            frontier = [doc["_id"] for doc in discovered[:budget]]
+            pruned_ids.update(doc["_id"] for doc in discovered[budget:])
+            network_entities.update(frontier)
+        
+        pruned_nodes = len(pruned_ids - network_entities)
+        
+        # Step 2: Edge and node rollups stream back through their own cursors;
+        # only the scalar summaries share a $facet, whose output is a single
+        # document bounded by the 16MB BSON limit
+        member_ids = list(network_entities)
+        member_match = {
+            "$match": {
+                "fromEntityId": {"$in": member_ids},
+                "toEntityId": {"$in": member_ids}
+            }
+        }
+        edges_pipeline = [
+            member_match,
+            {
+                "$group": {
+                    "_id": {
+                        "from": "$fromEntityId",
+                        "to": "$toEntityId",
+                        "type": "$transactionType"
+                    },
+                    "count": {"$sum": 1},
+                    "amount": {"$sum": "$amount"},
+                    "risk": {"$sum": "$riskScore"},
+                    "latest": {"$max": "$timestamp"},
+                    "currency": {"$first": "$currency"},
+                    "from_name": {"$first": "$fromEntityName"},
+                    "from_type": {"$first": "$fromEntityType"},
+                    "to_name": {"$first": "$toEntityName"},
+                    "to_type": {"$first": "$toEntityType"}
+                }
+            },
+            {
+                "$group": {
+                    "_id": {"from": "$_id.from", "to": "$_id.to"},
+                    "transaction_count": {"$sum": "$count"},
+                    "total_amount": {"$sum": "$amount"},
+                    "risk_sum": {"$sum": "$risk"},
+                    "latest_transaction": {"$max": "$latest"},
+                    "currency": {"$first": "$currency"},
+                    "type_counts": {"$push": {"k": "$_id.type", "v": "$count"}},
+                    "from_name": {"$first": "$from_name"},
+                    "from_type": {"$first": "$from_type"},
+                    "to_name": {"$first": "$to_name"},
+                    "to_type": {"$first": "$to_type"}
+                }
+            },
+            {"$sort": {"total_amount": -1}},
+            *([{"$limit": max_edges}] if max_edges is not None else [])
+        ]
+        
+        # Node metrics over all network transactions, not just the edges kept
+        def node_pipeline(id_field: str, name_field: str, type_field: str) -> List[Dict[str, Any]]:
+            return [
+                member_match,
                 {
                     "$group": {
-                        "_id": None,
-                        "connected_entities": {
-                            "$addToSet": {
-                                "$concatArrays": [
-                                    ["$fromEntityId"],
-                                    ["$toEntityId"]
-                                ]
-                            }
-                        }
-                    }
-                },
-                {
-                    "$project": {
-                        "all_entities": {
-                            "$reduce": {
-                                "input": "$connected_entities",
-                                "initialValue": [],
-                                "in": {"$setUnion": ["$$value", "$$this"]}
-                            }
-                        }
+                        "_id": f"${id_field}",
+                        "name": {"$first": f"${name_field}"},
+                        "type": {"$first": f"${type_field}"},
+                        "amount": {"$sum": "$amount"},
+                        "count": {"$sum": 1},
+                        "risk": {"$sum": "$riskScore"}
                     }
                 }
             ]
-            
-            level_result = await self.transactions_collection.aggregate(level_pipeline).to_list(1)
-            if level_result:
-                new_entities = set(level_result[0].get("all_entities", []))
-                connected_entities.update(new_entities)
         
-        # Step 2: Get only transactions between entities in our connected set
-        network_pipeline = [
+        summary_pipeline = [
+            member_match,
             {
-                "$match": {
-                    "$and": [
-                        {"fromEntityId": {"$in": list(connected_entities)}},
-                        {"toEntityId": {"$in": list(connected_entities)}}
+                "$facet": {
+                    "edge_count": [
+                        {"$group": {"_id": {"from": "$fromEntityId", "to": "$toEntityId"}}},
+                        {"$count": "total"}
+                    ],
+                    "totals": [
+                        {"$group": {"_id": None, "count": {"$sum": 1}, "volume": {"$sum": "$amount"}}}
+                    ],
+                    "center": [
+                        {"$match": {"$or": [{"fromEntityId": entity_id}, {"toEntityId": entity_id}]}},
+                        {"$group": {"_id": None, "count": {"$sum": 1}, "volume": {"$sum": "$amount"}}}
                     ]
                 }
             }
         ]
         
-        # Execute network query - only get transactions within our network
-        network_cursor = self.transactions_collection.aggregate(network_pipeline)
-        all_transactions = await network_cursor.to_list(length=None)
+        edge_groups, senders, receivers, summary_result = await asyncio.gather(
+            self.transactions_collection.aggregate(edges_pipeline).to_list(length=None),
+            self.transactions_collection.aggregate(
+                node_pipeline("fromEntityId", "fromEntityName", "fromEntityType")
+            ).to_list(length=None),
+            self.transactions_collection.aggregate(
+                node_pipeline("toEntityId", "toEntityName", "toEntityType")
+            ).to_list(length=None),
+            self.transactions_collection.aggregate(summary_pipeline).to_list(length=1)
+        )
+        summary = summary_result[0] if summary_result else {}
+        edge_count_result = summary.get("edge_count", [])
+        total_edge_count = edge_count_result[0]["total"] if edge_count_result else 0
+        totals = (summary.get("totals") or [{}])[0]
+        center = (summary.get("center") or [{}])[0]
         
-        # Step 3: Build nodes (entities) with aggregated metrics
-        entity_metrics = {}
-        all_entities = set()
+        # Step 3: Build edges and nodes from the grouped rollups
+        edges = []
         
-        for txn in all_transactions:
-            from_id = txn["fromEntityId"]
-            to_id = txn["toEntityId"]
-            amount = txn["amount"]
-            risk_score = txn["riskScore"]
+        for group in edge_groups:
+            from_id = group["_id"]["from"]
+            to_id = group["_id"]["to"]
+            count = group["transaction_count"]
+            type_counts: Dict[str, int] = {}
+            for item in group["type_counts"]:
+                type_counts[item["k"] or "unknown"] = type_counts.get(item["k"] or "unknown", 0) + item["v"]
             
-            # Track all entities
-            all_entities.add((from_id, txn["fromEntityName"], txn["fromEntityType"]))
-            all_entities.add((to_id, txn["toEntityName"], txn["toEntityType"]))
-            
-            # Initialize entity metrics if not exists
-            for entity_id, name, entity_type in [(from_id, txn["fromEntityName"], txn["fromEntityType"]),
-                                                  (to_id, txn["toEntityName"], txn["toEntityType"])]:
-                if entity_id not in entity_metrics:
-                    entity_metrics[entity_id] = {
-                        "entity_name": name,
-                        "entity_type": entity_type,
-                        "total_sent": 0.0,
-                        "total_received": 0.0,
-                        "transaction_count": 0,
-                        "risk_scores": []
-                    }
-            
-            # Update sender metrics
-            entity_metrics[from_id]["total_sent"] += amount
-            entity_metrics[from_id]["transaction_count"] += 1
-            entity_metrics[from_id]["risk_scores"].append(risk_score)
-            
-            # Update receiver metrics
-            entity_metrics[to_id]["total_received"] += amount
-            entity_metrics[to_id]["transaction_count"] += 1
-            entity_metrics[to_id]["risk_scores"].append(risk_score)
+            edges.append(TransactionNetworkEdge(
+                from_entity_id=from_id,
+                to_entity_id=to_id,
+                transaction_count=count,
+                total_amount=group["total_amount"],
+                avg_amount=group["total_amount"] / count if count else 0,
+                currency=group["currency"],
+                avg_risk_score=group["risk_sum"] / count if count else 0,
+                latest_transaction=group["latest_transaction"],
+                primary_transaction_type=max(type_counts, key=type_counts.get) if type_counts else "unknown",
+                transaction_type_counts=type_counts
+            ))
         
-        # Build network nodes
-        nodes = []
-        for entity_id, metrics in entity_metrics.items():
-            avg_risk = sum(metrics["risk_scores"]) / len(metrics["risk_scores"]) if metrics["risk_scores"] else 0
-            
-            node = TransactionNetworkNode(
-                entity_id=entity_id,
+        node_metrics: Dict[str, Dict[str, Any]] = {}
+        for groups, direction in ((senders, "total_sent"), (receivers, "total_received")):
+            for group in groups:
+                metrics = node_metrics.setdefault(group["_id"], {
+                    "entity_name": group["name"],
+                    "entity_type": group["type"],
+                    "total_sent": 0.0,
+                    "total_received": 0.0,
+                    "transaction_count": 0,
+                    "risk_sum": 0.0
+                })
+                metrics[direction] += group["amount"]
+                metrics["transaction_count"] += group["count"]
+                metrics["risk_sum"] += group["risk"]
+        
+        nodes = [
+            TransactionNetworkNode(
+                entity_id=node_id,
                 entity_name=metrics["entity_name"],
                 entity_type=metrics["entity_type"],
                 total_sent=metrics["total_sent"],
                 total_received=metrics["total_received"],
                 transaction_count=metrics["transaction_count"],
-                avg_risk_score=avg_risk
+                avg_risk_score=metrics["risk_sum"] / metrics["transaction_count"] if metrics["transaction_count"] else 0
             )
-            nodes.append(node)
-        
-        # Step 3: Build edges (transaction flows between entities)
-        edge_metrics = {}
-        
-        for txn in all_transactions:
-            from_id = txn["fromEntityId"]
-            to_id = txn["toEntityId"]
-            edge_key = f"{from_id}->{to_id}"
-            
-            if edge_key not in edge_metrics:
-                edge_metrics[edge_key] = {
-                    "from_entity_id": from_id,
-                    "to_entity_id": to_id,
-                    "transaction_count": 0,
-                    "total_amount": 0.0,
-                    "amounts": [],
-                    "risk_scores": [],
-                    "latest_transaction": None,
-                    "transaction_types": [],
-                    "currency": txn["currency"]
-                }
-            
-            metrics = edge_metrics[edge_key]
-            metrics["transaction_count"] += 1
-            metrics["total_amount"] += txn["amount"]
-            metrics["amounts"].append(txn["amount"])
-            metrics["risk_scores"].append(txn["riskScore"])
-            metrics["transaction_types"].append(txn["transactionType"])
-            
-            # Track latest transaction
-            if not metrics["latest_transaction"] or txn["timestamp"] > metrics["latest_transaction"]:
-                metrics["latest_transaction"] = txn["timestamp"]
-        
-        # Build network edges
-        edges = []
-        for metrics in edge_metrics.values():
-            avg_amount = sum(metrics["amounts"]) / len(metrics["amounts"]) if metrics["amounts"] else 0
-            avg_risk = sum(metrics["risk_scores"]) / len(metrics["risk_scores"]) if metrics["risk_scores"] else 0
-            
-            # Find most common transaction type
-            type_counts = {}
-            for txn_type in metrics["transaction_types"]:
-                type_counts[txn_type] = type_counts.get(txn_type, 0) + 1
-            primary_type = max(type_counts.keys(), key=type_counts.get) if type_counts else "unknown"
-            
-            edge = TransactionNetworkEdge(
-                from_entity_id=metrics["from_entity_id"],
-                to_entity_id=metrics["to_entity_id"],
-                transaction_count=metrics["transaction_count"],
-                total_amount=metrics["total_amount"],
-                avg_amount=avg_amount,
-                currency=metrics["currency"],
-                avg_risk_score=avg_risk,
-                latest_transaction=metrics["latest_transaction"],
-                primary_transaction_type=primary_type
-            )
-            edges.append(edge)
-        
-        # Calculate network summary with distinction between total and center entity transactions
-        total_transactions_in_network = len(all_transactions)
-        total_volume_in_network = sum(txn["amount"] for txn in all_transactions)
-        
-        # Calculate transactions involving center entity only (for comparison with table)
-        center_entity_transactions = [
-            txn for txn in all_transactions 
-            if txn["fromEntityId"] == entity_id or txn["toEntityId"] == entity_id
+            for node_id, metrics in node_metrics.items()
         ]
-        center_entity_transaction_count = len(center_entity_transactions)
-        center_entity_volume = sum(txn["amount"] for txn in center_entity_transactions)
+        
+        pruned_edges = max(total_edge_count - len(edges), 0)
         
         return TransactionNetwork(
             center_entity_id=entity_id,
             nodes=nodes,
             edges=edges,
-            total_transactions=total_transactions_in_network,
-            total_volume=total_volume_in_network,
-            center_entity_transaction_count=center_entity_transaction_count,
-            center_entity_volume=center_entity_volume,
-            max_depth=max_depth
-        )
\ No newline at end of file
+            total_transactions=totals.get("count", 0),
+            total_volume=totals.get("volume", 0.0),
+            center_entity_transaction_count=center.get("count", 0),
+            center_entity_volume=center.get("volume", 0.0),
+            max_depth=max_depth,
+            truncated=bool(pruned_nodes or pruned_edges),
+            pruned_node_count=pruned_nodes,
+            pruned_edge_count=pruned_edges
+        )
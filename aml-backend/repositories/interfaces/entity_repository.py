@@ -36,14 +36,16 @@ class EntityRepositoryInterface(ABC):
     
     @abstractmethod
     async def get_entities_paginated(self, skip: int = 0, limit: int = 20, 
-                                   filters: Optional[Dict[str, Any]] = None) -> tuple[List[Dict[str, Any]], int]:
+                                   filters: Optional[Dict[str, Any]] = None,
+                                   cursor: Optional[str] = None) -> tuple[List[Dict[str, Any]], int]:
         """
         Get paginated list of entities with optional filtering
         
         Args:
-            skip: Number of entities to skip
+            skip: Number of entities to skip (ignored when cursor is given)
             limit: Maximum number of entities to return
             filters: Optional filter criteria
+            cursor: Optional keyset continuation token from a previous page
             
         Returns:
             tuple: (entities_list, total_count)
@@ -117,17 +119,21 @@ class EntityRepositoryInterface(ABC):
     
     @abstractmethod
     async def find_by_criteria(self, criteria: Dict[str, Any], 
-                             limit: int = 20, offset: int = 0) -> Dict[str, Any]:
+                             limit: int = 20, offset: int = 0,
+                             cursor: Optional[str] = None,
+                             count_mode: str = "cached") -> Dict[str, Any]:
         """
         Find entities by search criteria with pagination
         
         Args:
             criteria: Search criteria dictionary
             limit: Maximum number of results
-            offset: Number of results to skip
+            offset: Number of results to skip (ignored when cursor is given)
+            cursor: Optional keyset continuation token from a previous page
+            count_mode: How total_count is computed - "exact", "cached" or "estimated"
             
         Returns:
-            Dict: Contains 'entities', 'total_count', 'has_more'
+            Dict: Contains 'entities', 'total_count', 'has_more', 'next_cursor'
         """
         pass
     
@@ -145,12 +151,18 @@ class EntityRepositoryInterface(ABC):
         pass
     
     @abstractmethod
-    async def find_by_phonetic_codes(self, phonetic_codes: Dict[str, str]) -> List[Dict[str, Any]]:
+    async def find_by_phonetic_codes(self, phonetic_codes: Dict[str, Any],
+                                     entity_type: Optional[str] = None,
+                                     limit: Optional[int] = 50,
+                                     exclude_ids: Optional[List[str]] = None) -> List[Dict[str, Any]]:
         """
         Find entities by phonetic name codes (for name matching)
         
         Args:
-            phonetic_codes: Dictionary of algorithm -> code
+            phonetic_codes: Dictionary of algorithm -> code or list of codes
+            entity_type: Optional entity type restriction
+            limit: Maximum number of candidates (None for no cap)
+            exclude_ids: Entity ids to leave out (already fetched)
             
         Returns:
             List[Dict]: Matching entities
@@ -203,6 +215,40 @@ class EntityRepositoryInterface(ABC):
         """
         pass
     
+    # ==================== MERGE OPERATIONS ====================
+    
+    @abstractmethod
+    async def find_for_merge(self, entity_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Load the documents taking part in a merge
+        
+        Args:
+            entity_ids: Master and source entity IDs
+            
+        Returns:
+            Dict[str, Dict]: Entity documents keyed by entityId
+        """
+        pass
+    
+    @abstractmethod
+    async def apply_merge(self, entity_operations: List[Any],
+                          repoint_filter: Optional[Dict[str, Any]],
+                          repoint_update: Optional[Dict[str, Any]],
+                          relationship_documents: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Apply a planned merge atomically where the deployment allows
+        
+        Args:
+            entity_operations: Bulk update operations for master and sources
+            repoint_filter: Filter for linked entities moving to the master
+            repoint_update: Update applied to those linked entities
+            relationship_documents: Merge relationships to insert
+            
+        Returns:
+            Dict: Write counts, inserted relationship IDs and whether a transaction was used
+        """
+        pass
+    
     # ==================== RISK AND COMPLIANCE ====================
     
     @abstractmethod
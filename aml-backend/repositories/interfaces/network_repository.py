@@ -13,6 +13,7 @@ from models.core.network import (
     EntityNetwork, NetworkNode, NetworkEdge, 
     RelationshipType, NetworkRiskLevel
 )
+from models.core.network_snapshot import GraphSnapshot
 
 
 @dataclass
@@ -30,17 +31,66 @@ class NetworkQueryParams:
     max_relationships: int = 200
 
 
-@dataclass
 class NetworkDataResponse:
-    """Response structure for network data"""
-    nodes: List[NetworkNode]
-    edges: List[NetworkEdge]
-    center_entity_id: str
-    total_entities: int
-    total_relationships: int
-    max_depth_reached: int
-    query_time_ms: float
-    statistics: Optional[Dict[str, Any]] = None  # Add statistics field
+    """
+    Response structure for network data
+
+    When built from a GraphSnapshot, `nodes` / `edges` are materialised as
+    NetworkNode / NetworkEdge models only on first access; the network view
+    serialises straight from `snapshot` instead.
+    """
+
+    def __init__(self, nodes: Optional[List[NetworkNode]] = None,
+                 edges: Optional[List[NetworkEdge]] = None,
+                 center_entity_id: str = "",
+                 total_entities: int = 0,
+                 total_relationships: int = 0,
+                 max_depth_reached: int = 0,
+                 query_time_ms: float = 0.0,
+                 statistics: Optional[Dict[str, Any]] = None,
+                 snapshot: Optional[GraphSnapshot] = None):
+        self._nodes = nodes
+        self._edges = edges
+        self.center_entity_id = center_entity_id
+        self.total_entities = total_entities
+        self.total_relationships = total_relationships
+        self.max_depth_reached = max_depth_reached
+        self.query_time_ms = query_time_ms
+        self.statistics = statistics
+        self.snapshot = snapshot
+
+    def copy(self) -> "NetworkDataResponse":
+        """Per-request copy of a cached response (own statistics dict and styling columns)"""
+        return NetworkDataResponse(
+            nodes=None if self.snapshot is not None else self._nodes,
+            edges=None if self.snapshot is not None else self._edges,
+            center_entity_id=self.center_entity_id,
+            total_entities=self.total_entities,
+            total_relationships=self.total_relationships,
+            max_depth_reached=self.max_depth_reached,
+            query_time_ms=self.query_time_ms,
+            statistics=dict(self.statistics) if self.statistics is not None else None,
+            snapshot=self.snapshot.fork() if self.snapshot is not None else None
+        )
+
+    def _materialize(self) -> None:
+        if self.snapshot is not None:
+            self._nodes, self._edges = self.snapshot.to_models()
+        else:
+            self._nodes = self._nodes or []
+            self._edges = self._edges or []
+
+    @property
+    def nodes(self) -> List[NetworkNode]:
+        if self._nodes is None:
+            self._materialize()
+        return self._nodes
+
+    @property
+    def edges(self) -> List[NetworkEdge]:
+        if self._edges is None:
+            self._materialize()
+        return self._edges
 
 
 @dataclass
@@ -94,6 +144,21 @@ class NetworkRepositoryInterface(ABC):
         """Detect hub entities with many connections"""
         pass
     
+    @abstractmethod
+    async def get_precomputed_hubs(self, min_connections: int = 5, limit: int = 20) -> List[Dict[str, Any]]:
+        """Hub entities ranked by precomputed networkFeatures"""
+        pass
+    
+    @abstractmethod
+    async def get_latest_feature_run(self) -> Optional[Dict[str, Any]]:
+        """Most recent completed network features run"""
+        pass
+    
+    @abstractmethod
+    async def get_feature_runs(self, limit: int = 5) -> Dict[str, Any]:
+        """Recent network features runs (newest first) and the job lease"""
+        pass
+    
     # ==================== RISK PROPAGATION ====================
     
     @abstractmethod
@@ -2,11 +2,21 @@
 Agent Investigation API Routes
 
 Endpoints:
-  POST /agents/investigate          – Launch a new investigation
+  POST /agents/investigate          – Queue a new investigation (streams its run)
+  GET  /agents/investigate/{thread_id}/stream – Reattach / replay a run
   POST /agents/investigate/resume   – Resume after human review
+  POST /agents/alerts/bulk          – Bulk alert intake with batch pre-triage
+  GET  /agents/alerts/bulk/metrics  – Bulk intake throughput / auto-close rate
+  GET  /agents/workers/metrics      – Worker pool metrics
+  GET  /agents/llm/metrics          – LLM gateway concurrency, per-node tokens / latency, response cache
   GET  /agents/investigations       – List all investigations
+  GET  /agents/investigations/analytics – Materialised dashboard analytics
+  POST /agents/investigations/analytics/reconcile – Rebuild analytics counters
   GET  /agents/investigations/{id}  – Get single investigation detail
   POST /agents/seed                 – Seed typology & compliance collections
+  WS   /agents/investigations/stream – Investigation changes (shared event bus)
+  WS   /agents/alerts/stream        – Alert + investigation changes (shared event bus)
+  GET  /agents/streams/metrics      – Event bus subscriber / cursor metrics
   GET  /agents/health               – Health check
 """
 
@@ -14,16 +24,33 @@ import asyncio
 import json
 import logging
 import uuid
-from datetime import datetime, timedelta, timezone
+from datetime import datetime, timezone
 from typing import Any, Dict, Optional
 
-from bson import ObjectId
-from fastapi import APIRouter, Depends, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, WebSocket, WebSocketDisconnect
 from fastapi.responses import StreamingResponse
-from dependencies import get_mongo_client, get_database, DB_NAME
-from services.agents.graph import get_compiled_graph
-from services.agents.tracing import get_tracing_callbacks
+from dependencies import get_database, get_mongo_client, DB_NAME
+from services.agents.analytics import (
+    RECONCILE_PIPELINE_TEXT,
+    get_investigation_analytics,
+    reconcile_investigation_analytics,
+)
+from services.agents.batch_triage import (
+    MAX_BULK_ALERTS,
+    QueueCapacityExceeded,
+    ingest_alerts,
+    metrics as bulk_metrics,
+)
+from services.agents.event_bus import get_event_bus
+from services.agents.llm_gateway import get_llm_gateway
 from services.agents.rate_limit import rate_limit_investigate
+from services.agents.worker_pool import (
+    MAX_PAYLOAD_CHARS,
+    MAX_PENDING_ALERTS,
+    InvestigationRun,
+    get_worker_pool,
+    parse_priority,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -31,27 +58,6 @@ router = APIRouter(prefix="/agents", tags=["agent-investigation"])
 
 # ── SSE helpers ──────────────────────────────────────────────────────
 
-_AGENT_NODES = frozenset({
-    "triage", "data_gathering", "assemble_case",
-    "network_analyst", "temporal_analyst",
-    "trail_follower", "dispatch_sub_investigations",
-    "mini_investigate",
-    "narrative", "validation", "human_review", "finalize",
-    "auto_close",
-    "fetch_entity_profile", "fetch_transactions",
-    "fetch_network", "fetch_watchlist",
-})
-
-_STATE_OUTPUT_KEYS = (
-    "triage_decision", "typology", "narrative", "network_analysis",
-    "temporal_analysis", "trail_analysis", "sub_investigation_findings",
-    "validation_result", "case_file",
-    "gathered_data", "human_decision",
-)
-
-MAX_PAYLOAD_CHARS = 8000
-
-
 def _now() -> str:
     return datetime.now(timezone.utc).isoformat()
 
@@ -83,201 +89,120 @@ def _extract_llm_content(raw_output: Any) -> str:
 
 
 def _sse(payload: dict) -> str:
-    return f"data: {json.dumps(payload, default=str)}\n\n"
-
-
-def _truncate_deep(obj: Any, budget: int = MAX_PAYLOAD_CHARS) -> Any:
-    """Recursively truncate string values within dicts/lists to stay under budget
-    while preserving the dict/list structure the frontend expects."""
-    if isinstance(obj, str):
-        return obj[:budget] + "..." if len(obj) > budget else obj
-    if isinstance(obj, dict):
-        out = {}
-        for k, v in obj.items():
-            out[k] = _truncate_deep(v, budget // max(len(obj), 1))
-        return out
-    if isinstance(obj, list):
-        if len(obj) > 20:
-            return [_truncate_deep(item, budget // 20) for item in obj[:20]]
-        return [_truncate_deep(item, budget // max(len(obj), 1)) for item in obj]
-    return obj
-
-
-def _extract_agent_output(result: dict) -> dict:
-    """Extract structured output keys from a node's state update."""
-    output = {}
-    for key in _STATE_OUTPUT_KEYS:
-        if key in result:
-            val = result[key]
-            try:
-                serialized = json.dumps(val, default=str)
-                if len(serialized) <= MAX_PAYLOAD_CHARS:
-                    output[key] = val
-                else:
-                    output[key] = _truncate_deep(val, MAX_PAYLOAD_CHARS)
-            except Exception:
-                output[key] = str(val)[:MAX_PAYLOAD_CHARS]
-    return output
-
-
-def _emit_node_events(node_name: str, state_update):
-    """Yield agent_start, tool_start/tool_end pairs, then agent_end SSE events."""
-    events = []
-    events.append(_sse({
-        "type": "agent_start",
-        "agent": node_name,
-        "timestamp": _now(),
-    }))
-
-    tool_calls = []
-    status = ""
-    output_data = {}
-    if isinstance(state_update, dict):
-        tool_calls = state_update.get("_node_tool_calls", [])
-        if not isinstance(tool_calls, list):
-            tool_calls = []
-        status = state_update.get("investigation_status", "")
-        output_data = _extract_agent_output(state_update)
-
-    for tc in tool_calls:
-        events.append(_sse({
-            "type": "tool_start",
-            "agent": node_name,
-            "tool": tc.get("tool", "unknown"),
-            "input": tc.get("input", ""),
-            "timestamp": _now(),
-        }))
-        events.append(_sse({
-            "type": "tool_end",
-            "agent": node_name,
-            "tool": tc.get("tool", "unknown"),
-            "output": tc.get("output", ""),
-            "timestamp": _now(),
-        }))
-
-    events.append(_sse({
-        "type": "agent_end",
-        "agent": node_name,
-        "status": status,
-        "output": output_data,
-        "timestamp": _now(),
-    }))
-    return events
+    seq = payload.get("seq")
+    prefix = f"id: {seq}\n" if seq is not None else ""
+    return f"{prefix}data: {json.dumps(payload, default=str)}\n\n"
+
+
+async def _follow_run(run: InvestigationRun, after: int = 0):
+    """SSE view of a worker-pool run; disconnecting only detaches the subscriber."""
+    async for payload in run.follow(after):
+        yield _sse(payload)
+
+
+async def _entity_priority(entity_id: str) -> float:
+    """Queue priority for a new alert: the entity's current overall risk score."""
+    try:
+        doc = await get_database()["entities"].find_one(
+            {"entityId": entity_id}, {"_id": 0, "riskAssessment.overall.score": 1}
+        )
+        return float(((doc or {}).get("riskAssessment") or {}).get("overall", {}).get("score") or 0)
+    except Exception:
+        return 0.0
 
 
 # ── Launch investigation ──────────────────────────────────────────────
 
 @router.post("/investigate", dependencies=[Depends(rate_limit_investigate)])
 async def launch_investigation(request: Dict[str, Any]):
-    """Start a new agentic investigation.
+    """Queue a new agentic investigation and stream its progress.
+
+    The alert is inserted as ``pending``, reserved for this process's worker
+    pool and picked up highest priority first. The response is a subscription
+    to the run: closing it does not stop the investigation, and
+    ``GET /agents/investigate/{thread_id}/stream`` reattaches.
 
     Body:
-        { "entity_id": "...", "alert_type": "...", ... }
+        { "entity_id": "...", "alert_type": "...", "priority": <optional 0-100>, ... }
     """
     entity_id = request.get("entity_id")
     if not entity_id:
         raise HTTPException(status_code=400, detail="entity_id is required")
+    try:
+        priority = parse_priority(request.get("priority"))
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
 
-    thread_id = f"case-{uuid.uuid4().hex[:12]}"
-    config = {
-        "configurable": {"thread_id": thread_id},
-        "recursion_limit": 100,
-        "callbacks": get_tracing_callbacks(thread_id),
-    }
+    pool = get_worker_pool()
+    if await pool.pending_count() >= MAX_PENDING_ALERTS:
+        raise HTTPException(status_code=503, detail="Investigation queue is full, retry later")
 
+    thread_id = f"case-{uuid.uuid4().hex[:12]}"
+    submitted_at = datetime.now(timezone.utc)
     alert_data = {
         "entity_id": entity_id,
         "alert_type": request.get("alert_type", "suspicious_activity"),
-        "submitted_at": datetime.now(timezone.utc).isoformat(),
-        **{k: v for k, v in request.items() if k not in ("entity_id", "alert_type")},
+        "submitted_at": submitted_at.isoformat(),
+        **{k: v for k, v in request.items() if k not in ("entity_id", "alert_type", "priority")},
     }
+    if priority is None:
+        priority = await _entity_priority(entity_id)
 
     # Insert alert document into alerts collection (event-driven trigger pattern)
     alert_doc = {
         "entity_id": entity_id,
         "alert_type": alert_data["alert_type"],
-        "submitted_at": datetime.now(timezone.utc),
+        "submitted_at": submitted_at,
         "status": "pending",
+        "priority": priority,
         "thread_id": thread_id,
+        # Claimed by this process only: its event log backs the SSE response below
+        "reserved_by": pool.worker_id,
+        # An analyst is following the run: its LLM calls go ahead of background work
+        "interactive": True,
+        "alert_data": alert_data,
     }
     try:
-        client = get_mongo_client()
-        result = client[DB_NAME]["alerts"].insert_one(alert_doc)
+        result = await get_database()["alerts"].insert_one(alert_doc)
         alert_id = str(result.inserted_id)
     except Exception as exc:
         logger.warning("Failed to insert alert doc: %s", exc)
-        alert_id = None
-
-    async def event_stream():
-        graph = get_compiled_graph()
-
-        # Emit alert ingestion event first
-        yield _sse({
-            "type": "alert_ingested",
-            "alert_id": alert_id,
-            "entity_id": entity_id,
-            "alert_type": alert_data["alert_type"],
-            "timestamp": _now(),
-        })
+        raise HTTPException(status_code=503, detail="Failed to queue investigation")
 
-        yield _sse({
-            "type": "pipeline_started",
-            "agent": "triage",
-            "timestamp": _now(),
-        })
-        try:
-            async for chunk in graph.astream(
-                {"alert_data": alert_data},
-                config=config,
-                stream_mode="updates",
-            ):
-                if not isinstance(chunk, dict):
-                    continue
-                for node_name, state_update in chunk.items():
-                    if node_name not in _AGENT_NODES:
-                        continue
-                    for event in _emit_node_events(node_name, state_update):
-                        yield event
-
-            final_state = await asyncio.to_thread(graph.get_state, config)
-            state_values = final_state.values if final_state else {}
-            is_interrupted = bool(final_state.next) if final_state else False
-
-            if is_interrupted:
-                yield _sse({
-                    "type": "agent_start",
-                    "agent": "human_review",
-                    "timestamp": _now(),
-                })
-
-            if alert_id:
-                try:
-                    new_status = "awaiting_review" if is_interrupted else "completed"
-                    await asyncio.to_thread(
-                        client[DB_NAME]["alerts"].update_one,
-                        {"_id": ObjectId(alert_id)},
-                        {"$set": {"status": new_status, "completed_at": datetime.now(timezone.utc)}},
-                    )
-                except Exception:
-                    pass
-
-            yield _sse({
-                "type": "investigation_complete",
-                "thread_id": thread_id,
-                "case_id": state_values.get("case_id", ""),
-                "status": state_values.get("investigation_status", "unknown"),
-                "triage_decision": state_values.get("triage_decision", {}),
-                "typology": state_values.get("typology", {}),
-                "narrative": state_values.get("narrative", {}),
-                "validation_result": state_values.get("validation_result", {}),
-                "needs_human_review": is_interrupted,
-                "timestamp": _now(),
-            })
-        except Exception as e:
-            logger.exception("Investigation stream error")
-            yield _sse({"type": "error", "message": str(e)})
-
-    return StreamingResponse(event_stream(), media_type="text/event-stream")
+    run = pool.register(thread_id, alert_id, entity_id)
+    await run.publish({
+        "type": "alert_ingested",
+        "alert_id": alert_id,
+        "thread_id": thread_id,
+        "entity_id": entity_id,
+        "alert_type": alert_data["alert_type"],
+        "priority": priority,
+        "timestamp": _now(),
+    })
+    pool.notify()
+
+    return StreamingResponse(
+        _follow_run(run), media_type="text/event-stream", headers={"X-Thread-Id": thread_id}
+    )
+
+
+@router.get("/investigate/{thread_id}/stream")
+async def reattach_investigation(
+    thread_id: str,
+    after: int = Query(0, ge=0, description="Replay events with seq greater than this"),
+    last_event_id: Optional[str] = Header(None),
+):
+    """Reattach to a queued or running investigation and replay missed events.
+
+    ``after`` (or the standard ``Last-Event-ID`` header) is the last ``seq``
+    the client received; pass 0 to replay the whole run.
+    """
+    run = get_worker_pool().get_run(thread_id)
+    if run is None:
+        raise HTTPException(status_code=404, detail=f"No active run for {thread_id} on this server")
+    if last_event_id and last_event_id.isdigit():
+        after = max(after, int(last_event_id))
+    return StreamingResponse(_follow_run(run, after), media_type="text/event-stream")
 
 
 # ── Resume after human review ────────────────────────────────────────
@@ -286,6 +211,10 @@ async def launch_investigation(request: Dict[str, Any]):
 async def resume_investigation(request: Dict[str, Any]):
     """Resume an investigation paused at human review.
 
+    The resume runs on the worker pool; the response streams the new events
+    and can be reattached like a launch. Returns 409 unless the thread's
+    alert is ``awaiting_review`` (e.g. a repeated or concurrent resume).
+
     Body:
         { "thread_id": "case-...", "decision": "approve|reject|request_changes",
           "analyst_notes": "..." }
@@ -294,84 +223,83 @@ async def resume_investigation(request: Dict[str, Any]):
     if not thread_id:
         raise HTTPException(status_code=400, detail="thread_id is required")
 
-    decision = request.get("decision", "approve")
-    analyst_notes = request.get("analyst_notes", "")
-
-    config = {
-        "configurable": {"thread_id": thread_id},
-        "recursion_limit": 100,
-        "callbacks": get_tracing_callbacks(thread_id),
+    resume_value = {
+        "decision": request.get("decision", "approve"),
+        "analyst_notes": request.get("analyst_notes", ""),
     }
-    resume_value = {"decision": decision, "analyst_notes": analyst_notes}
 
-    graph = get_compiled_graph()
+    pool = get_worker_pool()
+    existing = pool.get_run(thread_id)
+    after = existing.last_seq if existing else 0
+    run = await pool.submit_resume(thread_id, resume_value)
+    if run is None:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Investigation {thread_id} is not awaiting review or is already being resumed",
+        )
+    return StreamingResponse(
+        _follow_run(run, after), media_type="text/event-stream", headers={"X-Thread-Id": thread_id}
+    )
+
 
-    async def event_stream():
-        yield _sse({
-            "type": "pipeline_resumed",
-            "agent": "human_review",
-            "timestamp": _now(),
-        })
+# ── Bulk alert intake ────────────────────────────────────────────────
+
+@router.post("/alerts/bulk")
+async def bulk_ingest_alerts(request: Dict[str, Any]):
+    """Insert a batch of alerts with deterministic pre-triage.
+
+    Clear negatives are stored as ``auto_closed``; the rest are queued as
+    ``pending`` (priority = pre-triage score) for the worker pool. Up to
+    ``ALERT_BULK_MAX`` alerts (default 10000) are accepted per call; the queue
+    cap ``INVESTIGATION_MAX_PENDING`` (default 50000) holds several full
+    batches, and a batch is rejected with 503 only when its pending alerts
+    would take the queue past that cap (backpressure while workers drain it).
+
+    Body:
+        { "alerts": [{ "entity_id": "...", "alert_type": "...", ... }, ...],
+          "pre_triage": true }
+    """
+    alerts = request.get("alerts")
+    if not isinstance(alerts, list) or not alerts:
+        raise HTTPException(status_code=400, detail="alerts must be a non-empty list")
+    if len(alerts) > MAX_BULK_ALERTS:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BULK_ALERTS} alerts per batch")
+    for i, alert in enumerate(alerts):
         try:
-            audit_entry = {
-                "agent": "human_review",
-                "timestamp": _now(),
-                "analyst_decision": decision,
-                "analyst_notes": analyst_notes,
-            }
-
-            await asyncio.to_thread(
-                graph.update_state,
-                config,
-                {
-                    "human_decision": resume_value,
-                    "investigation_status": "reviewed_by_analyst",
-                    "agent_audit_log": [audit_entry],
-                },
-                as_node="human_review",
-            )
-
-            yield _sse({
-                "type": "agent_end",
-                "agent": "human_review",
-                "status": "reviewed_by_analyst",
-                "output": {"human_decision": resume_value},
-                "timestamp": _now(),
-            })
-
-            async for chunk in graph.astream(
-                None,
-                config=config,
-                stream_mode="updates",
-            ):
-                if not isinstance(chunk, dict):
-                    continue
-                for node_name, state_update in chunk.items():
-                    if node_name not in _AGENT_NODES:
-                        continue
-                    for event in _emit_node_events(node_name, state_update):
-                        yield event
-
-            final_state = await asyncio.to_thread(graph.get_state, config)
-            state_values = final_state.values if final_state else {}
-
-            yield _sse({
-                "type": "resume_complete",
-                "thread_id": thread_id,
-                "status": state_values.get("investigation_status", "unknown"),
-                "triage_decision": state_values.get("triage_decision", {}),
-                "typology": state_values.get("typology", {}),
-                "narrative": state_values.get("narrative", {}),
-                "validation_result": state_values.get("validation_result", {}),
-                "case_id": state_values.get("case_id", ""),
-                "human_decision": state_values.get("human_decision", {}),
-                "timestamp": _now(),
-            })
-        except Exception as e:
-            logger.exception("Resume stream error")
-            yield _sse({"type": "error", "message": str(e)})
-
-    return StreamingResponse(event_stream(), media_type="text/event-stream")
+            parse_priority(alert.get("priority") if isinstance(alert, dict) else None)
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=f"alerts[{i}]: {exc}")
+
+    pool = get_worker_pool()
+    capacity = MAX_PENDING_ALERTS - await pool.pending_count()
+    if capacity <= 0:
+        raise HTTPException(status_code=503, detail="Investigation queue is full, retry later")
+    try:
+        batch = await ingest_alerts(get_database(), alerts, pre_triage=bool(request.get("pre_triage", True)),
+                                    max_enqueued=capacity)
+    except QueueCapacityExceeded as exc:
+        raise HTTPException(status_code=503, detail=f"{exc}, retry later or split the batch")
+    if batch["enqueued"]:
+        pool.notify()
+    return batch
+
+
+@router.get("/alerts/bulk/metrics")
+async def bulk_intake_metrics():
+    """Bulk intake throughput and auto-close-rate metrics."""
+    return bulk_metrics.snapshot()
+
+
+@router.get("/workers/metrics")
+async def worker_metrics():
+    """Worker pool metrics (slots, running/tracked runs, queue depth, outcomes)."""
+    return await get_worker_pool().metrics()
+
+
+@router.get("/llm/metrics")
+async def llm_metrics():
+    """LLM gateway metrics (per-model concurrency / throttling, per-node tokens and latency)."""
+    return get_llm_gateway().metrics()
 
 
 # ── List investigations ──────────────────────────────────────────────
@@ -407,65 +335,30 @@ async def list_investigations(
     return {"investigations": investigations, "total": total, "skip": skip, "limit": limit}
 
 
-# ── Analytics Aggregation ─────────────────────────────────────────────
+# ── Analytics (materialised) ──────────────────────────────────────────
 
 @router.get("/investigations/analytics")
-async def investigation_analytics():
-    """Compute investigation analytics using MongoDB aggregation pipelines.
+async def investigation_analytics(
+    series: Optional[str] = Query(None, pattern="^(7d|30d)$"),
+    include_pipeline: bool = False,
+):
+    """Serve investigation analytics from the materialised counters.
 
-    Returns status distribution, typology counts, and average risk scores
-    using $facet, $group, and $avg stages.
+    Status, typology and risk counters are maintained by finalize_node and
+    status transitions (see services/agents/analytics.py) and reconciled
+    periodically, so this is a handful of _id lookups rather than a
+    full-collection $facet. ``series`` adds a daily 7d/30d trend.
     """
-    client = get_mongo_client()
-    db = client[DB_NAME]
-
-    pipeline = [
-        {"$facet": {
-            "by_status": [
-                {"$group": {"_id": "$investigation_status", "count": {"$sum": 1}}},
-                {"$sort": {"count": -1}},
-            ],
-            "by_typology": [
-                {"$match": {"typology.primary_typology": {"$exists": True, "$ne": None}}},
-                {"$group": {"_id": "$typology.primary_typology", "count": {"$sum": 1}}},
-                {"$sort": {"count": -1}},
-                {"$limit": 10},
-            ],
-            "risk_stats": [
-                {"$match": {"triage_decision.risk_score": {"$exists": True}}},
-                {"$group": {
-                    "_id": None,
-                    "avg_risk": {"$avg": "$triage_decision.risk_score"},
-                    "max_risk": {"$max": "$triage_decision.risk_score"},
-                    "min_risk": {"$min": "$triage_decision.risk_score"},
-                    "total": {"$sum": 1},
-                }},
-            ],
-            "recent_7d": [
-                {"$match": {"created_at": {"$gte": (datetime.now(timezone.utc).replace(hour=0, minute=0, second=0) - timedelta(days=7)).isoformat()}}},
-                {"$count": "count"},
-            ],
-        }},
-    ]
-
-    results = list(db["investigations"].aggregate(pipeline))
-    facets = results[0] if results else {}
+    result = await get_investigation_analytics(get_database(), series=series)
+    if include_pipeline:
+        result["aggregation_pipeline"] = RECONCILE_PIPELINE_TEXT
+    return result
 
-    risk = facets.get("risk_stats", [{}])[0] if facets.get("risk_stats") else {}
-    recent = facets.get("recent_7d", [{}])[0] if facets.get("recent_7d") else {}
 
-    return {
-        "by_status": facets.get("by_status", []),
-        "by_typology": facets.get("by_typology", []),
-        "risk_stats": {
-            "avg": round(risk.get("avg_risk", 0), 1) if risk.get("avg_risk") else None,
-            "max": risk.get("max_risk"),
-            "min": risk.get("min_risk"),
-            "total_scored": risk.get("total", 0),
-        },
-        "recent_7d": recent.get("count", 0),
-        "aggregation_pipeline": json.dumps(pipeline, indent=2, default=str),
-    }
+@router.post("/investigations/analytics/reconcile")
+async def reconcile_analytics():
+    """Recompute the materialised analytics from the investigations collection."""
+    return await reconcile_investigation_analytics(get_database())
 
 
 # ── Investigation Search ──────────────────────────────────────────────
@@ -625,62 +518,34 @@ async def list_typologies():
 _cs_connections: list = []
 
 
-def _make_json_safe(obj):
-    """Recursively convert MongoDB types to JSON-serializable types."""
-    if isinstance(obj, ObjectId):
-        return str(obj)
-    if isinstance(obj, datetime):
-        return obj.isoformat()
-    if isinstance(obj, dict):
-        return {k: _make_json_safe(v) for k, v in obj.items()}
-    if isinstance(obj, list):
-        return [_make_json_safe(i) for i in obj]
-    return obj
+async def _pump_events(websocket: WebSocket, sub, message_types: Dict[str, str]):
+    """Forward pre-serialised bus events to a WebSocket until it disconnects."""
+    while True:
+        event = await sub.queue.get()
+        await websocket.send_text(event.render(message_types[event.collection]))
 
 
 @router.websocket("/investigations/stream")
-async def investigation_change_stream(websocket: WebSocket):
-    """Stream real-time investigation updates via MongoDB Change Streams.
+async def investigation_change_stream(
+    websocket: WebSocket,
+    entity_id: Optional[str] = None,
+    status: Optional[str] = None,
+):
+    """Stream real-time investigation updates via the shared change-stream event bus.
 
-    Watches the `investigations` collection for insert/update/replace events
-    and pushes them to connected WebSocket clients.
+    All connections share one `investigations` change stream; each receives
+    compact, pre-serialised payloads, optionally filtered by entity_id/status.
     """
     await websocket.accept()
     _cs_connections.append(websocket)
 
-    db = get_database()
-
+    bus = get_event_bus()
+    sub = None
     heartbeat_task = None
     try:
-        pipeline = [
-            {"$match": {
-                "operationType": {"$in": ["insert", "update", "replace"]},
-                "ns.coll": "investigations",
-            }},
-        ]
-
-        async with db.watch(pipeline=pipeline, full_document="updateLookup") as stream:
-            heartbeat_task = asyncio.create_task(_cs_heartbeat(websocket))
-
-            async for change in stream:
-                doc = change.get("fullDocument")
-                if not doc:
-                    continue
-
-                safe_doc = _make_json_safe(doc)
-                await websocket.send_json({
-                    "type": "change",
-                    "operationType": change["operationType"],
-                    "investigation": {
-                        "case_id": safe_doc.get("case_id"),
-                        "entity_id": safe_doc.get("entity_id"),
-                        "investigation_status": safe_doc.get("investigation_status"),
-                        "created_at": safe_doc.get("created_at"),
-                        "typology": safe_doc.get("typology", {}).get("primary_typology") if safe_doc.get("typology") else None,
-                        "triage_risk_score": safe_doc.get("triage_decision", {}).get("risk_score") if safe_doc.get("triage_decision") else None,
-                    },
-                    "timestamp": datetime.now(timezone.utc).isoformat(),
-                })
+        sub = await bus.subscribe(["investigations"], entity_id=entity_id, status=status)
+        heartbeat_task = asyncio.create_task(_cs_heartbeat(websocket))
+        await _pump_events(websocket, sub, {"investigations": "change"})
 
     except WebSocketDisconnect:
         pass
@@ -689,6 +554,8 @@ async def investigation_change_stream(websocket: WebSocket):
     finally:
         if websocket in _cs_connections:
             _cs_connections.remove(websocket)
+        if sub is not None:
+            bus.unsubscribe(sub)
         if heartbeat_task is not None:
             heartbeat_task.cancel()
 
@@ -706,80 +573,49 @@ async def _cs_heartbeat(ws: WebSocket):
 # ── Alerts Change Stream WebSocket ────────────────────────────────────
 
 @router.websocket("/alerts/stream")
-async def alerts_change_stream(websocket: WebSocket):
-    """Stream real-time alert updates via MongoDB Change Streams.
+async def alerts_change_stream(
+    websocket: WebSocket,
+    entity_id: Optional[str] = None,
+    status: Optional[str] = None,
+):
+    """Stream real-time alert updates via the shared change-stream event bus.
 
-    Watches the `alerts` collection for insert/update events
-    and pushes them to connected WebSocket clients. Also watches
-    the `investigations` collection to correlate completions.
+    Sends the bus's snapshot of the latest alerts as initial state, then
+    alert and investigation changes (to correlate completions), optionally
+    filtered by entity_id/status.
     """
     await websocket.accept()
 
-    db = get_database()
-
+    bus = get_event_bus()
+    sub = None
     heartbeat_task = None
     try:
-        # Send recent alerts as initial state
-        recent = []
-        cursor = db["alerts"].find().sort("submitted_at", -1).limit(20)
-        async for doc in cursor:
-            recent.append(_make_json_safe(doc))
-        await websocket.send_json({"type": "initial", "alerts": recent})
-
-        # Watch both alerts and investigations collections
-        pipeline = [
-            {"$match": {
-                "operationType": {"$in": ["insert", "update", "replace"]},
-                "ns.coll": {"$in": ["alerts", "investigations"]},
-            }},
-        ]
+        sub = await bus.subscribe(["alerts", "investigations"], entity_id=entity_id, status=status)
+        await websocket.send_json({"type": "initial", "alerts": bus.snapshot("alerts", sub)})
 
         heartbeat_task = asyncio.create_task(_cs_heartbeat(websocket))
-
-        async with db.watch(pipeline=pipeline, full_document="updateLookup") as stream:
-            async for change in stream:
-                doc = change.get("fullDocument")
-                if not doc:
-                    continue
-
-                safe_doc = _make_json_safe(doc)
-                coll = change.get("ns", {}).get("coll", "")
-
-                if coll == "alerts":
-                    await websocket.send_json({
-                        "type": "alert_change",
-                        "operationType": change["operationType"],
-                        "alert": {
-                            "alert_id": safe_doc.get("_id"),
-                            "entity_id": safe_doc.get("entity_id"),
-                            "alert_type": safe_doc.get("alert_type"),
-                            "status": safe_doc.get("status"),
-                            "thread_id": safe_doc.get("thread_id"),
-                        },
-                        "timestamp": datetime.now(timezone.utc).isoformat(),
-                    })
-                elif coll == "investigations":
-                    await websocket.send_json({
-                        "type": "investigation_change",
-                        "operationType": change["operationType"],
-                        "investigation": {
-                            "case_id": safe_doc.get("case_id"),
-                            "entity_id": safe_doc.get("entity_id"),
-                            "investigation_status": safe_doc.get("investigation_status"),
-                            "created_at": safe_doc.get("created_at"),
-                        },
-                        "timestamp": datetime.now(timezone.utc).isoformat(),
-                    })
+        await _pump_events(websocket, sub, {
+            "alerts": "alert_change",
+            "investigations": "investigation_change",
+        })
 
     except WebSocketDisconnect:
         pass
     except Exception as exc:
         logger.error("Alerts change stream WebSocket error: %s", exc)
     finally:
+        if sub is not None:
+            bus.unsubscribe(sub)
         if heartbeat_task is not None:
             heartbeat_task.cancel()
 
 
+@router.get("/streams/metrics")
+async def stream_metrics():
+    """Change-stream event bus metrics (subscribers, cursors, buffered/dropped events)."""
+    return get_event_bus().metrics()
+
+
 # ── Health check ─────────────────────────────────────────────────────
 
 @router.get("/health")
@@ -17,6 +17,8 @@ from models.api.responses import EntityDetailedResponse, ErrorResponse
 from models.api.entity_list import EntityListResponse, create_entity_list_response
 from models.core.entity import Entity
 from services.dependencies import get_entity_repository
+from models.database.entity_projections import DEFAULT_ENTITY_VIEW
+from utils.pagination import InvalidCursorError
 
 logger = logging.getLogger(__name__)
 
@@ -46,6 +48,8 @@ async def get_entities(
     entity_type: Optional[str] = Query(None, description="Filter by entity type (individual, organization)"),
     risk_level: Optional[str] = Query(None, description="Filter by risk level (low, medium, high, critical)"),
     status: Optional[str] = Query(None, description="Filter by entity status (active, inactive, archived)"),
+    cursor: Optional[str] = Query(None, description="Keyset continuation token (next_cursor from the previous page); replaces skip"),
+    count_mode: str = Query("cached", pattern="^(exact|cached|estimated)$", description="How total_count is computed"),
     entity_repo = Depends(get_entity_repository_dependency)
 ):
     """
@@ -53,6 +57,7 @@ async def get_entities(
     
     Uses the new EntityRepository through dependency injection for clean data access.
     Supports filtering by entity type, risk level, and status with comprehensive pagination.
+    Deep pages should follow next_cursor (keyset pagination) instead of growing skip.
     
     Returns:
         EntitiesListResponse: Paginated entity list with metadata
@@ -70,19 +75,19 @@ async def get_entities(
             filters["status"] = status
         
         # Get paginated entities through repository
-        entities, total_count = await entity_repo.get_entities_paginated(
-            skip=skip,
+        result = await entity_repo.find_by_criteria(
+            filters,
             limit=limit,
-            filters=filters
+            offset=skip,
+            cursor=cursor,
+            count_mode=count_mode
         )
+        entities, total_count = result["entities"], result["total_count"]
         
         logger.info(f"Retrieved {len(entities)} entities out of {total_count} total")
         
         # Calculate pagination metadata
         current_page = (skip // limit) + 1
-        total_pages = math.ceil(total_count / limit) if total_count > 0 else 1
-        has_next = (skip + limit) < total_count
-        has_previous = skip > 0
         
         # Get available filter values for frontend
         available_filters = await entity_repo.get_available_filter_values()
@@ -94,9 +99,14 @@ async def get_entities(
             page=current_page,
             limit=limit,
             offset=skip,
-            available_filters=available_filters
+            available_filters=available_filters,
+            next_cursor=result.get("next_cursor"),
+            has_next=result["has_more"],
+            has_previous=skip > 0 or cursor is not None
         )
         
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error fetching entities: {e}")
         raise HTTPException(
@@ -108,24 +118,35 @@ async def get_entities(
 @router.get("/{entity_id}", response_model=EntityDetailedResponse)
 async def get_entity_by_id(
     entity_id: str,
+    view: str = Query(DEFAULT_ENTITY_VIEW, description="Field preset: summary, profile, detail or with_vectors (raw embeddings)"),
+    fields: Optional[str] = Query(None, description="Comma-separated include-only field list (overrides the preset)"),
+    exclude: Optional[str] = Query(None, description="Comma-separated fields to drop from the response"),
     entity_repo = Depends(get_entity_repository_dependency)
 ):
     """
     Retrieve a single entity by its entity ID
     
     Uses the new EntityRepository for clean data access with comprehensive entity details.
+    Embedding vectors are only returned with view=with_vectors; the default detail
+    view reports their dimensions under embeddingDimensions.
     
     Args:
         entity_id: Unique entity identifier
+        view: Projection preset
+        fields: Optional include-only field list
+        exclude: Optional fields to drop
         
     Returns:
         EntityDetailResponse: Complete entity information
     """
     try:
-        logger.info(f"Fetching entity with ID: {entity_id}")
+        logger.info(f"Fetching entity with ID: {entity_id} (view={view})")
         
         # Get entity through repository
-        entity = await entity_repo.find_by_entity_id(entity_id)
+        try:
+            entity = await entity_repo.find_by_entity_id(entity_id, view=view, fields=fields, exclude=exclude)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
         
         if not entity:
             logger.warning(f"Entity not found with ID: {entity_id}")
@@ -5,11 +5,12 @@ Focused routes for entity resolution functionality:
 - Entity matching and potential duplicate discovery
 - Resolution decision processing (confirm, reject, review)
 - Resolution status tracking and management
+- Batch deduplication runs (blocking keys + vectorised pairwise scoring)
 """
 
 import logging
 from typing import Dict, Any, List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, status
 
 from models.core.resolution import (
     ResolutionInput as NewOnboardingInput,
@@ -18,14 +19,21 @@ from models.core.resolution import (
 )
 from models.api.responses import StandardResponse as FindMatchesResponse
 from models.api.responses import ErrorResponse
+from models.api.requests import BatchDeduplicationRequest, BulkMergeRequest
+from dependencies import get_database, get_mongo_client, DB_NAME
 from services.dependencies import (
     get_entity_resolution_service,
     get_matching_service,
-    get_atlas_search_service
+    get_atlas_search_service,
+    get_merge_service
 )
 from services.core.entity_resolution_service import EntityResolutionService
 from services.core.matching_service import MatchingService
+from services.core.merge_service import MergeService
 from services.search.atlas_search_service import AtlasSearchService
+from services.core.batch_resolution import (
+    PAIRS_COLLECTION, RUNS_COLLECTION, new_run_id, run_batch_resolution
+)
 
 logger = logging.getLogger(__name__)
 
@@ -279,7 +287,10 @@ async def find_potential_matches_for_entity(
     existing entity using multiple matching strategies and confidence analysis.
     
     **Enhanced Matching Capabilities:**
-    - Multi-strategy matching (Atlas Search + Vector Search)
+    - Multi-strategy matching (Atlas Search, Vector Search and local phonetic
+      matching) run concurrently with per-strategy deadlines
+    - Partial results when a strategy times out; per-strategy latency and
+      contribution reported in `search_metadata`
     - Advanced confidence scoring and analysis
     - Match attribute analysis and validation
     - Repository-based data access
@@ -319,6 +330,93 @@ async def find_potential_matches_for_entity(
         )
 
 
+@router.post("/resolution/merge")
+async def merge_entities(
+    request: BulkMergeRequest,
+    merge_service: MergeService = Depends(get_merge_service)
+):
+    """
+    Merge source entities into a master entity
+    
+    All writes (master consolidation, source resolutions, repointing of
+    entities already linked to a source, confirmed_same_entity relationships)
+    are planned up front and applied in one transaction where supported.
+    
+    Returns:
+        Merge result with conflicts, write counts and per-phase timings
+    """
+    result = await merge_service.merge_many(
+        request.master_entity_id,
+        request.source_entity_ids,
+        {
+            "match_confidence": request.match_confidence,
+            "matched_attributes": request.matched_attributes,
+            "resolved_by": request.resolved_by,
+            "notes": request.notes
+        }
+    )
+    if not result.get("success"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST if result.get("invalid_request") else status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=result.get("error")
+        )
+    return result
+
+
+@router.post("/resolution/batch", status_code=status.HTTP_202_ACCEPTED)
+async def start_batch_resolution(request: BatchDeduplicationRequest, background_tasks: BackgroundTasks):
+    """
+    Deduplicate stored entities in bulk
+    
+    Runs the batch resolution pipeline in the background: blocking keys,
+    vectorised pair scoring, clustering and bulk resolution updates.
+    Pass `resume_run_id` to continue an interrupted run from its checkpoint.
+    
+    Returns:
+        Run ID to poll with GET /entities/resolution/batch/{run_id}
+    """
+    if request.resume_run_id:
+        if not await get_database()[RUNS_COLLECTION].count_documents({"_id": request.resume_run_id}, limit=1):
+            raise HTTPException(status_code=404, detail=f"Batch run {request.resume_run_id} not found")
+        run_id, resume = request.resume_run_id, True
+    else:
+        run_id, resume = new_run_id(), False
+    
+    background_tasks.add_task(
+        run_batch_resolution, get_mongo_client()[DB_NAME],
+        query=request.entity_filter or None,
+        run_id=run_id,
+        resume=resume,
+        apply=not request.dry_run,
+        max_block_size=request.max_block_size
+    )
+    return {"run_id": run_id, "resumed": resume, "status_endpoint": f"/entities/resolution/batch/{run_id}"}
+
+
+@router.get("/resolution/batch/{run_id}")
+def get_batch_resolution_run(
+    run_id: str,
+    include_pairs: int = Query(0, ge=0, le=500, description="Top scored pairs to include")
+):
+    """
+    Batch resolution run status, checkpoint, throughput and blocking statistics
+    
+    Args:
+        run_id: Batch run identifier
+        include_pairs: Number of highest-scoring pairs (with per-attribute scores) to return
+    """
+    db = get_mongo_client()[DB_NAME]
+    run = db[RUNS_COLLECTION].find_one({"_id": run_id})
+    if not run:
+        raise HTTPException(status_code=404, detail=f"Batch run {run_id} not found")
+    if include_pairs:
+        run["pairs"] = list(
+            db[PAIRS_COLLECTION].find({"run_id": run_id}, {"_id": 0})
+            .sort("score", -1).limit(include_pairs)
+        )
+    return run
+
+
 @router.get("/onboarding/demo")
 async def demo_entity_matching():
     """
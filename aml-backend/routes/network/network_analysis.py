@@ -6,13 +6,18 @@ Focused routes for network analysis capabilities using NetworkAnalysisService:
 - Network centrality analysis and community detection
 - Risk propagation and suspicious pattern detection
 - Network visualization data preparation
+- Network view cache metrics (builds are shared across tabs via NetworkViewCache)
+- Nightly whole-graph network features job (trigger + status)
 """
 
 import logging
 from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, status
 
 from repositories.interfaces.network_repository import NetworkQueryParams, NetworkDataResponse
+from models.core.network_snapshot import GraphSnapshot
+from repositories.impl.network_cache import get_network_cache
+from utils.fast_json import FastJSONResponse
 from models.api.responses import ErrorResponse
 from services.dependencies import get_network_analysis_service
 from services.network.network_analysis_service import NetworkAnalysisService
@@ -29,6 +34,41 @@ router = APIRouter(
 )
 
 
+async def _network_member_ids(network_analysis_service: NetworkAnalysisService,
+                              entity_id: str, max_depth: int = 2) -> list:
+    """Entity IDs in the default network view of an entity (center first)"""
+    network_data = await network_analysis_service.network_repo.build_entity_network(
+        NetworkQueryParams(center_entity_id=entity_id, max_depth=max_depth, min_confidence=0.5)
+    )
+    members = list(network_data.snapshot.ids) if network_data.snapshot else []
+    return [entity_id] + [member for member in members if member != entity_id]
+
+
+@router.get("/cache/metrics")
+async def get_network_cache_metrics():
+    """Network view cache hit/miss, single-flight and build-time counters"""
+    return get_network_cache().metrics()
+
+
+@router.post("/features/run", status_code=status.HTTP_202_ACCEPTED)
+async def trigger_network_features_run(
+    background_tasks: BackgroundTasks,
+    network_analysis_service: NetworkAnalysisService = Depends(get_network_analysis_service)
+):
+    """Run the whole-graph network features job now instead of waiting for the nightly schedule"""
+    background_tasks.add_task(network_analysis_service.run_network_features)
+    return {"accepted": True, "status_endpoint": "/network/features/status"}
+
+
+@router.get("/features/status")
+async def get_network_features_status(
+    limit: int = Query(5, ge=1, le=50),
+    network_analysis_service: NetworkAnalysisService = Depends(get_network_analysis_service)
+):
+    """Recent network features runs (status, timings, entities updated, graph summary)"""
+    return await network_analysis_service.get_network_features_status(limit)
+
+
 @router.get("/{entity_id}")
 async def get_entity_network(
     entity_id: str,
@@ -87,13 +127,13 @@ async def get_entity_network(
         logger.info(f"Enhanced network built successfully: {network_data.total_entities} nodes, {network_data.total_relationships} edges")
         
         # Enhance with advanced analysis if requested
-        enhanced_nodes = network_data.nodes
+        snapshot = network_data.snapshot or GraphSnapshot(network_data.center_entity_id)
         node_enhancements = {}
         
         if include_risk_analysis:
             try:
                 # Get all entity IDs from the network
-                entity_ids = [node.entity_id for node in network_data.nodes]
+                entity_ids = list(snapshot.ids)
                 
                 # Get centrality analysis for visual enhancement
                 centrality_results = await network_analysis_service.analyze_network_centrality(entity_ids)
@@ -117,76 +157,9 @@ async def get_entity_network(
             except Exception as e:
                 logger.warning(f"Failed to enhance network with advanced analysis: {e}")
         
-        # Convert to frontend-compatible format
-        def convert_node(node):
-            enhancements = node_enhancements.get(node.entity_id, {})
-            # Use actual risk score from node, with network enhancement as bonus
-            base_risk_score = getattr(node, 'risk_score', 0.0)
-            network_risk_bonus = enhancements.get("networkRiskScore", 0.0) * 0.1  # 10% bonus from network analysis
-            combined_risk_score = min(1.0, base_risk_score + network_risk_bonus)
-            
-            return {
-                "id": node.entity_id,
-                "label": node.entity_name,
-                "type": node.entity_type,
-                "riskLevel": node.risk_level.value if hasattr(node.risk_level, 'value') else str(node.risk_level),
-                "riskScore": combined_risk_score * 100,  # Convert to 0-100 scale for frontend
-                "centrality": enhancements.get("centrality", 0),
-                "betweenness": enhancements.get("betweenness", 0),
-                "isCenter": getattr(node, 'is_center', False),
-                "connectionCount": getattr(node, 'connection_count', 0),
-                "connections": getattr(node, 'connection_count', 0),  # Alias for frontend
-                "size": getattr(node, 'size', 20),
-                "verified": True,
-                "active": True,
-                "entityType": node.entity_type  # Alias for frontend
-            }
-        
-        # Use a counter to ensure absolutely unique edge IDs
-        edge_counter = 0
-        
-        def convert_edge(edge):
-            nonlocal edge_counter
-            edge_counter += 1
-            
-            # Create unique edge ID with counter to ensure absolute uniqueness
-            relationship_type_str = edge.relationship_type.value if hasattr(edge.relationship_type, 'value') else str(edge.relationship_type)
-            edge_id = f"{edge.source_id}-{edge.target_id}-{relationship_type_str}-{edge_counter}"
-            
-            # Calculate risk weight based on relationship type
-            risk_weight = 0.5  # Default
-            
-            # High-risk relationship types
-            if relationship_type_str in ['confirmed_same_entity', 'business_associate_suspected', 'potential_beneficial_owner_of', 'transactional_counterparty_high_risk']:
-                risk_weight = 0.9
-            # Medium-risk relationship types  
-            elif relationship_type_str in ['director_of', 'ubo_of', 'parent_of_subsidiary', 'potential_duplicate']:
-                risk_weight = 0.7
-            # Low-risk relationship types
-            elif relationship_type_str in ['household_member', 'professional_colleague_public', 'social_media_connection_public']:
-                risk_weight = 0.3
-            
-            # Determine if the edge is bidirectional
-            is_bidirectional = getattr(edge, 'direction', 'directed') == 'bidirectional'
-            
-            return {
-                "id": edge_id,
-                "source": edge.source_id,
-                "target": edge.target_id,
-                "relationshipType": relationship_type_str,
-                "confidence": edge.confidence,
-                "weight": edge.weight,
-                "verified": edge.verified,
-                "active": True,
-                "riskWeight": risk_weight,
-                "bidirectional": is_bidirectional,
-                "direction": getattr(edge, 'direction', 'directed')
-            }
-        
-        # Transform data for frontend
+        # Transform data for frontend straight from the graph snapshot
         response_data = {
-            "nodes": [convert_node(node) for node in network_data.nodes],
-            "edges": [convert_edge(edge) for edge in network_data.edges],
+            **snapshot.to_frontend(node_enhancements),
             "metadata": {
                 "centerEntityId": network_data.center_entity_id,
                 "totalEntities": network_data.total_entities,
@@ -214,7 +187,7 @@ async def get_entity_network(
                 "relationship_distribution": []
             }
         
-        return response_data
+        return FastJSONResponse(response_data)
         
     except ValueError as e:
         # Handle specific entity not found error
@@ -261,9 +234,10 @@ async def get_network_centrality_analysis(
     try:
         logger.info(f"Performing centrality analysis for entity {entity_id}, type: {centrality_type}")
         
-        # Get centrality analysis through enhanced service
+        # Analyse the entity's network (shared with the network tab via the view cache)
+        entity_ids = await _network_member_ids(network_analysis_service, entity_id, max_depth=network_scope)
         centrality_results = await network_analysis_service.analyze_network_centrality(
-            entity_ids=[entity_id]  # Service expects a list of entity IDs
+            entity_ids=entity_ids
         )
         
         logger.info(f"Centrality analysis completed for entity {entity_id}")
@@ -368,9 +342,10 @@ async def get_network_community_detection(
     try:
         logger.info(f"Detecting communities in network for entity {entity_id}, algorithm: {community_algorithm}")
         
-        # Get community detection through enhanced service
+        # Analyse the entity's network (shared with the network tab via the view cache)
+        entity_ids = await _network_member_ids(network_analysis_service, entity_id)
         community_results = await network_analysis_service.detect_network_communities(
-            entity_ids=[entity_id],  # Service expects a list of entity IDs
+            entity_ids=entity_ids,
             min_community_size=min_community_size
         )
         
@@ -479,16 +454,20 @@ async def get_network_visualization_data(
         logger.info(f"Preparing visualization data for entity {entity_id}, layout: {layout_algorithm}")
         
         # Get visualization data through enhanced service
-        visualization_data = await network_analysis_service.prepare_network_visualization(
-            entity_id=entity_id,
+        query_params = NetworkQueryParams(center_entity_id=entity_id, min_confidence=0.5)
+        if optimize_for_size:
+            query_params.max_entities = optimize_for_size
+        visualization_data = await network_analysis_service.prepare_network_for_visualization(
+            query_params=query_params,
             layout_algorithm=layout_algorithm,
-            include_styling=include_styling,
-            optimize_for_size=optimize_for_size
+            include_styling=include_styling
         )
+        if not visualization_data.get("success"):
+            raise RuntimeError(visualization_data.get("error", "visualization preparation failed"))
         
         logger.info(f"Visualization data prepared for entity {entity_id}")
         
-        return visualization_data
+        return FastJSONResponse(visualization_data["visualization_data"])
         
     except ValueError as e:
         logger.warning(f"Entity {entity_id} not found for visualization: {e}")
@@ -551,7 +530,7 @@ async def get_network_statistics(
         if include_advanced and network_data.total_entities > 0:
             try:
                 # Calculate true betweenness if requested
-                entity_ids = [node.entity_id for node in network_data.nodes]
+                entity_ids = list(network_data.snapshot.ids) if network_data.snapshot else [node.entity_id for node in network_data.nodes]
                 
                 # Get enhanced centrality analysis
                 centrality_results = await network_analysis_service.analyze_network_centrality(entity_ids)
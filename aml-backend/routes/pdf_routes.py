@@ -1,12 +1,30 @@
 """
 PDF Generation Routes - API endpoints for generating PDF reports
+
+- Single case reports, rendered off the event loop and streamed in chunks
+- Batch report jobs rendered into GridFS in the background (trigger + status + download)
+- Section fragment cache metrics
 """
 
+import asyncio
 import logging
-from fastapi import APIRouter, HTTPException, Response
-from pydantic import BaseModel
-from typing import Dict, Any, Optional
-from services.pdf_generation_service import get_pdf_generator
+from fastapi import APIRouter, BackgroundTasks, HTTPException, status
+from fastapi.responses import StreamingResponse
+from bson import ObjectId
+from bson.errors import InvalidId
+from gridfs.errors import NoFile
+from motor.motor_asyncio import AsyncIOMotorGridFSBucket
+from pydantic import BaseModel, Field
+from typing import Dict, Any, List, Optional
+from dependencies import DB_NAME, get_database, get_mongo_client
+from services.pdf_generation_service import (
+    BATCHES_COLLECTION,
+    REPORTS_BUCKET,
+    create_report_batch,
+    get_pdf_generator,
+    iter_spool,
+    run_report_batch,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -23,45 +41,112 @@ class PDFReportRequest(BaseModel):
     workflowSummary: Optional[Dict[str, Any]] = None
 
 
+class PDFBatchReportRequest(BaseModel):
+    """Request model for a background batch of PDF reports"""
+    cases: List[PDFReportRequest] = Field(..., min_items=1, max_items=100)
+
+
 @router.post("/generate-case-report")
 async def generate_case_report(request: PDFReportRequest):
     """
     Generate a PDF report for a case investigation
-    
+
     Args:
         request: Case data including workflow and investigation details
-        
+
     Returns:
-        PDF file as binary response
+        PDF file streamed as a binary response
     """
     try:
         logger.info(f"Generating PDF report for case: {request.caseId}")
-        
+
         # Convert request to dict for PDF generator
         case_data = request.dict()
-        
+
         # Get PDF generator service
         pdf_generator = get_pdf_generator()
-        
-        # Generate PDF
-        pdf_bytes = pdf_generator.generate_case_report(case_data)
-        
-        # Return PDF as response
+
+        # Render into a spooled file without blocking the event loop
+        spool = await asyncio.to_thread(pdf_generator.render_to_spool, case_data)
+        size = spool.seek(0, 2)
+        spool.seek(0)
+
+        # Stream PDF as response
         filename = f"case_report_{request.caseId}.pdf"
-        
-        return Response(
-            content=pdf_bytes,
+
+        return StreamingResponse(
+            iter_spool(spool),
             media_type="application/pdf",
             headers={
                 "Content-Disposition": f"attachment; filename={filename}",
-                "Content-Type": "application/pdf",
-                "Content-Length": str(len(pdf_bytes))
+                "Content-Length": str(size)
             }
         )
-        
+
     except Exception as e:
         logger.error(f"Failed to generate PDF report: {e}", exc_info=True)
         raise HTTPException(
             status_code=500,
             detail=f"Failed to generate PDF report: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+
+@router.post("/case-reports/batch", status_code=status.HTTP_202_ACCEPTED)
+async def generate_case_report_batch(request: PDFBatchReportRequest, background_tasks: BackgroundTasks):
+    """Render a batch of case reports into GridFS in the background, one case at a time"""
+    db = get_mongo_client()[DB_NAME]
+    cases = [case.dict() for case in request.cases]
+    batch_id = await asyncio.to_thread(create_report_batch, db, [case["caseId"] for case in cases])
+    background_tasks.add_task(run_report_batch, db, batch_id, cases)
+    return {
+        "accepted": True,
+        "batch_id": batch_id,
+        "total": len(cases),
+        "status_endpoint": f"/pdf/case-reports/batch/{batch_id}",
+    }
+
+
+@router.get("/case-reports/batch/{batch_id}")
+async def get_case_report_batch(batch_id: str):
+    """Batch progress and the GridFS file id of each rendered report"""
+    batch = await get_database()[BATCHES_COLLECTION].find_one({"_id": batch_id})
+    if not batch:
+        raise HTTPException(status_code=404, detail=f"Report batch {batch_id} not found")
+    for report in batch.get("reports", []):
+        if report.get("fileId"):
+            report["download_endpoint"] = f"/pdf/case-reports/{report['fileId']}"
+    return batch
+
+
+@router.get("/case-reports/{file_id}")
+async def download_case_report(file_id: str):
+    """Stream a batch-rendered report from GridFS"""
+    try:
+        bucket = AsyncIOMotorGridFSBucket(get_database(), bucket_name=REPORTS_BUCKET)
+        grid_out = await bucket.open_download_stream(ObjectId(file_id))
+    except InvalidId:
+        raise HTTPException(status_code=400, detail=f"Invalid report id: {file_id}")
+    except NoFile:
+        raise HTTPException(status_code=404, detail=f"Report {file_id} not found")
+
+    async def chunks():
+        while True:
+            chunk = await grid_out.readchunk()
+            if not chunk:
+                break
+            yield chunk
+
+    return StreamingResponse(
+        chunks(),
+        media_type="application/pdf",
+        headers={
+            "Content-Disposition": f"attachment; filename={grid_out.filename}",
+            "Content-Length": str(grid_out.length)
+        }
+    )
+
+
+@router.get("/metrics")
+async def get_pdf_metrics():
+    """Section fragment cache counters"""
+    return {"fragment_cache": get_pdf_generator().fragments.metrics()}
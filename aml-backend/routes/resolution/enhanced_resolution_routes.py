@@ -1074,7 +1074,7 @@ async def analyze_hybrid_search_network_risk(
                         "type": node.entity_type,
                         "riskLevel": node.risk_level.value if hasattr(node.risk_level, 'value') else str(node.risk_level),
                         "riskScore": getattr(node, 'risk_score', 0) * 100,  # Convert to 0-100 scale
-                        "isCenter": getattr(node, 'is_center', False),
+                        "isCenter": node.attributes.get("is_center", False),
                         "connectionCount": getattr(node, 'connection_count', 0),
                         "entityType": node.entity_type
                     })
@@ -9,6 +9,7 @@ These routes provide:
 - Autocomplete using the dedicated name.full field
 - Advanced faceted search with numeric range filtering  
 - Identifier-specific search functionality
+- Local phonetic / edit-distance name screening (no Atlas round trip)
 - Facet values and analytics endpoints
 """
 
@@ -19,8 +20,9 @@ from typing import List, Optional, Dict, Any
 from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel, Field
 
-from services.dependencies import get_entity_search_service
+from services.dependencies import get_entity_search_service, get_matching_service
 from services.search.entity_search_service import EntitySearchService
+from services.core.matching_service import MatchingService
 
 logger = logging.getLogger(__name__)
 
@@ -323,6 +325,47 @@ async def search_by_identifier(
             detail="Internal server error during identifier search"
         )
 
+@router.get("/fuzzy_name", response_model=EntitySearchResponse)
+async def screen_name(
+    name: str = Query(..., min_length=2, description="Name to screen"),
+    entity_type: Optional[str] = Query(None, description="Entity type filter (individual, organization)"),
+    min_score: float = Query(0.7, ge=0.0, le=1.0, description="Minimum name score"),
+    limit: int = Query(10, ge=1, le=100, description="Maximum results"),
+    matching_service: MatchingService = Depends(get_matching_service)
+):
+    """
+    Fuzzy name screening against the indexed phonetic codes
+    
+    Candidates sharing a Double Metaphone code or the normalised token
+    signature are scored locally (token-aligned Jaro-Winkler blended with
+    Damerau-Levenshtein). Each result carries its score breakdown:
+    aligned tokens, unmatched tokens, edit distance and phonetic overlap.
+    """
+    try:
+        start_time = datetime.now()
+        results = await matching_service.screen_name(name, entity_type, limit, min_score)
+        
+        metadata = {
+            "search_type": "fuzzy_name",
+            "name": name,
+            "entity_type": entity_type,
+            "min_score": min_score,
+            "search_time_ms": round((datetime.now() - start_time).total_seconds() * 1000, 1)
+        }
+        
+        return EntitySearchResponse(
+            success=True,
+            data={"results": results, "total_count": len(results)},
+            metadata=metadata
+        )
+        
+    except Exception as e:
+        logger.error(f"Fuzzy name screening failed: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail="Internal server error during name screening"
+        )
+
 @router.get("/facets", response_model=FacetsResponse)
 async def get_available_facets(
     entity_search_service: EntitySearchService = Depends(get_entity_search_service)
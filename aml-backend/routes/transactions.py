@@ -11,6 +11,7 @@ from typing import Optional
 from models.core.transaction import TransactionActivityResponse, TransactionNetwork
 from repositories.impl.transaction_repository import TransactionRepository
 from dependencies import get_database
+from utils.pagination import InvalidCursorError
 
 
 router = APIRouter(
@@ -36,6 +37,8 @@ async def get_entity_transactions(
     entity_id: str,
     limit: int = Query(50, ge=1, le=200, description="Number of transactions to return"),
     skip: int = Query(0, ge=0, description="Number of transactions to skip for pagination"),
+    cursor: Optional[str] = Query(None, description="Keyset continuation token (next_cursor from the previous page); replaces skip"),
+    count_mode: str = Query("cached", pattern="^(exact|cached|estimated)$", description="How total_count is computed"),
     repository: TransactionRepository = Depends(get_transaction_repository)
 ):
     """
@@ -43,16 +46,19 @@ async def get_entity_transactions(
     
     Returns transaction history showing sent and received transactions
     with counterparty information, amounts, risk scores, and metadata.
-    Uses existing MongoDB indexes for efficient querying.
+    Uses existing MongoDB indexes for efficient querying. Deep pages should
+    follow next_cursor (keyset pagination) instead of growing skip.
     """
     try:
         result = await repository.get_entity_transactions(
             entity_id=entity_id,
             limit=limit,
-            skip=skip
+            skip=skip,
+            cursor=cursor,
+            count_mode=count_mode
         )
         
-        if not result.transactions and skip == 0:
+        if not result.transactions and skip == 0 and not cursor:
             # No transactions found for this entity
             raise HTTPException(
                 status_code=404,
@@ -63,6 +69,8 @@ async def get_entity_transactions(
         
     except HTTPException:
         raise
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -74,19 +82,25 @@ async def get_entity_transactions(
 async def get_entity_transaction_network(
     entity_id: str,
     max_depth: int = Query(1, ge=1, le=4, description="Maximum network traversal depth"),
+    max_nodes: Optional[int] = Query(None, ge=2, le=2000, description="Optional node cap (highest-volume counterparties kept)"),
+    max_edges: Optional[int] = Query(None, ge=1, le=10000, description="Optional edge cap (highest-volume flows kept)"),
     repository: TransactionRepository = Depends(get_transaction_repository)
 ):
     """
     Get transaction network for an entity
     
-    Builds a network graph showing transaction flows between entities
-    using MongoDB $graphLookup for efficient traversal. Returns nodes
-    (entities with transaction metrics) and edges (transaction flows).
+    Builds a network graph showing transaction flows between entities,
+    expanding one frontier per hop and rolling up node/edge metrics with
+    a server-side $group. Returns nodes (entities with transaction metrics)
+    and edges (transaction flows). With max_nodes / max_edges the graph is
+    capped by volume and `truncated` / the pruned counts report what was dropped.
     """
     try:
         result = await repository.build_transaction_network(
             entity_id=entity_id,
-            max_depth=max_depth
+            max_depth=max_depth,
+            max_nodes=max_nodes,
+            max_edges=max_edges
         )
         
         if not result.nodes:
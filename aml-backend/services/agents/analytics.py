@@ -0,0 +1,302 @@
+"""
+Materialised investigation analytics.
+
+The investigations dashboard used to run a full-collection ``$facet`` on every
+refresh. Counters now live in the ``investigation_analytics`` collection and
+are maintained incrementally:
+
+* ``finalize_node`` calls ``record_finalized_case`` after persisting a case
+  (one ``bulk_write`` touching the totals document and that day's bucket).
+* ``reconcile_investigation_analytics`` recomputes everything from the
+  ``investigations`` collection and overwrites the materialised documents; it
+  runs periodically as a backstop for missed or racing increments.
+
+Documents:
+  {_id: "totals", total, by_status: {...}, by_typology: {...},
+   risk: {sum, count, min, max}, risk_histogram: {"0_9": n, ...},
+   updated_at, reconciled_at}
+  {_id: "day:YYYY-MM-DD", date, count, by_status: {...}, risk_sum, risk_count}
+
+Reads are a fixed number of ``_id`` lookups regardless of collection size.
+"""
+
+import asyncio
+import json
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from pymongo import UpdateOne
+
+logger = logging.getLogger(__name__)
+
+
+def _safe_int(env_key: str, default: int) -> int:
+    try:
+        return int(os.getenv(env_key, str(default)))
+    except (ValueError, TypeError):
+        return default
+
+
+ANALYTICS_COLLECTION = "investigation_analytics"
+RECONCILE_INTERVAL_SECONDS = _safe_int("ANALYTICS_RECONCILE_INTERVAL_SECONDS", 3600)
+SERIES_RETENTION_DAYS = _safe_int("ANALYTICS_SERIES_RETENTION_DAYS", 90)
+
+SERIES_WINDOWS = {"7d": 7, "30d": 30}
+_RECONCILE_WINDOW_DAYS = max(SERIES_WINDOWS.values())
+_TOTALS_ID = "totals"
+_TOP_TYPOLOGIES = 10
+
+
+def _field_key(value: str) -> str:
+    """Make a label safe to use as a sub-document field name."""
+    return str(value).replace(".", "_").lstrip("$") or "unknown"
+
+
+def _risk_bucket(score: float) -> str:
+    low = int(min(max(score, 0), 99) // 10) * 10
+    return f"{low}_{low + 9}"
+
+
+def _is_score(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _day_id(day: str) -> str:
+    return f"day:{day}"
+
+
+def _today() -> datetime:
+    return datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+# ── Incremental maintenance (sync, called from graph nodes) ──────────
+
+def record_finalized_case(db, case_document: dict) -> None:
+    """Add a freshly persisted case to the materialised counters."""
+    status = case_document.get("investigation_status") or "unknown"
+    typology = (case_document.get("typology") or {}).get("primary_typology")
+    score = (case_document.get("triage_decision") or {}).get("risk_score")
+    day = str(case_document.get("created_at") or _today().isoformat())[:10]
+    now = datetime.now(timezone.utc).isoformat()
+
+    totals_inc: Dict[str, Any] = {"total": 1, f"by_status.{_field_key(status)}": 1}
+    day_inc: Dict[str, Any] = {"count": 1, f"by_status.{_field_key(status)}": 1}
+    if typology:
+        totals_inc[f"by_typology.{_field_key(typology)}"] = 1
+    totals_update: Dict[str, Any] = {"$inc": totals_inc, "$set": {"updated_at": now}}
+    if _is_score(score):
+        totals_inc.update({"risk.sum": score, "risk.count": 1, f"risk_histogram.{_risk_bucket(score)}": 1})
+        totals_update["$min"] = {"risk.min": score}
+        totals_update["$max"] = {"risk.max": score}
+        day_inc.update({"risk_sum": score, "risk_count": 1})
+
+    db[ANALYTICS_COLLECTION].bulk_write([
+        UpdateOne({"_id": _TOTALS_ID}, totals_update, upsert=True),
+        UpdateOne({"_id": _day_id(day)}, {"$inc": day_inc, "$setOnInsert": {"date": day}}, upsert=True),
+    ], ordered=False)
+
+
+# ── Reconcile (async, full recompute) ────────────────────────────────
+
+def reconcile_pipeline(cutoff: str) -> List[dict]:
+    """The $facet pipeline that rebuilds every materialised document."""
+    score = "$triage_decision.risk_score"
+    return [
+        {"$facet": {
+            "by_status": [
+                {"$group": {"_id": "$investigation_status", "count": {"$sum": 1}}},
+            ],
+            "by_typology": [
+                {"$match": {"typology.primary_typology": {"$exists": True, "$ne": None}}},
+                {"$group": {"_id": "$typology.primary_typology", "count": {"$sum": 1}}},
+            ],
+            "risk": [
+                {"$match": {"$expr": {"$isNumber": score}}},
+                {"$group": {
+                    "_id": None,
+                    "sum": {"$sum": score},
+                    "count": {"$sum": 1},
+                    "min": {"$min": score},
+                    "max": {"$max": score},
+                }},
+            ],
+            "risk_histogram": [
+                {"$match": {"$expr": {"$isNumber": score}}},
+                {"$group": {
+                    "_id": {"$multiply": [
+                        {"$floor": {"$divide": [{"$min": [{"$max": [score, 0]}, 99]}, 10]}}, 10,
+                    ]},
+                    "count": {"$sum": 1},
+                }},
+            ],
+            "days": [
+                {"$match": {"created_at": {"$gte": cutoff}}},
+                {"$group": {
+                    "_id": {"day": {"$substrCP": ["$created_at", 0, 10]}, "status": "$investigation_status"},
+                    "count": {"$sum": 1},
+                    "risk_sum": {"$sum": {"$cond": [{"$isNumber": score}, score, 0]}},
+                    "risk_count": {"$sum": {"$cond": [{"$isNumber": score}, 1, 0]}},
+                }},
+                {"$group": {
+                    "_id": "$_id.day",
+                    "count": {"$sum": "$count"},
+                    "risk_sum": {"$sum": "$risk_sum"},
+                    "risk_count": {"$sum": "$risk_count"},
+                    "by_status": {"$push": {"k": {"$ifNull": ["$_id.status", "unknown"]}, "v": "$count"}},
+                }},
+            ],
+        }},
+    ]
+
+
+RECONCILE_PIPELINE_TEXT = json.dumps(reconcile_pipeline("<today - 30d>"), indent=2)
+
+
+async def reconcile_investigation_analytics(db) -> dict:
+    """Recompute the materialised analytics from the investigations collection."""
+    cutoff_day = _today() - timedelta(days=_RECONCILE_WINDOW_DAYS)
+    results = await db["investigations"].aggregate(reconcile_pipeline(cutoff_day.isoformat())).to_list(1)
+    facets = results[0] if results else {}
+    now = datetime.now(timezone.utc).isoformat()
+
+    by_status = {_field_key(r["_id"] or "unknown"): r["count"] for r in facets.get("by_status", [])}
+    risk = (facets.get("risk") or [{}])[0]
+    totals = {
+        "_id": _TOTALS_ID,
+        "total": sum(by_status.values()),
+        "by_status": by_status,
+        "by_typology": {_field_key(r["_id"]): r["count"] for r in facets.get("by_typology", [])},
+        "risk": {k: risk[k] for k in ("sum", "count", "min", "max") if k in risk},
+        "risk_histogram": {_risk_bucket(r["_id"]): r["count"] for r in facets.get("risk_histogram", [])},
+        "updated_at": now,
+        "reconciled_at": now,
+    }
+
+    coll = db[ANALYTICS_COLLECTION]
+    await coll.replace_one({"_id": _TOTALS_ID}, totals, upsert=True)
+
+    day_docs = [
+        {
+            "_id": _day_id(d["_id"]),
+            "date": d["_id"],
+            "count": d["count"],
+            "by_status": {_field_key(s["k"]): s["v"] for s in d["by_status"]},
+            "risk_sum": d["risk_sum"],
+            "risk_count": d["risk_count"],
+        }
+        for d in facets.get("days", []) if d.get("_id")
+    ]
+    if day_docs:
+        await coll.bulk_write(
+            [UpdateOne({"_id": d["_id"]}, {"$set": d}, upsert=True) for d in day_docs],
+            ordered=False,
+        )
+    window_start = cutoff_day.date().isoformat()
+    retention_start = (_today() - timedelta(days=SERIES_RETENTION_DAYS)).date().isoformat()
+    await coll.delete_many({"$or": [
+        {"date": {"$gte": window_start}, "_id": {"$nin": [d["_id"] for d in day_docs]}},
+        {"date": {"$lt": retention_start}},
+    ]})
+
+    logger.info("Investigation analytics reconciled: %d cases, %d day buckets", totals["total"], len(day_docs))
+    return {"total": totals["total"], "day_buckets": len(day_docs), "reconciled_at": now}
+
+
+async def run_reconcile_loop(db, interval_seconds: int = RECONCILE_INTERVAL_SECONDS) -> None:
+    """Reconcile on start-up and then every ``interval_seconds``."""
+    while True:
+        try:
+            await reconcile_investigation_analytics(db)
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            logger.warning("Investigation analytics reconcile failed: %s", exc)
+        await asyncio.sleep(interval_seconds)
+
+
+_reconcile_task: Optional[asyncio.Task] = None
+
+
+def start_reconcile_job(db) -> None:
+    """Start the periodic reconcile task (no-op when disabled or running)."""
+    global _reconcile_task
+    if RECONCILE_INTERVAL_SECONDS <= 0 or (_reconcile_task and not _reconcile_task.done()):
+        return
+    _reconcile_task = asyncio.create_task(run_reconcile_loop(db))
+
+
+async def stop_reconcile_job() -> None:
+    global _reconcile_task
+    if _reconcile_task is not None:
+        _reconcile_task.cancel()
+        await asyncio.gather(_reconcile_task, return_exceptions=True)
+        _reconcile_task = None
+
+
+# ── Read path ────────────────────────────────────────────────────────
+
+def _sorted_counts(counts: Dict[str, int], limit: Optional[int] = None) -> List[dict]:
+    items = sorted(
+        ({"_id": k, "count": v} for k, v in (counts or {}).items() if v > 0),
+        key=lambda i: i["count"], reverse=True,
+    )
+    return items[:limit] if limit else items
+
+
+async def get_investigation_analytics(db, series: Optional[str] = None) -> dict:
+    """Serve dashboard analytics from the materialised documents.
+
+    Reads the totals document plus at most one day bucket per day in the
+    requested window (``series`` of "7d" or "30d"), all by ``_id``.
+    """
+    coll = db[ANALYTICS_COLLECTION]
+    totals = await coll.find_one({"_id": _TOTALS_ID})
+    if totals is None:
+        await reconcile_investigation_analytics(db)
+        totals = await coll.find_one({"_id": _TOTALS_ID}) or {}
+
+    window = SERIES_WINDOWS.get(series or "", 0)
+    today = _today()
+    # recent_7d keeps its original meaning: cases since midnight seven days ago
+    days = [(today - timedelta(days=i)).date().isoformat() for i in range(max(window, 8))]
+    buckets = {
+        d["date"]: d
+        async for d in coll.find({"_id": {"$in": [_day_id(day) for day in days]}})
+    }
+
+    risk = totals.get("risk") or {}
+    risk_count = risk.get("count", 0)
+    response = {
+        "by_status": _sorted_counts(totals.get("by_status")),
+        "by_typology": _sorted_counts(totals.get("by_typology"), _TOP_TYPOLOGIES),
+        "risk_stats": {
+            "avg": round(risk["sum"] / risk_count, 1) if risk_count else None,
+            "max": risk.get("max"),
+            "min": risk.get("min"),
+            "total_scored": risk_count,
+        },
+        "risk_histogram": [
+            {"bucket": f"{low}-{low + 9}", "count": (totals.get("risk_histogram") or {}).get(f"{low}_{low + 9}", 0)}
+            for low in range(0, 100, 10)
+        ],
+        "recent_7d": sum(buckets.get(day, {}).get("count", 0) for day in days[:8]),
+        "updated_at": totals.get("updated_at"),
+        "reconciled_at": totals.get("reconciled_at"),
+    }
+
+    if window:
+        response["series"] = [
+            {
+                "date": day,
+                "count": buckets.get(day, {}).get("count", 0),
+                "by_status": {k: v for k, v in buckets.get(day, {}).get("by_status", {}).items() if v > 0},
+                "avg_risk": (
+                    round(buckets[day]["risk_sum"] / buckets[day]["risk_count"], 1)
+                    if buckets.get(day, {}).get("risk_count") else None
+                ),
+            }
+            for day in reversed(days[:window])
+        ]
+    return response
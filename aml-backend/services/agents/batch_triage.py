@@ -0,0 +1,301 @@
+"""
+Bulk alert intake with a deterministic batch pre-triage pass.
+
+Overnight monitoring runs produce thousands of alerts at once; scoring each
+one with the LLM triage node is slow and mostly confirms obvious negatives.
+``ingest_alerts`` instead:
+
+1. fetches features for every distinct entity in the batch with two grouped
+   queries (entity risk + watchlist matches, and per-entity transaction stats
+   from ``transactionsv2``),
+2. scores all alerts at once with vectorised rules,
+3. inserts the batch with a single ``insert_many``: clear negatives as
+   ``auto_closed`` (with the rule evidence), everything else as ``pending``
+   with ``priority`` = pre-triage score so the worker pool investigates the
+   riskiest alerts first.
+
+The LLM triage node still runs for every enqueued alert; it sees the
+pre-triage evidence in ``alert_data.pre_triage``.
+"""
+
+import logging
+import os
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def _safe_float(env_key: str, default: float) -> float:
+    try:
+        return float(os.getenv(env_key, str(default)))
+    except (ValueError, TypeError):
+        return default
+
+
+def _safe_int(env_key: str, default: int) -> int:
+    try:
+        return int(os.getenv(env_key, str(default)))
+    except (ValueError, TypeError):
+        return default
+
+
+RULES_VERSION = "pretriage-v1"
+
+# An alert is auto-closed only when every signal is clearly benign
+CLOSE_MAX_SCORE = _safe_float("PRETRIAGE_CLOSE_MAX_SCORE", 25)
+CLOSE_MAX_ENTITY_RISK = _safe_float("PRETRIAGE_CLOSE_MAX_ENTITY_RISK", 30)
+CLOSE_MAX_TXN_RISK = _safe_float("PRETRIAGE_CLOSE_MAX_TXN_RISK", 50)
+MAX_BULK_ALERTS = _safe_int("ALERT_BULK_MAX", 10_000)
+_ID_CHUNK = 1000
+
+# Score weights (sum to 100 before the watchlist floor)
+_W_ENTITY = 0.5
+_W_TXN_MAX = 0.3
+_W_FLAGGED = 20.0
+_FLAGGED_SATURATION = 5
+_WATCHLIST_FLOOR = 80.0
+
+
+class BulkIntakeMetrics:
+    """Cumulative counters for the bulk intake endpoint."""
+
+    def __init__(self):
+        self.batches = 0
+        self.received = 0
+        self.auto_closed = 0
+        self.enqueued = 0
+        self.last_batch: Dict[str, Any] = {}
+
+    def record(self, batch: Dict[str, Any]) -> None:
+        self.batches += 1
+        self.received += batch["received"]
+        self.auto_closed += batch["auto_closed"]
+        self.enqueued += batch["enqueued"]
+        self.last_batch = batch
+
+    def snapshot(self) -> dict:
+        return {
+            "batches": self.batches,
+            "alerts_received": self.received,
+            "auto_closed": self.auto_closed,
+            "enqueued": self.enqueued,
+            "auto_close_rate": round(self.auto_closed / self.received, 4) if self.received else None,
+            "last_batch": self.last_batch,
+        }
+
+
+metrics = BulkIntakeMetrics()
+
+
+# ── Feature fetch (grouped queries) ──────────────────────────────────
+
+def _chunks(items: List[str], size: int = _ID_CHUNK):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+async def _fetch_entity_features(db, entity_ids: List[str]) -> Dict[str, dict]:
+    features: Dict[str, dict] = {}
+    for chunk in _chunks(entity_ids):
+        cursor = db["entities"].find(
+            {"entityId": {"$in": chunk}},
+            {"_id": 0, "entityId": 1, "riskAssessment.overall.score": 1, "watchlistMatches.status": 1},
+        )
+        async for doc in cursor:
+            matches = doc.get("watchlistMatches") or []
+            features[doc["entityId"]] = {
+                "entity_risk": float(((doc.get("riskAssessment") or {}).get("overall") or {}).get("score") or 0),
+                "watchlist_hits": sum(1 for m in matches if m.get("status") not in ("dismissed", "cleared")),
+            }
+    return features
+
+
+async def _fetch_transaction_features(db, entity_ids: List[str]) -> Dict[str, dict]:
+    features: Dict[str, dict] = {}
+    for chunk in _chunks(entity_ids):
+        pipeline = [
+            {"$match": {"$or": [{"fromEntityId": {"$in": chunk}}, {"toEntityId": {"$in": chunk}}]}},
+            {"$project": {
+                "_id": 0,
+                "party": ["$fromEntityId", "$toEntityId"],
+                "riskScore": {"$ifNull": ["$riskScore", 0]},
+                "flagged": {"$cond": [{"$eq": ["$flagged", True]}, 1, 0]},
+            }},
+            {"$unwind": "$party"},
+            {"$match": {"party": {"$in": chunk}}},
+            {"$group": {
+                "_id": "$party",
+                "txn_count": {"$sum": 1},
+                "flagged_count": {"$sum": "$flagged"},
+                "max_txn_risk": {"$max": "$riskScore"},
+            }},
+        ]
+        async for row in db["transactionsv2"].aggregate(pipeline):
+            features[row["_id"]] = row
+    return features
+
+
+# ── Vectorised scoring ───────────────────────────────────────────────
+
+def score_alerts(entity_ids: List[str], entity_features: Dict[str, dict],
+                 txn_features: Dict[str, dict]) -> List[dict]:
+    """Score every alert in one pass; returns per-alert score, disposition and reasons."""
+    n = len(entity_ids)
+    known = np.fromiter((e in entity_features for e in entity_ids), dtype=bool, count=n)
+    entity_risk = np.fromiter(
+        (entity_features.get(e, {}).get("entity_risk", 0.0) for e in entity_ids), dtype=float, count=n)
+    watchlist = np.fromiter(
+        (entity_features.get(e, {}).get("watchlist_hits", 0) for e in entity_ids), dtype=float, count=n)
+    txn_max = np.fromiter(
+        (float(txn_features.get(e, {}).get("max_txn_risk") or 0) for e in entity_ids), dtype=float, count=n)
+    flagged = np.fromiter(
+        (txn_features.get(e, {}).get("flagged_count", 0) for e in entity_ids), dtype=float, count=n)
+    txn_count = np.fromiter(
+        (txn_features.get(e, {}).get("txn_count", 0) for e in entity_ids), dtype=float, count=n)
+
+    score = (
+        _W_ENTITY * entity_risk
+        + _W_TXN_MAX * txn_max
+        + _W_FLAGGED * np.minimum(flagged, _FLAGGED_SATURATION) / _FLAGGED_SATURATION
+    )
+    score = np.where(watchlist > 0, np.maximum(score, _WATCHLIST_FLOOR), score)
+    score = np.clip(score, 0, 100)
+
+    # Unknown entities are never auto-closed: missing data is not a negative
+    close = (
+        known
+        & (watchlist == 0)
+        & (flagged == 0)
+        & (entity_risk <= CLOSE_MAX_ENTITY_RISK)
+        & (txn_max <= CLOSE_MAX_TXN_RISK)
+        & (score <= CLOSE_MAX_SCORE)
+    )
+
+    results = []
+    for i in range(n):
+        reasons = []
+        if not known[i]:
+            reasons.append("entity not found")
+        if watchlist[i] > 0:
+            reasons.append(f"{int(watchlist[i])} watchlist match(es)")
+        if flagged[i] > 0:
+            reasons.append(f"{int(flagged[i])} flagged transaction(s)")
+        if entity_risk[i] > CLOSE_MAX_ENTITY_RISK:
+            reasons.append(f"entity risk {entity_risk[i]:.0f}")
+        if txn_max[i] > CLOSE_MAX_TXN_RISK:
+            reasons.append(f"max transaction risk {txn_max[i]:.0f}")
+        results.append({
+            "score": round(float(score[i]), 1),
+            "disposition": "auto_close" if close[i] else "investigate",
+            "reasons": reasons or ["no risk signals above thresholds"],
+            "features": {
+                "entity_risk": float(entity_risk[i]),
+                "watchlist_hits": int(watchlist[i]),
+                "txn_count": int(txn_count[i]),
+                "flagged_count": int(flagged[i]),
+                "max_txn_risk": float(txn_max[i]),
+            },
+            "rules_version": RULES_VERSION,
+        })
+    return results
+
+
+# ── Intake ───────────────────────────────────────────────────────────
+
+class QueueCapacityExceeded(Exception):
+    """The batch would enqueue more alerts than the worker queue has room for."""
+
+    def __init__(self, enqueued: int, capacity: int):
+        super().__init__(f"Batch would enqueue {enqueued} alerts but the investigation queue "
+                         f"has room for {capacity}")
+        self.enqueued = enqueued
+        self.capacity = capacity
+
+
+async def ingest_alerts(db, alerts: List[dict], pre_triage: bool = True,
+                        max_enqueued: Optional[int] = None) -> dict:
+    """Pre-triage and insert a batch of alerts; returns batch counts and timings.
+
+    With ``max_enqueued`` nothing is inserted, and ``QueueCapacityExceeded`` is
+    raised, when more than that many alerts would be queued as ``pending``
+    (auto-closed alerts do not count).
+    """
+    t0 = time.perf_counter()
+    now = datetime.now(timezone.utc)
+    batch_id = f"batch-{uuid.uuid4().hex[:10]}"
+
+    valid = [a for a in alerts if isinstance(a, dict) and a.get("entity_id")]
+    entity_ids = [a["entity_id"] for a in valid]
+
+    t_features = time.perf_counter()
+    if pre_triage and valid:
+        distinct = sorted(set(entity_ids))
+        entity_features = await _fetch_entity_features(db, distinct)
+        txn_features = await _fetch_transaction_features(db, distinct)
+        decisions = score_alerts(entity_ids, entity_features, txn_features)
+    else:
+        decisions = [None] * len(valid)
+    feature_ms = int((time.perf_counter() - t_features) * 1000)
+
+    docs = []
+    for alert, decision in zip(valid, decisions):
+        alert_type = alert.get("alert_type", "suspicious_activity")
+        alert_data = {
+            "entity_id": alert["entity_id"],
+            "alert_type": alert_type,
+            "submitted_at": now.isoformat(),
+            **{k: v for k, v in alert.items() if k not in ("entity_id", "alert_type", "priority")},
+        }
+        doc = {
+            "entity_id": alert["entity_id"],
+            "alert_type": alert_type,
+            "submitted_at": now,
+            "batch_id": batch_id,
+            "status": "pending",
+            "priority": alert.get("priority", 0),
+            "alert_data": alert_data,
+        }
+        if decision is not None:
+            alert_data["pre_triage"] = decision
+            doc["pre_triage"] = decision
+            if alert.get("priority") is None:
+                doc["priority"] = decision["score"]
+            if decision["disposition"] == "auto_close":
+                doc["status"] = "auto_closed"
+                doc["completed_at"] = now
+        docs.append(doc)
+
+    if max_enqueued is not None:
+        enqueued = sum(1 for d in docs if d["status"] == "pending")
+        if enqueued > max_enqueued:
+            raise QueueCapacityExceeded(enqueued, max(max_enqueued, 0))
+
+    t_insert = time.perf_counter()
+    if docs:
+        await db["alerts"].insert_many(docs, ordered=False)
+    insert_ms = int((time.perf_counter() - t_insert) * 1000)
+
+    auto_closed = sum(1 for d in docs if d["status"] == "auto_closed")
+    duration_s = time.perf_counter() - t0
+    batch = {
+        "batch_id": batch_id,
+        "received": len(alerts),
+        "rejected": len(alerts) - len(valid),
+        "auto_closed": auto_closed,
+        "enqueued": len(docs) - auto_closed,
+        "auto_close_rate": round(auto_closed / len(docs), 4) if docs else None,
+        "feature_fetch_ms": feature_ms,
+        "insert_ms": insert_ms,
+        "duration_ms": int(duration_s * 1000),
+        "alerts_per_second": round(len(docs) / duration_s, 1) if duration_s > 0 else None,
+        "rules_version": RULES_VERSION if pre_triage else None,
+    }
+    metrics.record(batch)
+    logger.info("Bulk intake %s: %d alerts, %d auto-closed, %d enqueued in %d ms",
+                batch_id, len(docs), auto_closed, batch["enqueued"], batch["duration_ms"])
+    return batch
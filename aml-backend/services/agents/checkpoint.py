@@ -0,0 +1,452 @@
+"""
+Async Motor-backed checkpointer for the investigation graph.
+
+``MongoDBSaver`` drives a synchronous ``MongoClient``, so every checkpoint
+round trip ties up a worker thread (or the event loop) while investigations
+stream over SSE. ``AsyncMongoDBCheckpointSaver`` talks to MongoDB through
+Motor and adds three optimisations for long investigations:
+
+  - Pending writes are buffered per checkpoint and flushed together with the
+    next ``aput`` (one ``bulk_write`` per superstep instead of one write per
+    task). Special channels (interrupt / error / resume) flush immediately so
+    a paused graph is always resumable.
+  - Serialised checkpoint and write blobs above ``CHECKPOINT_COMPRESS_MIN_BYTES``
+    are zlib-compressed.
+  - ``aprune_thread`` drops all but the latest checkpoint(s) for finalised
+    cases.
+
+Selected with ``CHECKPOINTER_MODE=async`` (default ``sync`` keeps MongoDBSaver).
+"""
+
+import asyncio
+import logging
+import os
+import random
+import zlib
+from typing import Any, AsyncIterator, Coroutine, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ASCENDING, DESCENDING, UpdateOne
+
+logger = logging.getLogger(__name__)
+
+
+def _safe_int(env_key: str, default: int) -> int:
+    try:
+        return int(os.getenv(env_key, str(default)))
+    except (ValueError, TypeError):
+        return default
+
+
+CHECKPOINTER_MODE = os.getenv("CHECKPOINTER_MODE", "sync").lower()
+COMPRESS_MIN_BYTES = _safe_int("CHECKPOINT_COMPRESS_MIN_BYTES", 16_384)
+MAX_BUFFERED_WRITES = _safe_int("CHECKPOINT_MAX_BUFFERED_WRITES", 256)
+
+_ZLIB_SUFFIX = "+zlib"
+
+
+def _encode(type_: str, payload: bytes) -> Tuple[str, bytes]:
+    """Compress a serialised blob when it is large enough to be worth it."""
+    if len(payload) >= COMPRESS_MIN_BYTES:
+        return type_ + _ZLIB_SUFFIX, zlib.compress(payload, 1)
+    return type_, payload
+
+
+def _decode(type_: str, payload: bytes) -> Tuple[str, bytes]:
+    if type_.endswith(_ZLIB_SUFFIX):
+        return type_[: -len(_ZLIB_SUFFIX)], zlib.decompress(payload)
+    return type_, payload
+
+
+def _metadata_index(metadata: dict) -> dict:
+    """Scalar metadata values kept in plain BSON so ``alist(filter=...)`` can match on them."""
+    return {
+        k: v for k, v in metadata.items()
+        if isinstance(v, (str, int, float, bool)) or v is None
+    }
+
+
+def current_loop() -> Optional[asyncio.AbstractEventLoop]:
+    """The event loop running in this thread, or None when called outside one."""
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+def run_on_loop(loop: Optional[asyncio.AbstractEventLoop], coro: Coroutine) -> Any:
+    """Run ``coro`` on ``loop`` from another thread and wait for the result.
+
+    Backs the sync halves of the Motor-based savers/stores: Motor objects are
+    bound to the loop that first used them, so the call cannot run on a new
+    loop, and blocking the loop's own thread would deadlock.
+    """
+    running = current_loop()
+    if loop is None or not loop.is_running() or running is loop:
+        coro.close()
+        raise asyncio.InvalidStateError(
+            "Synchronous calls must come from a worker thread while the event loop is running; "
+            "use the async API from the event loop itself"
+        )
+    return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+
+class AsyncMongoDBCheckpointSaver(BaseCheckpointSaver):
+    """Motor checkpoint saver with per-superstep write batching and blob compression."""
+
+    def __init__(
+        self,
+        db: AsyncIOMotorDatabase,
+        checkpoint_collection_name: str = "checkpoints_aio",
+        writes_collection_name: str = "checkpoint_writes_aio",
+        **kwargs: Any,
+    ):
+        super().__init__(**kwargs)
+        self.db = db
+        self.checkpoint_collection = db[checkpoint_collection_name]
+        self.writes_collection = db[writes_collection_name]
+        self._pending: Dict[Tuple[str, str, str], List[UpdateOne]] = {}
+        self._indexes_ready = False
+        self._index_lock = asyncio.Lock()
+        # Built on the app's loop, the sync API works before any async call has run
+        self._loop: Optional[asyncio.AbstractEventLoop] = current_loop()
+        self.stats = {
+            "checkpoints_written": 0,
+            "write_batches": 0,
+            "writes_flushed": 0,
+            "bytes_raw": 0,
+            "bytes_stored": 0,
+        }
+
+    # ── Setup ─────────────────────────────────────────────────────────
+
+    async def _ensure_indexes(self) -> None:
+        # Motor is bound to the loop it runs on; the sync API submits work there
+        self._loop = asyncio.get_running_loop()
+        if self._indexes_ready:
+            return
+        async with self._index_lock:
+            if self._indexes_ready:
+                return
+            await self.checkpoint_collection.create_index(
+                [("thread_id", ASCENDING), ("checkpoint_ns", ASCENDING), ("checkpoint_id", DESCENDING)],
+                unique=True,
+            )
+            await self.writes_collection.create_index(
+                [("thread_id", ASCENDING), ("checkpoint_ns", ASCENDING), ("checkpoint_id", ASCENDING),
+                 ("task_id", ASCENDING), ("idx", ASCENDING)],
+                unique=True,
+            )
+            self._indexes_ready = True
+
+    # ── Version / serialisation helpers ───────────────────────────────
+
+    def get_next_version(self, current: Optional[str], channel: Any) -> str:
+        """Zero-padded string versions so they sort lexically (same scheme as InMemorySaver)."""
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        return f"{current_v + 1:032}.{random.random():016}"
+
+    def _dump(self, obj: Any) -> Tuple[str, bytes]:
+        type_, payload = self.serde.dumps_typed(obj)
+        stored_type, stored = _encode(type_, payload)
+        self.stats["bytes_raw"] += len(payload)
+        self.stats["bytes_stored"] += len(stored)
+        return stored_type, stored
+
+    def _load(self, type_: str, payload: bytes) -> Any:
+        return self.serde.loads_typed(_decode(type_, payload))
+
+    # ── Write buffering ───────────────────────────────────────────────
+
+    async def _flush(self, thread_id: Optional[str] = None) -> None:
+        """Flush buffered pending writes (for one thread, or all threads)."""
+        keys = [k for k in self._pending if thread_id is None or k[0] == thread_id]
+        # Taken out of the buffer so concurrent flushes do not send them twice
+        taken = {key: self._pending.pop(key) for key in keys}
+        ops: List[UpdateOne] = [op for key_ops in taken.values() for op in key_ops]
+        if not ops:
+            return
+        try:
+            await self._ensure_indexes()
+            await self.writes_collection.bulk_write(ops, ordered=False)
+        except BaseException:
+            # Upserts are idempotent, so the whole batch is retried on the next flush
+            for key, key_ops in taken.items():
+                self._pending[key] = key_ops + self._pending.get(key, [])
+            raise
+        self.stats["write_batches"] += 1
+        self.stats["writes_flushed"] += len(ops)
+
+    async def aflush(self) -> None:
+        """Flush every buffered write. Call on shutdown."""
+        await self._flush()
+
+    # ── BaseCheckpointSaver async API ─────────────────────────────────
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        await self._ensure_indexes()
+        configurable = config["configurable"]
+        thread_id = configurable["thread_id"]
+        checkpoint_ns = configurable.get("checkpoint_ns", "")
+        await self._flush(thread_id)
+
+        query = {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns}
+        checkpoint_id = get_checkpoint_id(config)
+        if checkpoint_id:
+            query["checkpoint_id"] = checkpoint_id
+
+        doc = await self.checkpoint_collection.find_one(query, sort=[("checkpoint_id", DESCENDING)])
+        if not doc:
+            return None
+        return await self._to_tuple(doc)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        await self._ensure_indexes()
+        query: Dict[str, Any] = {}
+        if config is not None:
+            configurable = config["configurable"]
+            query["thread_id"] = configurable["thread_id"]
+            await self._flush(configurable["thread_id"])
+            if configurable.get("checkpoint_ns") is not None:
+                query["checkpoint_ns"] = configurable["checkpoint_ns"]
+            if get_checkpoint_id(config):
+                query["checkpoint_id"] = get_checkpoint_id(config)
+        else:
+            await self._flush()
+        for key, value in (filter or {}).items():
+            query[f"metadata_index.{key}"] = value
+        if before is not None:
+            query["checkpoint_id"] = {"$lt": before["configurable"]["checkpoint_id"]}
+
+        cursor = self.checkpoint_collection.find(query).sort("checkpoint_id", DESCENDING)
+        if limit:
+            cursor = cursor.limit(limit)
+        async for doc in cursor:
+            yield await self._to_tuple(doc)
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        await self._ensure_indexes()
+        configurable = config["configurable"]
+        thread_id = configurable["thread_id"]
+        checkpoint_ns = configurable.get("checkpoint_ns", "")
+        checkpoint_id = checkpoint["id"]
+
+        type_, payload = self._dump(checkpoint)
+        full_metadata = get_checkpoint_metadata(config, metadata)
+        meta_type, meta_payload = self.serde.dumps_typed(full_metadata)
+
+        doc = {
+            "thread_id": thread_id,
+            "checkpoint_ns": checkpoint_ns,
+            "checkpoint_id": checkpoint_id,
+            "parent_checkpoint_id": configurable.get("checkpoint_id"),
+            "type": type_,
+            "checkpoint": payload,
+            "metadata_type": meta_type,
+            "metadata": meta_payload,
+            "metadata_index": _metadata_index(full_metadata),
+        }
+
+        # One round trip per superstep: buffered task writes + the new checkpoint
+        await asyncio.gather(
+            self._flush(thread_id),
+            self.checkpoint_collection.update_one(
+                {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint_id},
+                {"$set": doc},
+                upsert=True,
+            ),
+        )
+        self.stats["checkpoints_written"] += 1
+
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint_id,
+            }
+        }
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        configurable = config["configurable"]
+        thread_id = configurable["thread_id"]
+        checkpoint_ns = configurable.get("checkpoint_ns", "")
+        checkpoint_id = configurable["checkpoint_id"]
+        overwrite = all(channel in WRITES_IDX_MAP for channel, _ in writes)
+
+        ops = []
+        for idx, (channel, value) in enumerate(writes):
+            type_, payload = self._dump(value)
+            key = {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint_id,
+                "task_id": task_id,
+                "idx": WRITES_IDX_MAP.get(channel, idx),
+            }
+            fields = {"task_path": task_path, "channel": channel, "type": type_, "value": payload}
+            update = {"$set": fields} if overwrite else {"$setOnInsert": fields}
+            ops.append(UpdateOne(key, update, upsert=True))
+
+        buffer_key = (thread_id, checkpoint_ns, checkpoint_id)
+        self._pending.setdefault(buffer_key, []).extend(ops)
+
+        # Interrupt / error / resume writes may be the last thing a run persists
+        if overwrite or sum(len(v) for v in self._pending.values()) >= MAX_BUFFERED_WRITES:
+            await self._flush(thread_id)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        self._pending = {k: v for k, v in self._pending.items() if k[0] != thread_id}
+        await asyncio.gather(
+            self.checkpoint_collection.delete_many({"thread_id": thread_id}),
+            self.writes_collection.delete_many({"thread_id": thread_id}),
+        )
+
+    async def aprune_thread(self, thread_id: str, keep_last: int = 1) -> int:
+        """Delete all but the newest ``keep_last`` checkpoints (and their writes) per namespace.
+
+        Returns the number of checkpoints removed.
+        """
+        await self._flush(thread_id)
+        removed = 0
+        namespaces = await self.checkpoint_collection.distinct("checkpoint_ns", {"thread_id": thread_id})
+        for checkpoint_ns in namespaces:
+            keep = [
+                doc["checkpoint_id"]
+                async for doc in self.checkpoint_collection.find(
+                    {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns},
+                    {"checkpoint_id": 1},
+                ).sort("checkpoint_id", DESCENDING).limit(keep_last)
+            ]
+            stale = {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": {"$nin": keep}}
+            result, _ = await asyncio.gather(
+                self.checkpoint_collection.delete_many(stale),
+                self.writes_collection.delete_many(stale),
+            )
+            removed += result.deleted_count
+        logger.info("Pruned %d checkpoints for finalised thread %s", removed, thread_id)
+        return removed
+
+    # ── Sync API (delegates to the event loop) ────────────────────────
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return run_on_loop(self._loop, self.aget_tuple(config))
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        async def collect() -> List[CheckpointTuple]:
+            return [t async for t in self.alist(config, filter=filter, before=before, limit=limit)]
+
+        return iter(run_on_loop(self._loop, collect()))
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return run_on_loop(self._loop, self.aput(config, checkpoint, metadata, new_versions))
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        run_on_loop(self._loop, self.aput_writes(config, writes, task_id, task_path))
+
+    def delete_thread(self, thread_id: str) -> None:
+        run_on_loop(self._loop, self.adelete_thread(thread_id))
+
+    # ── Internals ─────────────────────────────────────────────────────
+
+    async def _to_tuple(self, doc: dict) -> CheckpointTuple:
+        thread_id = doc["thread_id"]
+        checkpoint_ns = doc["checkpoint_ns"]
+        checkpoint_id = doc["checkpoint_id"]
+
+        writes_cursor = self.writes_collection.find(
+            {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint_id}
+        ).sort([("task_id", ASCENDING), ("idx", ASCENDING)])
+        pending_writes = [
+            (w["task_id"], w["channel"], self._load(w["type"], w["value"]))
+            async for w in writes_cursor
+        ]
+
+        parent_config = None
+        if doc.get("parent_checkpoint_id"):
+            parent_config = {
+                "configurable": {
+                    "thread_id": thread_id,
+                    "checkpoint_ns": checkpoint_ns,
+                    "checkpoint_id": doc["parent_checkpoint_id"],
+                }
+            }
+
+        return CheckpointTuple(
+            config={
+                "configurable": {
+                    "thread_id": thread_id,
+                    "checkpoint_ns": checkpoint_ns,
+                    "checkpoint_id": checkpoint_id,
+                }
+            },
+            checkpoint=self._load(doc["type"], doc["checkpoint"]),
+            metadata=self.serde.loads_typed((doc["metadata_type"], doc["metadata"])),
+            parent_config=parent_config,
+            pending_writes=pending_writes,
+        )
+
+
+async def prune_finalised_checkpoints(checkpointer: Any, thread_id: str, keep_last: int = 1) -> int:
+    """Prune a finished thread's history when the active checkpointer supports it."""
+    prune = getattr(checkpointer, "aprune_thread", None)
+    if prune is None:
+        return 0
+    try:
+        return await prune(thread_id, keep_last=keep_last)
+    except Exception as exc:
+        logger.warning("Checkpoint pruning failed for %s: %s", thread_id, exc)
+        return 0
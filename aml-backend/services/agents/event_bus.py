@@ -0,0 +1,284 @@
+"""
+Shared change-stream event bus for the investigations / alerts WebSockets.
+
+One process-wide ``ChangeStreamEventBus`` owns a single change stream per
+watched collection (with resume tokens, so a dropped cursor picks up where it
+left off) and fans compact, pre-serialised payloads out to any number of
+WebSocket subscribers. A bounded latest-document snapshot per collection
+serves initial state without a query per connection, so 100 open dashboards
+cost one cursor per collection. When the oplog no longer holds the resume
+point (``ChangeStreamHistoryLost``), the stream restarts from now and the
+snapshot is re-read.
+"""
+
+import asyncio
+import json
+import logging
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from bson import ObjectId
+from pymongo.errors import OperationFailure
+
+from dependencies import get_database
+
+logger = logging.getLogger(__name__)
+
+_SNAPSHOT_SIZE = 20
+_SUBSCRIBER_QUEUE_SIZE = 256
+_MAX_BACKOFF_SECONDS = 30
+_CHANGE_STREAM_HISTORY_LOST = 286
+
+
+def _json_safe(value: Any) -> Any:
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _compact_investigation(doc: dict) -> dict:
+    typology = doc.get("typology") or {}
+    triage = doc.get("triage_decision") or {}
+    return {
+        "case_id": doc.get("case_id"),
+        "entity_id": doc.get("entity_id"),
+        "investigation_status": doc.get("investigation_status"),
+        "created_at": _json_safe(doc.get("created_at")),
+        "typology": typology.get("primary_typology"),
+        "triage_risk_score": triage.get("risk_score"),
+    }
+
+
+def _compact_alert(doc: dict) -> dict:
+    return {
+        "alert_id": _json_safe(doc.get("_id")),
+        "entity_id": doc.get("entity_id"),
+        "alert_type": doc.get("alert_type"),
+        "status": doc.get("status"),
+        "thread_id": doc.get("thread_id"),
+        "submitted_at": _json_safe(doc.get("submitted_at")),
+    }
+
+
+# collection -> (compact shaper, fields needed from fullDocument, snapshot key, status field)
+_COLLECTION_SPECS: Dict[str, tuple] = {
+    "investigations": (
+        _compact_investigation,
+        ("case_id", "entity_id", "investigation_status", "created_at",
+         "typology.primary_typology", "triage_decision.risk_score"),
+        "case_id",
+        "investigation_status",
+    ),
+    "alerts": (
+        _compact_alert,
+        ("_id", "entity_id", "alert_type", "status", "thread_id", "submitted_at"),
+        "alert_id",
+        "status",
+    ),
+}
+
+
+def _filter_attrs(collection: str, record: dict) -> Dict[str, Any]:
+    """Attributes subscribers can filter on, normalised across collections."""
+    status_field = _COLLECTION_SPECS[collection][3]
+    return {"entity_id": record.get("entity_id"), "status": record.get(status_field)}
+
+
+def _passes(filters: Dict[str, Any], attrs: Dict[str, Any]) -> bool:
+    return all(attrs.get(k) == v for k, v in filters.items())
+
+
+class BusEvent:
+    """A compact change event; each wire format is serialised at most once."""
+
+    __slots__ = ("collection", "operation_type", "record", "timestamp", "_rendered")
+
+    def __init__(self, collection: str, operation_type: str, record: dict):
+        self.collection = collection
+        self.operation_type = operation_type
+        self.record = record
+        self.timestamp = datetime.now(timezone.utc).isoformat()
+        self._rendered: Dict[str, str] = {}
+
+    def render(self, message_type: str) -> str:
+        text = self._rendered.get(message_type)
+        if text is None:
+            key = "investigation" if self.collection == "investigations" else "alert"
+            text = json.dumps({
+                "type": message_type,
+                "operationType": self.operation_type,
+                key: self.record,
+                "timestamp": self.timestamp,
+            })
+            self._rendered[message_type] = text
+        return text
+
+
+class Subscription:
+    """Bounded per-connection queue with collection and attribute filters."""
+
+    def __init__(self, collections: Set[str], filters: Dict[str, Any], maxsize: int = _SUBSCRIBER_QUEUE_SIZE):
+        self.collections = collections
+        self.filters = {k: v for k, v in filters.items() if v is not None}
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def matches(self, event: BusEvent) -> bool:
+        if event.collection not in self.collections:
+            return False
+        return _passes(self.filters, _filter_attrs(event.collection, event.record))
+
+    def offer(self, event: BusEvent) -> None:
+        """Enqueue without blocking the bus; slow consumers lose their oldest events."""
+        if self.queue.full():
+            try:
+                self.queue.get_nowait()
+                self.dropped += 1
+            except asyncio.QueueEmpty:
+                pass
+        self.queue.put_nowait(event)
+
+
+class ChangeStreamEventBus:
+    """Owns one change stream per collection and fans events out to subscribers."""
+
+    def __init__(self, collections: Iterable[str] = ("investigations", "alerts")):
+        self.collections = list(collections)
+        self._subscribers: List[Subscription] = []
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._resume_tokens: Dict[str, Any] = {}
+        self._snapshots: Dict[str, "OrderedDict[str, dict]"] = {c: OrderedDict() for c in self.collections}
+        self._start_lock = asyncio.Lock()
+        self.stats = {"events": 0, "cursor_restarts": 0, "history_lost": 0}
+
+    # ── Lifecycle ─────────────────────────────────────────────────────
+
+    async def ensure_started(self) -> None:
+        if self._tasks:
+            return
+        async with self._start_lock:
+            if self._tasks:
+                return
+            for collection in self.collections:
+                await self._prime_snapshot(collection)
+                self._tasks[collection] = asyncio.create_task(self._watch(collection))
+            logger.info("Change stream event bus started for %s", ", ".join(self.collections))
+
+    async def stop(self) -> None:
+        for task in self._tasks.values():
+            task.cancel()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+        self._tasks.clear()
+
+    async def _prime_snapshot(self, collection: str) -> None:
+        """One query per collection at start-up instead of one per connection."""
+        sort_fields = {"alerts": "submitted_at", "investigations": "created_at"}
+        shaper, _, key_field, _ = _COLLECTION_SPECS[collection]
+        cursor = get_database()[collection].find().sort(sort_fields.get(collection, "_id"), -1).limit(_SNAPSHOT_SIZE)
+        docs = [shaper(doc) async for doc in cursor]
+        snapshot = self._snapshots[collection]
+        snapshot.clear()
+        for record in reversed(docs):
+            snapshot[record.get(key_field)] = record
+
+    async def _watch(self, collection: str) -> None:
+        shaper, fields, key_field, _ = _COLLECTION_SPECS[collection]
+        pipeline = [
+            {"$match": {"operationType": {"$in": ["insert", "update", "replace"]}}},
+            {"$project": {
+                "operationType": 1,
+                **{f"fullDocument.{field}": 1 for field in fields},
+            }},
+        ]
+        backoff = 1
+        while True:
+            try:
+                coll = get_database()[collection]
+                async with coll.watch(
+                    pipeline=pipeline,
+                    full_document="updateLookup",
+                    resume_after=self._resume_tokens.get(collection),
+                ) as stream:
+                    backoff = 1
+                    async for change in stream:
+                        self._resume_tokens[collection] = stream.resume_token
+                        doc = change.get("fullDocument")
+                        if not doc:
+                            continue
+                        record = shaper(doc)
+                        self._publish(BusEvent(collection, change["operationType"], record), key_field)
+            except asyncio.CancelledError:
+                raise
+            except OperationFailure as exc:
+                self.stats["cursor_restarts"] += 1
+                if exc.code != _CHANGE_STREAM_HISTORY_LOST:
+                    logger.warning("Change stream on %s interrupted (%s); resuming in %ss", collection, exc, backoff)
+                    await asyncio.sleep(backoff)
+                    backoff = min(backoff * 2, _MAX_BACKOFF_SECONDS)
+                    continue
+                # The resume point fell off the oplog: start from now and re-read current state
+                self.stats["history_lost"] += 1
+                logger.warning("Change stream history lost on %s; restarting from a fresh snapshot", collection)
+                self._resume_tokens.pop(collection, None)
+                try:
+                    await self._prime_snapshot(collection)
+                except Exception as snapshot_exc:
+                    logger.warning("Failed to re-read %s snapshot: %s", collection, snapshot_exc)
+            except Exception as exc:
+                self.stats["cursor_restarts"] += 1
+                logger.warning("Change stream on %s interrupted (%s); resuming in %ss", collection, exc, backoff)
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, _MAX_BACKOFF_SECONDS)
+
+    def _publish(self, event: BusEvent, key_field: str) -> None:
+        self.stats["events"] += 1
+        snapshot = self._snapshots[event.collection]
+        key = event.record.get(key_field)
+        snapshot.pop(key, None)
+        snapshot[key] = event.record
+        while len(snapshot) > _SNAPSHOT_SIZE:
+            snapshot.popitem(last=False)
+        for sub in self._subscribers:
+            if sub.matches(event):
+                sub.offer(event)
+
+    # ── Subscriber API ────────────────────────────────────────────────
+
+    async def subscribe(self, collections: Iterable[str], **filters: Any) -> Subscription:
+        await self.ensure_started()
+        sub = Subscription(set(collections), filters)
+        self._subscribers.append(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        if sub in self._subscribers:
+            self._subscribers.remove(sub)
+
+    def snapshot(self, collection: str, sub: Optional[Subscription] = None) -> List[dict]:
+        """Latest records for a collection, newest first, honouring the subscriber's filters."""
+        records = list(reversed(self._snapshots.get(collection, {}).values()))
+        if sub is None or not sub.filters:
+            return records
+        return [r for r in records if _passes(sub.filters, _filter_attrs(collection, r))]
+
+    def metrics(self) -> dict:
+        return {
+            **self.stats,
+            "subscribers": len(self._subscribers),
+            "dropped_events": sum(s.dropped for s in self._subscribers),
+            "cursors": len(self._tasks),
+        }
+
+
+_bus: Optional[ChangeStreamEventBus] = None
+
+
+def get_event_bus() -> ChangeStreamEventBus:
+    """Process-wide event bus singleton."""
+    global _bus
+    if _bus is None:
+        _bus = ChangeStreamEventBus()
+    return _bus
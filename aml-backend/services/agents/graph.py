@@ -6,7 +6,7 @@ Combines:
   - Send-based parallel fan-out (data gathering, sub-investigations)
   - Parallel analysis nodes (network_analyst || temporal_analyst)
   - interrupt_before for durable human-in-the-loop review
-  - MongoDBSaver for persistent checkpointing
+  - MongoDBSaver (or the async Motor saver) for persistent checkpointing
 """
 
 import logging
@@ -16,6 +16,7 @@ from pymongo import MongoClient
 from langgraph.graph import StateGraph, START, END
 from langgraph.checkpoint.mongodb import MongoDBSaver
 
+from services.agents.checkpoint import AsyncMongoDBCheckpointSaver, CHECKPOINTER_MODE
 from services.agents.memory import get_memory_store
 from services.agents.state import InvestigationState
 from services.agents.nodes.triage import triage_node, auto_close_node
@@ -127,6 +128,22 @@ def build_investigation_graph() -> StateGraph:
 
 
 _compiled_graph = None
+_checkpointer = None
+
+
+def get_checkpointer():
+    """Checkpointer singleton: MongoDBSaver (default) or the Motor saver when CHECKPOINTER_MODE=async."""
+    global _checkpointer
+    if _checkpointer is None:
+        db_name = os.getenv("DB_NAME", "fsi-threatsight360")
+        if CHECKPOINTER_MODE == "async":
+            from dependencies import get_motor_client
+            _checkpointer = AsyncMongoDBCheckpointSaver(get_motor_client()[db_name])
+            logger.info("Using AsyncMongoDBCheckpointSaver for investigation checkpoints")
+        else:
+            client = MongoClient(MONGODB_URI)
+            _checkpointer = MongoDBSaver(client[db_name])
+    return _checkpointer
 
 
 def get_compiled_graph():
@@ -134,9 +151,7 @@ def get_compiled_graph():
     global _compiled_graph
     if _compiled_graph is None:
         builder = build_investigation_graph()
-        client = MongoClient(MONGODB_URI)
-        db = client[os.getenv("DB_NAME", "fsi-threatsight360")]
-        checkpointer = MongoDBSaver(db)
+        checkpointer = get_checkpointer()
         store = get_memory_store()
         compile_kwargs = {
             "checkpointer": checkpointer,
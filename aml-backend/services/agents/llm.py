@@ -2,14 +2,15 @@
 LLM configuration for the agentic investigation pipeline.
 
 The model is controlled by the LLM_MODEL_ARN env var and defaults to
-Haiku 4.5 via a tagged application inference profile.
+Haiku 4.5 via a tagged application inference profile. Calls from agent
+nodes go through services.agents.llm_gateway (concurrency, throttling,
+retries, metrics).
 """
 
 import os
 import logging
 
 from langchain_aws import ChatBedrockConverse
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception
 
 logger = logging.getLogger(__name__)
 
@@ -55,29 +56,32 @@ def get_llm() -> ChatBedrockConverse:
     return _llm_instance
 
 
-def _is_retryable(exc: BaseException) -> bool:
-    """Return True for transient Bedrock / network errors worth retrying."""
-    # Handle botocore ClientError by inspecting the error code
+_THROTTLING_CODES = ("ThrottlingException", "TooManyRequestsException")
+_TRANSIENT_CODES = _THROTTLING_CODES + ("ServiceUnavailableException", "ModelTimeoutException")
+
+
+def _error_code(exc: BaseException) -> str:
+    # botocore ClientError carries the code in its response; SDK-specific
+    # exception classes are named after it
     resp = getattr(exc, "response", None)
     if resp and isinstance(resp, dict):
         code = resp.get("Error", {}).get("Code", "")
-        if code in ("ThrottlingException", "ServiceUnavailableException",
-                     "ModelTimeoutException", "TooManyRequestsException"):
-            return True
+        if code:
+            return code
+    return type(exc).__name__
+
 
-    name = type(exc).__name__
-    if name in ("ThrottlingException", "ServiceUnavailableException", "ModelTimeoutException"):
+def is_throttling(exc: BaseException) -> bool:
+    """Return True when Bedrock rejected the call for exceeding rate / token quotas."""
+    if _error_code(exc) in _THROTTLING_CODES:
         return True
     msg = str(exc).lower()
-    return any(kw in msg for kw in ("throttl", "timeout", "rate exceeded", "service unavailable"))
+    return any(kw in msg for kw in ("throttl", "rate exceeded", "too many requests"))
 
 
-@retry(
-    retry=retry_if_exception(_is_retryable),
-    stop=stop_after_attempt(3),
-    wait=wait_exponential(multiplier=1, min=2, max=15),
-    reraise=True,
-)
-def invoke_with_retry(llm, messages):
-    """Invoke an LLM (or structured-output wrapper) with retry on transient errors."""
-    return llm.invoke(messages)
+def is_retryable(exc: BaseException) -> bool:
+    """Return True for transient Bedrock / network errors worth retrying."""
+    if _error_code(exc) in _TRANSIENT_CODES or is_throttling(exc):
+        return True
+    msg = str(exc).lower()
+    return any(kw in msg for kw in ("timeout", "service unavailable"))
@@ -0,0 +1,192 @@
+"""Structured-output response cache for deterministic agent steps.
+
+Triage, case assembly / typology classification and validation often see
+byte-identical inputs: an alert re-run, a resumed investigation, the seeded
+demo entities investigated again. Their parsed structured outputs are cached
+under
+
+    sha256(model id, node, PROMPT_VERSION, output schema, canonical messages)
+
+The messages are the already-truncated payloads the node sends, serialised
+with sorted keys, so any change to evidence, prompt text or schema is a miss.
+Lookups go through an in-process LRU and then the ``llm_response_cache``
+collection, whose documents expire via a TTL index (LLM_CACHE_TTL_SECONDS).
+Only successfully parsed results are stored.
+
+Nodes listed in LLM_CACHE_SKIP_NODES always call the model.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Any, Optional
+
+from langchain_core.messages import AIMessage
+from pymongo import ASCENDING
+
+from dependencies import get_database
+from services.agents.llm import extract_token_usage
+from services.agents.prompts import PROMPT_VERSION
+
+logger = logging.getLogger(__name__)
+
+
+def _safe_int(env_key: str, default: int) -> int:
+    try:
+        return int(os.getenv(env_key, str(default)))
+    except (ValueError, TypeError):
+        return default
+
+
+CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+CACHE_TTL_SECONDS = _safe_int("LLM_CACHE_TTL_SECONDS", 7 * 24 * 3600)
+_LOCAL_MAX_ENTRIES = _safe_int("LLM_CACHE_LOCAL_SIZE", 256)
+SKIP_NODES = frozenset(n.strip() for n in os.getenv("LLM_CACHE_SKIP_NODES", "").split(",") if n.strip())
+
+CACHE_COLLECTION = "llm_response_cache"
+
+
+def _canonical_messages(messages) -> list:
+    return [
+        {"type": getattr(m, "type", type(m).__name__), "content": getattr(m, "content", m)}
+        for m in messages
+    ]
+
+
+@lru_cache(maxsize=64)
+def _schema_fingerprint(schema) -> str:
+    text = json.dumps(schema.model_json_schema(), sort_keys=True)
+    return f"{schema.__name__}:{hashlib.sha256(text.encode('utf-8')).hexdigest()[:16]}"
+
+
+def cache_key(model_id: str, node: str, schema, messages) -> str:
+    payload = json.dumps({
+        "model": model_id,
+        "node": node,
+        "prompt_version": PROMPT_VERSION,
+        "schema": _schema_fingerprint(schema),
+        "messages": _canonical_messages(messages),
+    }, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """LRU front over a TTL'd MongoDB collection of parsed structured outputs."""
+
+    def __init__(self, max_entries: int = _LOCAL_MAX_ENTRIES, ttl_seconds: int = CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._local: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+        self._indexes_ready = False
+        self.stats = {"hits_local": 0, "hits_db": 0, "misses": 0, "stores": 0, "errors": 0,
+                      "input_tokens_saved": 0, "output_tokens_saved": 0}
+
+    def enabled_for(self, node: str) -> bool:
+        return CACHE_ENABLED and node not in SKIP_NODES
+
+    async def _collection(self):
+        coll = get_database()[CACHE_COLLECTION]
+        if not self._indexes_ready:
+            await coll.create_index([("expires_at", ASCENDING)], expireAfterSeconds=0)
+            self._indexes_ready = True
+        return coll
+
+    async def get(self, key: str, schema) -> Optional[dict]:
+        """Cached result in include_raw shape, or None."""
+        entry = self._local.get(key)
+        if entry and entry[0] > time.time():
+            self._local.move_to_end(key)
+            self.stats["hits_local"] += 1
+            return self._result(key, entry[1], schema)
+        if entry:
+            self._local.pop(key, None)
+
+        try:
+            coll = await self._collection()
+            doc = await coll.find_one({"_id": key, "expires_at": {"$gt": datetime.now(timezone.utc)}})
+        except Exception as exc:
+            self.stats["errors"] += 1
+            logger.warning("LLM cache lookup failed: %s", exc)
+            doc = None
+        if not doc:
+            self.stats["misses"] += 1
+            return None
+        self.stats["hits_db"] += 1
+        self._remember(key, doc, doc["expires_at"])
+        return self._result(key, doc, schema)
+
+    async def put(self, key: str, node: str, model_id: str, result: dict) -> None:
+        parsed = result.get("parsed") if isinstance(result, dict) else None
+        if parsed is None or result.get("parsing_error"):
+            return
+        now = datetime.now(timezone.utc)
+        expires_at = now + timedelta(seconds=self.ttl_seconds)
+        doc = {
+            "node": node,
+            "model_id": model_id,
+            "prompt_version": PROMPT_VERSION,
+            "parsed": parsed.model_dump(mode="json"),
+            "token_usage": extract_token_usage(result.get("raw")),
+            "created_at": now,
+            "expires_at": expires_at,
+        }
+        self._remember(key, doc, expires_at)
+        try:
+            coll = await self._collection()
+            await coll.replace_one({"_id": key}, doc, upsert=True)
+            self.stats["stores"] += 1
+        except Exception as exc:
+            self.stats["errors"] += 1
+            logger.warning("LLM cache store failed: %s", exc)
+
+    def _remember(self, key: str, doc: dict, expires_at: datetime) -> None:
+        if expires_at.tzinfo is None:
+            expires_at = expires_at.replace(tzinfo=timezone.utc)
+        self._local[key] = (expires_at.timestamp(), doc)
+        self._local.move_to_end(key)
+        while len(self._local) > self.max_entries:
+            self._local.popitem(last=False)
+
+    def _result(self, key: str, doc: dict, schema) -> dict:
+        saved = doc.get("token_usage") or {}
+        self.stats["input_tokens_saved"] += saved.get("input_tokens", 0)
+        self.stats["output_tokens_saved"] += saved.get("output_tokens", 0)
+        return {
+            "raw": AIMessage(content="", usage_metadata={"input_tokens": 0, "output_tokens": 0, "total_tokens": 0}),
+            "parsed": schema.model_validate(doc["parsed"]),
+            "parsing_error": None,
+            "cache": {"hit": True, "key": key[:16], "tokens_saved": saved},
+        }
+
+    def metrics(self) -> dict:
+        hits = self.stats["hits_local"] + self.stats["hits_db"]
+        lookups = hits + self.stats["misses"]
+        return {
+            **self.stats,
+            "enabled": CACHE_ENABLED,
+            "skip_nodes": sorted(SKIP_NODES),
+            "hit_rate": round(hits / lookups, 4) if lookups else None,
+            "local_entries": len(self._local),
+            "ttl_seconds": self.ttl_seconds,
+        }
+
+
+_cache: Optional[LLMResponseCache] = None
+
+
+def get_llm_cache() -> LLMResponseCache:
+    global _cache
+    if _cache is None:
+        _cache = LLMResponseCache()
+    return _cache
+
+
+def cache_info(result: Any) -> dict:
+    """Audit-log fragment for a gateway result (hit flag and tokens saved)."""
+    info = result.get("cache") if isinstance(result, dict) else None
+    return info or {"hit": False}
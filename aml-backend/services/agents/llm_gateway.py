@@ -0,0 +1,287 @@
+"""Async LLM gateway shared by every agent node.
+
+Replaces the per-call synchronous tenacity retry. All Bedrock calls from the
+investigation graph go through ``ainvoke``:
+
+- one process-wide slot pool per model; waiters are admitted by priority
+  (INTERACTIVE before BACKGROUND, FIFO within a class), so an analyst
+  resuming a case is not queued behind the alert backlog
+- an adaptive rate controller per model shared by all callers: a
+  ThrottlingException halves the model's concurrency and pauses every caller
+  for a jittered, doubling cool-down; sustained successes grow concurrency
+  back one slot at a time (AIMD)
+- per-node call / token / latency / queue-wait metrics
+- optional structured-output response cache (``cache_schema``), see
+  services.agents.llm_cache
+
+Priority is taken from a context variable so the worker pool can mark whole
+graph runs without threading a parameter through every node::
+
+    with llm_priority(Priority.BACKGROUND):
+        async for chunk in graph.astream(...):
+            ...
+"""
+
+import asyncio
+import contextvars
+import heapq
+import itertools
+import logging
+import os
+import random
+import time
+from contextlib import contextmanager
+from enum import IntEnum
+from typing import Any, Iterator, Optional
+
+from services.agents.llm import extract_token_usage, get_model_id, is_retryable, is_throttling
+from services.agents.llm_cache import cache_key, get_llm_cache
+
+logger = logging.getLogger(__name__)
+
+
+def _safe_int(env_key: str, default: int) -> int:
+    try:
+        return int(os.getenv(env_key, str(default)))
+    except (ValueError, TypeError):
+        return default
+
+
+_MAX_CONCURRENCY = max(1, _safe_int("LLM_MAX_CONCURRENCY", 8))
+_MIN_CONCURRENCY = max(1, min(_MAX_CONCURRENCY, _safe_int("LLM_MIN_CONCURRENCY", 1)))
+_MAX_ATTEMPTS = max(1, _safe_int("LLM_MAX_ATTEMPTS", 4))
+_BASE_BACKOFF_SECONDS = 1.0
+_MAX_BACKOFF_SECONDS = 30.0
+
+
+class Priority(IntEnum):
+    INTERACTIVE = 0   # an analyst is waiting on the result
+    BACKGROUND = 1    # queued alert investigations
+
+
+_priority: contextvars.ContextVar[Priority] = contextvars.ContextVar("llm_priority", default=Priority.INTERACTIVE)
+
+
+@contextmanager
+def llm_priority(priority: Priority) -> Iterator[None]:
+    """Run LLM calls made in this context (and tasks it spawns) at ``priority``."""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+# ── Priority slots + adaptive rate control ───────────────────────────
+
+class ModelLane:
+    """Concurrency slots and throttle state for one model."""
+
+    def __init__(self, model_id: str):
+        self.model_id = model_id
+        self.limit = _MAX_CONCURRENCY
+        self.active = 0
+        self._waiters: list[tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._paused_until = 0.0
+        self._backoff = _BASE_BACKOFF_SECONDS
+        self._successes = 0
+        self.stats = {"throttles": 0, "limit_decreases": 0, "limit_increases": 0}
+
+    async def acquire(self, priority: Priority) -> None:
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+        else:
+            future = asyncio.get_running_loop().create_future()
+            heapq.heappush(self._waiters, (int(priority), next(self._seq), future))
+            try:
+                await future
+            except asyncio.CancelledError:
+                if future.done() and not future.cancelled():
+                    self.release()  # slot was handed over as we were cancelled
+                raise
+        # Throttled: every caller waits out the shared cool-down
+        delay = self._paused_until - time.monotonic()
+        if delay > 0:
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                self.release()
+                raise
+
+    def release(self) -> None:
+        self.active -= 1
+        self._wake()
+
+    def _wake(self) -> None:
+        while self._waiters and self.active < self.limit:
+            _, _, future = heapq.heappop(self._waiters)
+            if future.cancelled():
+                continue
+            self.active += 1
+            future.set_result(None)
+
+    def on_success(self) -> None:
+        self._backoff = _BASE_BACKOFF_SECONDS
+        self._successes += 1
+        if self.limit < _MAX_CONCURRENCY and self._successes >= self.limit:
+            self._successes = 0
+            self.limit += 1
+            self.stats["limit_increases"] += 1
+            self._wake()
+
+    def on_throttle(self) -> float:
+        """Halve concurrency and pause all callers; returns the pause length."""
+        now = time.monotonic()
+        self.stats["throttles"] += 1
+        self._successes = 0
+        if now >= self._paused_until:
+            # First throttle of this episode; concurrent failures share it
+            if self.limit > _MIN_CONCURRENCY:
+                self.limit = max(_MIN_CONCURRENCY, self.limit // 2)
+                self.stats["limit_decreases"] += 1
+            pause = self._backoff * (0.5 + random.random() / 2)
+            self._paused_until = now + pause
+            self._backoff = min(self._backoff * 2, _MAX_BACKOFF_SECONDS)
+            logger.warning("Bedrock throttling on %s: concurrency %d, pausing %.1fs",
+                           self.model_id, self.limit, pause)
+        return max(0.0, self._paused_until - now)
+
+    def snapshot(self) -> dict:
+        return {
+            **self.stats,
+            "limit": self.limit,
+            "max_limit": _MAX_CONCURRENCY,
+            "active": self.active,
+            "waiting": sum(1 for _, _, f in self._waiters if not f.cancelled()),
+            "paused_for_s": round(max(0.0, self._paused_until - time.monotonic()), 2),
+        }
+
+
+# ── Gateway ──────────────────────────────────────────────────────────
+
+def _empty_node_stats() -> dict:
+    return {
+        "calls": 0, "failures": 0, "retries": 0, "throttled": 0, "cache_hits": 0,
+        "input_tokens": 0, "output_tokens": 0, "input_tokens_saved": 0, "output_tokens_saved": 0,
+        "latency_ms_total": 0.0, "latency_ms_max": 0.0, "queue_ms_total": 0.0,
+        "by_priority": {p.name.lower(): 0 for p in Priority},
+    }
+
+
+class LLMGateway:
+    """Process-wide entry point for agent LLM calls."""
+
+    def __init__(self):
+        self._lanes: dict[str, ModelLane] = {}
+        self._nodes: dict[str, dict] = {}
+
+    def lane(self, model_id: str) -> ModelLane:
+        lane = self._lanes.get(model_id)
+        if lane is None:
+            lane = self._lanes[model_id] = ModelLane(model_id)
+        return lane
+
+    async def ainvoke(self, llm, messages, *, node: str, priority: Optional[Priority] = None,
+                      model_id: Optional[str] = None, cache_schema=None) -> Any:
+        """Invoke ``llm`` (a chat model or structured-output wrapper) asynchronously.
+
+        ``cache_schema`` (the pydantic output model of an ``include_raw``
+        structured-output call) makes the call cacheable for this node.
+        """
+        priority = _priority.get() if priority is None else priority
+        model_id = model_id or get_model_id()
+        stats = self._nodes.setdefault(node, _empty_node_stats())
+        stats["by_priority"][priority.name.lower()] += 1
+
+        cache = get_llm_cache()
+        key = None
+        if cache_schema is not None and cache.enabled_for(node):
+            key = cache_key(model_id, node, cache_schema, messages)
+            cached = await cache.get(key, cache_schema)
+            if cached is not None:
+                saved = cached["cache"]["tokens_saved"]
+                stats["cache_hits"] += 1
+                stats["input_tokens_saved"] += saved.get("input_tokens", 0)
+                stats["output_tokens_saved"] += saved.get("output_tokens", 0)
+                return cached
+
+        result = await self._call(self.lane(model_id), llm, messages, node, priority, stats)
+        if key is not None:
+            await cache.put(key, node, model_id, result)
+        return result
+
+    async def _call(self, lane: ModelLane, llm, messages, node: str, priority: Priority, stats: dict) -> Any:
+        for attempt in range(1, _MAX_ATTEMPTS + 1):
+            queued = time.perf_counter()
+            await lane.acquire(priority)
+            started = time.perf_counter()
+            stats["queue_ms_total"] += (started - queued) * 1000
+            try:
+                result = await llm.ainvoke(messages)
+            except Exception as exc:
+                if is_throttling(exc):
+                    stats["throttled"] += 1
+                    delay = lane.on_throttle()
+                elif is_retryable(exc):
+                    delay = min(_BASE_BACKOFF_SECONDS * 2 ** (attempt - 1), _MAX_BACKOFF_SECONDS)
+                else:
+                    stats["failures"] += 1
+                    raise
+                if attempt == _MAX_ATTEMPTS:
+                    stats["failures"] += 1
+                    raise
+                stats["retries"] += 1
+                logger.info("LLM call from %s failed (%s); retry %d/%d in %.1fs",
+                            node, type(exc).__name__, attempt, _MAX_ATTEMPTS - 1, delay)
+            else:
+                lane.on_success()
+                self._record(stats, result, (time.perf_counter() - started) * 1000)
+                return result
+            finally:
+                lane.release()
+            await asyncio.sleep(delay)
+
+    @staticmethod
+    def _record(stats: dict, result: Any, latency_ms: float) -> None:
+        raw = result.get("raw") if isinstance(result, dict) else result
+        usage = extract_token_usage(raw)
+        stats["calls"] += 1
+        stats["input_tokens"] += usage.get("input_tokens", 0)
+        stats["output_tokens"] += usage.get("output_tokens", 0)
+        stats["latency_ms_total"] += latency_ms
+        stats["latency_ms_max"] = max(stats["latency_ms_max"], latency_ms)
+
+    def metrics(self) -> dict:
+        nodes = {}
+        for node, stats in self._nodes.items():
+            calls = stats["calls"]
+            attempts = calls + stats["retries"] + stats["failures"]
+            nodes[node] = {
+                **stats,
+                "latency_ms_total": round(stats["latency_ms_total"], 1),
+                "latency_ms_max": round(stats["latency_ms_max"], 1),
+                "queue_ms_total": round(stats["queue_ms_total"], 1),
+                "latency_ms_avg": round(stats["latency_ms_total"] / calls, 1) if calls else None,
+                "queue_ms_avg": round(stats["queue_ms_total"] / attempts, 1) if attempts else None,
+            }
+        return {
+            "models": {model_id: lane.snapshot() for model_id, lane in self._lanes.items()},
+            "nodes": nodes,
+            "response_cache": get_llm_cache().metrics(),
+        }
+
+
+_gateway: Optional[LLMGateway] = None
+
+
+def get_llm_gateway() -> LLMGateway:
+    global _gateway
+    if _gateway is None:
+        _gateway = LLMGateway()
+    return _gateway
+
+
+async def ainvoke(llm, messages, *, node: str, priority: Optional[Priority] = None, cache_schema=None) -> Any:
+    """Shorthand for ``get_llm_gateway().ainvoke``."""
+    return await get_llm_gateway().ainvoke(llm, messages, node=node, priority=priority, cache_schema=cache_schema)
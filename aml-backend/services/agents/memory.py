@@ -1,7 +1,30 @@
-"""Cross-investigation long-term memory backed by MongoDBStore."""
+"""Cross-investigation long-term memory backed by MongoDBStore.
 
+With ``CHECKPOINTER_MODE=async`` the graph gets ``AsyncMongoDBMemoryStore``
+instead, a Motor-backed ``BaseStore`` that batches puts into one
+``bulk_write`` and never blocks the event loop.
+"""
+
+import asyncio
 import logging
 import os
+from datetime import datetime, timezone
+from typing import Iterable, List
+
+from langgraph.store.base import (
+    BaseStore,
+    GetOp,
+    Item,
+    ListNamespacesOp,
+    Op,
+    PutOp,
+    Result,
+    SearchItem,
+    SearchOp,
+)
+from pymongo import ASCENDING, DeleteOne, UpdateOne
+
+from services.agents.checkpoint import current_loop, run_on_loop
 
 logger = logging.getLogger(__name__)
 
@@ -11,10 +34,130 @@ MONGODB_URI = os.getenv("MONGODB_URI", "mongodb://localhost:27017")
 DB_NAME = os.getenv("DB_NAME", "fsi-threatsight360")
 
 
+class AsyncMongoDBMemoryStore(BaseStore):
+    """Motor implementation of the LangGraph store (get / put / filter search / namespaces).
+
+    Semantic ``query`` search is not supported; searches match on namespace
+    prefix and exact ``value.<field>`` filters.
+    """
+
+    def __init__(self, db, collection_name: str = "memory_store_aio"):
+        self.collection = db[collection_name]
+        self._indexes_ready = False
+        # Built on the app's loop, ``batch`` works before any async call has run
+        self._loop = current_loop()
+
+    async def _ensure_indexes(self) -> None:
+        # Motor is bound to the loop it runs on; ``batch`` submits work there
+        self._loop = asyncio.get_running_loop()
+        if not self._indexes_ready:
+            await self.collection.create_index(
+                [("namespace", ASCENDING), ("key", ASCENDING)], unique=True,
+            )
+            self._indexes_ready = True
+
+    def batch(self, ops: Iterable[Op]) -> List[Result]:
+        """Sync API for worker threads: runs ``abatch`` on the store's loop and waits."""
+        return run_on_loop(self._loop, self.abatch(ops))
+
+    async def abatch(self, ops: Iterable[Op]) -> List[Result]:
+        await self._ensure_indexes()
+        ops = list(ops)
+        results: List[Result] = [None] * len(ops)
+        writes = []
+        reads = []
+
+        for i, op in enumerate(ops):
+            if isinstance(op, PutOp):
+                writes.append(self._put_request(op))
+            elif isinstance(op, GetOp):
+                reads.append((i, self._get(op)))
+            elif isinstance(op, SearchOp):
+                reads.append((i, self._search(op)))
+            elif isinstance(op, ListNamespacesOp):
+                reads.append((i, self._list_namespaces(op)))
+            else:
+                raise ValueError(f"Unsupported store operation: {type(op).__name__}")
+
+        if writes:
+            await self.collection.bulk_write(writes, ordered=True)
+        if reads:
+            values = await asyncio.gather(*(coro for _, coro in reads))
+            for (i, _), value in zip(reads, values):
+                results[i] = value
+        return results
+
+    @staticmethod
+    def _put_request(op: PutOp):
+        key = {"namespace": list(op.namespace), "key": op.key}
+        if op.value is None:
+            return DeleteOne(key)
+        now = datetime.now(timezone.utc)
+        return UpdateOne(
+            key,
+            {"$set": {"value": op.value, "updated_at": now}, "$setOnInsert": {"created_at": now}},
+            upsert=True,
+        )
+
+    async def _get(self, op: GetOp):
+        doc = await self.collection.find_one({"namespace": list(op.namespace), "key": op.key})
+        if not doc:
+            return None
+        return Item(
+            value=doc["value"], key=doc["key"], namespace=tuple(doc["namespace"]),
+            created_at=doc["created_at"], updated_at=doc["updated_at"],
+        )
+
+    async def _search(self, op: SearchOp):
+        query: dict = {f"namespace.{i}": part for i, part in enumerate(op.namespace_prefix)}
+        for field, value in (op.filter or {}).items():
+            query[f"value.{field}"] = value
+        if op.query:
+            logger.debug("Semantic store search not supported, matching on filters only")
+        cursor = (
+            self.collection.find(query)
+            .sort("updated_at", -1)
+            .skip(op.offset)
+            .limit(op.limit)
+        )
+        return [
+            SearchItem(
+                namespace=tuple(doc["namespace"]), key=doc["key"], value=doc["value"],
+                created_at=doc["created_at"], updated_at=doc["updated_at"],
+            )
+            async for doc in cursor
+        ]
+
+    async def _list_namespaces(self, op: ListNamespacesOp):
+        namespaces = {
+            tuple(doc["_id"])
+            async for doc in self.collection.aggregate([{"$group": {"_id": "$namespace"}}])
+        }
+
+        def matches(ns: tuple) -> bool:
+            for cond in op.match_conditions or ():
+                path = tuple(cond.path)
+                if len(path) > len(ns):
+                    return False
+                part = ns[: len(path)] if cond.match_type == "prefix" else ns[len(ns) - len(path):]
+                if any(p != "*" and p != n for p, n in zip(path, part)):
+                    return False
+            return True
+
+        result = {ns[: op.max_depth] if op.max_depth else ns for ns in namespaces if matches(ns)}
+        return sorted(result)[op.offset: op.offset + op.limit]
+
+
 def get_memory_store():
     """Singleton accessor for MongoDBStore (long-term cross-investigation memory)."""
     global _store_instance
     if _store_instance is None:
+        from services.agents.checkpoint import CHECKPOINTER_MODE
+        if CHECKPOINTER_MODE == "async":
+            from dependencies import get_database
+            _store_instance = AsyncMongoDBMemoryStore(get_database())
+            logger.info("AsyncMongoDBMemoryStore initialised for cross-investigation memory")
+            return _store_instance
         try:
             from langgraph.store.mongodb import MongoDBStore
             _store_instance = MongoDBStore.from_conn_string(
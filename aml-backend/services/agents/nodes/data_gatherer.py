@@ -11,7 +11,9 @@ from langgraph.types import Send, Command
 
 from dependencies import get_mongo_client, DB_NAME
 from models.agents.investigation import CaseAssemblyOutput
-from services.agents.llm import get_llm, get_model_id, extract_token_usage, invoke_with_retry
+from services.agents.llm import get_llm, get_model_id, extract_token_usage
+from services.agents.llm_cache import cache_info
+from services.agents.llm_gateway import ainvoke
 from services.agents.prompts import CASE_ASSEMBLY_SYSTEM
 from services.agents.state import InvestigationState
 from services.agents.tools.entity_tools import get_entity_profile, screen_watchlists
@@ -147,7 +149,7 @@ def fetch_watchlist_node(state: GatherTask) -> dict:
 
 # ── Fan-in assembly + typology classification ────────────────────────
 
-def assemble_case_node(state: InvestigationState) -> dict:
+async def assemble_case_node(state: InvestigationState) -> dict:
     """Build case file AND classify typology in a single LLM call."""
     t0 = time.perf_counter()
     gathered = state.get("gathered_data", {})
@@ -184,13 +186,13 @@ def assemble_case_node(state: InvestigationState) -> dict:
     gathered_text = truncate_payload(gathered, max_chars=12000)
 
     llm = get_llm().with_structured_output(CaseAssemblyOutput, include_raw=True)
-    result = invoke_with_retry(llm, [
+    result = await ainvoke(llm, [
         SystemMessage(content=CASE_ASSEMBLY_SYSTEM),
         HumanMessage(content=(
             f"GATHERED EVIDENCE:\n{gathered_text}\n\n"
             f"RELEVANT TYPOLOGIES FROM LIBRARY:\n{typology_context}"
         )),
-    ])
+    ], node="assemble_case", cache_schema=CaseAssemblyOutput)
     assembly: CaseAssemblyOutput = result["parsed"]
     token_usage = extract_token_usage(result["raw"])
     duration_ms = int((time.perf_counter() - t0) * 1000)
@@ -206,6 +208,7 @@ def assemble_case_node(state: InvestigationState) -> dict:
         "duration_ms": duration_ms,
         "llm_model": get_model_id(),
         "token_usage": token_usage,
+        "llm_cache": cache_info(result),
         "sources_gathered": list(gathered.keys()),
         "primary_typology": assembly.typology.primary_typology.value,
         "typology_confidence": assembly.typology.confidence,
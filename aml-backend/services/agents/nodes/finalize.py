@@ -6,6 +6,7 @@ import uuid
 from datetime import datetime, timezone
 
 from dependencies import get_mongo_client, DB_NAME
+from services.agents.analytics import record_finalized_case
 from services.agents.state import InvestigationState
 
 logger = logging.getLogger(__name__)
@@ -82,6 +83,13 @@ def finalize_node(state: InvestigationState) -> dict:
         logger.exception("Failed to persist investigation %s", case_id)
         persistence_error = str(exc)
 
+    if persistence_error is None:
+        try:
+            record_finalized_case(client[DB_NAME], case_document)
+        except Exception as exc:
+            # The periodic reconcile job picks the case up on its next pass
+            logger.warning("Failed to update analytics counters for %s: %s", case_id, exc)
+
     duration_ms = int((time.perf_counter() - t0) * 1000)
 
     audit_entry = {
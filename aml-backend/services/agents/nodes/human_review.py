@@ -13,7 +13,7 @@ def human_review_node(state: InvestigationState) -> dict:
 
     The graph pauses before this node via ``interrupt_before``.
     The resume endpoint injects ``human_decision`` into the state
-    via ``graph.update_state(as_node="human_review")`` and the graph
+    via ``graph.aupdate_state(as_node="human_review")`` and the graph
     then proceeds directly to ``finalize``.
 
     This node function exists as a graph placeholder; actual
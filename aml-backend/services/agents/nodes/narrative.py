@@ -8,7 +8,8 @@ from datetime import datetime, timezone
 from langchain_core.messages import SystemMessage, HumanMessage
 
 from models.agents.investigation import SARNarrative
-from services.agents.llm import get_llm, get_model_id, extract_token_usage, invoke_with_retry
+from services.agents.llm import get_llm, get_model_id, extract_token_usage
+from services.agents.llm_gateway import ainvoke
 from services.agents.prompts import NARRATIVE_SYSTEM
 from services.agents.state import InvestigationState
 from services.agents.tools.policy_tools import search_compliance_policies
@@ -19,7 +20,7 @@ logger = logging.getLogger(__name__)
 _MAX_TOOL_OUTPUT = 3000
 
 
-def narrative_node(state: InvestigationState) -> dict:
+async def narrative_node(state: InvestigationState) -> dict:
     t0 = time.perf_counter()
     case_file = state.get("case_file", {})
     typology = state.get("typology", {})
@@ -91,14 +92,14 @@ def narrative_node(state: InvestigationState) -> dict:
             revision_context = "\n".join(parts)
 
     llm = get_llm().with_structured_output(SARNarrative, include_raw=True)
-    llm_result = invoke_with_retry(llm, [
+    llm_result = await ainvoke(llm, [
         SystemMessage(content=NARRATIVE_SYSTEM),
         HumanMessage(content=(
             f"COMPLIANCE POLICY CONTEXT:\n{policy_context}\n\n"
             f"INVESTIGATION EVIDENCE:\n{evidence_payload}"
             f"{revision_context}"
         )),
-    ])
+    ], node="narrative")
     narrative: SARNarrative | None = llm_result["parsed"]
     token_usage = extract_token_usage(llm_result["raw"])
     duration_ms = int((time.perf_counter() - t0) * 1000)
@@ -6,6 +6,7 @@ runs tool calls + a single LLM assessment. Results flow directly to the
 narrative node for synthesis.
 """
 
+import asyncio
 import json
 import logging
 import time
@@ -16,7 +17,8 @@ from langchain_core.messages import SystemMessage, HumanMessage
 from langgraph.types import Send, Command
 
 from models.agents.investigation import LeadAssessment
-from services.agents.llm import get_llm, get_model_id, extract_token_usage, invoke_with_retry
+from services.agents.llm import get_llm, get_model_id, extract_token_usage
+from services.agents.llm_gateway import ainvoke
 from services.agents.prompts import LEAD_ASSESSMENT_SYSTEM
 from services.agents.state import InvestigationState
 from services.agents.tools.entity_tools import get_entity_profile, screen_watchlists
@@ -105,7 +107,7 @@ def dispatch_sub_investigations(state: InvestigationState) -> Command:
 
 # ── Mini-investigation worker ─────────────────────────────────────────
 
-def mini_investigate_node(state: SubInvestigateTask) -> dict:
+async def mini_investigate_node(state: SubInvestigateTask) -> dict:
     """Self-contained worker: fetch all data, then LLM-assess the lead."""
     t0 = time.perf_counter()
     entity_id = state["entity_id"]
@@ -113,39 +115,42 @@ def mini_investigate_node(state: SubInvestigateTask) -> dict:
     reason = state.get("reason", "")
     parent_context = state.get("parent_context", {})
 
-    tool_calls = []
-    trace_entries = []
-
-    def _run_tool(tool_name, tool_fn, tool_input):
+    async def _run_tool(tool_name, tool_fn, tool_input):
         t_tool = time.perf_counter()
         try:
-            result = tool_fn.invoke(tool_input)
+            result = await asyncio.to_thread(tool_fn.invoke, tool_input)
         except Exception as exc:
             logger.warning("Sub-investigation tool %s failed for %s: %s", tool_name, entity_id, exc)
             result = {"error": str(exc)}
         dur = int((time.perf_counter() - t_tool) * 1000)
         serialized = _serialize(result)
-        tool_calls.append({
+        call = {
             "tool": tool_name,
             "input": json.dumps(tool_input),
             "output": serialized,
-        })
-        trace_entries.append({
+        }
+        trace = {
             "tool": tool_name,
             "agent": f"mini_investigate:{entity_id}",
             "input": json.dumps(tool_input),
             "output": serialized,
             "duration_ms": dur,
             "timestamp": datetime.now(timezone.utc).isoformat(),
-        })
-        return result
-
-    profile = _run_tool("get_entity_profile", get_entity_profile, {"entity_id": entity_id})
-    watchlist = _run_tool("screen_watchlists", screen_watchlists, {"entity_id": entity_id})
-    transactions = _run_tool("query_entity_transactions", query_entity_transactions,
-                             {"entity_id": entity_id, "limit": 20})
-    network = _run_tool("analyze_entity_network", analyze_entity_network,
-                        {"entity_id": entity_id, "max_depth": 1})
+        }
+        return result, call, trace
+
+    # The four lookups are independent; run them side by side
+    outcomes = await asyncio.gather(
+        _run_tool("get_entity_profile", get_entity_profile, {"entity_id": entity_id}),
+        _run_tool("screen_watchlists", screen_watchlists, {"entity_id": entity_id}),
+        _run_tool("query_entity_transactions", query_entity_transactions,
+                  {"entity_id": entity_id, "limit": 20}),
+        _run_tool("analyze_entity_network", analyze_entity_network,
+                  {"entity_id": entity_id, "max_depth": 1}),
+    )
+    profile, watchlist, transactions, network = (result for result, _, _ in outcomes)
+    tool_calls = [call for _, call, _ in outcomes]
+    trace_entries = [trace for _, _, trace in outcomes]
 
     evidence = truncate_payload({
         "entity_profile": profile,
@@ -157,10 +162,10 @@ def mini_investigate_node(state: SubInvestigateTask) -> dict:
     }, max_chars=10000)
 
     llm = get_llm().with_structured_output(LeadAssessment, include_raw=True)
-    llm_result = invoke_with_retry(llm, [
+    llm_result = await ainvoke(llm, [
         SystemMessage(content=LEAD_ASSESSMENT_SYSTEM),
         HumanMessage(content=evidence),
-    ])
+    ], node="mini_investigate")
     assessment: LeadAssessment | None = llm_result["parsed"]
     token_usage = extract_token_usage(llm_result["raw"])
     duration_ms = int((time.perf_counter() - t0) * 1000)
@@ -4,6 +4,7 @@ Uses $graphLookup to trace ownership chains, then asks the LLM to rank and
 select the most suspicious connected entities for sub-investigation.
 """
 
+import asyncio
 import json
 import logging
 import time
@@ -13,7 +14,8 @@ from langchain_core.messages import SystemMessage, HumanMessage
 
 from dependencies import get_mongo_client, DB_NAME
 from models.agents.investigation import TrailAnalysis
-from services.agents.llm import get_llm, get_model_id, extract_token_usage, invoke_with_retry
+from services.agents.llm import get_llm, get_model_id, extract_token_usage
+from services.agents.llm_gateway import ainvoke
 from services.agents.prompts import TRAIL_FOLLOWER_SYSTEM
 from services.agents.state import InvestigationState
 from services.agents.truncation import truncate_payload
@@ -91,7 +93,7 @@ def _trace_ownership_chains(db, entity_id: str, max_depth: int = 3) -> list[dict
     return chains[:10]
 
 
-def trail_follower_node(state: InvestigationState) -> dict:
+async def trail_follower_node(state: InvestigationState) -> dict:
     t0 = time.perf_counter()
     case_file = state.get("case_file", {})
     typology = state.get("typology", {})
@@ -113,7 +115,7 @@ def trail_follower_node(state: InvestigationState) -> dict:
         client = get_mongo_client()
         db = client[DB_NAME]
         t_tool = time.perf_counter()
-        ownership_chains = _trace_ownership_chains(db, entity_id)
+        ownership_chains = await asyncio.to_thread(_trace_ownership_chains, db, entity_id)
         tool_dur = int((time.perf_counter() - t_tool) * 1000)
 
         chain_output = json.dumps(ownership_chains, default=str)[:_MAX_TOOL_OUTPUT]
@@ -164,10 +166,10 @@ def trail_follower_node(state: InvestigationState) -> dict:
     }, max_chars=12000)
 
     llm = get_llm().with_structured_output(TrailAnalysis, include_raw=True)
-    llm_result = invoke_with_retry(llm, [
+    llm_result = await ainvoke(llm, [
         SystemMessage(content=TRAIL_FOLLOWER_SYSTEM),
         HumanMessage(content=evidence_payload),
-    ])
+    ], node="trail_follower")
     result: TrailAnalysis | None = llm_result["parsed"]
     token_usage = extract_token_usage(llm_result["raw"])
     duration_ms = int((time.perf_counter() - t0) * 1000)
@@ -9,22 +9,24 @@ from langchain_core.messages import SystemMessage, HumanMessage
 from langgraph.types import Command
 
 from models.agents.investigation import TriageDecision
-from services.agents.llm import get_llm, get_model_id, extract_token_usage, invoke_with_retry
+from services.agents.llm import get_llm, get_model_id, extract_token_usage
+from services.agents.llm_cache import cache_info
+from services.agents.llm_gateway import ainvoke
 from services.agents.prompts import TRIAGE_SYSTEM
 from services.agents.state import InvestigationState
 
 logger = logging.getLogger(__name__)
 
 
-def triage_node(state: InvestigationState) -> Command:
+async def triage_node(state: InvestigationState) -> Command:
     t0 = time.perf_counter()
     llm = get_llm().with_structured_output(TriageDecision, include_raw=True)
     alert = state.get("alert_data", {})
 
-    result = invoke_with_retry(llm, [
+    result = await ainvoke(llm, [
         SystemMessage(content=TRIAGE_SYSTEM),
         HumanMessage(content=json.dumps(alert, default=str)),
-    ])
+    ], node="triage", cache_schema=TriageDecision)
     decision: TriageDecision = result["parsed"]
     token_usage = extract_token_usage(result["raw"])
     duration_ms = int((time.perf_counter() - t0) * 1000)
@@ -35,6 +37,7 @@ def triage_node(state: InvestigationState) -> Command:
         "duration_ms": duration_ms,
         "llm_model": get_model_id(),
         "token_usage": token_usage,
+        "llm_cache": cache_info(result),
         "decision": decision.model_dump(),
         "reasoning": decision.reasoning[:300] if hasattr(decision, "reasoning") and decision.reasoning else "",
         "input_summary": f"entity_id={alert.get('entity_id','')}, alert_type={alert.get('alert_type','')}",
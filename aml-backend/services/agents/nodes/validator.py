@@ -8,7 +8,9 @@ from langchain_core.messages import SystemMessage, HumanMessage
 from langgraph.types import Command
 
 from models.agents.investigation import ValidationResult
-from services.agents.llm import get_llm, get_model_id, extract_token_usage, invoke_with_retry
+from services.agents.llm import get_llm, get_model_id, extract_token_usage
+from services.agents.llm_cache import cache_info
+from services.agents.llm_gateway import ainvoke
 from services.agents.prompts import VALIDATION_SYSTEM
 from services.agents.state import InvestigationState
 from services.agents.truncation import truncate_payload
@@ -18,7 +20,7 @@ logger = logging.getLogger(__name__)
 MAX_VALIDATION_LOOPS = 2
 
 
-def validation_node(state: InvestigationState) -> Command:
+async def validation_node(state: InvestigationState) -> Command:
     t0 = time.perf_counter()
     loop_count = state.get("validation_count", 0) + 1
 
@@ -59,10 +61,10 @@ def validation_node(state: InvestigationState) -> Command:
     }, max_chars=16000)
 
     llm = get_llm().with_structured_output(ValidationResult, include_raw=True)
-    llm_result = invoke_with_retry(llm, [
+    llm_result = await ainvoke(llm, [
         SystemMessage(content=VALIDATION_SYSTEM),
         HumanMessage(content=payload),
-    ])
+    ], node="validation", cache_schema=ValidationResult)
     result: ValidationResult | None = llm_result["parsed"]
     token_usage = extract_token_usage(llm_result["raw"])
     duration_ms = int((time.perf_counter() - t0) * 1000)
@@ -77,6 +79,7 @@ def validation_node(state: InvestigationState) -> Command:
         "duration_ms": duration_ms,
         "llm_model": get_model_id(),
         "token_usage": token_usage,
+        "llm_cache": cache_info(llm_result),
         "loop": loop_count,
         "score": result.score,
         "route_to": result.route_to,
@@ -0,0 +1,321 @@
+"""In-process BM25 index over typology_library and compliance_policies.
+
+The agent tools used to run an unanchored case-insensitive ``$regex`` over
+every field on each call: no index, exact substrings only, no ranking.
+Both collections are small reference sets (tens of documents), so they are
+held in memory as field-weighted BM25 indexes (BM25F-style: per-field term
+frequencies scaled by a boost before saturation):
+
+- tokenised, stop-worded and lightly stemmed ("structured deposits" finds
+  "Structuring ... deposit")
+- loaded once on startup (or on first search from scripts / workers)
+- kept current by a change stream per collection; on a standalone server
+  without change streams the index reloads every POLICY_INDEX_REFRESH_SECONDS
+
+A search is a handful of dict lookups per query term (microseconds).
+"""
+
+import asyncio
+import logging
+import math
+import os
+import re
+import threading
+from collections import Counter
+from functools import lru_cache
+from typing import Any, Optional
+
+from pymongo.errors import OperationFailure
+
+from dependencies import DB_NAME, get_mongo_client
+
+logger = logging.getLogger(__name__)
+
+
+def _safe_int(env_key: str, default: int) -> int:
+    try:
+        return int(os.getenv(env_key, str(default)))
+    except (ValueError, TypeError):
+        return default
+
+
+_REFRESH_SECONDS = _safe_int("POLICY_INDEX_REFRESH_SECONDS", 300)
+_MAX_BACKOFF_SECONDS = 30
+_CHANGE_STREAMS_UNSUPPORTED = 40573  # standalone server (no replica set)
+
+# collection -> (key field, {field: boost})
+INDEX_SPECS: dict[str, tuple[str, dict[str, float]]] = {
+    "typology_library": ("typology_id", {
+        "name": 3.0, "red_flags": 2.0, "category": 1.5, "description": 1.0, "regulatory_references": 1.0,
+    }),
+    "compliance_policies": ("policy_id", {
+        "title": 3.0, "category": 1.5, "content": 1.0,
+    }),
+}
+
+
+# ── Text analysis ────────────────────────────────────────────────────
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+_STOP_WORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this "
+    "to was were will with which who what when where why how not no".split()
+)
+
+# Longest suffix first; the stem must keep at least three characters
+_SUFFIXES = (
+    "ational", "ization", "fulness", "ousness", "iveness",
+    "ations", "ation", "ments", "ment", "ings", "ing", "ers", "ies", "ied",
+    "ed", "er", "ly", "es", "s",
+)
+
+
+@lru_cache(maxsize=8192)
+def stem(token: str) -> str:
+    """Light suffix-stripping stemmer (same function for documents and queries)"""
+    if len(token) <= 3 or token.isdigit():
+        return token
+    base = token
+    for suffix in _SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= 3:
+            base = token[: -len(suffix)]
+            if suffix in ("ies", "ied"):
+                return base + "y"
+            if suffix == "s" and base.endswith(("s", "u", "i")):
+                return token  # "business", "status", "analysis"
+            if len(base) > 3 and base[-1] == base[-2] and base[-1] not in "lsz":
+                return stem(base[:-1])  # "transferred" -> stem("transfer")
+            break
+    if len(base) >= 4 and base.endswith("e"):
+        base = base[:-1]  # "structure" / "structuring" -> "structur"
+    return base
+
+
+def analyze(text: str) -> list[str]:
+    return [stem(t) for t in _TOKEN_RE.findall(text.lower()) if t not in _STOP_WORDS]
+
+
+def _field_text(value: Any) -> str:
+    if isinstance(value, (list, tuple)):
+        return " ".join(_field_text(v) for v in value)
+    return "" if value is None else str(value)
+
+
+# ── BM25 ─────────────────────────────────────────────────────────────
+
+class BM25Index:
+    """Field-weighted BM25 over a small, mutable document set."""
+
+    def __init__(self, fields: dict[str, float], k1: float = 1.2, b: float = 0.75):
+        self.fields = fields
+        self.k1 = k1
+        self.b = b
+        self._docs: dict[str, dict] = {}
+        self._tf: dict[str, dict[str, float]] = {}    # doc key -> weighted term frequencies
+        self._lengths: dict[str, float] = {}
+        self._postings: dict[str, set[str]] = {}      # term -> doc keys
+        self._total_length = 0.0
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def add(self, key: str, doc: dict) -> None:
+        self.remove(key)
+        tf: Counter = Counter()
+        for field, boost in self.fields.items():
+            for term in analyze(_field_text(doc.get(field))):
+                tf[term] += boost
+        length = sum(tf.values())
+        self._docs[key] = doc
+        self._tf[key] = dict(tf)
+        self._lengths[key] = length
+        self._total_length += length
+        for term in tf:
+            self._postings.setdefault(term, set()).add(key)
+
+    def remove(self, key: str) -> None:
+        if key not in self._docs:
+            return
+        for term in self._tf.pop(key):
+            keys = self._postings.get(term)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._postings[term]
+        self._total_length -= self._lengths.pop(key)
+        del self._docs[key]
+
+    def search(self, query: str, limit: int = 5) -> list[tuple[float, dict]]:
+        terms = set(analyze(query))
+        n = len(self._docs)
+        if not terms or not n:
+            return []
+        avg_length = self._total_length / n or 1.0
+        scores: dict[str, float] = {}
+        for term in terms:
+            keys = self._postings.get(term)
+            if not keys:
+                continue
+            idf = math.log(1 + (n - len(keys) + 0.5) / (len(keys) + 0.5))
+            for key in keys:
+                tf = self._tf[key][term]
+                norm = self.k1 * (1 - self.b + self.b * self._lengths[key] / avg_length)
+                scores[key] = scores.get(key, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:limit]
+        return [(score, self._docs[key]) for key, score in ranked]
+
+
+# ── Collection-backed index ──────────────────────────────────────────
+
+class PolicySearchIndex:
+    """BM25 indexes for the agent reference collections, kept in sync by change streams."""
+
+    def __init__(self):
+        self._indexes = {name: BM25Index(fields) for name, (_, fields) in INDEX_SPECS.items()}
+        self._ids: dict[str, dict[str, str]] = {name: {} for name in INDEX_SPECS}  # str(_id) -> key
+        self._lock = threading.RLock()
+        self._loaded: set[str] = set()
+        self._tasks: dict[str, asyncio.Task] = {}
+        self._resume_tokens: dict[str, Any] = {}
+        self.stats = {"searches": 0, "reloads": 0, "changes": 0, "stream_restarts": 0}
+
+    # ── Loading ──
+
+    def load(self, collection: str, db=None) -> int:
+        """(Re)build one collection's index from MongoDB (sync)."""
+        db = db if db is not None else get_mongo_client()[DB_NAME]
+        key_field, fields = INDEX_SPECS[collection]
+        fresh = BM25Index(fields)
+        ids = {}
+        for doc in db[collection].find({}):
+            self._add_to(fresh, ids, key_field, doc)
+        with self._lock:
+            self._indexes[collection] = fresh
+            self._ids[collection] = ids
+            self._loaded.add(collection)
+        self.stats["reloads"] += 1
+        logger.info("Policy index loaded %d documents from %s", len(fresh), collection)
+        return len(fresh)
+
+    def load_all(self, db=None) -> None:
+        for collection in INDEX_SPECS:
+            self.load(collection, db)
+
+    @staticmethod
+    def _add_to(index: BM25Index, ids: dict[str, str], key_field: str, doc: dict) -> None:
+        oid = str(doc.pop("_id", ""))
+        key = str(doc.get(key_field) or oid)
+        ids[oid] = key
+        index.add(key, doc)
+
+    # ── Search ──
+
+    def search(self, collection: str, query: str, limit: int = 5) -> list[dict]:
+        """Ranked documents (without _id) with a ``relevance_score``."""
+        if collection not in self._loaded:
+            with self._lock:
+                if collection not in self._loaded:
+                    self.load(collection)
+        self.stats["searches"] += 1
+        with self._lock:
+            hits = self._indexes[collection].search(query, limit)
+        return [{**doc, "relevance_score": round(score, 3)} for score, doc in hits]
+
+    # ── Change streams ──
+
+    def start(self, db) -> None:
+        """Load both indexes and follow their collections (call from the event loop)."""
+        if self._tasks:
+            return
+        for collection in INDEX_SPECS:
+            self._tasks[collection] = asyncio.create_task(self._follow(db, collection))
+
+    async def stop(self) -> None:
+        for task in self._tasks.values():
+            task.cancel()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+        self._tasks.clear()
+
+    async def _follow(self, db, collection: str) -> None:
+        backoff = 1
+        await asyncio.to_thread(self._safe_load, collection)
+        while True:
+            try:
+                async with db[collection].watch(
+                    full_document="updateLookup",
+                    resume_after=self._resume_tokens.get(collection),
+                ) as stream:
+                    backoff = 1
+                    async for change in stream:
+                        self._resume_tokens[collection] = stream.resume_token
+                        self._apply_change(collection, change)
+            except asyncio.CancelledError:
+                raise
+            except OperationFailure as exc:
+                if exc.code == _CHANGE_STREAMS_UNSUPPORTED:
+                    logger.warning("Change streams unavailable on %s; policy index reloads every %ss",
+                                   collection, _REFRESH_SECONDS)
+                    await self._poll(collection)
+                    return
+                backoff = await self._restart_after(collection, exc, backoff)
+            except Exception as exc:
+                backoff = await self._restart_after(collection, exc, backoff)
+
+    async def _poll(self, collection: str) -> None:
+        if _REFRESH_SECONDS <= 0:
+            return
+        while True:
+            await asyncio.sleep(_REFRESH_SECONDS)
+            await asyncio.to_thread(self._safe_load, collection)
+
+    async def _restart_after(self, collection: str, exc: Exception, backoff: int) -> int:
+        self.stats["stream_restarts"] += 1
+        logger.warning("Policy index change stream on %s interrupted (%s); reloading in %ss",
+                       collection, exc, backoff)
+        await asyncio.sleep(backoff)
+        # Events may have been missed while the cursor was down
+        self._resume_tokens.pop(collection, None)
+        await asyncio.to_thread(self._safe_load, collection)
+        return min(backoff * 2, _MAX_BACKOFF_SECONDS)
+
+    def _safe_load(self, collection: str) -> None:
+        try:
+            self.load(collection)
+        except Exception as exc:
+            logger.warning("Policy index load of %s failed: %s", collection, exc)
+
+    def _apply_change(self, collection: str, change: dict) -> None:
+        op = change.get("operationType")
+        if op in ("drop", "rename", "dropDatabase", "invalidate"):
+            with self._lock:
+                self._indexes[collection] = BM25Index(INDEX_SPECS[collection][1])
+                self._ids[collection] = {}
+            return
+        oid = str((change.get("documentKey") or {}).get("_id", ""))
+        self.stats["changes"] += 1
+        with self._lock:
+            index, ids = self._indexes[collection], self._ids[collection]
+            old_key = ids.pop(oid, None)
+            if old_key is not None:
+                index.remove(old_key)
+            doc = change.get("fullDocument")
+            if op in ("insert", "update", "replace") and doc:
+                self._add_to(index, ids, INDEX_SPECS[collection][0], dict(doc))
+
+    def metrics(self) -> dict:
+        return {
+            **self.stats,
+            "documents": {name: len(index) for name, index in self._indexes.items()},
+            "watching": sorted(name for name, task in self._tasks.items() if not task.done()),
+        }
+
+
+_index: Optional[PolicySearchIndex] = None
+
+
+def get_policy_index() -> PolicySearchIndex:
+    global _index
+    if _index is None:
+        _index = PolicySearchIndex()
+    return _index
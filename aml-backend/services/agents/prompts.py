@@ -1,5 +1,10 @@
 """Centralised system prompts for every agent node."""
 
+# Part of every LLM response-cache key (services.agents.llm_cache); bump when a
+# prompt change should invalidate cached structured outputs without an edit
+# to the prompt text itself (e.g. new RULES semantics, output post-processing).
+PROMPT_VERSION = 1
+
 TRIAGE_SYSTEM = """You are an expert AML/KYC triage analyst. Evaluate the incoming alert and decide how to route it.
 
 RULES:
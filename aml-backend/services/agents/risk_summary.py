@@ -0,0 +1,476 @@
+"""Materialised per-entity risk summaries for the chat tools.
+
+``assess_entity_risk`` used to run a transactionsv2 stats pipeline and two
+relationships pipelines per call, and ``compare_entities`` re-ran the
+transaction aggregation for each side. Chat users call both repeatedly, so
+the aggregates live in ``entity_risk_summaries`` (``_id`` = entityId):
+
+    {transactions: {count, volume, flagged, risk_sum, risk_count, max_risk, as_of, applied_ids},
+     relationships: {total, high_risk, types: {<type>: n}, as_of, applied_ids},
+     built_at, updated_at}
+
+Maintenance:
+
+- full rebuild with two ``$group`` + ``$merge`` pipelines (on startup when the
+  collection is empty, periodically as a reconcile, or
+  ``python -m services.agents.risk_summary``)
+- change streams on transactionsv2 and relationships: inserts are applied
+  incrementally (``$inc`` / ``$max``); updates, replaces and deletes recompute
+  the summaries of the entities they touch, since a max or a flag cannot be
+  decremented safely. Pre-images are enabled on both collections at startup
+  so deletes name their entities; deletes that still arrive without one are
+  coalesced into a single debounced rebuild
+- read-through: a summary missing at read time is computed and stored
+
+Inserts are applied idempotently: every computed half carries ``as_of`` (server
+time before its aggregation ran), and an insert event is only applied to a half
+computed before it and not already listed in the bounded ``applied_ids``.
+Anything inserted while an aggregation was running can still be off by one
+until the next reconcile.
+
+``high_risk`` keeps the chat tool's existing definition: relationships with
+confidence below 0.5.
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+from pymongo import UpdateOne
+from pymongo.errors import OperationFailure
+
+from dependencies import DB_NAME, get_mongo_client
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_COLLECTION = "entity_risk_summaries"
+TRANSACTIONS_COLLECTION = "transactionsv2"
+RELATIONSHIPS_COLLECTION = "relationships"
+
+REBUILD_ON_STARTUP = os.getenv("RISK_SUMMARY_REBUILD_ON_STARTUP", "true").lower() == "true"
+ENABLE_PRE_IMAGES = os.getenv("RISK_SUMMARY_ENABLE_PRE_IMAGES", "true").lower() == "true"
+
+
+def _safe_int(env_key: str, default: int) -> int:
+    try:
+        return int(os.getenv(env_key, default))
+    except (TypeError, ValueError):
+        return default
+
+
+RECONCILE_SECONDS = _safe_int("RISK_SUMMARY_RECONCILE_SECONDS", 3600)  # 0 disables the periodic rebuild
+DELETE_REBUILD_DEBOUNCE_SECONDS = _safe_int("RISK_SUMMARY_DELETE_REBUILD_DEBOUNCE_SECONDS", 30)
+APPLIED_IDS_WINDOW = 200  # recent source _ids kept per half to drop redelivered inserts
+HIGH_RISK_CONFIDENCE = 0.5
+_MAX_BACKOFF_SECONDS = 30
+_CHANGE_STREAMS_UNSUPPORTED = 40573  # standalone server (no replica set)
+
+
+def _type_key(rel_type: Any) -> str:
+    """Relationship type as a safe document key."""
+    return str(rel_type or "unknown").replace(".", "_").lstrip("$") or "unknown"
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _server_time(db) -> datetime:
+    """Current server clock (change event cluster times come from the same clock)."""
+    try:
+        return db.command("hello")["localTime"].replace(tzinfo=timezone.utc)
+    except Exception:
+        return datetime.now(timezone.utc)
+
+
+# ── Aggregation pipelines ────────────────────────────────────────────
+
+def _transaction_pipeline(match: Dict[str, Any], entity_ids: Optional[List[str]] = None) -> List[dict]:
+    pipeline = [
+        {"$match": match},
+        {"$project": {
+            "amount": 1, "flagged": 1, "riskScore": 1,
+            "entity": {"$setUnion": [["$fromEntityId"], ["$toEntityId"]]},
+        }},
+        {"$unwind": "$entity"},
+    ]
+    if entity_ids is not None:
+        pipeline.append({"$match": {"entity": {"$in": entity_ids}}})
+    pipeline.append({"$group": {
+        "_id": "$entity",
+        "count": {"$sum": 1},
+        "volume": {"$sum": "$amount"},
+        "flagged": {"$sum": {"$cond": ["$flagged", 1, 0]}},
+        "risk_sum": {"$sum": "$riskScore"},
+        "risk_count": {"$sum": {"$cond": [{"$isNumber": "$riskScore"}, 1, 0]}},
+        "max_risk": {"$max": "$riskScore"},
+    }})
+    pipeline.append({"$match": {"_id": {"$ne": None}}})
+    pipeline.append({"$project": {"_id": 1, "transactions": {
+        "count": "$count", "volume": "$volume", "flagged": "$flagged",
+        "risk_sum": "$risk_sum", "risk_count": "$risk_count", "max_risk": "$max_risk",
+    }}})
+    return pipeline
+
+
+def _relationship_pipeline(match: Dict[str, Any], entity_ids: Optional[List[str]] = None) -> List[dict]:
+    pipeline = [
+        {"$match": match},
+        {"$project": {
+            "type": {"$ifNull": ["$type", "unknown"]},
+            "high_risk": {"$cond": [{"$lt": ["$confidence", HIGH_RISK_CONFIDENCE]}, 1, 0]},
+            "entity": {"$setUnion": [["$source.entityId"], ["$target.entityId"]]},
+        }},
+        {"$unwind": "$entity"},
+    ]
+    if entity_ids is not None:
+        pipeline.append({"$match": {"entity": {"$in": entity_ids}}})
+    pipeline += [
+        {"$group": {
+            "_id": {"entity": "$entity", "type": "$type"},
+            "count": {"$sum": 1},
+            "high_risk": {"$sum": "$high_risk"},
+        }},
+        {"$group": {
+            "_id": "$_id.entity",
+            "total": {"$sum": "$count"},
+            "high_risk": {"$sum": "$high_risk"},
+            "types": {"$push": {"k": "$_id.type", "v": "$count"}},
+        }},
+        {"$match": {"_id": {"$ne": None}}},
+        {"$project": {"_id": 1, "relationships": {
+            "total": "$total", "high_risk": "$high_risk", "types": {"$arrayToObject": "$types"},
+        }}},
+    ]
+    return pipeline
+
+
+_EMPTY_TRANSACTIONS = {"count": 0, "volume": 0, "flagged": 0, "risk_sum": 0, "risk_count": 0, "max_risk": None}
+_EMPTY_RELATIONSHIPS = {"total": 0, "high_risk": 0, "types": {}}
+
+
+def _rebuild_stages(built_at: datetime, part: str) -> List[dict]:
+    """Stamp and $merge one half of the summaries during a rebuild.
+
+    The transactions pass runs first and resets ``relationships``; the
+    relationships pass keeps ``transactions`` only when the first pass
+    stamped it in this rebuild, so neither half survives from an older build.
+    """
+    if part == "transactions":
+        return [
+            {"$set": {"transactions.as_of": built_at, "relationships": {"$literal": _EMPTY_RELATIONSHIPS},
+                      "built_at": built_at, "updated_at": built_at}},
+            {"$merge": {"into": SUMMARY_COLLECTION, "on": "_id", "whenMatched": "replace", "whenNotMatched": "insert"}},
+        ]
+    return [
+        {"$set": {"relationships.as_of": built_at, "transactions": {"$literal": _EMPTY_TRANSACTIONS},
+                  "built_at": built_at, "updated_at": built_at}},
+        {"$merge": {"into": SUMMARY_COLLECTION, "on": "_id", "whenNotMatched": "insert", "whenMatched": [
+            {"$set": {
+                "relationships": "$$new.relationships",
+                "transactions": {"$cond": [{"$eq": ["$built_at", "$$new.built_at"]},
+                                           "$transactions", {"$literal": _EMPTY_TRANSACTIONS}]},
+                "built_at": "$$new.built_at",
+                "updated_at": "$$new.updated_at",
+            }},
+        ]}},
+    ]
+
+
+# ── Build / recompute (sync) ─────────────────────────────────────────
+
+def rebuild_risk_summaries(db) -> Dict[str, Any]:
+    """Recompute every summary with server-side $merge (sync)."""
+    started = time.perf_counter()
+    built_at = _server_time(db)
+    db[TRANSACTIONS_COLLECTION].aggregate(_transaction_pipeline({}) + _rebuild_stages(built_at, "transactions"))
+    db[RELATIONSHIPS_COLLECTION].aggregate(_relationship_pipeline({}) + _rebuild_stages(built_at, "relationships"))
+    # Entities whose transactions / relationships are gone since the last build
+    removed = db[SUMMARY_COLLECTION].delete_many({"built_at": {"$lt": built_at}}).deleted_count
+    result = {
+        "summaries": db[SUMMARY_COLLECTION].estimated_document_count(),
+        "removed": removed,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+    }
+    logger.info("Entity risk summaries rebuilt: %d summaries in %.0f ms", result["summaries"], result["elapsed_ms"])
+    return result
+
+
+def _empty_summary(entity_id: str, now: datetime) -> dict:
+    return {
+        "_id": entity_id,
+        "transactions": {**_EMPTY_TRANSACTIONS, "as_of": now},
+        "relationships": {**_EMPTY_RELATIONSHIPS, "types": {}, "as_of": now},
+        "built_at": now,
+        "updated_at": now,
+    }
+
+
+def _entity_match(entity_ids: List[str], a: str, b: str) -> Dict[str, Any]:
+    return {"$or": [{a: {"$in": entity_ids}}, {b: {"$in": entity_ids}}]}
+
+
+def compute_summaries(db, entity_ids: Iterable[str]) -> Dict[str, dict]:
+    """Summaries for a few entities from the source collections (sync)."""
+    entity_ids = [e for e in dict.fromkeys(entity_ids) if e]
+    if not entity_ids:
+        return {}
+    # Taken before the aggregations: inserts up to here are included in the result
+    now = _server_time(db)
+    summaries = {eid: _empty_summary(eid, now) for eid in entity_ids}
+    for row in db[TRANSACTIONS_COLLECTION].aggregate(_transaction_pipeline(
+            _entity_match(entity_ids, "fromEntityId", "toEntityId"), entity_ids)):
+        summaries[row["_id"]]["transactions"] = {**row["transactions"], "as_of": now}
+    for row in db[RELATIONSHIPS_COLLECTION].aggregate(_relationship_pipeline(
+            _entity_match(entity_ids, "source.entityId", "target.entityId"), entity_ids)):
+        summaries[row["_id"]]["relationships"] = {**row["relationships"], "as_of": now}
+    return summaries
+
+
+def get_risk_summaries(db, entity_ids: Iterable[str]) -> Dict[str, dict]:
+    """Stored summaries by entityId, computing and storing any that are missing (sync)."""
+    entity_ids = list(dict.fromkeys(entity_ids))
+    coll = db[SUMMARY_COLLECTION]
+    found = {doc["_id"]: doc for doc in coll.find({"_id": {"$in": entity_ids}})}
+    missing = [eid for eid in entity_ids if eid not in found]
+    if missing:
+        computed = compute_summaries(db, missing)
+        coll.bulk_write([
+            UpdateOne({"_id": eid}, {"$setOnInsert": {k: v for k, v in doc.items() if k != "_id"}}, upsert=True)
+            for eid, doc in computed.items()
+        ], ordered=False)
+        found.update(computed)
+    return found
+
+
+# ── Change-stream maintenance ────────────────────────────────────────
+
+class RiskSummaryMaintainer:
+    """Keeps entity_risk_summaries current from transactionsv2 / relationships change streams."""
+
+    def __init__(self):
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._resume_tokens: Dict[str, Any] = {}
+        self.stats = {"incremental": 0, "duplicates_skipped": 0, "recomputed": 0, "events": 0,
+                      "stream_restarts": 0, "rebuilds": 0, "deletes_without_pre_image": 0}
+
+    def start(self, db) -> None:
+        """Rebuild if empty, then follow both source collections (call from the event loop)."""
+        if self._tasks:
+            return
+        self._tasks["_bootstrap"] = asyncio.create_task(self._bootstrap(db))
+        if RECONCILE_SECONDS > 0:
+            self._tasks["_reconcile"] = asyncio.create_task(self._reconcile())
+        self._tasks[TRANSACTIONS_COLLECTION] = asyncio.create_task(
+            self._watch(db, TRANSACTIONS_COLLECTION, self._on_transaction))
+        self._tasks[RELATIONSHIPS_COLLECTION] = asyncio.create_task(
+            self._watch(db, RELATIONSHIPS_COLLECTION, self._on_relationship))
+
+    async def stop(self) -> None:
+        for task in self._tasks.values():
+            task.cancel()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+        self._tasks.clear()
+
+    async def _bootstrap(self, db) -> None:
+        if ENABLE_PRE_IMAGES:
+            await self._enable_pre_images(db)
+        if not REBUILD_ON_STARTUP:
+            return
+        try:
+            if await db[SUMMARY_COLLECTION].estimated_document_count() == 0:
+                await self._rebuild()
+        except Exception as exc:
+            logger.warning("Entity risk summary rebuild failed: %s", exc)
+
+    @staticmethod
+    async def _enable_pre_images(db) -> None:
+        """Let delete events carry the deleted document (MongoDB 6.0+)."""
+        for collection in (TRANSACTIONS_COLLECTION, RELATIONSHIPS_COLLECTION):
+            try:
+                await db.command("collMod", collection, changeStreamPreAndPostImages={"enabled": True})
+            except Exception as exc:
+                logger.warning("Could not enable change stream pre-images on %s (%s); deletes there "
+                               "fall back to a debounced rebuild", collection, exc)
+
+    async def _rebuild(self) -> None:
+        await asyncio.to_thread(rebuild_risk_summaries, get_mongo_client()[DB_NAME])
+        self.stats["rebuilds"] += 1
+
+    async def _reconcile(self) -> None:
+        """Periodic full rebuild, correcting any drift left by incremental updates."""
+        while True:
+            await asyncio.sleep(RECONCILE_SECONDS)
+            try:
+                await self._rebuild()
+            except Exception as exc:
+                logger.warning("Entity risk summary reconcile failed: %s", exc)
+
+    def _schedule_rebuild(self) -> None:
+        """Coalesce deletes without a pre-image into one rebuild after a quiet period."""
+        task = self._tasks.get("_delete_rebuild")
+        if task is not None and not task.done():
+            return
+
+        async def debounced():
+            await asyncio.sleep(DELETE_REBUILD_DEBOUNCE_SECONDS)
+            try:
+                await self._rebuild()
+            except Exception as exc:
+                logger.warning("Entity risk summary rebuild after deletes failed: %s", exc)
+
+        self._tasks["_delete_rebuild"] = asyncio.create_task(debounced())
+
+    async def _watch(self, db, collection: str, handler) -> None:
+        backoff = 1
+        while True:
+            try:
+                async with db[collection].watch(
+                    full_document="updateLookup",
+                    full_document_before_change="whenAvailable",
+                    resume_after=self._resume_tokens.get(collection),
+                ) as stream:
+                    backoff = 1
+                    async for change in stream:
+                        self._resume_tokens[collection] = stream.resume_token
+                        self.stats["events"] += 1
+                        try:
+                            await handler(db, change)
+                        except Exception as exc:
+                            logger.warning("Risk summary update from %s failed: %s", collection, exc)
+            except asyncio.CancelledError:
+                raise
+            except OperationFailure as exc:
+                if exc.code == _CHANGE_STREAMS_UNSUPPORTED:
+                    logger.warning("Change streams unavailable on %s; entity risk summaries are "
+                                   "refreshed only by rebuilds and read-through", collection)
+                    return
+                backoff = await self._restart_after(collection, exc, backoff)
+            except Exception as exc:
+                backoff = await self._restart_after(collection, exc, backoff)
+
+    async def _restart_after(self, collection: str, exc: Exception, backoff: int) -> int:
+        self.stats["stream_restarts"] += 1
+        logger.warning("Risk summary change stream on %s interrupted (%s); resuming in %ss",
+                       collection, exc, backoff)
+        await asyncio.sleep(backoff)
+        return min(backoff * 2, _MAX_BACKOFF_SECONDS)
+
+    @staticmethod
+    def _entities(change: dict, a: str, b: str) -> List[str]:
+        ids = []
+        for doc in (change.get("fullDocument"), change.get("fullDocumentBeforeChange")):
+            for path in (a, b):
+                value = doc
+                for part in path.split("."):
+                    value = value.get(part) if isinstance(value, dict) else None
+                if value:
+                    ids.append(value)
+        return list(dict.fromkeys(ids))
+
+    async def _on_transaction(self, db, change: dict) -> None:
+        op = change.get("operationType")
+        txn = change.get("fullDocument") or {}
+        if op == "insert":
+            inc = {"transactions.count": 1}
+            if _is_number(txn.get("amount")):
+                inc["transactions.volume"] = txn["amount"]
+            if txn.get("flagged"):
+                inc["transactions.flagged"] = 1
+            update: Dict[str, Any] = {"$inc": inc, "$set": {"updated_at": datetime.now(timezone.utc)}}
+            if _is_number(txn.get("riskScore")):
+                inc["transactions.risk_sum"] = txn["riskScore"]
+                inc["transactions.risk_count"] = 1
+                update["$max"] = {"transactions.max_risk": txn["riskScore"]}
+            await self._apply_incremental(db, self._entities(change, "fromEntityId", "toEntityId"),
+                                          update, "transactions", change)
+        else:
+            await self._recompute(db, change, "fromEntityId", "toEntityId", "transactions")
+
+    async def _on_relationship(self, db, change: dict) -> None:
+        op = change.get("operationType")
+        rel = change.get("fullDocument") or {}
+        if op == "insert":
+            inc = {"relationships.total": 1, f"relationships.types.{_type_key(rel.get('type'))}": 1}
+            confidence = rel.get("confidence")
+            if _is_number(confidence) and confidence < HIGH_RISK_CONFIDENCE:
+                inc["relationships.high_risk"] = 1
+            update = {"$inc": inc, "$set": {"updated_at": datetime.now(timezone.utc)}}
+            await self._apply_incremental(db, self._entities(change, "source.entityId", "target.entityId"),
+                                          update, "relationships", change)
+        else:
+            await self._recompute(db, change, "source.entityId", "target.entityId", "relationships")
+
+    async def _apply_incremental(self, db, entity_ids: List[str], update: dict, part: str, change: dict) -> None:
+        if not entity_ids:
+            return
+        coll = db[SUMMARY_COLLECTION]
+        existing = {doc["_id"] async for doc in coll.find({"_id": {"$in": entity_ids}}, {"_id": 1})}
+        # Entities without a summary yet get a full one (read-through would build it anyway)
+        fresh = [eid for eid in entity_ids if eid not in existing]
+        if existing:
+            source_id = change["documentKey"]["_id"]
+            cluster_time = change.get("clusterTime")
+            event_at = datetime.fromtimestamp(cluster_time.time, timezone.utc) if cluster_time else None
+            # Skip halves already containing this insert: computed after it, or applied before
+            guard: Dict[str, Any] = {"_id": {"$in": list(existing)}, f"{part}.applied_ids": {"$ne": source_id}}
+            if event_at is not None:
+                guard["$or"] = [{f"{part}.as_of": {"$exists": False}}, {f"{part}.as_of": {"$lt": event_at}}]
+            update = {**update, "$push": {f"{part}.applied_ids": {"$each": [source_id], "$slice": -APPLIED_IDS_WINDOW}}}
+            result = await coll.update_many(guard, update)
+            self.stats["incremental"] += 1
+            self.stats["duplicates_skipped"] += len(existing) - result.modified_count
+        if fresh:
+            await self._store_computed(db, fresh, part)
+
+    async def _recompute(self, db, change: dict, a: str, b: str, part: str) -> None:
+        entity_ids = self._entities(change, a, b)
+        if entity_ids:
+            await self._store_computed(db, entity_ids, part)
+        elif change.get("operationType") in ("delete", "drop", "dropDatabase", "invalidate"):
+            # Deleted without a pre-image: we cannot tell whose totals changed
+            self.stats["deletes_without_pre_image"] += 1
+            self._schedule_rebuild()
+
+    async def _store_computed(self, db, entity_ids: List[str], part: str) -> None:
+        """Overwrite ``part`` from the source collection; the other half is only set on insert
+        (it is maintained by its own stream)."""
+        summaries = await asyncio.to_thread(compute_summaries, get_mongo_client()[DB_NAME], entity_ids)
+        other = "relationships" if part == "transactions" else "transactions"
+        await db[SUMMARY_COLLECTION].bulk_write([
+            UpdateOne({"_id": eid}, {
+                "$set": {part: doc[part], "updated_at": doc["updated_at"]},
+                "$setOnInsert": {other: doc[other], "built_at": doc["built_at"]},
+            }, upsert=True)
+            for eid, doc in summaries.items()
+        ], ordered=False)
+        self.stats["recomputed"] += len(summaries)
+
+    def metrics(self) -> dict:
+        return {
+            **self.stats,
+            "watching": sorted(name for name, task in self._tasks.items()
+                               if not name.startswith("_") and not task.done()),
+        }
+
+
+_maintainer: Optional[RiskSummaryMaintainer] = None
+
+
+def get_risk_summary_maintainer() -> RiskSummaryMaintainer:
+    global _maintainer
+    if _maintainer is None:
+        _maintainer = RiskSummaryMaintainer()
+    return _maintainer
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild entity_risk_summaries from transactionsv2 and relationships")
+    parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    for key, value in rebuild_risk_summaries(get_mongo_client()[DB_NAME]).items():
+        print(f"  {key}: {value}")
@@ -377,6 +377,9 @@ async def seed_agent_collections() -> dict:
     await coll.create_index("entity_id")
     await coll.create_index("submitted_at")
     await coll.create_index("status")
+    await coll.create_index([("status", 1), ("priority", -1), ("submitted_at", 1)])
+    await coll.create_index("thread_id", sparse=True)
+    await coll.create_index("batch_id", sparse=True)
     stats["alerts_indexes"] = "created"
 
     client.close()
@@ -4,6 +4,7 @@ import logging
 import os
 from langchain_core.tools import tool
 from dependencies import get_mongo_client, DB_NAME
+from services.agents.risk_summary import get_risk_summaries
 
 logger = logging.getLogger(__name__)
 
@@ -178,7 +179,8 @@ def assess_entity_risk(entity_id: str) -> dict:
     Combines entity profile, watchlist screening, transaction statistics,
     and network analysis. Returns the full risk assessment, watchlist details,
     transaction stats (volume, flagged count, avg/max risk), relationship type
-    breakdown, and high-risk connection count.
+    breakdown, and high-risk connection count. Statistics come from the
+    materialised entity_risk_summaries document.
     """
     client = get_mongo_client()
     db = client[DB_NAME]
@@ -193,48 +195,9 @@ def assess_entity_risk(entity_id: str) -> dict:
     if not profile:
         return {"error": f"Entity {entity_id} not found"}
 
-    txn_pipeline = [
-        {"$match": {"$or": [{"fromEntityId": entity_id}, {"toEntityId": entity_id}]}},
-        {"$group": {
-            "_id": None,
-            "total_count": {"$sum": 1},
-            "total_volume": {"$sum": "$amount"},
-            "flagged_count": {"$sum": {"$cond": ["$flagged", 1, 0]}},
-            "max_risk": {"$max": "$riskScore"},
-            "avg_risk": {"$avg": "$riskScore"},
-        }},
-    ]
-    txn_stats = list(db["transactionsv2"].aggregate(txn_pipeline))
-    txn = txn_stats[0] if txn_stats else {}
-
-    rel_type_pipeline = [
-        {"$match": {"$or": [
-            {"source.entityId": entity_id},
-            {"target.entityId": entity_id},
-        ]}},
-        {"$group": {
-            "_id": "$type",
-            "count": {"$sum": 1},
-        }},
-        {"$sort": {"count": -1}},
-        {"$limit": 10},
-    ]
-    relationships = list(db["relationships"].aggregate(rel_type_pipeline))
-
-    rel_risk_pipeline = [
-        {"$match": {"$or": [
-            {"source.entityId": entity_id},
-            {"target.entityId": entity_id},
-        ]}},
-        {"$group": {
-            "_id": None,
-            "total": {"$sum": 1},
-            "high_risk": {"$sum": {"$cond": [{"$lt": ["$confidence", 0.5]}, 1, 0]}},
-        }},
-    ]
-    rel_risk = list(db["relationships"].aggregate(rel_risk_pipeline))
-    rr = rel_risk[0] if rel_risk else {}
-
+    summary = get_risk_summaries(db, [entity_id])[entity_id]
+    txn = summary.get("transactions") or {}
+    rels = summary.get("relationships") or {}
     watchlist = profile.get("watchlistMatches", [])
 
     return {
@@ -248,23 +211,28 @@ def assess_entity_risk(entity_id: str) -> dict:
             for m in watchlist[:5]
         ],
         "transaction_stats": {
-            "total_count": txn.get("total_count", 0),
-            "total_volume": round(txn.get("total_volume", 0), 2),
-            "flagged_count": txn.get("flagged_count", 0),
-            "max_risk_score": txn.get("max_risk", 0),
-            "avg_risk_score": round(txn.get("avg_risk", 0), 2),
+            "total_count": txn.get("count", 0),
+            "total_volume": round(txn.get("volume") or 0, 2),
+            "flagged_count": txn.get("flagged", 0),
+            "max_risk_score": txn.get("max_risk") or 0,
+            "avg_risk_score": _avg_risk(txn),
         },
         "relationship_types": [
-            {"type": r["_id"], "count": r["count"]}
-            for r in relationships
+            {"type": rel_type, "count": count}
+            for rel_type, count in sorted((rels.get("types") or {}).items(), key=lambda kv: -kv[1])[:10]
         ],
         "network_stats": {
-            "total_relationships": rr.get("total", 0),
-            "high_risk_connections": rr.get("high_risk", 0),
+            "total_relationships": rels.get("total", 0),
+            "high_risk_connections": rels.get("high_risk", 0),
         },
     }
 
 
+def _avg_risk(txn: dict) -> float:
+    count = txn.get("risk_count") or 0
+    return round((txn.get("risk_sum") or 0) / count, 2) if count else 0
+
+
 @tool
 def compare_entities(entity_id_a: str, entity_id_b: str) -> dict:
     """Compare two entities side-by-side on risk, transactions, and network.
@@ -275,29 +243,23 @@ def compare_entities(entity_id_a: str, entity_id_b: str) -> dict:
     client = get_mongo_client()
     db = client[DB_NAME]
 
-    def _summarize(eid):
-        entity = db["entities"].find_one(
-            {"entityId": eid},
+    entity_ids = [entity_id_a, entity_id_b]
+    entities = {
+        e["entityId"]: e
+        for e in db["entities"].find(
+            {"entityId": {"$in": entity_ids}},
             {"_id": 0, "entityId": 1, "name": 1, "entityType": 1,
              "riskAssessment.overall": 1, "watchlistMatches": 1},
         )
+    }
+    summaries = get_risk_summaries(db, [eid for eid in entity_ids if eid in entities])
+
+    def _summarize(eid):
+        entity = entities.get(eid)
         if not entity:
             return {"error": f"Entity {eid} not found"}
-
-        txns = list(db["transactionsv2"].aggregate([
-            {"$match": {"$or": [{"fromEntityId": eid}, {"toEntityId": eid}]}},
-            {"$group": {
-                "_id": None,
-                "count": {"$sum": 1},
-                "volume": {"$sum": "$amount"},
-                "flagged": {"$sum": {"$cond": ["$flagged", 1, 0]}},
-            }},
-        ]))
-        t = txns[0] if txns else {}
-
-        rels = db["relationships"].count_documents({
-            "$or": [{"source.entityId": eid}, {"target.entityId": eid}]
-        })
+        txn = summaries[eid].get("transactions") or {}
+        rels = summaries[eid].get("relationships") or {}
 
         return {
             "entity_id": eid,
@@ -306,10 +268,10 @@ def compare_entities(entity_id_a: str, entity_id_b: str) -> dict:
             "risk_score": entity.get("riskAssessment", {}).get("overall", {}).get("score"),
             "risk_level": entity.get("riskAssessment", {}).get("overall", {}).get("level"),
             "watchlist_hits": len(entity.get("watchlistMatches", [])),
-            "transaction_count": t.get("count", 0),
-            "transaction_volume": round(t.get("volume", 0), 2),
-            "flagged_transactions": t.get("flagged", 0),
-            "relationship_count": rels,
+            "transaction_count": txn.get("count", 0),
+            "transaction_volume": round(txn.get("volume") or 0, 2),
+            "flagged_transactions": txn.get("flagged", 0),
+            "relationship_count": rels.get("total", 0),
         }
 
     return {
@@ -3,6 +3,7 @@
 import logging
 from langchain_core.tools import tool
 from dependencies import get_mongo_client, DB_NAME
+from models.database.entity_projections import build_entity_projection
 
 logger = logging.getLogger(__name__)
 
@@ -17,22 +18,7 @@ def get_entity_profile(entity_id: str) -> dict:
     client = get_mongo_client()
     doc = client[DB_NAME]["entities"].find_one(
         {"entityId": entity_id},
-        {
-            "_id": 0,
-            "entityId": 1,
-            "entityType": 1,
-            "scenarioKey": 1,
-            "status": 1,
-            "name": 1,
-            "dateOfBirth": 1,
-            "addresses": 1,
-            "identifiers": 1,
-            "contactInfo": 1,
-            "customerInfo": 1,
-            "uboInfo": 1,
-            "riskAssessment": 1,
-            "watchlistMatches": 1,
-        },
+        build_entity_projection("profile"),
     )
     if not doc:
         return {"error": f"Entity {entity_id} not found"}
@@ -1,9 +1,9 @@
 """RAG tools over typology_library and compliance_policies collections."""
 
 import logging
-import re
 from langchain_core.tools import tool
 from dependencies import get_mongo_client, DB_NAME
+from services.agents.policy_index import get_policy_index
 
 logger = logging.getLogger(__name__)
 
@@ -26,23 +26,11 @@ def search_typologies(query: str) -> list:
     """Text search across all typology descriptions and red flags.
 
     Returns matching typologies ranked by relevance.
-    Uses MongoDB $regex for server-side filtering instead of full collection scan.
+    Uses the in-memory BM25 policy index (name and red flags weighted highest).
     """
     if not query.strip():
         return []
-    client = get_mongo_client()
-    coll = client[DB_NAME]["typology_library"]
-    pattern = re.escape(query)
-    regex = {"$regex": pattern, "$options": "i"}
-    results = list(coll.find(
-        {"$or": [
-            {"name": regex},
-            {"description": regex},
-            {"red_flags": regex},
-        ]},
-        {"_id": 0},
-    ).limit(5))
-    return results
+    return get_policy_index().search("typology_library", query, limit=5)
 
 
 @tool
@@ -50,19 +38,8 @@ def search_compliance_policies(query: str) -> list:
     """Text search across compliance policies and SAR guidance.
 
     Returns matching policies ranked by relevance.
-    Uses MongoDB $regex for server-side filtering instead of full collection scan.
+    Uses the in-memory BM25 policy index (titles weighted highest).
     """
     if not query.strip():
         return []
-    client = get_mongo_client()
-    coll = client[DB_NAME]["compliance_policies"]
-    pattern = re.escape(query)
-    regex = {"$regex": pattern, "$options": "i"}
-    results = list(coll.find(
-        {"$or": [
-            {"title": regex},
-            {"content": regex},
-        ]},
-        {"_id": 0},
-    ).limit(5))
-    return results
+    return get_policy_index().search("compliance_policies", query, limit=5)
@@ -0,0 +1,655 @@
+"""
+Investigation worker pool.
+
+Investigations used to run inside the HTTP request's SSE generator, so a
+closed browser tab could abort or orphan a run and the number of concurrent
+pipelines was bounded only by per-IP rate limits. The pool decouples the two:
+
+* ``POST /agents/investigate`` inserts a ``pending`` alert and returns.
+* A dispatcher claims pending alerts (highest ``priority`` first, then oldest)
+  with ``find_one_and_update`` whenever one of ``INVESTIGATION_WORKERS`` slots
+  is free, and runs the graph in a background task.
+* Every run keeps a sequenced event log in memory. SSE endpoints are
+  subscribers: they can attach, detach and reattach to a ``thread_id`` and
+  replay everything after the last ``seq`` they saw.
+
+Resumes after human review go through the same slots, so throughput is set
+by the pool size rather than by how many streams are open. Event logs live in
+the process that runs the investigation, so an alert launched over SSE is
+reserved (``reserved_by``) for the launching process and only claimed there;
+other replicas take it over only once the reservation is older than
+``STALE_CLAIM_SECONDS`` (launcher gone). Reattach requests must reach the
+launching process (sticky routing) when several API replicas share the queue.
+
+Only alerts queued by this pool (carrying ``alert_data``) are claimed. A
+running investigation refreshes ``heartbeat_at`` every ``HEARTBEAT_SECONDS``;
+a maintenance task requeues alerts whose heartbeat is older than
+``STALE_CLAIM_SECONDS`` (crashed worker), returns stalled resumes to
+``awaiting_review``, and evicts finished runs and runs left queued past
+``RUN_MAX_AGE_SECONDS`` (never claimed here). A resume is claimed by moving
+its alert from ``awaiting_review`` to ``resuming``, so a repeated request for
+the same thread is refused instead of running the rest of the graph twice.
+"""
+
+import asyncio
+import json
+import logging
+import math
+import os
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional, Set
+
+from pymongo import ReturnDocument
+
+from dependencies import get_database
+from services.agents.checkpoint import prune_finalised_checkpoints
+from services.agents.graph import get_checkpointer, get_compiled_graph
+from services.agents.llm_gateway import Priority, llm_priority
+from services.agents.tracing import get_tracing_callbacks
+
+logger = logging.getLogger(__name__)
+
+
+def _safe_int(env_key: str, default: int) -> int:
+    try:
+        return int(os.getenv(env_key, str(default)))
+    except (ValueError, TypeError):
+        return default
+
+
+INVESTIGATION_WORKERS = _safe_int("INVESTIGATION_WORKERS", 4)
+# Room for several full bulk batches (ALERT_BULK_MAX) on top of interactive launches
+MAX_PENDING_ALERTS = _safe_int("INVESTIGATION_MAX_PENDING", 50_000)
+POLL_INTERVAL_SECONDS = _safe_int("INVESTIGATION_POLL_SECONDS", 5)
+RUN_RETENTION_SECONDS = _safe_int("INVESTIGATION_RUN_RETENTION_SECONDS", 900)
+STALE_CLAIM_SECONDS = _safe_int("INVESTIGATION_STALE_CLAIM_SECONDS", 1800)
+RUN_MAX_AGE_SECONDS = _safe_int("INVESTIGATION_RUN_MAX_AGE_SECONDS", 3600)
+MAINTENANCE_INTERVAL_SECONDS = _safe_int("INVESTIGATION_MAINTENANCE_SECONDS", 60)
+HEARTBEAT_SECONDS = max(1, _safe_int("INVESTIGATION_HEARTBEAT_SECONDS", 60))
+MAX_PRIORITY = 100.0  # priorities share the 0-100 risk score scale
+MAX_RUN_EVENTS = 2000
+
+# Alerts queued by /agents/investigate or bulk intake; older "pending" documents
+# without an alert payload predate the pool and are left alone
+QUEUED_ALERTS = {"status": "pending", "alert_data": {"$exists": True}}
+
+# ── Node event payloads ──────────────────────────────────────────────
+
+AGENT_NODES = frozenset({
+    "triage", "data_gathering", "assemble_case",
+    "network_analyst", "temporal_analyst",
+    "trail_follower", "dispatch_sub_investigations",
+    "mini_investigate",
+    "narrative", "validation", "human_review", "finalize",
+    "auto_close",
+    "fetch_entity_profile", "fetch_transactions",
+    "fetch_network", "fetch_watchlist",
+})
+
+_STATE_OUTPUT_KEYS = (
+    "triage_decision", "typology", "narrative", "network_analysis",
+    "temporal_analysis", "trail_analysis", "sub_investigation_findings",
+    "validation_result", "case_file",
+    "gathered_data", "human_decision",
+)
+
+MAX_PAYLOAD_CHARS = 8000
+
+
+def now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def parse_priority(value: Any) -> Optional[float]:
+    """Validate a caller-supplied queue priority (None when absent).
+
+    Raises:
+        ValueError: not a finite number within 0..MAX_PRIORITY
+    """
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+        raise ValueError("priority must be a number")
+    if not 0 <= value <= MAX_PRIORITY:
+        raise ValueError(f"priority must be between 0 and {MAX_PRIORITY:g}")
+    return float(value)
+
+
+def _truncate_deep(obj: Any, budget: int = MAX_PAYLOAD_CHARS) -> Any:
+    """Recursively truncate string values within dicts/lists to stay under budget
+    while preserving the dict/list structure the frontend expects."""
+    if isinstance(obj, str):
+        return obj[:budget] + "..." if len(obj) > budget else obj
+    if isinstance(obj, dict):
+        out = {}
+        for k, v in obj.items():
+            out[k] = _truncate_deep(v, budget // max(len(obj), 1))
+        return out
+    if isinstance(obj, list):
+        if len(obj) > 20:
+            return [_truncate_deep(item, budget // 20) for item in obj[:20]]
+        return [_truncate_deep(item, budget // max(len(obj), 1)) for item in obj]
+    return obj
+
+
+def _extract_agent_output(result: dict) -> dict:
+    """Extract structured output keys from a node's state update."""
+    output = {}
+    for key in _STATE_OUTPUT_KEYS:
+        if key in result:
+            val = result[key]
+            try:
+                serialized = json.dumps(val, default=str)
+                if len(serialized) <= MAX_PAYLOAD_CHARS:
+                    output[key] = val
+                else:
+                    output[key] = _truncate_deep(val, MAX_PAYLOAD_CHARS)
+            except Exception:
+                output[key] = str(val)[:MAX_PAYLOAD_CHARS]
+    return output
+
+
+def node_event_payloads(node_name: str, state_update) -> List[dict]:
+    """agent_start, tool_start/tool_end pairs, then agent_end for one node update."""
+    events = [{"type": "agent_start", "agent": node_name, "timestamp": now_iso()}]
+
+    tool_calls = []
+    status = ""
+    output_data = {}
+    if isinstance(state_update, dict):
+        tool_calls = state_update.get("_node_tool_calls", [])
+        if not isinstance(tool_calls, list):
+            tool_calls = []
+        status = state_update.get("investigation_status", "")
+        output_data = _extract_agent_output(state_update)
+
+    for tc in tool_calls:
+        events.append({
+            "type": "tool_start",
+            "agent": node_name,
+            "tool": tc.get("tool", "unknown"),
+            "input": tc.get("input", ""),
+            "timestamp": now_iso(),
+        })
+        events.append({
+            "type": "tool_end",
+            "agent": node_name,
+            "tool": tc.get("tool", "unknown"),
+            "output": tc.get("output", ""),
+            "timestamp": now_iso(),
+        })
+
+    events.append({
+        "type": "agent_end",
+        "agent": node_name,
+        "status": status,
+        "output": output_data,
+        "timestamp": now_iso(),
+    })
+    return events
+
+
+# ── Runs ─────────────────────────────────────────────────────────────
+
+class InvestigationRun:
+    """Sequenced, replayable event log for one investigation thread."""
+
+    def __init__(self, thread_id: str, alert_id: Optional[str] = None, entity_id: Optional[str] = None):
+        self.thread_id = thread_id
+        self.alert_id = alert_id
+        self.entity_id = entity_id
+        self.status = "queued"
+        self.done = False
+        self.created_at = time.monotonic()
+        self.finished_at: Optional[float] = None
+        self.events: List[dict] = []
+        self.last_seq = 0
+        self._cond = asyncio.Condition()
+
+    async def publish(self, payload: dict) -> None:
+        async with self._cond:
+            self.last_seq += 1
+            self.events.append({**payload, "seq": self.last_seq})
+            if len(self.events) > MAX_RUN_EVENTS:
+                del self.events[: len(self.events) - MAX_RUN_EVENTS]
+            self._cond.notify_all()
+
+    async def finish(self, status: str) -> None:
+        async with self._cond:
+            self.status = status
+            self.done = True
+            self.finished_at = time.monotonic()
+            self._cond.notify_all()
+
+    def reopen(self) -> None:
+        self.status = "queued"
+        self.done = False
+        self.created_at = time.monotonic()
+        self.finished_at = None
+
+    async def follow(self, after: int = 0) -> AsyncIterator[dict]:
+        """Replay events after ``after``, then stream new ones until the run finishes."""
+        while True:
+            async with self._cond:
+                await self._cond.wait_for(lambda: self.last_seq > after or self.done)
+                batch = [e for e in self.events if e["seq"] > after]
+                last_seq, finished = self.last_seq, self.done
+            for event in batch:
+                yield event
+            # Events trimmed from the log are skipped rather than waited for
+            after = batch[-1]["seq"] if batch else max(after, last_seq)
+            if finished and last_seq <= after:
+                return
+
+
+# ── Pool ─────────────────────────────────────────────────────────────
+
+class InvestigationWorkerPool:
+    """Claims pending alerts and runs the investigation graph with bounded concurrency."""
+
+    def __init__(self, concurrency: int = INVESTIGATION_WORKERS):
+        self.concurrency = max(concurrency, 1)
+        self.worker_id = f"worker-{uuid.uuid4().hex[:8]}"
+        self._slots = asyncio.Semaphore(self.concurrency)
+        self._wake = asyncio.Event()
+        self._runs: Dict[str, InvestigationRun] = {}
+        self._active: Set[asyncio.Task] = set()
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._maintenance: Optional[asyncio.Task] = None
+        self.stats = {"claimed": 0, "completed": 0, "awaiting_review": 0, "failed": 0, "resumed": 0,
+                      "expired_runs": 0}
+
+    # ── Lifecycle ─────────────────────────────────────────────────────
+
+    def start(self) -> None:
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch_loop())
+            self._maintenance = asyncio.create_task(self._maintenance_loop())
+            logger.info("Investigation worker pool %s started with %d slots", self.worker_id, self.concurrency)
+
+    async def stop(self) -> None:
+        tasks = [t for t in (self._dispatcher, self._maintenance, *self._active) if t is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._dispatcher = None
+        self._maintenance = None
+        # Hand interrupted and reserved alerts back to the queue for the next process
+        try:
+            alerts = get_database()["alerts"]
+            await alerts.update_many(
+                {"status": "running", "worker": self.worker_id},
+                {"$set": {"status": "pending"}, "$unset": {"worker": "", "claimed_at": "", "heartbeat_at": ""}},
+            )
+            await alerts.update_many(
+                {"status": "resuming", "worker": self.worker_id},
+                {"$set": {"status": "awaiting_review"}, "$unset": {"worker": "", "heartbeat_at": ""}},
+            )
+            await alerts.update_many(
+                {"status": "pending", "reserved_by": self.worker_id},
+                {"$unset": {"reserved_by": ""}},
+            )
+        except Exception as exc:
+            logger.warning("Failed to requeue running alerts on shutdown: %s", exc)
+
+    def notify(self) -> None:
+        """Wake the dispatcher after new alerts are queued."""
+        self._wake.set()
+
+    # ── Run registry ──────────────────────────────────────────────────
+
+    def register(self, thread_id: str, alert_id: Optional[str] = None,
+                 entity_id: Optional[str] = None) -> InvestigationRun:
+        run = self._runs.get(thread_id)
+        if run is None:
+            run = InvestigationRun(thread_id, alert_id, entity_id)
+            self._runs[thread_id] = run
+        return run
+
+    def get_run(self, thread_id: str) -> Optional[InvestigationRun]:
+        return self._runs.get(thread_id)
+
+    async def _expire_runs(self) -> None:
+        now = time.monotonic()
+        finished_cutoff = now - RUN_RETENTION_SECONDS
+        queued_cutoff = now - RUN_MAX_AGE_SECONDS
+        for thread_id, run in list(self._runs.items()):
+            if run.done:
+                if run.finished_at < finished_cutoff:
+                    del self._runs[thread_id]
+            elif run.status == "queued" and run.created_at < queued_cutoff:
+                # Never claimed by this process: end its subscribers instead of leaking the run
+                await run.publish({"type": "error", "message": "Investigation was not started on this server",
+                                   "timestamp": now_iso()})
+                await run.finish("expired")
+                del self._runs[thread_id]
+                self.stats["expired_runs"] += 1
+
+    async def pending_count(self) -> int:
+        return await get_database()["alerts"].count_documents(QUEUED_ALERTS)
+
+    # ── Scheduling ────────────────────────────────────────────────────
+
+    async def _maintenance_loop(self) -> None:
+        while True:
+            await self._requeue_stale()
+            try:
+                await self._expire_runs()
+            except Exception as exc:
+                logger.warning("Failed to expire investigation runs: %s", exc)
+            await asyncio.sleep(MAINTENANCE_INTERVAL_SECONDS)
+
+    async def _dispatch_loop(self) -> None:
+        while True:
+            await self._slots.acquire()
+            self._wake.clear()
+            try:
+                alert = await self._claim_next()
+            except asyncio.CancelledError:
+                self._slots.release()
+                raise
+            except Exception as exc:
+                logger.warning("Failed to claim pending alert: %s", exc)
+                alert = None
+
+            if alert is None:
+                self._slots.release()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=POLL_INTERVAL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            self.stats["claimed"] += 1
+            self._spawn(self._execute_alert(alert), holds_slot=True)
+
+    def _spawn(self, coro, holds_slot: bool) -> asyncio.Task:
+        task = asyncio.create_task(coro)
+        self._active.add(task)
+
+        def _done(t: asyncio.Task) -> None:
+            self._active.discard(t)
+            if holds_slot:
+                self._slots.release()
+
+        task.add_done_callback(_done)
+        return task
+
+    async def _claim_next(self) -> Optional[dict]:
+        new_thread_id = f"case-{uuid.uuid4().hex[:12]}"
+        # Alerts reserved by another live launcher stay with it (its SSE stream follows the run)
+        reservation_cutoff = datetime.now(timezone.utc) - timedelta(seconds=STALE_CLAIM_SECONDS)
+        now = datetime.now(timezone.utc)
+        return await get_database()["alerts"].find_one_and_update(
+            {**QUEUED_ALERTS, "$or": [
+                {"reserved_by": {"$in": [None, self.worker_id]}},
+                {"submitted_at": {"$lt": reservation_cutoff}},
+            ]},
+            [{"$set": {
+                "status": "running",
+                "claimed_at": now,
+                "heartbeat_at": now,
+                "worker": self.worker_id,
+                "thread_id": {"$ifNull": ["$thread_id", new_thread_id]},
+            }}],
+            sort=[("priority", -1), ("submitted_at", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def _requeue_stale(self) -> None:
+        """Requeue runs with no heartbeat for STALE_CLAIM_SECONDS (crashed worker); stalled resumes go back to review."""
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=STALE_CLAIM_SECONDS)
+        alerts = get_database()["alerts"]
+        try:
+            result = await alerts.update_many(
+                {"status": "running", "heartbeat_at": {"$lt": cutoff}},
+                {"$set": {"status": "pending"}, "$unset": {"worker": "", "claimed_at": "", "heartbeat_at": ""}},
+            )
+            if result.modified_count:
+                logger.info("Requeued %d stale investigation alerts", result.modified_count)
+            result = await alerts.update_many(
+                {"status": "resuming", "heartbeat_at": {"$lt": cutoff}},
+                {"$set": {"status": "awaiting_review"}, "$unset": {"worker": "", "heartbeat_at": ""}},
+            )
+            if result.modified_count:
+                logger.info("Returned %d stale resumes to awaiting_review", result.modified_count)
+        except Exception as exc:
+            logger.warning("Failed to requeue stale alerts: %s", exc)
+
+    async def _heartbeat(self, alert_filter: dict) -> None:
+        """Refresh ``heartbeat_at`` while a run is alive so it is not requeued as stale."""
+        alerts = get_database()["alerts"]
+        while True:
+            await asyncio.sleep(HEARTBEAT_SECONDS)
+            try:
+                await alerts.update_one(
+                    {**alert_filter, "worker": self.worker_id},
+                    {"$set": {"heartbeat_at": datetime.now(timezone.utc)}},
+                )
+            except Exception as exc:
+                logger.warning("Failed to refresh investigation heartbeat: %s", exc)
+
+    # ── Execution ─────────────────────────────────────────────────────
+
+    async def _stream_graph(self, run: InvestigationRun, graph, graph_input, config: dict) -> None:
+        async for chunk in graph.astream(graph_input, config=config, stream_mode="updates"):
+            if not isinstance(chunk, dict):
+                continue
+            for node_name, state_update in chunk.items():
+                if node_name not in AGENT_NODES:
+                    continue
+                for payload in node_event_payloads(node_name, state_update):
+                    await run.publish(payload)
+
+    @staticmethod
+    def _config(thread_id: str) -> dict:
+        return {
+            "configurable": {"thread_id": thread_id},
+            "recursion_limit": 100,
+            "callbacks": get_tracing_callbacks(thread_id),
+        }
+
+    async def _execute_alert(self, alert: dict) -> None:
+        thread_id = alert["thread_id"]
+        alert_id = str(alert["_id"])
+        run = self.register(thread_id, alert_id, alert.get("entity_id"))
+        run.status = "running"
+        config = self._config(thread_id)
+        alert_data = alert["alert_data"]
+        alerts = get_database()["alerts"]
+        heartbeat = asyncio.create_task(self._heartbeat({"_id": alert["_id"]}))
+
+        await run.publish({"type": "pipeline_started", "agent": "triage", "timestamp": now_iso()})
+        try:
+            graph = get_compiled_graph()
+            # Launched with a live SSE consumer vs. queued by bulk intake
+            priority = Priority.INTERACTIVE if alert.get("interactive") else Priority.BACKGROUND
+            with llm_priority(priority):
+                await self._stream_graph(run, graph, {"alert_data": alert_data}, config)
+
+            final_state = await graph.aget_state(config)
+            state_values = final_state.values if final_state else {}
+            is_interrupted = bool(final_state.next) if final_state else False
+
+            if is_interrupted:
+                await run.publish({"type": "agent_start", "agent": "human_review", "timestamp": now_iso()})
+
+            new_status = "awaiting_review" if is_interrupted else "completed"
+            await alerts.update_one(
+                {"_id": alert["_id"]},
+                {"$set": {"status": new_status, "completed_at": datetime.now(timezone.utc)},
+                 "$unset": {"worker": "", "heartbeat_at": ""}},
+            )
+            if not is_interrupted:
+                await prune_finalised_checkpoints(get_checkpointer(), thread_id)
+
+            await run.publish({
+                "type": "investigation_complete",
+                "thread_id": thread_id,
+                "case_id": state_values.get("case_id", ""),
+                "status": state_values.get("investigation_status", "unknown"),
+                "triage_decision": state_values.get("triage_decision", {}),
+                "typology": state_values.get("typology", {}),
+                "narrative": state_values.get("narrative", {}),
+                "validation_result": state_values.get("validation_result", {}),
+                "needs_human_review": is_interrupted,
+                "timestamp": now_iso(),
+            })
+            self.stats[new_status] += 1
+            await run.finish(new_status)
+        except asyncio.CancelledError:
+            await run.finish("interrupted")
+            raise
+        except Exception as exc:
+            logger.exception("Investigation %s failed", thread_id)
+            self.stats["failed"] += 1
+            await run.publish({"type": "error", "message": str(exc)})
+            await run.finish("failed")
+            try:
+                await alerts.update_one(
+                    {"_id": alert["_id"]},
+                    {"$set": {"status": "failed", "error": str(exc)[:500], "completed_at": datetime.now(timezone.utc)},
+                     "$unset": {"worker": "", "heartbeat_at": ""}},
+                )
+            except Exception:
+                pass
+        finally:
+            heartbeat.cancel()
+
+    async def submit_resume(self, thread_id: str, resume_value: dict) -> Optional[InvestigationRun]:
+        """Claim a human-review resume and queue it on the pool's slots.
+
+        Returns None when the thread's alert is not ``awaiting_review`` (already
+        resumed, still running, unknown) or a run for the thread is still live here.
+        """
+        existing = self._runs.get(thread_id)
+        if existing is not None and not existing.done:
+            return None
+        now = datetime.now(timezone.utc)
+        claimed = await get_database()["alerts"].find_one_and_update(
+            {"thread_id": thread_id, "status": "awaiting_review"},
+            {"$set": {"status": "resuming", "worker": self.worker_id, "heartbeat_at": now}},
+        )
+        if claimed is None:
+            return None
+        run = self.register(thread_id)
+        run.reopen()
+        self.stats["resumed"] += 1
+        self._spawn(self._execute_resume(run, resume_value), holds_slot=False)
+        return run
+
+    async def _execute_resume(self, run: InvestigationRun, resume_value: dict) -> None:
+        thread_id = run.thread_id
+        alerts = get_database()["alerts"]
+        claim = {"thread_id": thread_id, "status": "resuming", "worker": self.worker_id}
+        heartbeat = asyncio.create_task(self._heartbeat({"thread_id": thread_id, "status": "resuming"}))
+        try:
+            await self._resume_on_slot(run, resume_value)
+        finally:
+            heartbeat.cancel()
+            # Whatever the outcome, the thread is no longer being resumed by this worker
+            if run.status == "completed":
+                update = {"$set": {"status": "completed", "completed_at": datetime.now(timezone.utc)}}
+            elif run.status == "failed":
+                update = {"$set": {"status": "failed", "completed_at": datetime.now(timezone.utc)}}
+            else:
+                update = {"$set": {"status": "awaiting_review"}}
+            update["$unset"] = {"worker": "", "heartbeat_at": ""}
+            try:
+                await alerts.update_one(claim, update)
+            except Exception as exc:
+                logger.warning("Failed to release resume claim for %s: %s", thread_id, exc)
+
+    async def _resume_on_slot(self, run: InvestigationRun, resume_value: dict) -> None:
+        async with self._slots:
+            run.status = "running"
+            thread_id = run.thread_id
+            config = self._config(thread_id)
+            graph = get_compiled_graph()
+
+            await run.publish({"type": "pipeline_resumed", "agent": "human_review", "timestamp": now_iso()})
+            try:
+                audit_entry = {
+                    "agent": "human_review",
+                    "timestamp": now_iso(),
+                    "analyst_decision": resume_value.get("decision"),
+                    "analyst_notes": resume_value.get("analyst_notes", ""),
+                }
+                await graph.aupdate_state(
+                    config,
+                    {
+                        "human_decision": resume_value,
+                        "investigation_status": "reviewed_by_analyst",
+                        "agent_audit_log": [audit_entry],
+                    },
+                    as_node="human_review",
+                )
+                await run.publish({
+                    "type": "agent_end",
+                    "agent": "human_review",
+                    "status": "reviewed_by_analyst",
+                    "output": {"human_decision": resume_value},
+                    "timestamp": now_iso(),
+                })
+
+                # An analyst is waiting on the resumed run
+                with llm_priority(Priority.INTERACTIVE):
+                    await self._stream_graph(run, graph, None, config)
+
+                final_state = await graph.aget_state(config)
+                state_values = final_state.values if final_state else {}
+                finished = bool(final_state) and not final_state.next
+                if finished:
+                    await prune_finalised_checkpoints(get_checkpointer(), thread_id)
+
+                await run.publish({
+                    "type": "resume_complete",
+                    "thread_id": thread_id,
+                    "status": state_values.get("investigation_status", "unknown"),
+                    "triage_decision": state_values.get("triage_decision", {}),
+                    "typology": state_values.get("typology", {}),
+                    "narrative": state_values.get("narrative", {}),
+                    "validation_result": state_values.get("validation_result", {}),
+                    "case_id": state_values.get("case_id", ""),
+                    "human_decision": state_values.get("human_decision", {}),
+                    "timestamp": now_iso(),
+                })
+                await run.finish("completed" if finished else "awaiting_review")
+            except asyncio.CancelledError:
+                await run.finish("interrupted")
+                raise
+            except Exception as exc:
+                logger.exception("Resume of %s failed", thread_id)
+                self.stats["failed"] += 1
+                await run.publish({"type": "error", "message": str(exc)})
+                await run.finish("failed")
+
+    # ── Metrics ───────────────────────────────────────────────────────
+
+    async def metrics(self) -> dict:
+        try:
+            pending = await self.pending_count()
+        except Exception:
+            pending = None
+        return {
+            **self.stats,
+            "worker_id": self.worker_id,
+            "concurrency": self.concurrency,
+            "running": sum(1 for r in self._runs.values() if r.status == "running"),
+            "tracked_runs": len(self._runs),
+            "pending_alerts": pending,
+            "max_pending_alerts": MAX_PENDING_ALERTS,
+        }
+
+
+_pool: Optional[InvestigationWorkerPool] = None
+
+
+def get_worker_pool() -> InvestigationWorkerPool:
+    """Process-wide worker pool singleton."""
+    global _pool
+    if _pool is None:
+        _pool = InvestigationWorkerPool()
+    return _pool
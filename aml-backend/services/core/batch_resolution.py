@@ -0,0 +1,677 @@
+"""
+Batch Entity Resolution - Bulk deduplication with blocking keys and vectorised scoring
+
+MatchingService / ConfidenceService resolve one source/target pair at a time,
+which cannot dedupe a book of tens of thousands of onboarded customers. This
+pipeline resolves a whole entity population in one pass:
+
+1. load   - stream the selected entities (sorted by entityId) into columns:
+            name MinHash signatures, identifier / contact / DOB / country hashes
+2. block  - group records by blocking keys (normalised name tokens, Double
+            Metaphone codes, identifier values, email/phone, DOB + country), skip
+            oversized blocks and emit each candidate pair once, tagged with the
+            key families that produced it
+3. score  - score candidate pairs in numpy chunks on name, identifier,
+            contact and demographic similarity, weighted with the
+            ConfidenceService attribute weights; pairs above the manual-review
+            threshold are persisted to ``batch_resolution_pairs`` per chunk;
+            auto-confirm also needs a shared identifier, email/phone or DOB,
+            so name-only matches always go to manual review
+4. cluster- union-find over auto-confirm pairs; the earliest-created record of
+            each cluster becomes the master
+5. write  - ``bulk_write`` resolution updates (linked -> master, review flags)
+
+Each chunk commits a checkpoint to ``batch_resolution_runs`` so a failed run
+resumes from the last scored / written chunk. Run once with:
+
+    python -m services.core.batch_resolution --filter '{"scenarioKey": "acquired_bank"}' [--dry-run]
+    python -m services.core.batch_resolution --resume <run_id>
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import time
+import uuid
+import zlib
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from pymongo import ASCENDING, UpdateOne
+
+from services.core.confidence_service import ConfidenceService
+from utils.name_matching import name_tokens, token_codes
+
+logger = logging.getLogger(__name__)
+
+
+def _safe_int(env_key: str, default: int) -> int:
+    try:
+        return int(os.getenv(env_key, str(default)))
+    except (ValueError, TypeError):
+        return default
+
+
+RUNS_COLLECTION = "batch_resolution_runs"
+PAIRS_COLLECTION = "batch_resolution_pairs"
+MAX_BLOCK_SIZE = _safe_int("BATCH_RESOLUTION_MAX_BLOCK_SIZE", 200)
+PAIR_CHUNK_SIZE = _safe_int("BATCH_RESOLUTION_PAIR_CHUNK", 200_000)
+MINHASH_PERMUTATIONS = 64
+MAX_IDENTIFIERS = 4
+_WRITE_CHUNK = 1_000
+
+# Blocking key families (bit flags recorded on every candidate pair)
+BLOCK_NAME = 1
+BLOCK_PHONETIC = 2
+BLOCK_IDENTIFIER = 4
+BLOCK_CONTACT = 8
+BLOCK_DOB_COUNTRY = 16
+_FAMILY_NAMES = {
+    BLOCK_NAME: "name", BLOCK_PHONETIC: "phonetic", BLOCK_IDENTIFIER: "identifier",
+    BLOCK_CONTACT: "contact", BLOCK_DOB_COUNTRY: "dob_country",
+}
+
+_RECORD_PROJECTION = {
+    "_id": 0, "entityId": 1, "entityType": 1, "name": 1, "dateOfBirth": 1,
+    "nationality": 1, "residency": 1, "addresses.country": 1,
+    "identifiers": 1, "contactInfo": 1, "createdAt": 1,
+}
+
+# ==================== NORMALISATION ====================
+
+def _h64(value: str) -> int:
+    """Stable non-zero signed 64-bit hash (0 marks a missing value)"""
+    digest = int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "little", signed=True)
+    return digest or 1
+
+
+def _identifier_pairs(identifiers: Any) -> List[Tuple[str, str]]:
+    if isinstance(identifiers, dict):
+        items = identifiers.items()
+    elif isinstance(identifiers, list):
+        items = ((i.get("type"), i.get("value")) for i in identifiers if isinstance(i, dict))
+    else:
+        return []
+    pairs = []
+    for id_type, id_value in items:
+        value = "".join(ch for ch in str(id_value or "") if ch.isalnum()).upper()
+        if id_type and value:
+            pairs.append((str(id_type).lower(), value))
+    return pairs
+
+
+def _contacts(contact_info: Any) -> Tuple[str, str]:
+    """(email, phone digits) from a contactInfo array or a contact object"""
+    email = phone = ""
+    if isinstance(contact_info, dict):
+        contact_info = [{"type": k, "value": v} for k, v in contact_info.items()]
+    for contact in contact_info or []:
+        if not isinstance(contact, dict):
+            continue
+        kind, value = str(contact.get("type", "")).lower(), str(contact.get("value") or "")
+        if "email" in kind and not email:
+            email = value.strip().lower()
+        elif kind in ("phone", "mobile", "telephone") and not phone:
+            # Last 9 digits drop country / trunk prefixes
+            phone = "".join(ch for ch in value if ch.isdigit())[-9:]
+    return email, phone
+
+
+# ==================== RECORD COLUMNS ====================
+
+class RecordColumns:
+    """Per-record matching attributes as numpy columns, row i = entity_ids[i]"""
+
+    def __init__(self, entity_ids: List[str], created: List[Any], keys: List[List[Tuple[int, str]]],
+                 name_sig: np.ndarray, has_name: np.ndarray, entity_type: np.ndarray,
+                 id_type: np.ndarray, id_value: np.ndarray, email: np.ndarray, phone: np.ndarray,
+                 dob: np.ndarray, country: np.ndarray):
+        self.entity_ids = entity_ids
+        self.created = created
+        self.keys = keys
+        self.name_sig = name_sig
+        self.has_name = has_name
+        self.entity_type = entity_type
+        self.id_type = id_type
+        self.id_value = id_value
+        self.email = email
+        self.phone = phone
+        self.dob = dob
+        self.country = country
+
+    @property
+    def n(self) -> int:
+        return len(self.entity_ids)
+
+    def fingerprint(self) -> str:
+        return f"{self.n}:{zlib.crc32(chr(0).join(self.entity_ids).encode()):08x}"
+
+
+_rng = np.random.default_rng(20240601)
+_MINHASH_A = _rng.integers(1, 2**63, MINHASH_PERMUTATIONS, dtype=np.uint64) | np.uint64(1)
+_MINHASH_B = _rng.integers(0, 2**63, MINHASH_PERMUTATIONS, dtype=np.uint64)
+_EMPTY_SIG = np.full(MINHASH_PERMUTATIONS, np.iinfo(np.uint16).max, dtype=np.uint16)
+
+
+def _trigram_hashes(text: str) -> List[int]:
+    padded = f"  {text} "
+    return list({zlib.crc32(padded[k:k + 3].encode()) for k in range(len(padded) - 2)})
+
+
+def minhash_signatures(texts: List[str], batch: int = 4_096) -> np.ndarray:
+    """
+    MinHash signatures of character trigrams (multiply-shift hash family),
+    computed for a batch of records at once with a segmented minimum. Only the
+    top 16 bits of each minimum are kept: collisions add ~1.5e-5 to the
+    Jaccard estimate and halve the memory gathered per scored pair.
+    """
+    signatures = np.empty((len(texts), MINHASH_PERMUTATIONS), dtype=np.uint16)
+    for lo in range(0, len(texts), batch):
+        grams = [_trigram_hashes(text) if text else [] for text in texts[lo:lo + batch]]
+        counts = np.array([len(g) for g in grams], dtype=np.int64)
+        block = np.tile(_EMPTY_SIG, (len(grams), 1))
+        filled = counts > 0
+        if filled.any():
+            hashes = np.fromiter((h for g in grams for h in g), dtype=np.uint64, count=int(counts.sum()))
+            with np.errstate(over="ignore"):
+                permuted = (hashes[:, None] * _MINHASH_A + _MINHASH_B) >> np.uint64(48)
+            starts = np.concatenate([[0], np.cumsum(counts)[:-1]])[filled]
+            block[filled] = np.minimum.reduceat(permuted, starts, axis=0).astype(np.uint16)
+        signatures[lo:lo + len(grams)] = block
+    return signatures
+
+
+def prepare_records(docs: Iterable[Dict[str, Any]]) -> RecordColumns:
+    """Normalise entity documents into columns and blocking keys"""
+    entity_ids, created, keys = [], [], []
+    name_texts, etypes, id_types, id_values = [], [], [], []
+    emails, phones, dobs, countries = [], [], [], []
+
+    for doc in docs:
+        entity_id = doc.get("entityId")
+        if not entity_id:
+            continue
+        name = doc.get("name")
+        full_name = name.get("full") if isinstance(name, dict) else name
+        aliases = name.get("aliases", []) if isinstance(name, dict) else []
+        tokens = name_tokens(full_name)
+        etype = str(doc.get("entityType") or "unknown")
+        identifiers = _identifier_pairs(doc.get("identifiers"))[:MAX_IDENTIFIERS]
+        email, phone = _contacts(doc.get("contactInfo") or doc.get("contact"))
+        dob = str(doc.get("dateOfBirth") or "")[:10]
+        addresses = doc.get("addresses") or []
+        country = str(doc.get("nationality") or doc.get("residency")
+                      or (addresses[0].get("country") if addresses and isinstance(addresses[0], dict) else "")
+                      or "").upper()
+
+        record_keys: List[Tuple[int, str]] = []
+        for variant in [tokens] + [name_tokens(alias) for alias in aliases]:
+            if variant:
+                record_keys.append((BLOCK_NAME, " ".join(sorted(variant))))
+        if tokens:
+            codes = sorted({code for token in (tokens[0], tokens[-1]) for code in token_codes(token)[:1]})
+            record_keys.append((BLOCK_PHONETIC, "|".join(codes)))
+        record_keys.extend((BLOCK_IDENTIFIER, f"{t}:{v}") for t, v in identifiers)
+        if email:
+            record_keys.append((BLOCK_CONTACT, f"e:{email}"))
+        if phone:
+            record_keys.append((BLOCK_CONTACT, f"p:{phone}"))
+        if dob:
+            record_keys.append((BLOCK_DOB_COUNTRY, f"{dob}|{country}"))
+
+        entity_ids.append(entity_id)
+        created.append(doc.get("createdAt"))
+        keys.append([(family, f"{etype}|{family}|{value}") for family, value in record_keys])
+        name_texts.append(" ".join(sorted(tokens)))
+        etypes.append(_h64(etype))
+        id_types.append([_h64(t) for t, _ in identifiers] + [0] * (MAX_IDENTIFIERS - len(identifiers)))
+        id_values.append([_h64(v) for _, v in identifiers] + [0] * (MAX_IDENTIFIERS - len(identifiers)))
+        emails.append(_h64(email) if email else 0)
+        phones.append(_h64(phone) if phone else 0)
+        dobs.append(_h64(dob) if dob else 0)
+        countries.append(_h64(country) if country else 0)
+
+    n = len(entity_ids)
+    return RecordColumns(
+        entity_ids=entity_ids, created=created, keys=keys,
+        name_sig=minhash_signatures(name_texts),
+        has_name=np.array([bool(text) for text in name_texts], dtype=bool),
+        entity_type=np.array(etypes, dtype=np.int64),
+        id_type=np.array(id_types, dtype=np.int64).reshape(n, MAX_IDENTIFIERS),
+        id_value=np.array(id_values, dtype=np.int64).reshape(n, MAX_IDENTIFIERS),
+        email=np.array(emails, dtype=np.int64), phone=np.array(phones, dtype=np.int64),
+        dob=np.array(dobs, dtype=np.int64), country=np.array(countries, dtype=np.int64),
+    )
+
+
+# ==================== BLOCKING ====================
+
+def candidate_pairs(records: RecordColumns, max_block_size: int = MAX_BLOCK_SIZE
+                    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, Dict[str, Any]]:
+    """
+    Unique (i < j) candidate pairs from all blocks, with an OR of the key
+    families that produced each pair. Blocks above max_block_size are skipped
+    (common surnames, shared company addresses) and counted in the stats.
+    """
+    n = records.n
+    blocks: Dict[str, List[int]] = {}
+    family_of: Dict[str, int] = {}
+    for idx, record_keys in enumerate(records.keys):
+        for family, key in record_keys:
+            members = blocks.get(key)
+            if members is None:
+                blocks[key] = [idx]
+                family_of[key] = family
+            elif members[-1] != idx:
+                members.append(idx)
+
+    # Group blocks by size so each size is one vectorised triu expansion
+    by_size: Dict[int, Tuple[List[List[int]], List[int]]] = {}
+    oversized = 0
+    for key, members in blocks.items():
+        size = len(members)
+        if size < 2:
+            continue
+        if size > max_block_size:
+            oversized += 1
+            continue
+        group = by_size.setdefault(size, ([], []))
+        group[0].append(members)
+        group[1].append(family_of[key])
+
+    pair_keys, pair_bits = [np.zeros(0, dtype=np.int64)], [np.zeros(0, dtype=np.int64)]
+    for size, (member_lists, families) in by_size.items():
+        members = np.array(member_lists, dtype=np.int64)
+        iu, ju = np.triu_indices(size, k=1)
+        a, b = members[:, iu].ravel(), members[:, ju].ravel()
+        pair_keys.append(np.minimum(a, b) * n + np.maximum(a, b))
+        pair_bits.append(np.repeat(np.array(families, dtype=np.int64), len(iu)))
+
+    keys, bits = np.concatenate(pair_keys), np.concatenate(pair_bits)
+    raw_pairs = len(keys)
+    if raw_pairs:
+        order = np.argsort(keys, kind="stable")
+        keys, bits = keys[order], bits[order]
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+        bits = np.bitwise_or.reduceat(bits, starts)
+        keys = keys[starts]
+    # Organisations and individuals never resolve to each other
+    left, right = keys // max(n, 1), keys % max(n, 1)
+    same_type = records.entity_type[left] == records.entity_type[right]
+    left, right, bits = left[same_type], right[same_type], bits[same_type]
+
+    all_pairs = n * (n - 1) // 2
+    stats = {
+        "blocks": len(blocks),
+        "blocks_scored": sum(len(group[0]) for group in by_size.values()),
+        "oversized_blocks_skipped": oversized,
+        "raw_block_pairs": int(raw_pairs),
+        "candidate_pairs": int(len(left)),
+        "reduction_ratio": round(1 - len(left) / all_pairs, 6) if all_pairs else 0.0,
+    }
+    return left, right, bits, stats
+
+
+# ==================== VECTORISED SCORING ====================
+
+def score_pairs(records: RecordColumns, left: np.ndarray, right: np.ndarray,
+                weights: Dict[str, float]) -> Dict[str, np.ndarray]:
+    """
+    Attribute similarities and weighted score for candidate pairs.
+
+    Attributes missing on either side are excluded from the weighted mean
+    (same convention as ConfidenceService._calculate_weighted_score), so a
+    name-only pair can score 1.0; ``corroborated`` marks pairs that also agree
+    on a shared identifier, an email/phone or the date of birth, which is
+    required for auto-confirmation.
+    """
+    # Name: MinHash estimate of trigram Jaccard on sorted tokens
+    name = np.count_nonzero(records.name_sig[left] == records.name_sig[right], axis=1) / MINHASH_PERMUTATIONS
+    name_ok = records.has_name[left] & records.has_name[right]
+
+    # Identifiers: any shared (type, value) = 1; same type but different values = 0.
+    # The (pairs x 4 x 4) comparison only runs where both records carry identifiers.
+    shared = np.zeros(len(left), dtype=bool)
+    ident_ok = np.zeros(len(left), dtype=bool)
+    both = (records.id_type[left, 0] != 0) & (records.id_type[right, 0] != 0)
+    if both.any():
+        li, ri = left[both], right[both]
+        lt, rt = records.id_type[li][:, :, None], records.id_type[ri][:, None, :]
+        lv, rv = records.id_value[li][:, :, None], records.id_value[ri][:, None, :]
+        same_type = (lt == rt) & (lt != 0)
+        shared[both] = (same_type & (lv == rv)).any(axis=(1, 2))
+        ident_ok[both] = same_type.any(axis=(1, 2))
+    identifiers = shared.astype(np.float64)
+
+    # Contact: share of comparable channels (email, phone) that agree
+    email_cmp = (records.email[left] != 0) & (records.email[right] != 0)
+    phone_cmp = (records.phone[left] != 0) & (records.phone[right] != 0)
+    contact_n = email_cmp.astype(np.int8) + phone_cmp
+    contact_hits = (email_cmp & (records.email[left] == records.email[right])).astype(np.int8) \
+        + (phone_cmp & (records.phone[left] == records.phone[right]))
+    contact_ok = contact_n > 0
+    contact = np.divide(contact_hits, contact_n, out=np.zeros(len(left)), where=contact_ok)
+
+    # Demographic: date of birth and country agreement
+    dob_cmp = (records.dob[left] != 0) & (records.dob[right] != 0)
+    country_cmp = (records.country[left] != 0) & (records.country[right] != 0)
+    demo_n = dob_cmp.astype(np.int8) + country_cmp
+    demo_hits = (dob_cmp & (records.dob[left] == records.dob[right])).astype(np.int8) \
+        + (country_cmp & (records.country[left] == records.country[right]))
+    demo_ok = demo_n > 0
+    demographic = np.divide(demo_hits, demo_n, out=np.zeros(len(left)), where=demo_ok)
+
+    # Independent evidence beyond the name (country alone is too common to count)
+    dob_match = dob_cmp & (records.dob[left] == records.dob[right])
+    corroborated = shared | (contact_hits > 0) | dob_match
+
+    weighted = np.zeros(len(left))
+    total = np.zeros(len(left))
+    for attr, values, available in (("name", name, name_ok), ("identifiers", identifiers, ident_ok),
+                                    ("contact", contact, contact_ok), ("demographic", demographic, demo_ok)):
+        w = weights.get(attr, 0.0) * available
+        weighted += w * values
+        total += w
+    score = np.divide(weighted, total, out=np.zeros(len(left)), where=total > 0)
+    # A conflicting identifier of the same type caps the pair below auto-confirm
+    score = np.where(ident_ok & ~shared, np.minimum(score, 0.75), score)
+
+    return {"score": score, "corroborated": corroborated, "name": name, "identifiers": np.where(ident_ok, identifiers, np.nan),
+            "contact": np.where(contact_ok, contact, np.nan), "demographic": np.where(demo_ok, demographic, np.nan)}
+
+
+# ==================== CLUSTERING ====================
+
+def cluster_pairs(n: int, left: Iterable[int], right: Iterable[int]) -> Dict[int, List[int]]:
+    """
+    Connected components (union-find) over linked pairs; root -> sorted members
+
+    The root is the smallest member and clusters are ordered by root, so the
+    result does not depend on the order the pairs arrive in.
+    """
+    parent = list(range(n))
+
+    def find(x: int) -> int:
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for a, b in zip(left, right):
+        ra, rb = find(int(a)), find(int(b))
+        if ra != rb:
+            parent[max(ra, rb)] = min(ra, rb)
+
+    clusters: Dict[int, List[int]] = {}
+    for node in {int(x) for x in left} | {int(x) for x in right}:
+        clusters.setdefault(find(node), []).append(node)
+    return {root: sorted(clusters[root]) for root in sorted(clusters)}
+
+
+def write_plan_digest(clusters: Dict[int, List[int]], review_members: Iterable[int]) -> str:
+    """Identity of the resolution write list (clusters in root order, then review members)"""
+    digest = hashlib.sha1()
+    for root, members in clusters.items():
+        digest.update(f"c{root}:{','.join(map(str, members))};".encode())
+    digest.update(f"r{','.join(map(str, sorted(review_members)))}".encode())
+    return digest.hexdigest()
+
+
+def _master_index(records: RecordColumns, members: List[int]) -> int:
+    """Earliest-created record (then lowest entityId) is the cluster master"""
+    far_future = datetime.max
+
+    def sort_key(idx: int):
+        created = records.created[idx]
+        if isinstance(created, datetime):
+            created = created.replace(tzinfo=None)
+        else:
+            created = far_future
+        return created, records.entity_ids[idx]
+
+    return min(members, key=sort_key)
+
+
+# ==================== RUN ORCHESTRATION ====================
+
+def _load_records(db, query: Dict[str, Any], run_id: str, entity_collection: str) -> RecordColumns:
+    # Records this run already resolved still belong to the population on resume
+    cursor = db[entity_collection].find(
+        {"$or": [query, {"resolution.batch_run_id": run_id}]}, _RECORD_PROJECTION
+    ).sort("entityId", ASCENDING).batch_size(5_000)
+    return prepare_records(cursor)
+
+
+def _pair_document(run_id: str, chunk: int, records: RecordColumns, i: int, j: int,
+                   bits: int, scores: Dict[str, np.ndarray], k: int, decision: str) -> Dict[str, Any]:
+    def maybe(value: float) -> Optional[float]:
+        return None if np.isnan(value) else round(float(value), 4)
+
+    return {
+        "run_id": run_id,
+        "chunk": chunk,
+        "source_entity_id": records.entity_ids[i],
+        "target_entity_id": records.entity_ids[j],
+        "source_index": int(i),
+        "target_index": int(j),
+        "score": round(float(scores["score"][k]), 4),
+        "decision": decision,
+        "corroborated": bool(scores["corroborated"][k]),
+        "similarity_scores": {
+            "name": round(float(scores["name"][k]), 4),
+            "identifiers": maybe(scores["identifiers"][k]),
+            "contact": maybe(scores["contact"][k]),
+            "demographic": maybe(scores["demographic"][k]),
+        },
+        "blocked_by": [label for bit, label in _FAMILY_NAMES.items() if bits & bit],
+    }
+
+
+def new_run_id() -> str:
+    return f"br-{datetime.now(timezone.utc):%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:6]}"
+
+
+def run_batch_resolution(db, query: Optional[Dict[str, Any]] = None, run_id: Optional[str] = None,
+                         resume: bool = False, apply: bool = True, max_block_size: int = MAX_BLOCK_SIZE,
+                         pair_chunk_size: int = PAIR_CHUNK_SIZE) -> Dict[str, Any]:
+    """
+    Resolve every entity matching ``query`` against each other (sync).
+
+    With ``resume=True`` the interrupted run ``run_id`` continues from its last
+    checkpoint; its original query, parameters and scored chunks are reused.
+    """
+    runs, pairs_coll = db[RUNS_COLLECTION], db[PAIRS_COLLECTION]
+    entity_collection = os.getenv("ENTITIES_COLLECTION", "entities")
+    confidence = ConfidenceService()
+    thresholds = confidence.decision_thresholds
+    timings: Dict[str, float] = {}
+
+    run = runs.find_one({"_id": run_id}) if resume else None
+    if resume and not run:
+        raise ValueError(f"Unknown batch resolution run {run_id}")
+    if run:
+        if run.get("status") == "completed":
+            return run
+        query, apply = run["query"], run["apply"]
+        max_block_size, pair_chunk_size = run["params"]["max_block_size"], run["params"]["pair_chunk_size"]
+        checkpoint = run.get("checkpoint", {})
+        logger.info("Resuming batch resolution %s from %s", run_id, checkpoint)
+    else:
+        query = query or {"resolution.status": {"$ne": "resolved"}}
+        run_id = run_id or new_run_id()
+        checkpoint = {}
+        pairs_coll.create_index([("run_id", ASCENDING), ("chunk", ASCENDING)])
+        pairs_coll.create_index([("run_id", ASCENDING), ("score", -1)])
+        runs.insert_one({
+            "_id": run_id, "status": "running", "query": query, "apply": apply,
+            "params": {"max_block_size": max_block_size, "pair_chunk_size": pair_chunk_size,
+                       "weights": confidence.attribute_weights, "thresholds": thresholds},
+            "started_at": datetime.now(timezone.utc), "checkpoint": checkpoint,
+        })
+
+    started = time.perf_counter()
+    try:
+        # Load
+        t = time.perf_counter()
+        records = _load_records(db, query, run_id, entity_collection)
+        timings["load_ms"] = round((time.perf_counter() - t) * 1000, 1)
+        fingerprint = records.fingerprint()
+        if checkpoint.get("fingerprint") not in (None, fingerprint):
+            # Population changed since the interrupted attempt: chunk boundaries no longer line up
+            logger.warning("Batch resolution %s: entity set changed, rescoring from scratch", run_id)
+            pairs_coll.delete_many({"run_id": run_id})
+            checkpoint = {}
+
+        # Block
+        t = time.perf_counter()
+        left, right, bits, block_stats = candidate_pairs(records, max_block_size)
+        timings["block_ms"] = round((time.perf_counter() - t) * 1000, 1)
+        total_chunks = (len(left) + pair_chunk_size - 1) // pair_chunk_size
+        checkpoint.update({"fingerprint": fingerprint, "total_chunks": total_chunks})
+        runs.update_one({"_id": run_id}, {"$set": {"checkpoint": checkpoint, "stats.blocking": block_stats}})
+
+        # Score (chunked, checkpointed)
+        t = time.perf_counter()
+        scored_pairs = 0
+        for chunk in range(checkpoint.get("scored_chunks", 0), total_chunks):
+            lo, hi = chunk * pair_chunk_size, min((chunk + 1) * pair_chunk_size, len(left))
+            scores = score_pairs(records, left[lo:hi], right[lo:hi], confidence.attribute_weights)
+            keep = np.flatnonzero(scores["score"] >= thresholds["manual_review"])
+            # Name-only matches never auto-merge: they go to manual review
+            auto = (scores["score"] >= thresholds["auto_confirm"]) & scores["corroborated"]
+            docs = [
+                _pair_document(run_id, chunk, records, left[lo + k], right[lo + k], bits[lo + k], scores, k,
+                               "auto_confirm" if auto[k] else "manual_review")
+                for k in keep
+            ]
+            pairs_coll.delete_many({"run_id": run_id, "chunk": chunk})
+            if docs:
+                pairs_coll.insert_many(docs, ordered=False)
+            scored_pairs += hi - lo
+            checkpoint["scored_chunks"] = chunk + 1
+            runs.update_one({"_id": run_id}, {"$set": {"checkpoint.scored_chunks": chunk + 1}})
+        timings["score_ms"] = round((time.perf_counter() - t) * 1000, 1)
+
+        # Cluster (from persisted pairs, so fresh and resumed runs see the same set)
+        t = time.perf_counter()
+        auto_left, auto_right, best_score = [], [], {}
+        review_members = set()
+        pair_cursor = pairs_coll.find(
+            {"run_id": run_id}, {"_id": 0, "source_index": 1, "target_index": 1, "score": 1, "decision": 1}
+        ).sort([("source_index", ASCENDING), ("target_index", ASCENDING)]).allow_disk_use(True)
+        for pair in pair_cursor:
+            i, j, score = pair["source_index"], pair["target_index"], pair["score"]
+            if pair["decision"] == "auto_confirm":
+                auto_left.append(i)
+                auto_right.append(j)
+                best_score[i] = max(best_score.get(i, 0.0), score)
+                best_score[j] = max(best_score.get(j, 0.0), score)
+            else:
+                review_members.update((i, j))
+        clusters = cluster_pairs(records.n, auto_left, auto_right)
+        clustered = {member for members in clusters.values() for member in members}
+        review_members -= clustered
+        timings["cluster_ms"] = round((time.perf_counter() - t) * 1000, 1)
+
+        # Write resolution updates (chunked, checkpointed; updates are idempotent)
+        t = time.perf_counter()
+        now = datetime.now(timezone.utc)
+        ops: List[UpdateOne] = []
+        for members in clusters.values():
+            master = _master_index(records, members)
+            master_id = records.entity_ids[master]
+            linked = [records.entity_ids[m] for m in members if m != master]
+            ops.append(UpdateOne({"entityId": master_id}, {
+                "$addToSet": {"resolution.linked_entities": {"$each": linked}},
+                "$set": {"resolution.batch_run_id": run_id},
+            }))
+            for member in members:
+                if member == master:
+                    continue
+                ops.append(UpdateOne({"entityId": records.entity_ids[member]}, {"$set": {"resolution": {
+                    "status": "resolved",
+                    "master_entity_id": master_id,
+                    "confidence": best_score.get(member, thresholds["auto_confirm"]),
+                    "resolved_by": "batch_resolution",
+                    "resolved_at": now.isoformat(),
+                    "linked_entities": [master_id],
+                    "batch_run_id": run_id,
+                }}}))
+        for member in sorted(review_members):
+            ops.append(UpdateOne(
+                {"entityId": records.entity_ids[member], "resolution.status": {"$ne": "resolved"}},
+                {"$set": {"resolution.status": "requires_review", "resolution.batch_run_id": run_id}},
+            ))
+
+        # Written chunks are only skipped when the op list is the one they were cut from
+        plan = write_plan_digest(clusters, review_members)
+        written_chunks = checkpoint.get("written_chunks", 0) if checkpoint.get("write_plan") == plan else 0
+        if apply and checkpoint.get("write_plan") != plan:
+            runs.update_one({"_id": run_id}, {"$set": {"checkpoint.write_plan": plan,
+                                                       "checkpoint.written_chunks": 0}})
+        modified = 0
+        write_chunks = (len(ops) + _WRITE_CHUNK - 1) // _WRITE_CHUNK if apply else 0
+        for chunk in range(written_chunks, write_chunks):
+            result = db[entity_collection].bulk_write(ops[chunk * _WRITE_CHUNK:(chunk + 1) * _WRITE_CHUNK],
+                                                      ordered=False)
+            modified += result.modified_count
+            runs.update_one({"_id": run_id}, {"$set": {"checkpoint.written_chunks": chunk + 1}})
+        timings["write_ms"] = round((time.perf_counter() - t) * 1000, 1)
+
+        elapsed = time.perf_counter() - started
+        cluster_sizes = [len(members) for members in clusters.values()]
+        result = {
+            "status": "completed",
+            "finished_at": datetime.now(timezone.utc),
+            "timings": timings,
+            "stats": {
+                "blocking": block_stats,
+                "records": records.n,
+                "pairs_scored_this_attempt": scored_pairs,
+                "auto_confirm_pairs": len(auto_left),
+                "manual_review_entities": len(review_members),
+                "clusters": len(clusters),
+                "entities_linked": sum(cluster_sizes) - len(clusters),
+                "largest_cluster": max(cluster_sizes, default=0),
+                "resolution_updates": len(ops),
+                "entities_modified": modified,
+                "records_per_second": round(records.n / elapsed, 1) if elapsed else None,
+                "pairs_per_second": round(scored_pairs / (timings["score_ms"] / 1000), 1)
+                if timings["score_ms"] else None,
+            },
+        }
+        runs.update_one({"_id": run_id}, {"$set": result})
+        logger.info("Batch resolution %s: %d records, %d candidate pairs, %d clusters (%.1fs)",
+                    run_id, records.n, block_stats["candidate_pairs"], len(clusters), elapsed)
+        return {"run_id": run_id, **result}
+
+    except Exception as exc:
+        runs.update_one({"_id": run_id}, {"$set": {"status": "failed", "error": str(exc),
+                                                   "failed_at": datetime.now(timezone.utc)}})
+        raise
+
+
+if __name__ == "__main__":
+    from dependencies import DB_NAME, get_mongo_client
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--filter", default=None, help="JSON entity filter (default: all unresolved entities)")
+    parser.add_argument("--resume", default=None, help="run_id of an interrupted run to resume")
+    parser.add_argument("--dry-run", action="store_true", help="score and cluster without updating entities")
+    parser.add_argument("--max-block-size", type=int, default=MAX_BLOCK_SIZE)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    outcome = run_batch_resolution(
+        get_mongo_client()[DB_NAME],
+        query=json.loads(args.filter) if args.filter else None,
+        run_id=args.resume,
+        resume=bool(args.resume),
+        apply=not args.dry_run,
+        max_block_size=args.max_block_size,
+    )
+    for key, value in outcome.items():
+        print(f"  {key}: {value}")
@@ -261,8 +261,10 @@ class EntityResolutionService:
             if not is_valid or not entity:
                 return {"success": False, "error": error_msg}
             
-            # Find potential matches using MatchingService
-            potential_matches = await self.matching_service.find_potential_matches(entity, limit)
+            # Find potential matches using MatchingService (strategies run concurrently)
+            potential_matches, search_metadata = await self.matching_service.find_potential_matches_with_metadata(
+                entity, limit
+            )
             
             # Analyze confidence for each match
             matches_with_confidence = []
@@ -281,6 +283,7 @@ class EntityResolutionService:
                             "search_scores": {
                                 "atlas_score": match.get("atlas_score", 0.0),
                                 "vector_score": match.get("vector_score", 0.0),
+                                "phonetic_score": match.get("phonetic_score", 0.0),
                                 "combined_score": match.get("combined_score", 0.0)
                             },
                             "confidence_analysis": confidence_result,
@@ -302,6 +305,7 @@ class EntityResolutionService:
                 "entity_id": entity_id,
                 "potential_matches": matches_with_confidence[:limit],
                 "total_found": len(matches_with_confidence),
+                "search_metadata": search_metadata,
                 "search_timestamp": datetime.utcnow().isoformat()
             }
             
@@ -5,8 +5,13 @@ Focused service for handling entity matching logic, validation, and match attrib
 Uses repository pattern for clean separation of concerns.
 """
 
+import asyncio
+import hashlib
 import logging
-from typing import Dict, Any, Optional, List, Tuple
+import os
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Any, Optional, List, Tuple
 from datetime import datetime
 
 from repositories.interfaces.entity_repository import EntityRepositoryInterface
@@ -15,10 +20,89 @@ from repositories.interfaces.vector_search_repository import VectorSearchReposit
 from models.api.requests import EntitySearchRequest
 from models.api.responses import StandardResponse
 from models.core.entity import Entity
+from utils.name_matching import best_name_match, compare_names, name_index_fields, string_similarity
 
 logger = logging.getLogger(__name__)
 
 
+def _safe_int(env_key: str, default: int) -> int:
+    try:
+        return int(os.getenv(env_key, str(default)))
+    except (ValueError, TypeError):
+        return default
+
+
+# Per-strategy deadlines for find_potential_matches; a strategy that misses
+# its deadline is dropped from the result instead of delaying it
+STRATEGY_TIMEOUTS_MS = {
+    "atlas_search": _safe_int("MATCH_ATLAS_TIMEOUT_MS", 1500),
+    "vector_search": _safe_int("MATCH_VECTOR_TIMEOUT_MS", 2500),
+    "phonetic": _safe_int("MATCH_PHONETIC_TIMEOUT_MS", 1000),
+}
+
+
+# ==================== QUERY EMBEDDING CACHE ====================
+
+class QueryEmbeddingCache:
+    """
+    Bounded TTL cache of semantic-query embeddings keyed by a hash of the query text
+    
+    Concurrent requests for the same text share one in-flight embedding call,
+    which is shielded from caller cancellation so a strategy that times out
+    still warms the cache for the next request.
+    """
+    
+    def __init__(self, ttl_seconds: float = 3600.0, max_entries: int = 512):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, List[float]]]" = OrderedDict()
+        self._pending: Dict[str, "asyncio.Task[List[float]]"] = {}
+        self.hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def make_key(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+    
+    async def get_or_compute(self, text: str, compute: Callable[[str], Awaitable[List[float]]]) -> List[float]:
+        """Return the cached embedding for text, computing it at most once at a time"""
+        key = self.make_key(text)
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry and now - entry[0] < self.ttl_seconds:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+        
+        task = self._pending.get(key)
+        if task is None:
+            self.misses += 1
+            task = asyncio.ensure_future(compute(text))
+            self._pending[key] = task
+            task.add_done_callback(lambda done: self._store(key, done))
+        return await asyncio.shield(task)
+    
+    def _store(self, key: str, task: "asyncio.Task[List[float]]") -> None:
+        self._pending.pop(key, None)
+        if task.cancelled() or task.exception() is not None or not task.result():
+            return  # failed / empty embeddings are retried on the next request
+        self._entries[key] = (time.monotonic(), task.result())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0}
+
+
+query_embedding_cache = QueryEmbeddingCache(
+    ttl_seconds=_safe_int("MATCH_EMBEDDING_CACHE_TTL_SECONDS", 3600),
+    max_entries=_safe_int("MATCH_EMBEDDING_CACHE_SIZE", 512)
+)
+
+
 class MatchingService:
     """
     Entity matching service using repository pattern
@@ -43,8 +127,10 @@ class MatchingService:
         self.atlas_search_repo = atlas_search_repo
         self.vector_search_repo = vector_search_repo
         
-        # Matching configuration
-        self.fuzzy_threshold = 0.7
+        # Matching configuration (name scores come from utils.name_matching.compare_names)
+        self.fuzzy_threshold = 0.85
+        self.partial_name_threshold = 0.7
+        self.screening_candidate_limit = 200
         self.semantic_threshold = 0.6
         self.identifier_exact_match = True
         
@@ -180,19 +266,16 @@ class MatchingService:
             if not source_name or not target_name:
                 return {"is_match": False, "is_partial": False, "score": 0.0}
             
-            # Exact match
-            if source_name.lower().strip() == target_name.lower().strip():
-                return {"is_match": True, "is_partial": False, "score": 1.0}
-            
-            # Fuzzy matching using simple similarity
-            similarity = self._calculate_string_similarity(source_name, target_name)
+            # Token-aligned Jaro-Winkler / edit distance with phonetic agreement
+            comparison = compare_names(source_name, target_name)
+            similarity = comparison["score"]
             
             if similarity >= self.fuzzy_threshold:
-                return {"is_match": True, "is_partial": False, "score": similarity}
-            elif similarity >= 0.5:
-                return {"is_match": False, "is_partial": True, "score": similarity}
+                return {"is_match": True, "is_partial": False, "score": similarity, "details": comparison}
+            elif similarity >= self.partial_name_threshold:
+                return {"is_match": False, "is_partial": True, "score": similarity, "details": comparison}
             else:
-                return {"is_match": False, "is_partial": False, "score": similarity}
+                return {"is_match": False, "is_partial": False, "score": similarity, "details": comparison}
                 
         except Exception as e:
             logger.error(f"Error analyzing name match: {e}")
@@ -309,18 +392,40 @@ class MatchingService:
         Returns:
             List of potential matches with scores and methods
         """
+        matches, _ = await self.find_potential_matches_with_metadata(entity, limit)
+        return matches
+    
+    async def find_potential_matches_with_metadata(self, entity: Entity,
+                                                   limit: int = 10) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """
+        Run the Atlas, vector and phonetic strategies concurrently
+        
+        Each strategy gets its own deadline (STRATEGY_TIMEOUTS_MS); one that
+        misses it contributes nothing and the others are returned as a
+        partial result.
+        
+        Returns:
+            Tuple of (matches, metadata) where metadata reports per-strategy
+            status, latency, candidates and contribution to the returned matches
+        """
+        started = time.perf_counter()
+        strategies = {
+            "atlas_search": self._find_atlas_matches,
+            "vector_search": self._find_vector_matches,
+            "phonetic": self._find_phonetic_matches,
+        }
         try:
             logger.info(f"Finding potential matches for entity: {entity.entity_id}")
             
-            potential_matches = []
-            
-            # Atlas Search strategy (fuzzy text matching)
-            atlas_matches = await self._find_atlas_matches(entity, limit)
-            potential_matches.extend(atlas_matches)
+            outcomes = await asyncio.gather(*(
+                self._run_strategy(name, strategy(entity, limit)) for name, strategy in strategies.items()
+            ))
             
-            # Vector Search strategy (semantic similarity)
-            vector_matches = await self._find_vector_matches(entity, limit)
-            potential_matches.extend(vector_matches)
+            potential_matches = []
+            strategy_metadata = {}
+            for name, (matches, outcome) in zip(strategies, outcomes):
+                potential_matches.extend(matches)
+                strategy_metadata[name] = outcome
             
             # Deduplicate and score
             deduplicated_matches = self._deduplicate_matches(potential_matches)
@@ -330,13 +435,45 @@ class MatchingService:
                 deduplicated_matches, 
                 key=lambda x: x.get('combined_score', 0), 
                 reverse=True
-            )
-            
-            return sorted_matches[:limit]
+            )[:limit]
+            
+            for name, outcome in strategy_metadata.items():
+                methods = [match.get('match_methods', [match.get('match_method')]) for match in sorted_matches]
+                outcome["contributed"] = sum(name in found_by for found_by in methods)
+                outcome["unique"] = sum(found_by == [name] for found_by in methods)
+            
+            metadata = {
+                "strategies": strategy_metadata,
+                "partial": any(outcome["status"] != "ok" for outcome in strategy_metadata.values()),
+                "total_ms": round((time.perf_counter() - started) * 1000, 1),
+                "embedding_cache": query_embedding_cache.stats()
+            }
+            return sorted_matches, metadata
             
         except Exception as e:
             logger.error(f"Error finding potential matches: {e}")
-            return []
+            return [], {"error": str(e), "total_ms": round((time.perf_counter() - started) * 1000, 1)}
+    
+    async def _run_strategy(self, name: str,
+                            search: Awaitable[List[Dict[str, Any]]]) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """Await one strategy under its deadline, recording status and latency"""
+        timeout_ms = STRATEGY_TIMEOUTS_MS[name]
+        started = time.perf_counter()
+        try:
+            matches = await asyncio.wait_for(search, timeout=timeout_ms / 1000)
+            status = "ok"
+        except asyncio.TimeoutError:
+            logger.warning(f"Match strategy {name} missed its {timeout_ms} ms deadline; returning partial results")
+            matches, status = [], "timeout"
+        except Exception as e:
+            logger.error(f"Match strategy {name} failed: {e}")
+            matches, status = [], "error"
+        return matches, {
+            "status": status,
+            "latency_ms": round((time.perf_counter() - started) * 1000, 1),
+            "timeout_ms": timeout_ms,
+            "candidates": len(matches)
+        }
     
     async def _find_atlas_matches(self, entity: Entity, limit: int) -> List[Dict[str, Any]]:
         """Find matches using Atlas Search"""
@@ -380,9 +517,15 @@ class MatchingService:
             if not query_text:
                 return []
             
-            # Execute vector search through repository
-            vector_results = await self.vector_search_repo.find_similar_by_text(
-                query_text=query_text,
+            # Embed once per distinct query text, then search by vector
+            query_vector = await query_embedding_cache.get_or_compute(
+                query_text, self.vector_search_repo.generate_embedding_from_text
+            )
+            if not query_vector:
+                return []
+            
+            vector_results = await self.vector_search_repo.find_similar_by_vector(
+                query_vector=query_vector,
                 limit=limit,
                 similarity_threshold=self.semantic_threshold
             )
@@ -405,6 +548,99 @@ class MatchingService:
             logger.error(f"Error finding vector matches: {e}")
             return []
     
+    async def _find_phonetic_matches(self, entity: Entity, limit: int) -> List[Dict[str, Any]]:
+        """Find matches by blocking on indexed phonetic codes and scoring names locally"""
+        try:
+            if not hasattr(entity, 'name') or not entity.name:
+                return []
+            
+            matches = []
+            for result in await self.screen_name(entity.name, limit=limit + 1):
+                if result.get('entity_id') != entity.entity_id:  # Exclude self
+                    matches.append({
+                        'entity_id': result.get('entity_id'),
+                        'entity_data': result,
+                        'match_method': 'phonetic',
+                        'atlas_score': 0.0,
+                        'vector_score': 0.0,
+                        'phonetic_score': result['score'],
+                        'combined_score': result['score']
+                    })
+            
+            return matches[:limit]
+            
+        except Exception as e:
+            logger.error(f"Error finding phonetic matches: {e}")
+            return []
+    
+    async def screen_name(self, name: str, entity_type: Optional[str] = None,
+                          limit: int = 10, min_score: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Fuzzy name screening without an Atlas round trip
+        
+        Candidates sharing the exact token signature are fetched first, without
+        a cap, then the remaining room up to `screening_candidate_limit` is
+        filled with candidates sharing a Double Metaphone code; both go through
+        the indexed `phonetic_codes` fields and are scored locally against
+        their full name and aliases.
+        
+        Args:
+            name: Name to screen
+            entity_type: Optional entity type restriction
+            limit: Maximum number of results
+            min_score: Minimum name score (defaults to the partial name threshold)
+            
+        Returns:
+            Ranked matches with the score breakdown used to reach them
+        """
+        min_score = self.partial_name_threshold if min_score is None else min_score
+        keys = name_index_fields(name)
+        if not keys["double_metaphone"] and not keys["signature"]:
+            return []
+        
+        # Exact signature hits are never crowded out by looser phonetic ones
+        candidates = []
+        if keys["signature"]:
+            candidates = await self.entity_repo.find_by_phonetic_codes(
+                {"signature": keys["signature"]}, entity_type=entity_type, limit=None
+            )
+        room = self.screening_candidate_limit - len(candidates)
+        if keys["double_metaphone"] and room > 0:
+            candidates += await self.entity_repo.find_by_phonetic_codes(
+                {"double_metaphone": keys["double_metaphone"]},
+                entity_type=entity_type,
+                limit=room,
+                exclude_ids=[c["_id"] for c in candidates]
+            )
+        
+        results = []
+        for candidate in candidates:
+            comparison = best_name_match(name, candidate.get("name"), candidate.get("alternate_names"), min_score)
+            if comparison["score"] < min_score:
+                continue
+            
+            candidate_name = candidate.get("name")
+            results.append({
+                "entity_id": candidate.get("entityId") or candidate.get("_id"),
+                "name": candidate_name.get("full") if isinstance(candidate_name, dict) else candidate_name,
+                "entity_type": candidate.get("entityType") or candidate.get("entity_type"),
+                "risk_level": ((candidate.get("riskAssessment") or {}).get("overall") or {}).get("level"),
+                "score": comparison["score"],
+                "matched_name": comparison.get("matched_name"),
+                "via_alias": comparison.get("via_alias", False),
+                "explanation": {
+                    "method": comparison["method"],
+                    "aligned_tokens": comparison["aligned_tokens"],
+                    "unmatched_tokens": comparison["unmatched_tokens"],
+                    "edit_distance": comparison["edit_distance"],
+                    "phonetic_overlap": comparison["phonetic_overlap"]
+                }
+            })
+        
+        results.sort(key=lambda r: (-r["score"], str(r["entity_id"])))
+        logger.info(f"Name screening for '{name}': {len(candidates)} blocked candidates, {len(results)} above {min_score}")
+        return results[:limit]
+    
     def _create_semantic_query(self, entity: Entity) -> str:
         """Create semantic query from entity data"""
         try:
@@ -444,13 +680,16 @@ class MatchingService:
                     existing = entity_matches[entity_id]
                     existing['atlas_score'] = max(existing['atlas_score'], match['atlas_score'])
                     existing['vector_score'] = max(existing['vector_score'], match['vector_score'])
+                    existing['phonetic_score'] = max(existing.get('phonetic_score', 0.0), match.get('phonetic_score', 0.0))
                     
-                    # Calculate combined score (weighted average)
+                    # Calculate combined score (weighted average); a strong local
+                    # name score stands on its own
                     atlas_weight = 0.6
                     vector_weight = 0.4
-                    existing['combined_score'] = (
+                    existing['combined_score'] = max(
                         existing['atlas_score'] * atlas_weight + 
-                        existing['vector_score'] * vector_weight
+                        existing['vector_score'] * vector_weight,
+                        existing['phonetic_score']
                     )
                     
                     # Add method information
@@ -468,7 +707,7 @@ class MatchingService:
     # ==================== UTILITY METHODS ====================
     
     def _calculate_string_similarity(self, str1: str, str2: str) -> float:
-        """Calculate similarity between two strings using simple algorithm"""
+        """Calculate similarity between two strings (Jaro-Winkler blended with edit distance)"""
         try:
             if not str1 or not str2:
                 return 0.0
@@ -479,14 +718,8 @@ class MatchingService:
             if str1 == str2:
                 return 1.0
             
-            # Simple Jaccard similarity using character sets
-            set1 = set(str1)
-            set2 = set(str2)
-            
-            intersection = len(set1 & set2)
-            union = len(set1 | set2)
-            
-            return intersection / union if union > 0 else 0.0
+            # Order-sensitive, unlike a Jaccard over character sets ("anna" != "nana")
+            return string_similarity(str1, str2)
             
         except Exception as e:
             logger.error(f"Error calculating string similarity: {e}")
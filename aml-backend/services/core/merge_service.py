@@ -3,525 +3,452 @@ Merge Service - Entity merging operations using repository pattern
 
 Focused service for handling entity data consolidation, deduplication,
 and merge conflict resolution using clean repository-based data access.
+
+A merge runs in three timed phases:
+
+1. load  - master and all source documents in one query
+2. plan  - every change computed up front: master additions (aliases,
+           identifiers, contacts, risk, linked entities, merge history), one
+           resolution update per source, the repoint of entities already
+           linked to a source and one confirmed_same_entity relationship per
+           source
+3. apply - one ``bulk_write``, one ``update_many`` and one ``insert_many``,
+           inside a multi-document transaction where the deployment supports it
+
+Any number of sources can be merged into one master in a single call.
 """
 
 import logging
-from typing import Dict, Any, Optional, List
+import time
+import uuid
 from datetime import datetime
+from typing import Dict, Any, Optional, List, Tuple
+
+from pymongo import UpdateOne
 
 from repositories.interfaces.entity_repository import EntityRepositoryInterface
 from repositories.interfaces.relationship_repository import RelationshipRepositoryInterface
 from models.core.entity import Entity
-from models.core.relationship import Relationship, EntityReference, RelationshipEvidence, RelationshipType, RelationshipDirection
+from models.core.relationship import RelationshipType, RelationshipDirection
 
 logger = logging.getLogger(__name__)
 
+MAX_SOURCES_PER_MERGE = 500
+
+_RISK_LEVELS = ("low", "medium", "high", "critical")
+
+
+class MergeError(Exception):
+    """Raised when a merge request cannot be planned"""
+    pass
+
+
+class MergePlan:
+    """Every write a merge will make, computed before anything is written"""
+
+    def __init__(self, merge_id: str, master_id: str, source_ids: List[str],
+                 entity_operations: List[UpdateOne],
+                 repoint_filter: Optional[Dict[str, Any]],
+                 repoint_update: Optional[Dict[str, Any]],
+                 relationship_documents: List[Dict[str, Any]],
+                 linked_entities_transferred: List[str],
+                 conflict_analysis: Dict[str, Dict[str, Any]],
+                 master_changes: Optional[Dict[str, Any]] = None):
+        self.merge_id = merge_id
+        self.master_id = master_id
+        self.source_ids = source_ids
+        self.entity_operations = entity_operations
+        self.repoint_filter = repoint_filter
+        self.repoint_update = repoint_update
+        self.relationship_documents = relationship_documents
+        self.linked_entities_transferred = linked_entities_transferred
+        self.conflict_analysis = conflict_analysis
+        self.master_changes = master_changes or {}
+
 
 class MergeService:
     """
     Entity merging service using repository pattern
-    
+
     Handles entity data consolidation, relationship creation,
     and merge conflict resolution through repository interfaces.
     """
-    
-    def __init__(self, 
+
+    def __init__(self,
                  entity_repo: EntityRepositoryInterface,
                  relationship_repo: RelationshipRepositoryInterface):
         """
         Initialize Merge service
-        
+
         Args:
             entity_repo: Entity repository for entity operations
             relationship_repo: Relationship repository for relationship operations
         """
         self.entity_repo = entity_repo
         self.relationship_repo = relationship_repo
-        
+
         # Merge configuration
         self.merge_strategies = {
-            "name": "prefer_longer",
+            "name": "keep_target_add_aliases",
             "identifiers": "combine_unique",
-            "contact": "prefer_complete",
+            "contact": "combine_unique",
             "risk_data": "prefer_higher"
         }
-        
+
         logger.info("Merge service initialized with repository pattern")
-    
+
     # ==================== ENTITY MERGING OPERATIONS ====================
-    
-    async def merge_entities(self, source_entity: Entity, target_entity: Entity, 
+
+    async def merge_entities(self, source_entity: Entity, target_entity: Entity,
                            merge_decision: Dict[str, Any]) -> Dict[str, Any]:
         """
         Merge source entity into target entity with conflict resolution
-        
+
         Args:
             source_entity: Source entity to merge from
             target_entity: Target entity to merge into
             merge_decision: Decision data with merge instructions
-            
+
         Returns:
             Dictionary containing merge results and updated entities
         """
+        source_id = _entity_id(source_entity)
+        target_id = _entity_id(target_entity)
+        result = await self.merge_many(target_id, [source_id], merge_decision)
+        if result.get("success"):
+            result["source_entity_id"] = source_id
+            result["relationship_id"] = (result.get("relationship_ids") or [None])[0]
+            result["conflict_analysis"] = result["conflict_analysis"].get(source_id, {})
+        else:
+            result.setdefault("source_entity_id", source_id)
+            result.setdefault("target_entity_id", target_id)
+        return result
+
+    async def merge_many(self, master_entity_id: str, source_entity_ids: List[str],
+                         merge_decision: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Merge any number of source entities into one master
+
+        Args:
+            master_entity_id: Entity that survives the merge
+            source_entity_ids: Entities merged into it
+            merge_decision: match_confidence, matched_attributes, resolved_by, notes
+
+        Returns:
+            Dictionary with merge ID, relationship IDs, conflicts, transferred
+            linked entities, write counts and per-phase timings
+        """
+        started = time.perf_counter()
+        timings: Dict[str, float] = {}
         try:
-            logger.info(f"Merging entity {source_entity.entity_id} into {target_entity.entity_id}")
-            
-            # Analyze merge conflicts
-            conflict_analysis = await self._analyze_merge_conflicts(source_entity, target_entity)
-            
-            # Resolve conflicts and create merged data
-            merged_data = await self._resolve_merge_conflicts(
-                source_entity, target_entity, conflict_analysis, merge_decision
-            )
-            
-            # Update target entity with merged data
-            updated_target = await self._update_target_entity(target_entity, merged_data)
-            
-            # Update source entity resolution status
-            updated_source = await self._update_source_entity_resolution(
-                source_entity, target_entity, merge_decision
-            )
-            
-            # Create or update relationships
-            relationship_id = await self._create_merge_relationship(
-                source_entity, target_entity, merge_decision, conflict_analysis
-            )
-            
-            # Handle linked entities if source was a master
-            linked_entities_updated = await self._handle_linked_entities_transfer(
-                source_entity, target_entity
+            source_ids = list(dict.fromkeys(source_entity_ids))
+            logger.info(f"Merging {len(source_ids)} entities into {master_entity_id}")
+
+            phase = time.perf_counter()
+            documents = await self.entity_repo.find_for_merge([master_entity_id] + source_ids)
+            timings["load_ms"] = _elapsed_ms(phase)
+
+            phase = time.perf_counter()
+            plan = self.plan_merge(master_entity_id, source_ids, documents, merge_decision)
+            timings["plan_ms"] = _elapsed_ms(phase)
+
+            phase = time.perf_counter()
+            outcome = await self.entity_repo.apply_merge(
+                plan.entity_operations, plan.repoint_filter, plan.repoint_update, plan.relationship_documents
             )
-            
-            merge_result = {
+            timings["apply_ms"] = _elapsed_ms(phase)
+            timings["total_ms"] = _elapsed_ms(started)
+
+            logger.info(f"Merge {plan.merge_id} completed: {len(source_ids)} sources, "
+                        f"{outcome['linked_repointed']} linked entities repointed, "
+                        f"transactional={outcome['transactional']}, {timings['total_ms']} ms")
+            return {
                 "success": True,
-                "merged_entity_id": target_entity.entity_id,
-                "source_entity_id": source_entity.entity_id,
-                "relationship_id": relationship_id,
-                "conflict_analysis": conflict_analysis,
-                "merged_data": merged_data,
-                "linked_entities_transferred": linked_entities_updated,
+                "merge_id": plan.merge_id,
+                "merged_entity_id": master_entity_id,
+                "source_entity_ids": source_ids,
+                "relationship_ids": outcome["relationship_ids"],
+                "conflict_analysis": plan.conflict_analysis,
+                "merged_data": plan.master_changes,
+                "linked_entities_transferred": plan.linked_entities_transferred,
+                "entities_modified": outcome["entities_modified"],
+                "linked_repointed": outcome["linked_repointed"],
+                "transactional": outcome["transactional"],
+                "timings_ms": timings,
                 "merge_timestamp": datetime.utcnow().isoformat()
             }
-            
-            logger.info(f"Entity merge completed successfully. Relationship: {relationship_id}")
-            return merge_result
-            
+
         except Exception as e:
-            logger.error(f"Error merging entities: {e}")
+            logger.error(f"Error merging entities into {master_entity_id}: {e}")
+            timings["total_ms"] = _elapsed_ms(started)
             return {
                 "success": False,
                 "error": str(e),
-                "source_entity_id": source_entity.entity_id,
-                "target_entity_id": target_entity.entity_id
-            }
-    
-    async def _analyze_merge_conflicts(self, source_entity: Entity, target_entity: Entity) -> Dict[str, Any]:
-        """Analyze potential conflicts between entities"""
-        try:
-            conflicts = {
-                "name_conflicts": [],
-                "identifier_conflicts": [],
-                "contact_conflicts": [],
-                "data_conflicts": [],
-                "resolution_required": False
+                "invalid_request": isinstance(e, MergeError),
+                "merged_entity_id": master_entity_id,
+                "source_entity_ids": list(source_entity_ids),
+                "timings_ms": timings
             }
-            
-            # Name conflicts
-            if hasattr(source_entity, 'name') and hasattr(target_entity, 'name'):
-                if source_entity.name and target_entity.name:
-                    if source_entity.name.lower().strip() != target_entity.name.lower().strip():
-                        conflicts["name_conflicts"].append({
-                            "field": "name",
-                            "source_value": source_entity.name,
-                            "target_value": target_entity.name,
-                            "recommended_action": "manual_review"
-                        })
-                        conflicts["resolution_required"] = True
-            
-            # Identifier conflicts
-            source_ids = getattr(source_entity, 'identifiers', {})
-            target_ids = getattr(target_entity, 'identifiers', {})
-            
-            for id_type in set(source_ids.keys()) & set(target_ids.keys()):
-                if source_ids[id_type] != target_ids[id_type]:
-                    conflicts["identifier_conflicts"].append({
-                        "field": f"identifiers.{id_type}",
-                        "source_value": source_ids[id_type],
-                        "target_value": target_ids[id_type],
-                        "recommended_action": "investigate"
-                    })
-                    conflicts["resolution_required"] = True
-            
-            # Contact conflicts
-            source_contact = getattr(source_entity, 'contact', None)
-            target_contact = getattr(target_entity, 'contact', None)
-            
-            if source_contact and target_contact:
-                contact_conflicts = self._analyze_contact_conflicts(source_contact, target_contact)
-                conflicts["contact_conflicts"].extend(contact_conflicts)
-                if contact_conflicts:
-                    conflicts["resolution_required"] = True
-            
-            return conflicts
-            
-        except Exception as e:
-            logger.error(f"Error analyzing merge conflicts: {e}")
-            return {"resolution_required": True, "error": str(e)}
-    
-    def _analyze_contact_conflicts(self, source_contact: Any, target_contact: Any) -> List[Dict[str, Any]]:
-        """Analyze conflicts in contact information"""
-        conflicts = []
-        
-        try:
-            # Email conflicts
-            if hasattr(source_contact, 'email') and hasattr(target_contact, 'email'):
-                if (source_contact.email and target_contact.email and 
-                    source_contact.email.lower() != target_contact.email.lower()):
-                    conflicts.append({
-                        "field": "contact.email",
-                        "source_value": source_contact.email,
-                        "target_value": target_contact.email,
-                        "recommended_action": "combine"
-                    })
-            
-            # Phone conflicts
-            if hasattr(source_contact, 'phone') and hasattr(target_contact, 'phone'):
-                if source_contact.phone and target_contact.phone:
-                    # Normalize phones for comparison
-                    source_phone = ''.join(filter(str.isdigit, source_contact.phone))
-                    target_phone = ''.join(filter(str.isdigit, target_contact.phone))
-                    if source_phone != target_phone:
-                        conflicts.append({
-                            "field": "contact.phone",
-                            "source_value": source_contact.phone,
-                            "target_value": target_contact.phone,
-                            "recommended_action": "combine"
-                        })
-            
-            # Address conflicts
-            if hasattr(source_contact, 'address') and hasattr(target_contact, 'address'):
-                if (source_contact.address and target_contact.address and 
-                    str(source_contact.address) != str(target_contact.address)):
-                    conflicts.append({
-                        "field": "contact.address",
-                        "source_value": str(source_contact.address),
-                        "target_value": str(target_contact.address),
-                        "recommended_action": "prefer_complete"
-                    })
-            
-        except Exception as e:
-            logger.error(f"Error analyzing contact conflicts: {e}")
-        
-        return conflicts
-    
-    async def _resolve_merge_conflicts(self, source_entity: Entity, target_entity: Entity,
-                                     conflict_analysis: Dict[str, Any], 
-                                     merge_decision: Dict[str, Any]) -> Dict[str, Any]:
-        """Resolve merge conflicts using configured strategies"""
-        try:
-            merged_data = {}
-            
-            # Resolve name conflicts
-            merged_data["name"] = self._resolve_name_conflict(
-                source_entity, target_entity, merge_decision
-            )
-            
-            # Resolve identifier conflicts
-            merged_data["identifiers"] = self._resolve_identifier_conflicts(
-                source_entity, target_entity, merge_decision
-            )
-            
-            # Resolve contact conflicts
-            merged_data["contact"] = self._resolve_contact_conflicts(
-                source_entity, target_entity, merge_decision
-            )
-            
-            # Merge other entity data
-            merged_data.update(self._merge_additional_data(source_entity, target_entity))
-            
-            # Add merge metadata
-            merged_data["merge_history"] = {
-                "merged_from": source_entity.entity_id,
-                "merge_timestamp": datetime.utcnow().isoformat(),
-                "merge_method": "service_based_merge",
-                "conflicts_detected": conflict_analysis.get("resolution_required", False)
-            }
-            
-            return merged_data
-            
-        except Exception as e:
-            logger.error(f"Error resolving merge conflicts: {e}")
-            return {}
-    
-    def _resolve_name_conflict(self, source_entity: Entity, target_entity: Entity, 
-                              merge_decision: Dict[str, Any]) -> str:
-        """Resolve name conflicts using strategy"""
-        try:
-            source_name = getattr(source_entity, 'name', '')
-            target_name = getattr(target_entity, 'name', '')
-            
-            strategy = self.merge_strategies.get("name", "prefer_longer")
-            
-            if strategy == "prefer_longer":
-                return source_name if len(source_name) > len(target_name) else target_name
-            elif strategy == "prefer_target":
-                return target_name or source_name
-            elif strategy == "prefer_source":
-                return source_name or target_name
-            else:
-                return target_name or source_name
-                
-        except Exception as e:
-            logger.error(f"Error resolving name conflict: {e}")
-            return getattr(target_entity, 'name', '')
-    
-    def _resolve_identifier_conflicts(self, source_entity: Entity, target_entity: Entity,
-                                    merge_decision: Dict[str, Any]) -> Dict[str, str]:
-        """Resolve identifier conflicts using combine strategy"""
-        try:
-            source_ids = getattr(source_entity, 'identifiers', {})
-            target_ids = getattr(target_entity, 'identifiers', {})
-            
-            merged_identifiers = target_ids.copy()
-            
-            for id_type, id_value in source_ids.items():
-                if id_type not in merged_identifiers:
-                    # Add new identifier from source
-                    merged_identifiers[id_type] = id_value
-                elif merged_identifiers[id_type] != id_value:
-                    # Conflict - keep target but log alternative
-                    logger.warning(f"Identifier conflict for {id_type}: "
-                                 f"target={merged_identifiers[id_type]}, source={id_value}")
-                    # Could store alternative identifier with suffix
-                    merged_identifiers[f"{id_type}_alt"] = id_value
-            
-            return merged_identifiers
-            
-        except Exception as e:
-            logger.error(f"Error resolving identifier conflicts: {e}")
-            return getattr(target_entity, 'identifiers', {})
-    
-    def _resolve_contact_conflicts(self, source_entity: Entity, target_entity: Entity,
-                                 merge_decision: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-        """Resolve contact information conflicts"""
-        try:
-            source_contact = getattr(source_entity, 'contact', None)
-            target_contact = getattr(target_entity, 'contact', None)
-            
-            if not source_contact:
-                return target_contact.__dict__ if target_contact else None
-            if not target_contact:
-                return source_contact.__dict__ if source_contact else None
-            
-            # Combine contact information, preferring more complete data
-            merged_contact = {}
-            
-            # Email - prefer non-empty
-            merged_contact["email"] = (
-                getattr(target_contact, 'email', None) or 
-                getattr(source_contact, 'email', None)
-            )
-            
-            # Phone - prefer non-empty
-            merged_contact["phone"] = (
-                getattr(target_contact, 'phone', None) or 
-                getattr(source_contact, 'phone', None)
-            )
-            
-            # Address - prefer more complete
-            target_address = getattr(target_contact, 'address', None)
-            source_address = getattr(source_contact, 'address', None)
-            
-            if target_address and source_address:
-                # Compare completeness (simple length comparison)
-                if len(str(target_address)) >= len(str(source_address)):
-                    merged_contact["address"] = target_address
-                else:
-                    merged_contact["address"] = source_address
-            else:
-                merged_contact["address"] = target_address or source_address
-            
-            return merged_contact
-            
-        except Exception as e:
-            logger.error(f"Error resolving contact conflicts: {e}")
-            return getattr(target_entity, 'contact', None)
-    
-    def _merge_additional_data(self, source_entity: Entity, target_entity: Entity) -> Dict[str, Any]:
-        """Merge additional entity data fields"""
-        try:
-            additional_data = {}
-            
-            # Risk level - prefer higher risk
-            source_risk = getattr(source_entity, 'risk_level', 'low')
-            target_risk = getattr(target_entity, 'risk_level', 'low')
-            
-            risk_order = {'low': 1, 'medium': 2, 'high': 3, 'critical': 4}
-            source_risk_value = risk_order.get(source_risk, 1)
-            target_risk_value = risk_order.get(target_risk, 1)
-            
-            if source_risk_value > target_risk_value:
-                additional_data["risk_level"] = source_risk
-                additional_data["risk_score"] = getattr(source_entity, 'risk_score', None)
-            else:
-                additional_data["risk_level"] = target_risk
-                additional_data["risk_score"] = getattr(target_entity, 'risk_score', None)
-            
-            # Entity type - should be consistent
-            additional_data["entity_type"] = getattr(target_entity, 'entity_type', 'individual')
-            
-            # Status - prefer active
-            source_status = getattr(source_entity, 'status', 'active')
-            target_status = getattr(target_entity, 'status', 'active')
-            additional_data["status"] = 'active' if 'active' in [source_status, target_status] else target_status
-            
-            # Updated timestamp
-            additional_data["updated_date"] = datetime.utcnow()
-            
-            return additional_data
-            
-        except Exception as e:
-            logger.error(f"Error merging additional data: {e}")
-            return {}
-    
-    # ==================== ENTITY UPDATE OPERATIONS ====================
-    
-    async def _update_target_entity(self, target_entity: Entity, merged_data: Dict[str, Any]) -> Entity:
-        """Update target entity with merged data"""
-        try:
-            # Update entity through repository
-            updated_entity = await self.entity_repo.update_entity(
-                target_entity.entity_id, merged_data
-            )
-            
-            logger.info(f"Updated target entity {target_entity.entity_id} with merged data")
-            return updated_entity
-            
-        except Exception as e:
-            logger.error(f"Error updating target entity: {e}")
-            raise
-    
-    async def _update_source_entity_resolution(self, source_entity: Entity, target_entity: Entity,
-                                             merge_decision: Dict[str, Any]) -> Entity:
-        """Update source entity with resolution status"""
-        try:
-            resolution_data = {
+
+    # ==================== MERGE PLANNING ====================
+
+    def plan_merge(self, master_id: str, source_ids: List[str],
+                   documents: Dict[str, Dict[str, Any]], merge_decision: Dict[str, Any]) -> MergePlan:
+        """Compute every write for the merge without touching the database"""
+        if not source_ids:
+            raise MergeError("At least one source entity is required")
+        if len(source_ids) > MAX_SOURCES_PER_MERGE:
+            raise MergeError(f"At most {MAX_SOURCES_PER_MERGE} sources can be merged in one call")
+        if master_id in source_ids:
+            raise MergeError("Master entity cannot also be a source")
+        missing = [entity_id for entity_id in [master_id] + source_ids if entity_id not in documents]
+        if missing:
+            raise MergeError(f"Entities not found: {', '.join(missing[:10])}")
+
+        master = documents[master_id]
+        master_resolution = master.get("resolution") or {}
+        if master_resolution.get("master_entity_id") in source_ids:
+            raise MergeError(f"{master_id} is already linked to {master_resolution['master_entity_id']}; "
+                             f"merge in the other direction")
+        for source_id in source_ids:
+            resolution = documents[source_id].get("resolution") or {}
+            if resolution.get("status") == "resolved" and resolution.get("master_entity_id") not in (None, master_id):
+                raise MergeError(f"{source_id} is already resolved into {resolution['master_entity_id']}")
+
+        now = datetime.utcnow()
+        merge_id = f"mg-{now:%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:6]}"
+        confidence = merge_decision.get("match_confidence", 1.0)
+        resolved_by = merge_decision.get("resolved_by") or "merge_service"
+        sources = [documents[source_id] for source_id in source_ids]
+
+        # Entities already linked to a source follow it to the new master
+        excluded = set([master_id] + source_ids)
+        transferred = list(dict.fromkeys(
+            linked for source in sources
+            for linked in (source.get("resolution") or {}).get("linked_entities") or []
+            if linked not in excluded
+        ))
+
+        master_update, master_changes = self._plan_master_update(
+            master, sources, source_ids + transferred, merge_id, resolved_by, now
+        )
+        operations = [UpdateOne({"entityId": master_id}, master_update)]
+        relationships = []
+        conflicts = {}
+        for source in sources:
+            source_id = source["entityId"]
+            conflicts[source_id] = self._analyze_merge_conflicts(source, master)
+            operations.append(UpdateOne({"entityId": source_id}, {"$set": {
                 "resolution": {
                     "status": "resolved",
-                    "master_entity_id": target_entity.entity_id,
-                    "confidence": merge_decision.get("match_confidence", 1.0),
-                    "resolved_by": merge_decision.get("resolved_by", "merge_service"),
-                    "resolved_at": datetime.utcnow().isoformat(),
-                    "linked_entities": [target_entity.entity_id]
+                    "master_entity_id": master_id,
+                    "confidence": confidence,
+                    "resolved_by": resolved_by,
+                    "resolved_at": now,
+                    "linked_entities": [master_id],
+                    "merge_id": merge_id
                 },
-                "updated_date": datetime.utcnow()
-            }
-            
-            updated_entity = await self.entity_repo.update_entity(
-                source_entity.entity_id, resolution_data
-            )
-            
-            logger.info(f"Updated source entity {source_entity.entity_id} resolution status")
-            return updated_entity
-            
-        except Exception as e:
-            logger.error(f"Error updating source entity resolution: {e}")
-            raise
-    
-    async def _handle_linked_entities_transfer(self, source_entity: Entity, target_entity: Entity) -> List[str]:
-        """Transfer linked entities from source to target if source was a master"""
-        try:
-            # Check if source entity had linked entities
-            source_resolution = getattr(source_entity, 'resolution', {})
-            linked_entities = source_resolution.get('linked_entities', [])
-            
-            if not linked_entities:
-                return []
-            
-            updated_entities = []
-            
-            # Update each linked entity to point to new master
-            for linked_entity_id in linked_entities:
-                try:
-                    linked_entity = await self.entity_repo.get_entity_by_id(linked_entity_id)
-                    if linked_entity:
-                        # Update resolution to point to new master
-                        resolution_update = {
-                            "resolution.master_entity_id": target_entity.entity_id,
-                            "updated_date": datetime.utcnow()
-                        }
-                        
-                        await self.entity_repo.update_entity(linked_entity_id, resolution_update)
-                        updated_entities.append(linked_entity_id)
-                        
-                except Exception as e:
-                    logger.error(f"Error updating linked entity {linked_entity_id}: {e}")
-                    continue
-            
-            # Update target entity to include all linked entities
-            if updated_entities:
-                target_resolution = getattr(target_entity, 'resolution', {})
-                existing_linked = target_resolution.get('linked_entities', [])
-                all_linked = list(set(existing_linked + updated_entities + [source_entity.entity_id]))
-                
-                await self.entity_repo.update_entity(target_entity.entity_id, {
-                    "resolution.linked_entities": all_linked
+                "updatedAt": now
+            }}))
+            relationships.append(self._merge_relationship_document(
+                source, master, merge_id, merge_decision, conflicts[source_id], now
+            ))
+
+        return MergePlan(
+            merge_id=merge_id,
+            master_id=master_id,
+            source_ids=source_ids,
+            entity_operations=operations,
+            repoint_filter={
+                "resolution.master_entity_id": {"$in": source_ids},
+                "entityId": {"$nin": list(excluded)}
+            },
+            repoint_update={"$set": {
+                "resolution.master_entity_id": master_id,
+                "resolution.merge_id": merge_id,
+                "updatedAt": now
+            }},
+            relationship_documents=relationships,
+            linked_entities_transferred=transferred,
+            conflict_analysis=conflicts,
+            master_changes=master_changes
+        )
+
+    def _plan_master_update(self, master: Dict[str, Any], sources: List[Dict[str, Any]],
+                            linked_ids: List[str], merge_id: str, resolved_by: str,
+                            now: datetime) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Master update: only additions ($addToSet) plus a higher risk score, so concurrent edits survive"""
+        add_to_set: Dict[str, Any] = {"resolution.linked_entities": {"$each": linked_ids}}
+        set_fields: Dict[str, Any] = {"updatedAt": now}
+        changes: Dict[str, Any] = {"linked_entities_added": linked_ids}
+
+        # Name - keep the master's, remember every source spelling as an alias
+        master_name, master_aliases = _name_parts(master.get("name"))
+        known = {master_name.lower(), *(alias.lower() for alias in master_aliases)}
+        aliases = []
+        for source in sources:
+            source_name, source_aliases = _name_parts(source.get("name"))
+            for alias in [source_name] + source_aliases:
+                if alias and alias.lower() not in known:
+                    known.add(alias.lower())
+                    aliases.append(alias)
+        if aliases:
+            alias_field = "name.aliases" if isinstance(master.get("name"), dict) else "alternate_names"
+            add_to_set[alias_field] = {"$each": aliases}
+            changes["aliases_added"] = aliases
+
+        # Identifiers and contact details - union on (type, normalised value)
+        for list_field, change_key in (("identifiers", "identifiers_added"), ("contactInfo", "contacts_added")):
+            if not isinstance(master.get(list_field, []), list):
+                continue
+            seen = {_item_key(item) for item in master.get(list_field) or []}
+            additions = []
+            for source in sources:
+                items = source.get(list_field) or []
+                for item in items if isinstance(items, list) else []:
+                    key = _item_key(item)
+                    if key and key not in seen:
+                        seen.add(key)
+                        additions.append({**item, "primary": False} if list_field == "contactInfo" else item)
+            if additions:
+                add_to_set[list_field] = {"$each": additions}
+                changes[change_key] = additions
+
+        # Risk - prefer the higher assessment
+        master_score = _risk_score(master)
+        riskiest = max(sources, key=_risk_score)
+        if _risk_score(riskiest) > master_score:
+            overall = (riskiest.get("riskAssessment") or {}).get("overall") or {}
+            set_fields["riskAssessment.overall.score"] = overall.get("score")
+            if overall.get("level") in _RISK_LEVELS:
+                set_fields["riskAssessment.overall.level"] = overall["level"]
+            changes["risk_from"] = riskiest["entityId"]
+
+        update = {
+            "$addToSet": add_to_set,
+            "$set": set_fields,
+            "$push": {"merge_history": {
+                "merge_id": merge_id,
+                "merged_from": [source["entityId"] for source in sources],
+                "merged_at": now,
+                "merged_by": resolved_by
+            }}
+        }
+        return update, changes
+
+    def _analyze_merge_conflicts(self, source: Dict[str, Any], master: Dict[str, Any]) -> Dict[str, Any]:
+        """Conflicting values between a source and the master (reported, not blocking)"""
+        conflicts = {
+            "name_conflicts": [],
+            "identifier_conflicts": [],
+            "data_conflicts": [],
+            "resolution_required": False
+        }
+
+        source_name, _ = _name_parts(source.get("name"))
+        master_name, _ = _name_parts(master.get("name"))
+        if source_name and master_name and source_name.lower().strip() != master_name.lower().strip():
+            conflicts["name_conflicts"].append({
+                "field": "name",
+                "source_value": source_name,
+                "target_value": master_name,
+                "recommended_action": "kept_as_alias"
+            })
+
+        source_ids = _identifiers_by_type(source.get("identifiers"))
+        master_ids = _identifiers_by_type(master.get("identifiers"))
+        for id_type in sorted(set(source_ids) & set(master_ids)):
+            if not source_ids[id_type] & master_ids[id_type]:
+                conflicts["identifier_conflicts"].append({
+                    "field": f"identifiers.{id_type}",
+                    "source_value": sorted(source_ids[id_type]),
+                    "target_value": sorted(master_ids[id_type]),
+                    "recommended_action": "investigate"
                 })
-            
-            logger.info(f"Transferred {len(updated_entities)} linked entities to new master")
-            return updated_entities
-            
-        except Exception as e:
-            logger.error(f"Error handling linked entities transfer: {e}")
-            return []
-    
+                conflicts["resolution_required"] = True
+
+        for field_name in ("entityType", "dateOfBirth"):
+            source_value, master_value = source.get(field_name), master.get(field_name)
+            if source_value and master_value and str(source_value)[:10] != str(master_value)[:10]:
+                conflicts["data_conflicts"].append({
+                    "field": field_name,
+                    "source_value": str(source_value),
+                    "target_value": str(master_value),
+                    "recommended_action": "investigate"
+                })
+                conflicts["resolution_required"] = True
+
+        return conflicts
+
     # ==================== RELATIONSHIP CREATION ====================
-    
-    async def _create_merge_relationship(self, source_entity: Entity, target_entity: Entity,
-                                       merge_decision: Dict[str, Any], 
-                                       conflict_analysis: Dict[str, Any]) -> str:
-        """Create relationship record for the merge operation"""
-        try:
-            # Create relationship evidence
-            evidence = RelationshipEvidence(
-                matched_attributes=merge_decision.get("matched_attributes", []),
-                manual_confidence=merge_decision.get("match_confidence", 1.0),
-                additional_data={
-                    "merge_timestamp": datetime.utcnow().isoformat(),
-                    "conflicts_detected": conflict_analysis.get("resolution_required", False),
-                    "merge_notes": merge_decision.get("notes", ""),
-                    "conflict_summary": conflict_analysis
-                }
-            )
-            
-            # Create relationship
-            relationship = Relationship(
-                source=EntityReference(
-                    entity_id=source_entity.entity_id,
-                    entity_type=getattr(source_entity, 'entity_type', 'individual'),
-                    entity_name=getattr(source_entity, 'name', '')
-                ),
-                target=EntityReference(
-                    entity_id=target_entity.entity_id,
-                    entity_type=getattr(target_entity, 'entity_type', 'individual'),
-                    entity_name=getattr(target_entity, 'name', '')
-                ),
-                type=RelationshipType.CONFIRMED_SAME_ENTITY,
-                direction=RelationshipDirection.BIDIRECTIONAL,
-                strength=merge_decision.get("match_confidence", 1.0),
-                evidence=evidence,
-                datasource="merge_service",
-                created_by=merge_decision.get("resolved_by", "merge_service"),
-                status="active",
-                notes=merge_decision.get("notes", "Entity merge operation")
-            )
-            
-            # Create relationship through repository
-            relationship_id = await self.relationship_repo.create_relationship(relationship)
-            
-            logger.info(f"Created merge relationship: {relationship_id}")
-            return relationship_id
-            
-        except Exception as e:
-            logger.error(f"Error creating merge relationship: {e}")
-            raise
\ No newline at end of file
+
+    def _merge_relationship_document(self, source: Dict[str, Any], master: Dict[str, Any], merge_id: str,
+                                     merge_decision: Dict[str, Any], conflict_analysis: Dict[str, Any],
+                                     now: datetime) -> Dict[str, Any]:
+        """confirmed_same_entity relationship recording one source of the merge"""
+        confidence = merge_decision.get("match_confidence", 1.0)
+        return {
+            "relationshipId": f"REL-{merge_id}-{source['entityId']}",
+            "source": {"entityId": source["entityId"], "entityType": source.get("entityType", "individual")},
+            "target": {"entityId": master["entityId"], "entityType": master.get("entityType", "individual")},
+            "type": RelationshipType.CONFIRMED_SAME_ENTITY.value,
+            "direction": RelationshipDirection.BIDIRECTIONAL.value,
+            "strength": confidence,
+            "confidence": confidence,
+            "active": True,
+            "verified": True,
+            "evidence": merge_decision.get("matched_attributes", []),
+            "datasource": "merge_service",
+            "created_by": merge_decision.get("resolved_by") or "merge_service",
+            "notes": merge_decision.get("notes") or "Entity merge operation",
+            "merge": {
+                "merge_id": merge_id,
+                "conflicts_detected": conflict_analysis.get("resolution_required", False)
+            },
+            "createdAt": now,
+            "updatedAt": now
+        }
+
+
+# ==================== DOCUMENT HELPERS ====================
+
+def _elapsed_ms(started: float) -> float:
+    return round((time.perf_counter() - started) * 1000, 1)
+
+
+def _entity_id(entity: Any) -> str:
+    if isinstance(entity, dict):
+        return entity.get("entityId") or entity.get("entity_id")
+    return getattr(entity, "entity_id", None) or getattr(entity, "entityId", None)
+
+
+def _name_parts(name: Any) -> Tuple[str, List[str]]:
+    if isinstance(name, dict):
+        return str(name.get("full") or ""), [str(alias) for alias in name.get("aliases") or [] if alias]
+    return str(name or ""), []
+
+
+def _item_key(item: Any) -> Optional[Tuple[str, str]]:
+    """(type, normalised value) of an identifier / contactInfo entry"""
+    if not isinstance(item, dict) or not item.get("value"):
+        return None
+    value = str(item["value"]).strip().lower()
+    if item.get("type") == "phone":
+        value = "".join(ch for ch in value if ch.isdigit())[-9:]
+    return str(item.get("type", "")).lower(), value
+
+
+def _identifiers_by_type(identifiers: Any) -> Dict[str, set]:
+    grouped: Dict[str, set] = {}
+    if isinstance(identifiers, dict):
+        identifiers = [{"type": k, "value": v} for k, v in identifiers.items()]
+    for item in identifiers or []:
+        key = _item_key(item)
+        if key:
+            grouped.setdefault(key[0], set()).add(key[1])
+    return grouped
+
+
+def _risk_score(doc: Dict[str, Any]) -> float:
+    score = ((doc.get("riskAssessment") or {}).get("overall") or {}).get("score")
+    return float(score) if isinstance(score, (int, float)) else -1.0
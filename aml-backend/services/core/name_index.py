@@ -0,0 +1,107 @@
+"""
+Name Index - write-time phonetic codes / token signatures on entities
+
+EntityRepository writes ``phonetic_codes`` on create/update; entities loaded
+by the seed scripts or written before the name index existed are brought up
+to date here:
+
+    {double_metaphone: [...], soundex: [...], tokens: [...], signature, version}
+
+``backfill_name_index`` rewrites every entity whose ``phonetic_codes.version``
+is not the current NAME_INDEX_VERSION (idempotent, chunked ``bulk_write``) and
+ensures the multikey indexes used for blocking. It runs once in the
+background on API startup (NAME_INDEX_BACKFILL_ON_STARTUP) or with:
+
+    python -m services.core.name_index [--force]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Dict, Optional
+
+from pymongo import ASCENDING, UpdateOne
+
+from utils.name_matching import NAME_INDEX_VERSION, name_index_fields
+
+logger = logging.getLogger(__name__)
+
+
+def _safe_int(env_key: str, default: int) -> int:
+    try:
+        return int(os.getenv(env_key, str(default)))
+    except (ValueError, TypeError):
+        return default
+
+
+BACKFILL_ON_STARTUP = os.getenv("NAME_INDEX_BACKFILL_ON_STARTUP", "true").lower() == "true"
+_WRITE_CHUNK = _safe_int("NAME_INDEX_WRITE_CHUNK", 1000)
+
+INDEXED_FIELDS = ("phonetic_codes.double_metaphone", "phonetic_codes.soundex", "phonetic_codes.signature")
+
+
+def ensure_name_indexes(coll) -> None:
+    """Multikey indexes for blocking on codes and exact signature lookups"""
+    for field in INDEXED_FIELDS:
+        coll.create_index([(field, ASCENDING)], sparse=True)
+
+
+def backfill_name_index(db, force: bool = False) -> Dict[str, Any]:
+    """Recompute phonetic_codes for stale entities (sync)"""
+    coll = db[os.getenv("ENTITIES_COLLECTION", "entities")]
+    query = {} if force else {"phonetic_codes.version": {"$ne": NAME_INDEX_VERSION}}
+    started = time.perf_counter()
+    scanned = modified = 0
+    ops = []
+    for doc in coll.find(query, {"name": 1, "alternate_names": 1}):
+        scanned += 1
+        ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": {
+            "phonetic_codes": name_index_fields(doc.get("name"), doc.get("alternate_names"))
+        }}))
+        if len(ops) >= _WRITE_CHUNK:
+            modified += coll.bulk_write(ops, ordered=False).modified_count
+            ops = []
+    if ops:
+        modified += coll.bulk_write(ops, ordered=False).modified_count
+    ensure_name_indexes(coll)
+
+    result = {"scanned": scanned, "updated": modified, "version": NAME_INDEX_VERSION,
+              "elapsed_ms": round((time.perf_counter() - started) * 1000, 1)}
+    if scanned:
+        logger.info("Name index backfill: %d entities scanned, %d updated in %.0f ms",
+                    scanned, modified, result["elapsed_ms"])
+    return result
+
+
+async def _backfill_once() -> None:
+    from dependencies import DB_NAME, get_mongo_client
+
+    try:
+        await asyncio.to_thread(backfill_name_index, get_mongo_client()[DB_NAME])
+    except Exception as exc:
+        logger.warning("Name index backfill failed: %s", exc)
+
+
+_backfill_task: Optional[asyncio.Task] = None
+
+
+def start_name_index_backfill() -> None:
+    """Bring stale entities up to the current name index in the background."""
+    global _backfill_task
+    if not BACKFILL_ON_STARTUP or (_backfill_task and not _backfill_task.done()):
+        return
+    _backfill_task = asyncio.create_task(_backfill_once())
+
+
+if __name__ == "__main__":
+    from dependencies import DB_NAME, get_mongo_client
+
+    parser = argparse.ArgumentParser(description="Backfill entity phonetic_codes for name matching")
+    parser.add_argument("--force", action="store_true", help="recompute every entity, not just stale ones")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    for key, value in backfill_name_index(get_mongo_client()[DB_NAME], force=args.force).items():
+        print(f"  {key}: {value}")
@@ -13,9 +13,14 @@ from repositories.interfaces.network_repository import NetworkRepositoryInterfac
 from models.api.requests import NetworkRequest, EntityNetworkRequest
 from models.api.responses import StandardResponse, NetworkResponse
 from models.core.network import NetworkNode, NetworkEdge, RelationshipType
+from services.network.network_features import run_network_features_job_async
 
 logger = logging.getLogger(__name__)
 
+# Visualization fields dropped when a caller asks for unstyled data
+_NODE_STYLE_FIELDS = {"color"}
+_EDGE_STYLE_FIELDS = {"color", "thickness"}
+
 
 class NetworkAnalysisService:
     """
@@ -107,7 +112,7 @@ class NetworkAnalysisService:
             
             processing_time = (datetime.utcnow() - start_time).total_seconds() * 1000
             
-            logger.info(f"Built network with {len(enhanced_network.nodes)} nodes and {len(enhanced_network.edges)} edges in {processing_time:.2f}ms")
+            logger.info(f"Built network with {enhanced_network.total_entities} nodes and {enhanced_network.total_relationships} edges in {processing_time:.2f}ms")
             
             return NetworkResponse(
                 success=True,
@@ -506,11 +511,19 @@ class NetworkAnalysisService:
         try:
             logger.info("Detecting hub entities in network")
             
-            # Detect hub entities through repository
-            hub_entities = await self.network_repo.detect_hub_entities(
-                min_connections=min_connections or 10,
-                connection_types=connection_types
-            )
+            # Precomputed degrees cover all relationship types; filtered counts need the live scan
+            hub_entities = []
+            source = "live"
+            if not connection_types:
+                hub_entities = await self.network_repo.get_precomputed_hubs(
+                    min_connections=min_connections or 10
+                )
+                source = "precomputed" if hub_entities else source
+            if not hub_entities:
+                hub_entities = await self.network_repo.detect_hub_entities(
+                    min_connections=min_connections or 10,
+                    connection_types=connection_types
+                )
             
             # Analyze hub entities for insights
             hub_analysis = await self._analyze_hub_entities(hub_entities)
@@ -519,7 +532,8 @@ class NetworkAnalysisService:
                 "success": True,
                 "total_hubs": len(hub_entities),
                 "hub_entities": hub_entities,
-                "analysis": hub_analysis
+                "analysis": hub_analysis,
+                "source": source
             }
             
         except Exception as e:
@@ -529,16 +543,62 @@ class NetworkAnalysisService:
                 "error": str(e)
             }
     
+    async def get_global_network_statistics(self) -> Dict[str, Any]:
+        """
+        Global network statistics from the latest nightly network features run
+        
+        Returns:
+            Dict: Graph summary (density, degree, communities, k-core, top PageRank)
+        """
+        latest_run = await self.network_repo.get_latest_feature_run()
+        if not latest_run:
+            return {
+                "success": False,
+                "message": "No network features run has completed yet; trigger POST /network/features/run"
+            }
+        
+        return {
+            "success": True,
+            "version": latest_run["_id"],
+            "algorithm_version": latest_run.get("algorithm_version"),
+            "computed_at": latest_run.get("finished_at"),
+            "statistics": latest_run.get("summary", {}),
+            "timings": latest_run.get("timings", {})
+        }
+    
+    async def run_network_features(self) -> Dict[str, Any]:
+        """
+        Run the whole-graph network features job now
+        
+        Returns:
+            Dict: Run outcome (run ID, status, timings, graph summary)
+        """
+        return await run_network_features_job_async()
+    
+    async def get_network_features_status(self, limit: int = 5) -> Dict[str, Any]:
+        """
+        Recent network features runs and the job lease
+        
+        Args:
+            limit: Number of runs to return (newest first)
+            
+        Returns:
+            Dict: Runs (status, timings, entities updated, graph summary) and lease
+        """
+        return await self.network_repo.get_feature_runs(limit)
+    
     # ==================== VISUALIZATION SUPPORT ====================
     
     async def prepare_network_for_visualization(self, query_params: NetworkQueryParams,
-                                              layout_algorithm: Optional[str] = None) -> Dict[str, Any]:
+                                              layout_algorithm: Optional[str] = None,
+                                              include_styling: bool = True) -> Dict[str, Any]:
         """
         Prepare network data optimized for visualization
         
         Args:
             query_params: Network query parameters
             layout_algorithm: Preferred layout algorithm
+            include_styling: Include node/edge colors, edge thickness and the legend
             
         Returns:
             Dict: Visualization-ready network data
@@ -553,7 +613,7 @@ class NetworkAnalysisService:
             )
             
             # Add visualization styling and metadata
-            enhanced_viz_data = await self._enhance_visualization_data(viz_data)
+            enhanced_viz_data = await self._enhance_visualization_data(viz_data, include_styling)
             
             return {
                 "success": True,
@@ -582,6 +642,12 @@ class NetworkAnalysisService:
             NetworkDataResponse: Enhanced network data
         """
         try:
+            if network_data.snapshot is not None:
+                # Column-wise table lookups instead of per-model styling; the
+                # frontend force layout positions nodes itself
+                network_data.snapshot.apply_styling(self.risk_colors, self.relationship_colors)
+                return network_data
+            
             # Calculate node positions if not already set
             if not any(hasattr(node, 'x') and hasattr(node, 'y') for node in network_data.nodes):
                 positions = await self.network_repo.calculate_node_positions(
@@ -678,43 +744,23 @@ class NetworkAnalysisService:
             Dict: Network statistics
         """
         try:
-            total_nodes = len(network_data.nodes)
-            total_edges = len(network_data.edges)
-            
-            # Calculate node statistics
-            node_stats = {
-                "total_nodes": total_nodes,
-                "node_types": {},
-                "risk_distribution": {}
-            }
-            
-            for node in network_data.nodes:
-                # Count by type
-                node_type = getattr(node, 'entity_type', 'unknown')
-                node_stats["node_types"][node_type] = node_stats["node_types"].get(node_type, 0) + 1
-                
-                # Count by risk level
-                risk_level = getattr(node, 'risk_level', 'unknown')
-                node_stats["risk_distribution"][risk_level] = node_stats["risk_distribution"].get(risk_level, 0) + 1
-            
-            # Calculate edge statistics
-            edge_stats = {
-                "total_edges": total_edges,
-                "relationship_types": {},
-                "verification_status": {"verified": 0, "unverified": 0}
-            }
-            
-            for edge in network_data.edges:
-                # Count by relationship type
-                rel_type = getattr(edge, 'relationship_type', 'unknown')
-                edge_stats["relationship_types"][str(rel_type)] = edge_stats["relationship_types"].get(str(rel_type), 0) + 1
-                
-                # Count verification status
-                verified = getattr(edge, 'verified', False)
-                if verified:
-                    edge_stats["verification_status"]["verified"] += 1
-                else:
-                    edge_stats["verification_status"]["unverified"] += 1
+            snapshot = network_data.snapshot
+            if snapshot is not None:
+                total_nodes, total_edges = snapshot.node_count, snapshot.edge_count
+                counts = snapshot.counts()
+                node_stats = {
+                    "total_nodes": total_nodes,
+                    "node_types": counts["node_types"],
+                    "risk_distribution": counts["risk_distribution"]
+                }
+                edge_stats = {
+                    "total_edges": total_edges,
+                    "relationship_types": counts["relationship_types"],
+                    "verification_status": counts["verification_status"]
+                }
+            else:
+                total_nodes, total_edges = len(network_data.nodes), len(network_data.edges)
+                node_stats, edge_stats = self._count_network_models(network_data)
             
             # Calculate network density
             max_possible_edges = total_nodes * (total_nodes - 1) / 2 if total_nodes > 1 else 0
@@ -734,6 +780,44 @@ class NetworkAnalysisService:
             logger.warning(f"Network statistics calculation failed: {e}")
             return {"error": str(e)}
     
+    def _count_network_models(self, network_data: NetworkDataResponse) -> tuple:
+        """Node and edge histograms for a network built without a snapshot"""
+        node_stats = {
+            "total_nodes": len(network_data.nodes),
+            "node_types": {},
+            "risk_distribution": {}
+        }
+        
+        for node in network_data.nodes:
+            # Count by type
+            node_type = getattr(node, 'entity_type', 'unknown')
+            node_stats["node_types"][node_type] = node_stats["node_types"].get(node_type, 0) + 1
+            
+            # Count by risk level
+            risk_level = getattr(node, 'risk_level', 'unknown')
+            node_stats["risk_distribution"][risk_level] = node_stats["risk_distribution"].get(risk_level, 0) + 1
+        
+        # Calculate edge statistics
+        edge_stats = {
+            "total_edges": len(network_data.edges),
+            "relationship_types": {},
+            "verification_status": {"verified": 0, "unverified": 0}
+        }
+        
+        for edge in network_data.edges:
+            # Count by relationship type
+            rel_type = getattr(edge, 'relationship_type', 'unknown')
+            edge_stats["relationship_types"][str(rel_type)] = edge_stats["relationship_types"].get(str(rel_type), 0) + 1
+            
+            # Count verification status
+            verified = getattr(edge, 'verified', False)
+            if verified:
+                edge_stats["verification_status"]["verified"] += 1
+            else:
+                edge_stats["verification_status"]["unverified"] += 1
+        
+        return node_stats, edge_stats
+    
     async def _analyze_entity_connections(self, connections: List[Dict[str, Any]], entity_id: str) -> Dict[str, Any]:
         """
         Analyze entity connections for insights
@@ -1099,12 +1183,15 @@ class NetworkAnalysisService:
             logger.warning(f"Hub analysis failed: {e}")
             return {"error": str(e)}
     
-    async def _enhance_visualization_data(self, viz_data: Dict[str, Any]) -> Dict[str, Any]:
+    async def _enhance_visualization_data(self, viz_data: Dict[str, Any],
+                                          include_styling: bool = True) -> Dict[str, Any]:
         """
         Enhance visualization data with additional styling and metadata
         
         Args:
             viz_data: Raw visualization data
+            include_styling: Keep styling fields and add the legend; when False
+                the styling the repository attached is stripped
             
         Returns:
             Dict: Enhanced visualization data
@@ -1121,6 +1208,17 @@ class NetworkAnalysisService:
                 "clustering_enabled": len(viz_data.get("nodes", [])) > 100
             }
             
+            if not include_styling:
+                enhanced["nodes"] = [
+                    {k: v for k, v in node.items() if k not in _NODE_STYLE_FIELDS}
+                    for node in viz_data.get("nodes", [])
+                ]
+                enhanced["edges"] = [
+                    {k: v for k, v in edge.items() if k not in _EDGE_STYLE_FIELDS}
+                    for edge in viz_data.get("edges", [])
+                ]
+                return enhanced
+            
             # Add legend information
             enhanced["legend"] = {
                 "node_colors": self.risk_colors,
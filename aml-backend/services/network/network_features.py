@@ -0,0 +1,489 @@
+"""
+Network Features Job - Nightly whole-graph analytics persisted on entities
+
+Hub detection, network risk and global statistics used to be computed per
+request for the entities asked about. This job computes graph features for
+every entity in one batch and writes them back as ``entities.networkFeatures``
+so request-time endpoints read precomputed values:
+
+    {degree, weightedDegree, pagerank, pagerankPercentile, communityId,
+     communitySize, kCore, propagatedRisk, version, algorithmVersion, computedAt}
+
+Pipeline:
+1. stream ``relationships`` once (active only) into interned int32/float64
+   arrays; edge weight = confidence x relationship-type risk weight
+2. compute degree, PageRank, label-propagation communities, k-core numbers and
+   max-product risk propagation with vectorised numpy kernels, one feature
+   family per worker process
+3. ``bulk_write`` the sub-document in chunks, stamped with the run ID, and
+   record the run (timings + graph summary) in ``network_feature_runs``
+
+A Mongo lease in ``network_feature_runs`` keeps concurrent API processes from
+running the job twice. Scheduled nightly at NETWORK_FEATURES_RUN_HOUR_UTC;
+can also be run once with:
+
+    python -m services.network.network_features
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import time
+import uuid
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from pymongo import DESCENDING, UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+from models.core.network import RelationshipType, get_relationship_risk_weight
+
+logger = logging.getLogger(__name__)
+
+
+def _safe_int(env_key: str, default: int) -> int:
+    try:
+        return int(os.getenv(env_key, str(default)))
+    except (ValueError, TypeError):
+        return default
+
+
+ALGORITHM_VERSION = "network-features-v1"
+RUNS_COLLECTION = "network_feature_runs"
+RUN_HOUR_UTC = _safe_int("NETWORK_FEATURES_RUN_HOUR_UTC", 2)  # negative disables the schedule
+FEATURE_WORKERS = _safe_int("NETWORK_FEATURES_WORKERS", min(4, os.cpu_count() or 1))
+PROPAGATION_HOPS = _safe_int("NETWORK_FEATURES_PROPAGATION_HOPS", 3)
+PROPAGATION_DECAY = 0.5
+PAGERANK_DAMPING = 0.85
+_READ_BATCH = 10_000
+_WRITE_CHUNK = 1_000
+_LEASE_ID = "lease"
+_LEASE_SECONDS = 6 * 3600
+
+_TYPE_WEIGHTS = {rt.value: get_relationship_risk_weight(rt) for rt in RelationshipType}
+_DEFAULT_TYPE_WEIGHT = get_relationship_risk_weight(RelationshipType.UNKNOWN)
+
+
+# ==================== GRAPH LOADING ====================
+
+class GraphArrays:
+    """Interned entity IDs plus parallel edge / node arrays"""
+
+    __slots__ = ("ids", "is_entity", "base_risk", "src", "dst", "weight")
+
+    def __init__(self, ids: List[str], is_entity: np.ndarray, base_risk: np.ndarray,
+                 src: np.ndarray, dst: np.ndarray, weight: np.ndarray):
+        self.ids = ids
+        self.is_entity = is_entity
+        self.base_risk = base_risk
+        self.src = src
+        self.dst = dst
+        self.weight = weight
+
+    @property
+    def n(self) -> int:
+        return len(self.ids)
+
+
+def load_graph(db, entity_collection: str = "entities",
+               relationship_collection: str = "relationships") -> GraphArrays:
+    """Stream entities and active relationships once into compact arrays"""
+    index: Dict[str, int] = {}
+    ids: List[str] = []
+    is_entity = bytearray()
+    base_risk = array("d")
+
+    def intern(entity_id: str) -> int:
+        idx = index.get(entity_id)
+        if idx is None:
+            idx = index[entity_id] = len(ids)
+            ids.append(entity_id)
+            is_entity.append(0)
+            base_risk.append(0.0)
+        return idx
+
+    entities = db[entity_collection].find(
+        {}, {"_id": 0, "entityId": 1, "riskAssessment.overall.score": 1}
+    ).batch_size(_READ_BATCH)
+    for doc in entities:
+        entity_id = doc.get("entityId")
+        if not entity_id:
+            continue
+        idx = intern(entity_id)
+        is_entity[idx] = 1
+        score = ((doc.get("riskAssessment") or {}).get("overall") or {}).get("score")
+        base_risk[idx] = float(score) if isinstance(score, (int, float)) else 0.0
+
+    src, dst, weight = array("i"), array("i"), array("d")
+    relationships = db[relationship_collection].find(
+        {"active": {"$ne": False}},
+        {"_id": 0, "source.entityId": 1, "target.entityId": 1, "confidence": 1, "type": 1},
+    ).batch_size(_READ_BATCH)
+    for rel in relationships:
+        source = (rel.get("source") or {}).get("entityId")
+        target = (rel.get("target") or {}).get("entityId")
+        if not source or not target or source == target:
+            continue
+        confidence = rel.get("confidence")
+        confidence = float(confidence) if isinstance(confidence, (int, float)) else 0.5
+        src.append(intern(source))
+        dst.append(intern(target))
+        # Floor keeps zero-confidence edges from producing zero out-weight nodes
+        weight.append(max(confidence * _TYPE_WEIGHTS.get(rel.get("type"), _DEFAULT_TYPE_WEIGHT), 1e-6))
+
+    return GraphArrays(
+        ids=ids,
+        is_entity=np.frombuffer(bytes(is_entity), dtype=np.uint8).astype(bool),
+        base_risk=np.frombuffer(base_risk, dtype=np.float64).copy(),
+        src=np.frombuffer(src, dtype=np.int32).astype(np.int64),
+        dst=np.frombuffer(dst, dtype=np.int32).astype(np.int64),
+        weight=np.frombuffer(weight, dtype=np.float64).copy(),
+    )
+
+
+# ==================== FEATURE KERNELS ====================
+# Module-level so they can run in worker processes. Edges are treated as
+# undirected: every kernel works on the symmetrised (s, d, w) arrays.
+
+def _symmetric(src: np.ndarray, dst: np.ndarray, weight: np.ndarray):
+    return np.concatenate([src, dst]), np.concatenate([dst, src]), np.concatenate([weight, weight])
+
+
+def degree_features(n: int, src: np.ndarray, dst: np.ndarray, weight: np.ndarray) -> Dict[str, np.ndarray]:
+    degree = np.bincount(src, minlength=n) + np.bincount(dst, minlength=n)
+    weighted = np.bincount(src, weights=weight, minlength=n) + np.bincount(dst, weights=weight, minlength=n)
+    return {"degree": degree, "weighted_degree": weighted}
+
+
+def pagerank(n: int, src: np.ndarray, dst: np.ndarray, weight: np.ndarray,
+             damping: float = PAGERANK_DAMPING, tol: float = 1e-9, max_iter: int = 100) -> Dict[str, Any]:
+    """Weighted PageRank by power iteration; dangling mass is spread uniformly"""
+    if n == 0:
+        return {"pagerank": np.zeros(0), "pagerank_iterations": 0}
+    s, d, w = _symmetric(src, dst, weight)
+    out_weight = np.bincount(s, weights=w, minlength=n)
+    dangling = out_weight == 0
+    coef = w / out_weight[s] if len(s) else w
+    rank = np.full(n, 1.0 / n)
+    iterations = 0
+    for iterations in range(1, max_iter + 1):
+        spread = np.bincount(d, weights=rank[s] * coef, minlength=n)
+        new_rank = (1 - damping) / n + damping * (spread + rank[dangling].sum() / n)
+        delta = np.abs(new_rank - rank).sum()
+        rank = new_rank
+        if delta < tol * n:
+            break
+    return {"pagerank": rank, "pagerank_iterations": iterations}
+
+
+def label_propagation(n: int, src: np.ndarray, dst: np.ndarray, weight: np.ndarray,
+                      max_iter: int = 30, seed: int = 7) -> Dict[str, Any]:
+    """
+    Weighted semi-synchronous label propagation: each round a random half of
+    the nodes adopt the label with the largest incident weight (ties to the
+    smallest label), which avoids the oscillation of fully synchronous updates
+    """
+    labels = np.arange(n, dtype=np.int64)
+    if n == 0 or len(src) == 0:
+        return {"community": labels, "iterations": 0}
+    s, d, w = _symmetric(src, dst, weight)
+    rng = np.random.default_rng(seed)
+    iterations = 0
+    for iterations in range(1, max_iter + 1):
+        # One sort per round: (node, neighbour label) keys, candidates ascending within a node
+        key = s * n + labels[d]
+        order = np.argsort(key)
+        key = key[order]
+        starts = np.flatnonzero(np.r_[True, key[1:] != key[:-1]])
+        sums = np.add.reduceat(w[order], starts)
+        nodes, candidate = key[starts] // n, key[starts] % n
+        node_starts = np.flatnonzero(np.r_[True, nodes[1:] != nodes[:-1]])
+        node_best = np.maximum.reduceat(sums, node_starts)
+        segment = np.repeat(np.arange(len(node_starts)), np.diff(np.r_[node_starts, len(nodes)]))
+        winners = np.flatnonzero(sums >= node_best[segment] - 1e-12)
+        first = np.r_[True, nodes[winners[1:]] != nodes[winners[:-1]]]
+        proposal = labels.copy()
+        proposal[nodes[winners[first]]] = candidate[winners[first]]
+        if np.array_equal(proposal, labels):
+            break
+        update = rng.random(n) < 0.5
+        labels = np.where(update, proposal, labels)
+    _, community = np.unique(labels, return_inverse=True)
+    return {"community": community, "iterations": iterations}
+
+
+def k_core(n: int, src: np.ndarray, dst: np.ndarray) -> Dict[str, Any]:
+    """Core number per node by vectorised peeling on the simple undirected graph"""
+    core = np.zeros(n, dtype=np.int64)
+    if n == 0 or len(src) == 0:
+        return {"k_core": core}
+    a, b = np.minimum(src, dst), np.maximum(src, dst)
+    pairs = np.unique(a * n + b)
+    ea, eb = pairs // n, pairs % n
+    degree = np.bincount(ea, minlength=n) + np.bincount(eb, minlength=n)
+    alive = np.ones(n, dtype=bool)
+    k = 0
+    while True:
+        while True:
+            peel = alive & (degree <= k)
+            if not peel.any():
+                break
+            core[peel] = k
+            alive[peel] = False
+            touched = peel[ea] | peel[eb]
+            degree -= np.bincount(ea[touched], minlength=n) + np.bincount(eb[touched], minlength=n)
+            ea, eb = ea[~touched], eb[~touched]
+        if not alive.any():
+            break
+        k = int(degree[alive].min())
+    return {"k_core": core}
+
+
+def propagate_risk(n: int, src: np.ndarray, dst: np.ndarray, weight: np.ndarray, base_risk: np.ndarray,
+                   hops: int = PROPAGATION_HOPS, decay: float = PROPAGATION_DECAY) -> Dict[str, Any]:
+    """
+    Highest risk reaching each node within `hops` hops: each hop multiplies by
+    `decay` x edge weight (confidence x relationship-type risk weight)
+    """
+    exposure = np.zeros(n)
+    if n == 0 or len(src) == 0:
+        return {"propagated_risk": exposure}
+    s, d, w = _symmetric(src, dst, weight)
+    carried = base_risk.copy()
+    factor = decay * w
+    for _ in range(hops):
+        incoming = np.zeros(n)
+        np.maximum.at(incoming, d, factor * carried[s])
+        exposure = np.maximum(exposure, incoming)
+        carried = np.maximum(base_risk, incoming)
+    return {"propagated_risk": exposure}
+
+
+def _timed(fn, *args) -> Tuple[Dict[str, Any], float]:
+    """Run a kernel and return its result with the elapsed milliseconds (measured in the worker)"""
+    t = time.perf_counter()
+    result = fn(*args)
+    return result, round((time.perf_counter() - t) * 1000, 1)
+
+
+def compute_features(graph: GraphArrays, workers: int = FEATURE_WORKERS) -> Tuple[Dict[str, Any], Dict[str, float]]:
+    """Run every kernel (one process per family when workers > 1); returns features and timings"""
+    n, src, dst, weight = graph.n, graph.src, graph.dst, graph.weight
+    jobs = {
+        "degree": (degree_features, (n, src, dst, weight)),
+        "pagerank": (pagerank, (n, src, dst, weight)),
+        "communities": (label_propagation, (n, src, dst, weight)),
+        "k_core": (k_core, (n, src, dst)),
+        "propagation": (propagate_risk, (n, src, dst, weight, graph.base_risk)),
+    }
+    features: Dict[str, Any] = {}
+    timings: Dict[str, float] = {}
+    t0 = time.perf_counter()
+    if workers > 1:
+        # spawn: forking a process that holds Mongo client threads is unsafe
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs)), mp_context=context) as pool:
+            futures = {name: pool.submit(_timed, fn, *args) for name, (fn, args) in jobs.items()}
+            results = {name: future.result() for name, future in futures.items()}
+    else:
+        results = {name: _timed(fn, *args) for name, (fn, args) in jobs.items()}
+    for name, (result, elapsed_ms) in results.items():
+        features.update(result)
+        timings[f"{name}_ms"] = elapsed_ms
+    timings["compute_ms"] = round((time.perf_counter() - t0) * 1000, 1)
+    return features, timings
+
+
+# ==================== PERSISTENCE ====================
+
+def _summary(graph: GraphArrays, features: Dict[str, Any]) -> Dict[str, Any]:
+    n = graph.n
+    degree, rank = features["degree"], features["pagerank"]
+    community_sizes = np.bincount(features["community"]) if n else np.zeros(0, dtype=np.int64)
+    core = features["k_core"]
+    top = np.argsort(-rank)[:10] if n else []
+    return {
+        "entities": int(graph.is_entity.sum()),
+        "nodes": n,
+        "edges": int(len(graph.src)),
+        "density": round(2 * len(graph.src) / (n * (n - 1)), 6) if n > 1 else 0.0,
+        "avg_degree": round(float(degree.mean()), 3) if n else 0.0,
+        "max_degree": int(degree.max()) if n else 0,
+        "isolated_entities": int(((degree == 0) & graph.is_entity).sum()),
+        "communities": int((community_sizes > 1).sum()),
+        "largest_community": int(community_sizes.max()) if n else 0,
+        "max_k_core": int(core.max()) if n else 0,
+        "k_core_distribution": {str(k): int(c) for k, c in enumerate(np.bincount(core)) if c} if n else {},
+        "high_exposure_entities": int(((features["propagated_risk"] >= 50) & graph.is_entity).sum()),
+        "pagerank_iterations": features.get("pagerank_iterations"),
+        "top_pagerank": [
+            {"entityId": graph.ids[i], "pagerank": float(rank[i]), "degree": int(degree[i])} for i in top
+        ],
+    }
+
+
+def write_features(db, graph: GraphArrays, features: Dict[str, Any], run_id: str,
+                   entity_collection: str = "entities") -> int:
+    """Bulk-write networkFeatures onto every entity; returns modified count"""
+    n = graph.n
+    degree, weighted = features["degree"], features["weighted_degree"]
+    rank, community, core = features["pagerank"], features["community"], features["k_core"]
+    exposure = features["propagated_risk"]
+    percentile = np.empty(n)
+    if n:
+        percentile[np.argsort(rank, kind="stable")] = np.arange(n) / max(n - 1, 1)
+    community_sizes = np.bincount(community) if n else np.zeros(0, dtype=np.int64)
+    computed_at = datetime.now(timezone.utc)
+
+    coll = db[entity_collection]
+    modified = 0
+    ops: List[UpdateOne] = []
+    for i in np.flatnonzero(graph.is_entity):
+        ops.append(UpdateOne({"entityId": graph.ids[i]}, {"$set": {"networkFeatures": {
+            "degree": int(degree[i]),
+            "weightedDegree": round(float(weighted[i]), 4),
+            "pagerank": float(rank[i]),
+            "pagerankPercentile": round(float(percentile[i]), 4),
+            "communityId": int(community[i]),
+            "communitySize": int(community_sizes[community[i]]),
+            "kCore": int(core[i]),
+            "propagatedRisk": round(float(exposure[i]), 2),
+            "version": run_id,
+            "algorithmVersion": ALGORITHM_VERSION,
+            "computedAt": computed_at,
+        }}}))
+        if len(ops) >= _WRITE_CHUNK:
+            modified += coll.bulk_write(ops, ordered=False).modified_count
+            ops = []
+    if ops:
+        modified += coll.bulk_write(ops, ordered=False).modified_count
+
+    coll.create_index([("networkFeatures.degree", DESCENDING)])
+    coll.create_index([("networkFeatures.pagerank", DESCENDING)])
+    coll.create_index("networkFeatures.communityId")
+    return modified
+
+
+def _acquire_lease(db, run_id: str) -> bool:
+    now = datetime.now(timezone.utc)
+    try:
+        db[RUNS_COLLECTION].update_one(
+            {"_id": _LEASE_ID, "expires_at": {"$lt": now}},
+            {"$set": {"holder": run_id, "expires_at": now + timedelta(seconds=_LEASE_SECONDS)}},
+            upsert=True,
+        )
+        return True
+    except DuplicateKeyError:
+        return False
+
+
+def _release_lease(db, run_id: str) -> None:
+    db[RUNS_COLLECTION].update_one(
+        {"_id": _LEASE_ID, "holder": run_id},
+        {"$set": {"expires_at": datetime.now(timezone.utc)}},
+    )
+
+
+def run_network_features_job(db, workers: int = FEATURE_WORKERS) -> Dict[str, Any]:
+    """Load, compute and persist network features for the whole graph (sync)"""
+    run_id = f"nf-{datetime.now(timezone.utc):%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:6]}"
+    if not _acquire_lease(db, run_id):
+        logger.info("Network features job already running elsewhere; skipping")
+        return {"run_id": None, "status": "skipped", "reason": "another run holds the lease"}
+
+    runs = db[RUNS_COLLECTION]
+    started_at = datetime.now(timezone.utc)
+    runs.insert_one({"_id": run_id, "status": "running", "started_at": started_at,
+                     "algorithm_version": ALGORITHM_VERSION})
+    try:
+        t0 = time.perf_counter()
+        graph = load_graph(db, os.getenv("ENTITIES_COLLECTION", "entities"),
+                           os.getenv("RELATIONSHIPS_COLLECTION", "relationships"))
+        load_ms = round((time.perf_counter() - t0) * 1000, 1)
+
+        features, timings = compute_features(graph, workers)
+
+        t1 = time.perf_counter()
+        modified = write_features(db, graph, features, run_id, os.getenv("ENTITIES_COLLECTION", "entities"))
+        write_ms = round((time.perf_counter() - t1) * 1000, 1)
+
+        result = {
+            "status": "completed",
+            "finished_at": datetime.now(timezone.utc),
+            "timings": {"load_ms": load_ms, **timings, "write_ms": write_ms},
+            "entities_updated": modified,
+            "workers": workers,
+            "summary": _summary(graph, features),
+        }
+        runs.update_one({"_id": run_id}, {"$set": result})
+        logger.info("Network features %s: %d nodes, %d edges, %d entities updated (load %.0f ms, compute %.0f ms, write %.0f ms)",
+                    run_id, graph.n, len(graph.src), modified, load_ms, timings["compute_ms"], write_ms)
+        return {"run_id": run_id, **result}
+    except Exception as exc:
+        runs.update_one({"_id": run_id}, {"$set": {
+            "status": "failed", "error": str(exc), "finished_at": datetime.now(timezone.utc),
+        }})
+        raise
+    finally:
+        _release_lease(db, run_id)
+
+
+# ==================== SCHEDULING ====================
+
+def _seconds_until_hour(hour_utc: int) -> float:
+    now = datetime.now(timezone.utc)
+    target = now.replace(hour=hour_utc, minute=0, second=0, microsecond=0)
+    if target <= now:
+        target += timedelta(days=1)
+    return (target - now).total_seconds()
+
+
+async def run_network_features_job_async(workers: int = FEATURE_WORKERS) -> Dict[str, Any]:
+    """Run the job in a worker thread against the application database."""
+    from dependencies import DB_NAME, get_mongo_client
+
+    return await asyncio.to_thread(run_network_features_job, get_mongo_client()[DB_NAME], workers)
+
+
+async def run_nightly_loop(hour_utc: int = RUN_HOUR_UTC) -> None:
+    """Run the job every day at ``hour_utc``:00 UTC."""
+    while True:
+        await asyncio.sleep(_seconds_until_hour(hour_utc))
+        try:
+            await run_network_features_job_async()
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            logger.warning("Network features job failed: %s", exc)
+
+
+_nightly_task: Optional[asyncio.Task] = None
+
+
+def start_network_features_job() -> None:
+    """Start the nightly schedule (no-op when disabled or running)."""
+    global _nightly_task
+    if not 0 <= RUN_HOUR_UTC <= 23 or (_nightly_task and not _nightly_task.done()):
+        return
+    _nightly_task = asyncio.create_task(run_nightly_loop())
+
+
+async def stop_network_features_job() -> None:
+    global _nightly_task
+    if _nightly_task is not None:
+        _nightly_task.cancel()
+        await asyncio.gather(_nightly_task, return_exceptions=True)
+        _nightly_task = None
+
+
+if __name__ == "__main__":
+    from dependencies import DB_NAME, get_mongo_client
+
+    logging.basicConfig(level=logging.INFO)
+    outcome = run_network_features_job(get_mongo_client()[DB_NAME])
+    for key, value in outcome.items():
+        print(f"  {key}: {value}")
@@ -1,30 +1,167 @@
 """
 PDF Report Generation Service - Generate professional case investigation PDF reports
+
+Rendering pipeline:
+- the report is a fixed sequence of sections; independent sections are built
+  concurrently in a shared thread pool (PDF_SECTION_WORKERS)
+- a section's flowables are pre-wrapped to the page frame while it is built, so
+  paragraph line breaking (the dominant cost for long narratives) happens in
+  the pool rather than during page layout
+- built sections are cached as fragments keyed by (case id, case version,
+  section); the case version is a hash of the case payload, so regenerating an
+  unchanged case only lays out cached lines (PDF_FRAGMENT_CACHE_SIZE)
+- reports are written to a spooled temp file (PDF_SPOOL_MAX_BYTES in memory,
+  then disk) and streamed out in chunks; batches render one case at a time
+  into GridFS, where reports older than PDF_REPORT_RETENTION_DAYS are purged
 """
 
+import asyncio
+import hashlib
 import io
+import json
 import logging
-from datetime import datetime
-from typing import Dict, Any, Optional
+import os
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from copy import copy
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, Iterator, List, Optional
+
+import gridfs
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import letter, A4
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
 from reportlab.platypus import KeepTogether, Image
+from reportlab.platypus.paragraph import ParaLines
 from reportlab.lib.enums import TA_JUSTIFY, TA_LEFT, TA_CENTER, TA_RIGHT
 from reportlab.lib.colors import HexColor
 
 logger = logging.getLogger(__name__)
 
 
+def _safe_int(env_key: str, default: int) -> int:
+    try:
+        return int(os.getenv(env_key, str(default)))
+    except (ValueError, TypeError):
+        return default
+
+
+SECTION_WORKERS = max(1, _safe_int("PDF_SECTION_WORKERS", 4))
+FRAGMENT_CACHE_SIZE = _safe_int("PDF_FRAGMENT_CACHE_SIZE", 128)
+SPOOL_MAX_BYTES = _safe_int("PDF_SPOOL_MAX_BYTES", 4 * 1024 * 1024)
+REPORT_RETENTION_DAYS = _safe_int("PDF_REPORT_RETENTION_DAYS", 30)  # 0 keeps reports forever
+REPORT_PURGE_INTERVAL_SECONDS = _safe_int("PDF_REPORT_PURGE_INTERVAL_SECONDS", 6 * 3600)
+STREAM_CHUNK_BYTES = 64 * 1024
+
+REPORTS_BUCKET = "case_reports"
+BATCHES_COLLECTION = "pdf_report_batches"
+
+PAGE_MARGIN = 72
+# Space SimpleDocTemplate's single frame offers each flowable (6pt frame padding per side)
+FRAME_WIDTH = letter[0] - 2 * PAGE_MARGIN - 12
+FRAME_HEIGHT = letter[1] - 2 * PAGE_MARGIN - 12
+
+
+class ReportParagraph(Paragraph):
+    """Paragraph that keeps its line breaks for the width it was last wrapped at"""
+
+    def wrap(self, availWidth, availHeight):
+        wrapped = getattr(self, '_wrapped', None)
+        if wrapped is not None and abs(wrapped[0] - availWidth) < 1e-6:
+            _, self.height, self.blPara, self._wrapWidths = wrapped
+            self.width = availWidth
+            return availWidth, self.height
+        width, height = super().wrap(availWidth, availHeight)
+        self._wrapped = (availWidth, height, self.blPara, self._wrapWidths)
+        return width, height
+
+    def split(self, availWidth, availHeight):
+        parts = super().split(availWidth, availHeight)
+        wrapped = getattr(self, '_wrapped', None)
+        auto_leading = getattr(self, 'autoLeading', getattr(self.style, 'autoLeading', ''))
+        if len(parts) != 2 or wrapped is None or abs(wrapped[0] - availWidth) >= 1e-6 \
+                or auto_leading not in ('', 'off'):
+            return parts
+        # The head is drawn as is on this page: give it its share of the already broken
+        # lines instead of re-breaking it (the tail is re-broken, it may split again)
+        head, cut = parts[0], len(parts[0].blPara.lines)
+        head_bl_para = ParaLines(**{**wrapped[2].__dict__, 'lines': wrapped[2].lines[:cut]})
+        head._wrapped = (availWidth, head.height, head_bl_para, wrapped[3])
+        return parts
+
+
+class SectionFragmentCache:
+    """Thread-safe LRU of built section flowables keyed by (case id, case version, section)"""
+
+    def __init__(self, max_entries: int = FRAGMENT_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+    def get(self, key: tuple) -> Optional[list]:
+        with self._lock:
+            flowables = self._entries.get(key)
+            if flowables is None:
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+        # Layout sets per-build attributes on flowables; each build gets its own copies
+        return [copy(f) for f in flowables]
+
+    def put(self, key: tuple, flowables: list) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = flowables
+            self._entries.move_to_end(key)
+            self.stats["stores"] += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def metrics(self) -> dict:
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return {
+                **self.stats,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hit_rate": round(self.stats["hits"] / lookups, 4) if lookups else None,
+            }
+
+
 class PDFReportGenerator:
     """Generate professional PDF reports for case investigations"""
+
+    # (section, builder, cacheable) in report order. The header, entity table and
+    # footer print the current date, so they are rebuilt on every render.
+    SECTIONS = (
+        ("header", "_create_header", False),
+        ("executive_summary", "_create_executive_summary", True),
+        ("risk_assessment", "_create_risk_assessment", True),
+        ("entity", "_create_entity_section", False),
+        ("search_summary", "_create_search_summary", True),
+        ("network", "_create_network_summary", True),
+        ("ai_classification", "_create_ai_classification", True),
+        ("recommendations", "_create_recommendations", True),
+        ("narrative", "_create_investigation_summary", True),
+        ("footer", "_create_footer", False),
+    )
     
     def __init__(self):
         """Initialize PDF generator with styles"""
         self.styles = getSampleStyleSheet()
         self._setup_custom_styles()
+        self.fragments = SectionFragmentCache()
+        self._executor = ThreadPoolExecutor(max_workers=SECTION_WORKERS, thread_name_prefix="pdf-section")
         
     def _setup_custom_styles(self):
         """Setup custom paragraph styles for the report"""
@@ -94,6 +231,105 @@ class PDFReportGenerator:
             fontName='Helvetica-Bold'
         ))
         
+        # Footer
+        self.styles.add(ParagraphStyle(
+            name='Footer',
+            parent=self.styles['Normal'],
+            fontSize=9,
+            textColor=colors.grey,
+            alignment=TA_CENTER
+        ))
+        
+    @staticmethod
+    def case_version(case_data: Dict[str, Any]) -> str:
+        """Content hash of the case payload; any change to the case is a new version"""
+        payload = json.dumps(case_data, sort_keys=True, default=str, separators=(",", ":"))
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+    
+    def build_story(self, case_data: Dict[str, Any]) -> list:
+        """
+        Build the report flowables, section by section
+        
+        Cached sections are reused; the rest are built concurrently in the
+        section pool and joined back in report order.
+        
+        Args:
+            case_data: Complete case investigation data including workflow and classification
+            
+        Returns:
+            List of flowables ready for layout
+        """
+        case_id = case_data.get('caseId', 'Unknown')
+        version = self.case_version(case_data)
+        
+        parts = []
+        for section, builder, cacheable in self.SECTIONS:
+            key = (case_id, version, section) if cacheable else None
+            cached = self.fragments.get(key) if key else None
+            if cached is not None:
+                parts.append(cached)
+            else:
+                parts.append(self._executor.submit(self._build_section, builder, case_data, key))
+        
+        story = []
+        for part in parts:
+            story.extend(part if isinstance(part, list) else part.result())
+        return story
+    
+    def _build_section(self, builder: str, case_data: Dict[str, Any], key: Optional[tuple]) -> list:
+        """Build one section and pre-wrap its paragraphs to the page frame (runs in the section pool)"""
+        flowables = getattr(self, builder)(case_data)
+        for flowable in flowables:
+            if isinstance(flowable, ReportParagraph):
+                flowable.wrap(FRAME_WIDTH, FRAME_HEIGHT)
+        if key is None:
+            return flowables
+        self.fragments.put(key, flowables)
+        return [copy(f) for f in flowables]
+    
+    def render_case_report(self, case_data: Dict[str, Any], output) -> None:
+        """
+        Render a PDF report into a binary file-like object
+        
+        Args:
+            case_data: Complete case investigation data including workflow and classification
+            output: Writable binary file object (left open, positioned at the end)
+        """
+        t0 = time.perf_counter()
+        story = self.build_story(case_data)
+        t1 = time.perf_counter()
+        
+        doc = SimpleDocTemplate(
+            output,
+            pagesize=letter,
+            rightMargin=PAGE_MARGIN,
+            leftMargin=PAGE_MARGIN,
+            topMargin=PAGE_MARGIN,
+            bottomMargin=PAGE_MARGIN
+        )
+        doc.build(story)
+        
+        logger.info(
+            f"Rendered PDF report for {case_data.get('caseId', 'Unknown')}: "
+            f"sections {(t1 - t0) * 1000:.0f}ms, layout {(time.perf_counter() - t1) * 1000:.0f}ms"
+        )
+    
+    def render_to_spool(self, case_data: Dict[str, Any]) -> tempfile.SpooledTemporaryFile:
+        """
+        Render a PDF report into a spooled temp file, rewound for reading
+        
+        Reports up to PDF_SPOOL_MAX_BYTES stay in memory; larger ones roll over
+        to disk. The caller owns (and must close) the returned file.
+        """
+        spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES, mode="w+b")
+        try:
+            self.render_case_report(case_data, spool)
+            spool.seek(0)
+        except Exception:
+            spool.close()
+            raise
+        return spool
+    
     def generate_case_report(self, case_data: Dict[str, Any]) -> bytes:
         """
         Generate a PDF report from case investigation data
@@ -105,53 +341,8 @@ class PDFReportGenerator:
             PDF file as bytes
         """
         try:
-            # Create PDF buffer
             buffer = io.BytesIO()
-            
-            # Create document
-            doc = SimpleDocTemplate(
-                buffer,
-                pagesize=letter,
-                rightMargin=72,
-                leftMargin=72,
-                topMargin=72,
-                bottomMargin=72
-            )
-            
-            # Build content
-            story = []
-            
-            # Add header
-            story.extend(self._create_header(case_data))
-            
-            # Add executive summary
-            story.extend(self._create_executive_summary(case_data))
-            
-            # Add risk assessment section
-            story.extend(self._create_risk_assessment(case_data))
-            
-            # Add entity information
-            story.extend(self._create_entity_section(case_data))
-            
-            # Add search results summary
-            story.extend(self._create_search_summary(case_data))
-            
-            # Add network analysis summary
-            story.extend(self._create_network_summary(case_data))
-            
-            # Add AI classification details
-            story.extend(self._create_ai_classification(case_data))
-            
-            # Add recommendations
-            story.extend(self._create_recommendations(case_data))
-            
-            # Add investigation summary
-            story.extend(self._create_investigation_summary(case_data))
-            
-            # Build PDF
-            doc.build(story)
-            
-            # Get PDF bytes
+            self.render_case_report(case_data, buffer)
             pdf_bytes = buffer.getvalue()
             buffer.close()
             
@@ -167,7 +358,7 @@ class PDFReportGenerator:
         elements = []
         
         # Title
-        elements.append(Paragraph(
+        elements.append(ReportParagraph(
             "Case Investigation Report",
             self.styles['CustomTitle']
         ))
@@ -204,7 +395,7 @@ class PDFReportGenerator:
         """Create executive summary section"""
         elements = []
         
-        elements.append(Paragraph("Executive Summary", self.styles['CustomHeading1']))
+        elements.append(ReportParagraph("Executive Summary", self.styles['CustomHeading1']))
         
         # Extract key data
         workflow_data = case_data.get('workflowData', {})
@@ -227,13 +418,17 @@ class PDFReportGenerator:
         confidence level of <b>{confidence_score}%</b>.
         """
         
-        elements.append(Paragraph(summary_text, self.styles['CustomBody']))
+        elements.append(ReportParagraph(summary_text, self.styles['CustomBody']))
         elements.append(Spacer(1, 0.2*inch))
         
         # Add investigation summary if available
         if investigation_summary:
-            elements.append(Paragraph("<b>Investigation Summary:</b>", self.styles['CustomHeading2']))
-            elements.append(Paragraph(investigation_summary, self.styles['CustomBody']))
+            elements.append(ReportParagraph("<b>Investigation Summary:</b>", self.styles['CustomHeading2']))
+            # One flowable per paragraph: a single paragraph spanning pages is
+            # re-broken from the split point on every page it continues onto
+            for para in investigation_summary.split('\n\n'):
+                if para.strip():
+                    elements.append(ReportParagraph(para.strip(), self.styles['CustomBody']))
             elements.append(Spacer(1, 0.3*inch))
         
         return elements
@@ -242,7 +437,7 @@ class PDFReportGenerator:
         """Create risk assessment section"""
         elements = []
         
-        elements.append(Paragraph("Risk Assessment", self.styles['CustomHeading1']))
+        elements.append(ReportParagraph("Risk Assessment", self.styles['CustomHeading1']))
         
         workflow_data = case_data.get('workflowData', {})
         classification = workflow_data.get('classification', {})
@@ -277,7 +472,7 @@ class PDFReportGenerator:
         # AML/KYC Flags
         aml_flags = classification.get('aml_kyc_flags', {})
         if aml_flags:
-            elements.append(Paragraph("AML/KYC Compliance Flags", self.styles['CustomHeading2']))
+            elements.append(ReportParagraph("AML/KYC Compliance Flags", self.styles['CustomHeading2']))
             
             flag_data = []
             for flag_name, flag_value in aml_flags.items():
@@ -304,9 +499,9 @@ class PDFReportGenerator:
         # Key Risk Factors
         risk_factors = classification.get('key_risk_factors', [])
         if risk_factors:
-            elements.append(Paragraph("Key Risk Factors", self.styles['CustomHeading2']))
+            elements.append(ReportParagraph("Key Risk Factors", self.styles['CustomHeading2']))
             for i, factor in enumerate(risk_factors[:5], 1):
-                elements.append(Paragraph(f"{i}. {factor}", self.styles['CustomBody']))
+                elements.append(ReportParagraph(f"{i}. {factor}", self.styles['CustomBody']))
             elements.append(Spacer(1, 0.3*inch))
         
         return elements
@@ -315,7 +510,7 @@ class PDFReportGenerator:
         """Create entity information section"""
         elements = []
         
-        elements.append(Paragraph("Entity Information", self.styles['CustomHeading1']))
+        elements.append(ReportParagraph("Entity Information", self.styles['CustomHeading1']))
         
         workflow_data = case_data.get('workflowData', {})
         entity_input = workflow_data.get('entityInput', {})
@@ -354,7 +549,7 @@ class PDFReportGenerator:
         search_results = workflow_data.get('searchResults', {})
         
         if search_results:
-            elements.append(Paragraph("Search Results Summary", self.styles['CustomHeading1']))
+            elements.append(ReportParagraph("Search Results Summary", self.styles['CustomHeading1']))
             
             atlas_count = len(search_results.get('atlasResults', []))
             vector_count = len(search_results.get('vectorResults', []))
@@ -367,7 +562,7 @@ class PDFReportGenerator:
             for relationship networks and transaction patterns.
             """
             
-            elements.append(Paragraph(search_text, self.styles['CustomBody']))
+            elements.append(ReportParagraph(search_text, self.styles['CustomBody']))
             elements.append(Spacer(1, 0.3*inch))
         
         return elements
@@ -380,7 +575,7 @@ class PDFReportGenerator:
         network_analysis = workflow_data.get('networkAnalysis', {})
         
         if network_analysis:
-            elements.append(Paragraph("Network Analysis", self.styles['CustomHeading1']))
+            elements.append(ReportParagraph("Network Analysis", self.styles['CustomHeading1']))
             
             entities_analyzed = network_analysis.get('entitiesAnalyzed', 0)
             analysis_type = network_analysis.get('analysisType', 'comprehensive')
@@ -392,7 +587,7 @@ class PDFReportGenerator:
             transaction patterns, and risk propagation through the network.
             """
             
-            elements.append(Paragraph(network_text, self.styles['CustomBody']))
+            elements.append(ReportParagraph(network_text, self.styles['CustomBody']))
             elements.append(Spacer(1, 0.3*inch))
         
         return elements
@@ -405,15 +600,15 @@ class PDFReportGenerator:
         classification = workflow_data.get('classification', {})
         
         if classification:
-            elements.append(Paragraph("AI Classification Analysis", self.styles['CustomHeading1']))
+            elements.append(ReportParagraph("AI Classification Analysis", self.styles['CustomHeading1']))
             
             detailed_analysis = classification.get('detailed_analysis', {})
             
             if detailed_analysis:
                 # Entity Profile Assessment
                 if detailed_analysis.get('entity_profile_assessment'):
-                    elements.append(Paragraph("Entity Profile Assessment", self.styles['CustomHeading2']))
-                    elements.append(Paragraph(
+                    elements.append(ReportParagraph("Entity Profile Assessment", self.styles['CustomHeading2']))
+                    elements.append(ReportParagraph(
                         detailed_analysis['entity_profile_assessment'],
                         self.styles['CustomBody']
                     ))
@@ -421,8 +616,8 @@ class PDFReportGenerator:
                 
                 # Network Positioning
                 if detailed_analysis.get('network_positioning_analysis'):
-                    elements.append(Paragraph("Network Positioning Analysis", self.styles['CustomHeading2']))
-                    elements.append(Paragraph(
+                    elements.append(ReportParagraph("Network Positioning Analysis", self.styles['CustomHeading2']))
+                    elements.append(ReportParagraph(
                         detailed_analysis['network_positioning_analysis'],
                         self.styles['CustomBody']
                     ))
@@ -430,8 +625,8 @@ class PDFReportGenerator:
                 
                 # Data Quality
                 if detailed_analysis.get('data_quality_assessment'):
-                    elements.append(Paragraph("Data Quality Assessment", self.styles['CustomHeading2']))
-                    elements.append(Paragraph(
+                    elements.append(ReportParagraph("Data Quality Assessment", self.styles['CustomHeading2']))
+                    elements.append(ReportParagraph(
                         detailed_analysis['data_quality_assessment'],
                         self.styles['CustomBody']
                     ))
@@ -448,10 +643,10 @@ class PDFReportGenerator:
         recommendations = classification.get('recommendations', [])
         
         if recommendations:
-            elements.append(Paragraph("Recommendations", self.styles['CustomHeading1']))
+            elements.append(ReportParagraph("Recommendations", self.styles['CustomHeading1']))
             
             for i, recommendation in enumerate(recommendations, 1):
-                elements.append(Paragraph(
+                elements.append(ReportParagraph(
                     f"<b>{i}.</b> {recommendation}",
                     self.styles['CustomBody']
                 ))
@@ -468,30 +663,27 @@ class PDFReportGenerator:
         
         if investigation_summary:
             elements.append(PageBreak())
-            elements.append(Paragraph("Detailed Investigation Summary", self.styles['CustomHeading1']))
+            elements.append(ReportParagraph("Detailed Investigation Summary", self.styles['CustomHeading1']))
             
             # Split summary into paragraphs for better formatting
             paragraphs = investigation_summary.split('\n\n')
             for para in paragraphs:
                 if para.strip():
-                    elements.append(Paragraph(para.strip(), self.styles['CustomBody']))
+                    elements.append(ReportParagraph(para.strip(), self.styles['CustomBody']))
                     elements.append(Spacer(1, 0.1*inch))
         
-        # Footer
-        elements.append(Spacer(1, 0.5*inch))
-        elements.append(Paragraph(
-            f"Generated by ThreatSight 360 on {datetime.utcnow().strftime('%Y-%m-%d %H:%M UTC')}",
-            ParagraphStyle(
-                name='Footer',
-                parent=self.styles['Normal'],
-                fontSize=9,
-                textColor=colors.grey,
-                alignment=TA_CENTER
-            )
-        ))
-        
         return elements
     
+    def _create_footer(self, case_data: Dict[str, Any]) -> list:
+        """Create report footer"""
+        return [
+            Spacer(1, 0.5*inch),
+            ReportParagraph(
+                f"Generated by ThreatSight 360 on {datetime.utcnow().strftime('%Y-%m-%d %H:%M UTC')}",
+                self.styles['Footer']
+            ),
+        ]
+    
     def _get_risk_indicator(self, risk_level: str) -> str:
         """Get risk indicator symbol"""
         risk_level = risk_level.lower()
@@ -525,4 +717,157 @@ def get_pdf_generator() -> PDFReportGenerator:
     global _pdf_generator
     if _pdf_generator is None:
         _pdf_generator = PDFReportGenerator()
-    return _pdf_generator
\ No newline at end of file
+    return _pdf_generator
+
+def iter_spool(spool, chunk_size: int = STREAM_CHUNK_BYTES) -> Iterator[bytes]:
+    """Yield a rendered report in chunks, closing the file when done"""
+    try:
+        while True:
+            chunk = spool.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        spool.close()
+
+
+# ==================== BATCH REPORT JOB ====================
+
+def create_report_batch(db, case_ids: List[str]) -> str:
+    """Record a queued batch and return its id (sync)"""
+    batch_id = f"pdf-{datetime.now(timezone.utc):%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:6]}"
+    db[BATCHES_COLLECTION].insert_one({
+        "_id": batch_id,
+        "status": "queued",
+        "created_at": datetime.now(timezone.utc),
+        "case_ids": case_ids,
+        "total": len(case_ids),
+        "completed": 0,
+        "failed": 0,
+        "reports": [],
+    })
+    return batch_id
+
+
+def run_report_batch(db, batch_id: str, cases: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Render a batch of case reports into GridFS, one case at a time (sync)
+    
+    Each report is spooled and streamed into the ``case_reports`` bucket before
+    the next case starts, and its payload is released once rendered, so memory
+    stays at roughly one report regardless of batch size.
+    """
+    batches = db[BATCHES_COLLECTION]
+    try:
+        return _render_report_batch(db, batch_id, cases)
+    except Exception as e:
+        # Anything outside the per-case handling (bucket setup, progress writes) ends the batch
+        logger.error(f"PDF report batch {batch_id} failed: {e}", exc_info=True)
+        batches.update_one({"_id": batch_id}, {"$set": {
+            "status": "failed", "error": str(e), "finished_at": datetime.now(timezone.utc),
+        }})
+        raise
+
+
+def _render_report_batch(db, batch_id: str, cases: List[Dict[str, Any]]) -> Dict[str, Any]:
+    bucket = gridfs.GridFSBucket(db, bucket_name=REPORTS_BUCKET)
+    batches = db[BATCHES_COLLECTION]
+    generator = get_pdf_generator()
+    batches.update_one({"_id": batch_id}, {"$set": {"status": "running", "started_at": datetime.now(timezone.utc)}})
+    
+    t0 = time.perf_counter()
+    completed = failed = 0
+    for index in range(len(cases)):
+        case_data, cases[index] = cases[index], None
+        case_id = case_data.get('caseId', 'Unknown')
+        try:
+            with generator.render_to_spool(case_data) as spool:
+                file_id = bucket.upload_from_stream(
+                    f"case_report_{case_id}.pdf",
+                    spool,
+                    metadata={
+                        "caseId": case_id,
+                        "caseVersion": generator.case_version(case_data),
+                        "batchId": batch_id,
+                        "contentType": "application/pdf",
+                    },
+                )
+                outcome = {"caseId": case_id, "status": "completed", "fileId": str(file_id), "bytes": spool.tell()}
+            completed += 1
+        except Exception as e:
+            logger.error(f"Batch {batch_id}: PDF report for {case_id} failed: {e}", exc_info=True)
+            outcome = {"caseId": case_id, "status": "failed", "error": str(e)}
+            failed += 1
+        batches.update_one({"_id": batch_id}, {
+            "$push": {"reports": outcome},
+            "$inc": {"completed" if outcome["status"] == "completed" else "failed": 1},
+        })
+    
+    result = {
+        "status": "completed" if not failed else "completed_with_errors",
+        "finished_at": datetime.now(timezone.utc),
+        "duration_ms": round((time.perf_counter() - t0) * 1000, 1),
+    }
+    batches.update_one({"_id": batch_id}, {"$set": result})
+    logger.info(f"PDF report batch {batch_id}: {completed} rendered, {failed} failed in {result['duration_ms']}ms")
+    return {"batch_id": batch_id, "completed": completed, "failed": failed, **result}
+
+
+def purge_expired_reports(db, retention_days: int = REPORT_RETENTION_DAYS) -> Dict[str, int]:
+    """
+    Delete batch-rendered reports (GridFS files and chunks) and batch records
+    older than ``retention_days`` (sync)
+    
+    GridFS has no TTL of its own: a TTL index on ``case_reports.files`` would
+    leave the chunks behind, so files are removed through the bucket.
+    """
+    if retention_days <= 0:
+        return {"reports": 0, "batches": 0}
+    cutoff = datetime.now(timezone.utc) - timedelta(days=retention_days)
+    bucket = gridfs.GridFSBucket(db, bucket_name=REPORTS_BUCKET)
+    reports = 0
+    for grid_out in bucket.find({"uploadDate": {"$lt": cutoff}}):
+        try:
+            bucket.delete(grid_out._id)
+            reports += 1
+        except gridfs.NoFile:
+            pass  # removed concurrently by another process
+    batches = db[BATCHES_COLLECTION].delete_many({
+        "created_at": {"$lt": cutoff}, "status": {"$nin": ["queued", "running"]},
+    }).deleted_count
+    if reports or batches:
+        logger.info(f"Purged {reports} PDF reports and {batches} report batches older than {retention_days} days")
+    return {"reports": reports, "batches": batches}
+
+
+async def run_report_retention_loop(interval_seconds: int = REPORT_PURGE_INTERVAL_SECONDS) -> None:
+    """Purge expired batch reports every ``interval_seconds``"""
+    from dependencies import DB_NAME, get_mongo_client
+
+    while True:
+        try:
+            await asyncio.to_thread(purge_expired_reports, get_mongo_client()[DB_NAME])
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"PDF report retention purge failed: {e}")
+        await asyncio.sleep(interval_seconds)
+
+
+_retention_task: Optional[asyncio.Task] = None
+
+
+def start_report_retention_job() -> None:
+    """Start the periodic report purge (no-op when retention is disabled or already running)"""
+    global _retention_task
+    if REPORT_RETENTION_DAYS <= 0 or REPORT_PURGE_INTERVAL_SECONDS <= 0 or (_retention_task and not _retention_task.done()):
+        return
+    _retention_task = asyncio.create_task(run_report_retention_loop())
+
+
+async def stop_report_retention_job() -> None:
+    global _retention_task
+    if _retention_task is not None:
+        _retention_task.cancel()
+        await asyncio.gather(_retention_task, return_exceptions=True)
+        _retention_task = None
@@ -0,0 +1,60 @@
+from models.core.network import NetworkRiskLevel, RelationshipStrength
+from models.core.network_snapshot import GraphSnapshot, relationship_risk_weight, strength_from_score
+
+
+def _snapshot():
+    snapshot = GraphSnapshot("A")
+    snapshot.add_edge("A", "B", "director_of", 0.9, 0.8, True, "directed", edge_id="r1")
+    snapshot.add_edge("B", "C", "household_member", 0.5, 0.25, False, "bidirectional", edge_id="r2")
+    snapshot.add_edge("A", "C", "confirmed_same_entity", 0.3, 1.0, True, "directed", edge_id="r3")
+    snapshot.set_node("A", {"full": "Alice Ng"}, "individual", "HIGH", 85)
+    snapshot.set_node("B", "Acme Ltd", "organization", "bogus", "n/a")
+    snapshot.set_node("D", None, None, None, 250)   # isolated node
+    return snapshot.finalize()
+
+
+def test_interning_and_node_attributes():
+    snapshot = _snapshot()
+    assert snapshot.ids == ["A", "B", "C", "D"] and snapshot.index_of("C") == 2
+    assert snapshot.names == ["Alice Ng", "Acme Ltd", "Unknown", "Unknown"]
+    assert snapshot.risk_levels == ["high", "low", "low", "low"]   # unknown levels fall back to low
+    assert list(snapshot.risk_scores) == [0.85, 0.0, 0.0, 1.0]      # 0-100 scaled and clamped
+    assert list(snapshot.degrees()) == [2, 2, 2, 0]
+    assert list(snapshot.sizes) == [10, 10, 10, 10]
+
+
+def test_counts():
+    counts = _snapshot().counts()
+    assert counts["verification_status"] == {"verified": 2, "unverified": 1}
+    assert counts["bidirectional_count"] == 1
+    assert counts["node_types"] == {"individual": 1, "organization": 1, "unknown": 2}
+
+
+def test_fork_restyles_without_touching_the_original():
+    snapshot = _snapshot()
+    fork = snapshot.fork()
+    fork.apply_styling({NetworkRiskLevel.HIGH: "#f00", "unknown": "#999"}, {"director_of": "#00f"})
+    assert snapshot.colors is None and snapshot.edge_colors is None and list(snapshot.sizes) == [10] * 4
+    assert fork.colors == ["#f00", "#999", "#999", "#999"]
+    assert fork.edge_colors == ["#00f", None, None]
+    assert list(fork.edge_widths) == [4.2, 2.0, 5.0]
+    assert fork.ids is snapshot.ids   # structural columns are shared
+
+
+def test_models_and_frontend_shape():
+    snapshot = _snapshot()
+    nodes, edges = snapshot.to_models()
+    assert [n.connection_count for n in nodes] == [2, 2, 2, 0]
+    assert nodes[0].attributes == {"is_center": True} and nodes[0].risk_level == NetworkRiskLevel.HIGH
+    assert [e.strength for e in edges] == [RelationshipStrength.CONFIRMED, RelationshipStrength.POSSIBLE,
+                                           RelationshipStrength.SUSPECTED]
+    view = snapshot.to_frontend({"A": {"networkRiskScore": 5.0, "centrality": 0.4}})
+    assert view["nodes"][0]["riskScore"] == 100.0 and view["nodes"][0]["centrality"] == 0.4
+    assert [e["id"] for e in view["edges"]] == ["A-B-director_of-1", "B-C-household_member-2",
+                                                "A-C-confirmed_same_entity-3"]
+    assert [e["riskWeight"] for e in view["edges"]] == [0.7, 0.3, 0.9]
+
+
+def test_helpers():
+    assert relationship_risk_weight("something_else") == 0.5
+    assert strength_from_score("high") == RelationshipStrength.POSSIBLE
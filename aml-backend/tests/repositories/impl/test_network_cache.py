@@ -0,0 +1,150 @@
+import asyncio
+
+import pytest
+
+from models.core.network_snapshot import GraphSnapshot
+from repositories.impl import network_cache
+from repositories.impl.network_cache import NetworkViewCache
+from repositories.interfaces.network_repository import NetworkDataResponse, NetworkQueryParams
+
+# center -> [(source, target, relationship id)]
+NETWORKS = {
+    "A": [("A", "B", "r1"), ("B", "C", "r2")],
+    "D": [("D", "E", "r3")],
+}
+
+
+class _Builder:
+    """Counts builds; optionally runs a hook while the build is in flight"""
+
+    def __init__(self, during=None):
+        self.builds = 0
+        self.during = during
+
+    async def __call__(self, params):
+        self.builds += 1
+        await asyncio.sleep(0)
+        if self.during:
+            self.during()
+        snapshot = GraphSnapshot(params.center_entity_id)
+        for source, target, rel_id in NETWORKS[params.center_entity_id]:
+            snapshot.add_edge(source, target, "business_associate", 1.0, 0.9, True, "directed", edge_id=rel_id)
+        return NetworkDataResponse(center_entity_id=params.center_entity_id, statistics={"nodes": snapshot.node_count},
+                                   snapshot=snapshot.finalize())
+
+
+def _get(cache, center, builder, **params):
+    return cache.get_or_build(NetworkQueryParams(center_entity_id=center, **params), builder)
+
+
+def test_hits_return_independent_copies():
+    async def main():
+        cache, builder = NetworkViewCache(), _Builder()
+        first = await _get(cache, "A", builder)
+        first.statistics["styled"] = True
+        first.snapshot.apply_styling({"low": "#fff"}, {})
+        second = await _get(cache, "A", builder)
+        return builder.builds, second
+
+    builds, second = asyncio.run(main())
+    assert builds == 1
+    assert "styled" not in second.statistics and second.snapshot.colors is None
+
+
+def test_filter_order_does_not_change_the_key():
+    a = NetworkQueryParams(center_entity_id="A", include_entity_types=["individual", "organization"])
+    b = NetworkQueryParams(center_entity_id="A", include_entity_types=["organization", "individual"])
+    assert network_cache.cache_key(a) == network_cache.cache_key(b)
+    assert network_cache.cache_key(a) != network_cache.cache_key(NetworkQueryParams(center_entity_id="A", max_depth=3))
+
+
+def test_concurrent_builds_are_coalesced():
+    async def main():
+        cache, builder = NetworkViewCache(), _Builder()
+        await asyncio.gather(*(_get(cache, "A", builder) for _ in range(5)))
+        return builder.builds, cache.stats
+
+    builds, stats = asyncio.run(main())
+    assert builds == 1 and stats["misses"] == 1 and stats["coalesced"] == 4
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(network_cache.time, "monotonic", lambda: now[0])
+
+    async def main():
+        cache, builder = NetworkViewCache(ttl_seconds=60), _Builder()
+        await _get(cache, "A", builder)
+        now[0] += 60
+        await _get(cache, "A", builder)
+        now[0] += 61
+        await _get(cache, "A", builder)
+        return builder.builds, cache.stats["expired"]
+
+    assert asyncio.run(main()) == (2, 1)
+
+
+@pytest.mark.parametrize("invalidation, dropped", [
+    ({"entity_ids": ["C"]}, {"A"}),
+    ({"relationship_ids": ["r3"]}, {"D"}),
+    ({"entity_ids": ["Z"], "relationship_ids": ["r9"]}, set()),
+])
+def test_invalidation_drops_only_networks_containing_the_change(invalidation, dropped):
+    async def main():
+        cache, builder = NetworkViewCache(), _Builder()
+        for center in NETWORKS:
+            await _get(cache, center, builder)
+        cache.invalidate(**invalidation)
+        builder.builds = 0
+        rebuilt = set()
+        for center in NETWORKS:
+            before = builder.builds
+            await _get(cache, center, builder)
+            if builder.builds > before:
+                rebuilt.add(center)
+        return rebuilt
+
+    assert asyncio.run(main()) == dropped
+
+
+def test_build_racing_a_member_invalidation_is_not_cached():
+    async def main():
+        cache = NetworkViewCache()
+        racing = _Builder(during=lambda: cache.invalidate(entity_ids=["B"]))
+        response = await _get(cache, "A", racing)
+        unrelated = _Builder(during=lambda: cache.invalidate(entity_ids=["Z"]))
+        await _get(cache, "D", unrelated)
+        return response, cache
+
+    response, cache = asyncio.run(main())
+    assert response.snapshot.ids == ["A", "B", "C"]
+    assert cache.stats["not_cached_raced"] == 1
+    assert cache.metrics()["entries"] == 1   # only D
+
+
+def test_build_outliving_the_invalidation_history_is_not_cached(monkeypatch):
+    monkeypatch.setattr(network_cache, "_RECENT_INVALIDATIONS", 2)
+
+    async def main():
+        cache = NetworkViewCache()
+
+        def burst():
+            for n in range(3):
+                cache.invalidate(entity_ids=[f"Z{n}"])
+
+        await _get(cache, "A", _Builder(during=burst))
+        return cache.metrics()["entries"]
+
+    assert asyncio.run(main()) == 0
+
+
+def test_lru_eviction_and_entity_delete_without_pre_image():
+    async def main():
+        cache, builder = NetworkViewCache(max_entries=1), _Builder()
+        await _get(cache, "A", builder)
+        await _get(cache, "D", builder)
+        evicted = cache.stats["evictions"]
+        cache._on_entity_change({"operationType": "delete", "documentKey": {"_id": "x"}})
+        return evicted, cache.metrics()["entries"]
+
+    assert asyncio.run(main()) == (1, 0)
@@ -0,0 +1,100 @@
+import asyncio
+import random
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+import pytest
+
+from repositories.impl.transaction_repository import TransactionRepository
+
+
+class _AsyncCursor:
+    def __init__(self, docs):
+        self._docs = docs
+
+    async def to_list(self, length=None):
+        return self._docs[:length] if length else self._docs
+
+
+class _AsyncCollection:
+    """Motor-style aggregate over a mongomock collection"""
+
+    def __init__(self, collection):
+        self._collection = collection
+        self.pipelines = []
+
+    def aggregate(self, pipeline):
+        self.pipelines.append(pipeline)
+        collection = self._collection
+        for i, stage in enumerate(pipeline):
+            # mongomock leaves array literals in $project unevaluated; project those in Python
+            literals = {k: v for k, v in stage.get("$project", {}).items() if isinstance(v, list)}
+            if literals:
+                docs = [
+                    {**{k: doc[k] for k, v in stage["$project"].items() if v == 1},
+                     **{k: [doc[f[1:]] for f in v] for k, v in literals.items()}}
+                    for doc in collection.aggregate(pipeline[:i])
+                ]
+                collection = collection.database[f"{collection.name}_projected"]
+                collection.drop()
+                if docs:
+                    collection.insert_many(docs)
+                pipeline = pipeline[i + 1:]
+                break
+        return _AsyncCursor(list(collection.aggregate(pipeline)))
+
+
+def _transactions():
+    rng = random.Random(5)
+    ids = [f"E{i}" for i in range(8)]
+    docs = []
+    for k in range(120):
+        a, b = rng.sample(ids, 2)
+        docs.append({
+            "fromEntityId": a, "fromEntityName": a.lower(), "fromEntityType": "individual",
+            "toEntityId": b, "toEntityName": b.lower(), "toEntityType": "organization",
+            "amount": float(rng.randint(1, 900)), "riskScore": float(rng.randint(0, 100)),
+            "transactionType": rng.choice(["wire", "ach"]), "currency": "USD",
+            "timestamp": datetime(2024, 1, 1) + timedelta(hours=k),
+        })
+    return docs
+
+
+def _network(**kwargs):
+    mongomock = pytest.importorskip("mongomock")
+    collection = mongomock.MongoClient().db.transactionsv2
+    collection.insert_many(_transactions())
+    wrapped = _AsyncCollection(collection)
+    network = asyncio.run(TransactionRepository(wrapped).build_transaction_network("E0", max_depth=2, **kwargs))
+    return network, wrapped
+
+
+def test_network_rollups_match_the_raw_transactions():
+    network, wrapped = _network()
+    sent, received, counts = defaultdict(float), defaultdict(float), defaultdict(int)
+    pairs = set()
+    for t in _transactions():
+        sent[t["fromEntityId"]] += t["amount"]
+        received[t["toEntityId"]] += t["amount"]
+        counts[t["fromEntityId"]] += 1
+        counts[t["toEntityId"]] += 1
+        pairs.add((t["fromEntityId"], t["toEntityId"]))
+
+    assert {n.entity_id: (n.total_sent, n.total_received, n.transaction_count) for n in network.nodes} == {
+        e: (sent[e], received[e], counts[e]) for e in counts
+    }
+    assert {(e.from_entity_id, e.to_entity_id) for e in network.edges} == pairs
+    assert network.total_transactions == 120
+    assert not network.truncated
+    # Unbounded edge and node lists are never packed into a single $facet document
+    for pipeline in wrapped.pipelines:
+        for stage in pipeline:
+            assert all(branch in ("edge_count", "totals", "center") for branch in stage.get("$facet", {}))
+
+
+def test_edge_cap_keeps_node_metrics_and_reports_pruned_edges():
+    full, _ = _network()
+    capped, _ = _network(max_edges=5)
+    assert [e.total_amount for e in capped.edges] == sorted((e.total_amount for e in full.edges), reverse=True)[:5]
+    assert capped.pruned_edge_count == len(full.edges) - 5 and capped.truncated
+    assert {n.entity_id: n.total_sent for n in capped.nodes} == {n.entity_id: n.total_sent for n in full.nodes}
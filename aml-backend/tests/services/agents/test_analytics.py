@@ -0,0 +1,88 @@
+import asyncio
+import random
+from collections import Counter
+from datetime import timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from services.agents import analytics
+from services.agents.analytics import ANALYTICS_COLLECTION, get_investigation_analytics, record_finalized_case
+
+
+def _bulk_write(self, ops, ordered=True, **kwargs):
+    """mongomock's bulk_write does not accept the UpdateOne of current pymongo; apply ops one by one"""
+    for op in ops:
+        self.update_one(op._filter, op._doc, upsert=bool(op._upsert))
+    return SimpleNamespace()
+
+
+class _AsyncCursor:
+    def __init__(self, docs):
+        self._docs = iter(docs)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._docs)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class _AsyncCollection:
+    def __init__(self, collection):
+        self._collection = collection
+
+    async def find_one(self, query):
+        return self._collection.find_one(query)
+
+    def find(self, query):
+        return _AsyncCursor(list(self._collection.find(query)))
+
+
+def _cases(n=300, seed=8):
+    rng = random.Random(seed)
+    today = analytics._today()
+    cases = []
+    for _ in range(n):
+        case = {
+            "investigation_status": rng.choice(["closed", "escalated", "pending.review", None]),
+            "created_at": (today - timedelta(days=rng.randint(0, 40), hours=rng.randint(0, 23))).isoformat(),
+        }
+        if rng.random() < 0.8:
+            case["typology"] = {"primary_typology": rng.choice(["structuring", "trade.based", "layering"])}
+        score = rng.choice([rng.uniform(0, 100), 100, -3, None, "high", True])
+        case["triage_decision"] = {"risk_score": score}
+        cases.append(case)
+    return cases
+
+
+def test_incremental_counters_match_the_cases(monkeypatch):
+    mongomock = pytest.importorskip("mongomock")
+    monkeypatch.setattr(mongomock.collection.Collection, "bulk_write", _bulk_write, raising=False)
+    sync_db = mongomock.MongoClient().db
+    cases = _cases()
+    for case in cases:
+        record_finalized_case(sync_db, case)
+    db = {ANALYTICS_COLLECTION: _AsyncCollection(sync_db[ANALYTICS_COLLECTION])}
+    result = asyncio.run(get_investigation_analytics(db, series="30d"))
+
+    statuses = Counter((c["investigation_status"] or "unknown").replace(".", "_") for c in cases)
+    assert {s["_id"]: s["count"] for s in result["by_status"]} == statuses
+    typologies = Counter(c["typology"]["primary_typology"].replace(".", "_") for c in cases if "typology" in c)
+    assert {t["_id"]: t["count"] for t in result["by_typology"]} == typologies
+
+    scores = [c["triage_decision"]["risk_score"] for c in cases]
+    scores = [s for s in scores if isinstance(s, (int, float)) and not isinstance(s, bool)]
+    assert result["risk_stats"] == {"avg": round(sum(scores) / len(scores), 1), "max": max(scores),
+                                    "min": min(scores), "total_scored": len(scores)}
+    histogram = Counter(int(min(max(s, 0), 99) // 10) * 10 for s in scores)
+    assert [h["count"] for h in result["risk_histogram"]] == [histogram[low] for low in range(0, 100, 10)]
+
+    days = Counter(c["created_at"][:10] for c in cases)
+    assert [(d["date"], d["count"]) for d in result["series"]] == [(day, days[day]) for day in sorted(
+        (analytics._today() - timedelta(days=i)).date().isoformat() for i in range(30))]
+    week = {(analytics._today() - timedelta(days=i)).date().isoformat() for i in range(8)}
+    assert result["recent_7d"] == sum(days[day] for day in week)
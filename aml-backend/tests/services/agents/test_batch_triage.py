@@ -0,0 +1,89 @@
+import asyncio
+import random
+
+import pytest
+
+from services.agents import batch_triage
+from services.agents.batch_triage import QueueCapacityExceeded, ingest_alerts, score_alerts
+
+
+def _reference(entity, txn):
+    """Per-alert rules written out one alert at a time"""
+    known = entity is not None
+    entity, txn = entity or {}, txn or {}
+    risk, hits = entity.get("entity_risk", 0.0), entity.get("watchlist_hits", 0)
+    txn_max, flagged = float(txn.get("max_txn_risk") or 0), txn.get("flagged_count", 0)
+    score = 0.5 * risk + 0.3 * txn_max + 20.0 * min(flagged, 5) / 5
+    if hits:
+        score = max(score, 80.0)
+    score = min(max(score, 0), 100)
+    close = (known and not hits and not flagged and risk <= batch_triage.CLOSE_MAX_ENTITY_RISK
+             and txn_max <= batch_triage.CLOSE_MAX_TXN_RISK and score <= batch_triage.CLOSE_MAX_SCORE)
+    return round(score, 1), "auto_close" if close else "investigate"
+
+
+def test_vectorised_scores_match_per_alert_rules():
+    rng = random.Random(2)
+    entity_features, txn_features = {}, {}
+    for k in range(300):
+        if rng.random() < 0.9:
+            entity_features[f"E{k}"] = {"entity_risk": rng.choice([0.0, rng.uniform(0, 100)]),
+                                        "watchlist_hits": rng.choice([0, 0, 0, 1, 2])}
+        if rng.random() < 0.7:
+            txn_features[f"E{k}"] = {"txn_count": rng.randint(1, 50), "flagged_count": rng.choice([0, 0, 1, 7]),
+                                     "max_txn_risk": rng.choice([None, rng.uniform(0, 100)])}
+    entity_ids = [f"E{rng.randrange(320)}" for _ in range(1000)]
+
+    results = score_alerts(entity_ids, entity_features, txn_features)
+    for entity_id, result in zip(entity_ids, results):
+        expected = _reference(entity_features.get(entity_id), txn_features.get(entity_id))
+        assert (result["score"], result["disposition"]) == pytest.approx(expected)
+    dispositions = {r["disposition"] for r in results}
+    assert dispositions == {"auto_close", "investigate"}
+
+
+def test_unknown_entities_are_never_auto_closed():
+    [result] = score_alerts(["ghost"], {}, {})
+    assert result["disposition"] == "investigate" and result["reasons"] == ["entity not found"]
+
+
+class _Alerts:
+    def __init__(self):
+        self.inserted = []
+
+    async def insert_many(self, docs, ordered=True):
+        self.inserted.extend(docs)
+
+
+@pytest.fixture
+def db(monkeypatch):
+    async def entity_features(db, ids):
+        return {e: {"entity_risk": 90.0 if e.startswith("risky") else 5.0, "watchlist_hits": 0} for e in ids}
+
+    async def txn_features(db, ids):
+        return {}
+
+    monkeypatch.setattr(batch_triage, "_fetch_entity_features", entity_features)
+    monkeypatch.setattr(batch_triage, "_fetch_transaction_features", txn_features)
+    return {"alerts": _Alerts()}
+
+
+def test_ingest_closes_clear_negatives_and_prioritises_the_rest(db):
+    alerts = [{"entity_id": "calm1"}, {"entity_id": "risky1"}, {"entity_id": "risky2", "priority": 3}, {"x": 1}]
+    batch = asyncio.run(ingest_alerts(db, alerts))
+    assert (batch["received"], batch["rejected"], batch["auto_closed"], batch["enqueued"]) == (4, 1, 1, 2)
+    docs = {d["entity_id"]: d for d in db["alerts"].inserted}
+    assert docs["calm1"]["status"] == "auto_closed" and "completed_at" in docs["calm1"]
+    assert docs["risky1"]["status"] == "pending" and docs["risky1"]["priority"] == 45.0
+    assert docs["risky2"]["priority"] == 3   # caller priority wins
+    assert docs["risky1"]["alert_data"]["pre_triage"]["rules_version"] == batch_triage.RULES_VERSION
+
+
+def test_ingest_over_capacity_inserts_nothing(db):
+    alerts = [{"entity_id": f"risky{k}"} for k in range(3)] + [{"entity_id": "calm"}]
+    with pytest.raises(QueueCapacityExceeded) as excinfo:
+        asyncio.run(ingest_alerts(db, alerts, max_enqueued=2))
+    assert (excinfo.value.enqueued, excinfo.value.capacity) == (3, 2)
+    assert db["alerts"].inserted == []
+    # Auto-closed alerts do not use queue capacity
+    assert asyncio.run(ingest_alerts(db, alerts[1:], max_enqueued=2))["enqueued"] == 2
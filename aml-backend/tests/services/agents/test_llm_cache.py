@@ -0,0 +1,134 @@
+import asyncio
+from datetime import datetime, timezone
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from pydantic import BaseModel
+
+from services.agents import llm_cache, llm_gateway
+from services.agents.llm_cache import LLMResponseCache, cache_key
+
+
+class Triage(BaseModel):
+    risk: int
+    summary: str
+
+
+class Other(BaseModel):
+    risk: int
+
+
+MESSAGES = [SystemMessage(content="You triage alerts"), HumanMessage(content='{"entity": "E1", "amount": 10}')]
+
+
+def test_cache_key_changes_with_every_input():
+    key = cache_key("model-a", "triage", Triage, MESSAGES)
+    assert key == cache_key("model-a", "triage", Triage, list(MESSAGES))
+    assert len({
+        key,
+        cache_key("model-b", "triage", Triage, MESSAGES),
+        cache_key("model-a", "validation", Triage, MESSAGES),
+        cache_key("model-a", "triage", Other, MESSAGES),
+        cache_key("model-a", "triage", Triage, MESSAGES[:1] + [HumanMessage(content='{"entity": "E2"}')]),
+    }) == 5
+
+
+class _Collection:
+    def __init__(self, fail=False):
+        self.docs = {}
+        self.fail = fail
+
+    async def find_one(self, query):
+        if self.fail:
+            raise ConnectionError("down")
+        doc = self.docs.get(query["_id"])
+        return doc if doc and doc["expires_at"] > query["expires_at"]["$gt"] else None
+
+    async def replace_one(self, query, doc, upsert=False):
+        if self.fail:
+            raise ConnectionError("down")
+        self.docs[query["_id"]] = {**doc, "_id": query["_id"]}
+
+
+def _cache(collection, **kwargs):
+    cache = LLMResponseCache(**kwargs)
+
+    async def _collection():
+        return collection
+    cache._collection = _collection
+    return cache
+
+
+def _result(parsed=Triage(risk=7, summary="ok"), error=None):
+    usage = {"input_tokens": 120, "output_tokens": 30, "total_tokens": 150}
+    return {"raw": AIMessage(content="", usage_metadata=usage), "parsed": parsed, "parsing_error": error}
+
+
+def test_put_then_get_from_memory_and_from_the_collection():
+    async def main():
+        collection = _Collection()
+        writer = _cache(collection)
+        await writer.put("k", "triage", "model-a", _result())
+        local = await writer.get("k", Triage)
+        remote = await _cache(collection).get("k", Triage)   # fresh process: collection hit
+        return writer, local, remote
+
+    writer, local, remote = asyncio.run(main())
+    assert local["parsed"] == remote["parsed"] == Triage(risk=7, summary="ok")
+    assert remote["cache"] == {"hit": True, "key": "k", "tokens_saved": {"input_tokens": 120, "output_tokens": 30,
+                                                                         "total_tokens": 150}}
+    assert writer.stats["hits_local"] == 1 and writer.stats["stores"] == 1
+
+
+def test_failed_parses_are_not_stored_and_outages_are_misses():
+    async def main():
+        collection = _Collection()
+        cache = _cache(collection)
+        await cache.put("k", "triage", "model-a", _result(parsed=None, error=ValueError("bad json")))
+        stored = dict(collection.docs)
+        down = _cache(_Collection(fail=True))
+        await down.put("k", "triage", "model-a", _result())
+        down._local.clear()
+        return stored, await down.get("k", Triage), down.stats
+
+    stored, result, stats = asyncio.run(main())
+    assert stored == {} and result is None
+    assert stats["errors"] == 2 and stats["misses"] == 1
+
+
+def test_expired_local_entries_fall_through_to_the_collection(monkeypatch):
+    async def main():
+        collection = _Collection()
+        cache = _cache(collection, ttl_seconds=60)
+        await cache.put("k", "triage", "model-a", _result())
+        monkeypatch.setattr(llm_cache.time, "time", lambda: datetime.now(timezone.utc).timestamp() + 61)
+        served = await cache.get("k", Triage)
+        collection.docs.clear()   # the TTL index has removed it too
+        cache._local.clear()
+        return served, await cache.get("k", Triage), cache.stats
+
+    served, expired, stats = asyncio.run(main())
+    assert served is not None and expired is None
+    assert (stats["hits_local"], stats["hits_db"], stats["misses"]) == (0, 1, 1)
+
+
+def test_gateway_serves_repeat_calls_from_the_cache(monkeypatch):
+    cache = _cache(_Collection())
+    monkeypatch.setattr(llm_gateway, "get_llm_cache", lambda: cache)
+    monkeypatch.setattr(llm_cache, "CACHE_ENABLED", True)
+
+    class _LLM:
+        calls = 0
+
+        async def ainvoke(self, messages):
+            self.calls += 1
+            return _result()
+
+    async def main():
+        gateway, llm = llm_gateway.LLMGateway(), _LLM()
+        first = await gateway.ainvoke(llm, MESSAGES, node="triage", model_id="model-a", cache_schema=Triage)
+        second = await gateway.ainvoke(llm, MESSAGES, node="triage", model_id="model-a", cache_schema=Triage)
+        return llm.calls, first, second, gateway.metrics()["nodes"]["triage"]
+
+    calls, first, second, stats = asyncio.run(main())
+    assert calls == 1 and "cache" not in first and second["cache"]["hit"]
+    assert stats["cache_hits"] == 1 and stats["input_tokens_saved"] == 120
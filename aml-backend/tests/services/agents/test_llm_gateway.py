@@ -0,0 +1,136 @@
+import asyncio
+
+import pytest
+
+from services.agents import llm_gateway
+from services.agents.llm_gateway import LLMGateway, ModelLane, Priority
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    def perf_counter(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(llm_gateway, "time", clock)
+    monkeypatch.setattr(llm_gateway.random, "random", lambda: 1.0)  # pause = full backoff
+    monkeypatch.setattr(llm_gateway, "_MAX_CONCURRENCY", 8)
+    monkeypatch.setattr(llm_gateway, "_MIN_CONCURRENCY", 1)
+    return clock
+
+
+def test_throttle_halves_concurrency_once_per_episode(clock):
+    lane = ModelLane("m")
+    assert lane.on_throttle() == 1.0 and lane.limit == 4
+    # Concurrent failures inside the same pause share it
+    clock.now += 0.5
+    assert lane.on_throttle() == 0.5 and lane.limit == 4
+    clock.now += 0.5
+    assert lane.on_throttle() == 2.0 and lane.limit == 2   # next episode: backoff doubled
+    clock.now += 2.0
+    assert lane.on_throttle() == 4.0 and lane.limit == 1
+    clock.now += 4.0
+    lane.on_throttle()
+    assert lane.limit == 1 and lane.stats["limit_decreases"] == 3
+
+
+def test_successes_grow_concurrency_additively(clock):
+    lane = ModelLane("m")
+    lane.on_throttle()
+    lane.on_throttle()
+    lane.limit = 2
+    for _ in range(2):
+        lane.on_success()
+    assert lane.limit == 3
+    for _ in range(3 + 4 + 5 + 6 + 7 + 8):
+        lane.on_success()
+    assert lane.limit == 8 and lane.stats["limit_increases"] == 6
+    # A success resets the throttle backoff
+    clock.now += 100
+    assert lane.on_throttle() == 1.0
+
+
+def test_waiters_are_admitted_by_priority_then_fifo():
+    async def main():
+        lane = ModelLane("m")
+        lane.limit = 1
+        await lane.acquire(Priority.INTERACTIVE)
+        order = []
+
+        async def call(name, priority):
+            await lane.acquire(priority)
+            order.append(name)
+            lane.release()
+
+        tasks = [asyncio.create_task(call(name, priority)) for name, priority in (
+            ("bg1", Priority.BACKGROUND), ("ui1", Priority.INTERACTIVE),
+            ("bg2", Priority.BACKGROUND), ("ui2", Priority.INTERACTIVE),
+        )]
+        await asyncio.sleep(0)
+        lane.release()
+        await asyncio.gather(*tasks)
+        return order, lane.active
+
+    assert asyncio.run(main()) == (["ui1", "ui2", "bg1", "bg2"], 0)
+
+
+def test_cancelled_waiter_does_not_leak_a_slot():
+    async def main():
+        lane = ModelLane("m")
+        lane.limit = 1
+        await lane.acquire(Priority.INTERACTIVE)
+        waiter = asyncio.create_task(lane.acquire(Priority.BACKGROUND))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        lane.release()
+        await asyncio.gather(waiter, return_exceptions=True)
+        return lane.active
+
+    assert asyncio.run(main()) == 0
+
+
+class _FlakyLLM:
+    def __init__(self, failures):
+        self.failures = list(failures)
+
+    async def ainvoke(self, messages):
+        if self.failures:
+            raise self.failures.pop(0)
+        return {"raw": None, "parsed": "ok"}
+
+
+def test_gateway_retries_throttles_within_one_episode(monkeypatch):
+    monkeypatch.setattr(llm_gateway, "_MAX_CONCURRENCY", 8)
+    sleeps = []
+
+    async def fake_sleep(seconds):
+        sleeps.append(seconds)
+
+    monkeypatch.setattr(llm_gateway.asyncio, "sleep", fake_sleep)
+    gateway = LLMGateway()
+    llm = _FlakyLLM([RuntimeError("ThrottlingException: rate exceeded")] * 2)
+    result = asyncio.run(gateway._call(gateway.lane("m"), llm, [], "triage", Priority.INTERACTIVE,
+                                       llm_gateway._empty_node_stats()))
+    assert result["parsed"] == "ok"
+    lane = gateway.lane("m")
+    # The clock does not advance, so both throttles belong to one episode: halved once
+    assert lane.stats["throttles"] == 2 and lane.stats["limit_decreases"] == 1
+    assert lane.limit == 4 and lane.active == 0
+    assert sleeps and all(s > 0 for s in sleeps)
+
+
+def test_gateway_does_not_retry_permanent_errors(monkeypatch):
+    gateway = LLMGateway()
+    stats = llm_gateway._empty_node_stats()
+    with pytest.raises(ValueError):
+        asyncio.run(gateway._call(gateway.lane("m"), _FlakyLLM([ValueError("bad request")]), [], "triage",
+                                  Priority.INTERACTIVE, stats))
+    assert stats["failures"] == 1 and stats["retries"] == 0 and gateway.lane("m").active == 0
@@ -0,0 +1,55 @@
+import asyncio
+
+import pytest
+from langgraph.store.base import GetOp, PutOp
+from pymongo import DeleteOne
+
+from services.agents.memory import AsyncMongoDBMemoryStore
+
+
+class _FakeCollection:
+    """Just enough of a Motor collection for get/put"""
+
+    def __init__(self):
+        self.docs = {}
+
+    async def create_index(self, *args, **kwargs):
+        return "namespace_1_key_1"
+
+    async def bulk_write(self, ops, ordered=True):
+        for op in ops:
+            key = (tuple(op._filter["namespace"]), op._filter["key"])
+            if isinstance(op, DeleteOne):
+                self.docs.pop(key, None)
+                continue
+            doc = self.docs.get(key) or {**op._filter, **op._doc["$setOnInsert"]}
+            doc.update(op._doc["$set"])
+            self.docs[key] = doc
+
+    async def find_one(self, query):
+        return self.docs.get((tuple(query["namespace"]), query["key"]))
+
+
+def _store():
+    return AsyncMongoDBMemoryStore({"memory_store_aio": _FakeCollection()})
+
+
+def test_sync_batch_from_worker_thread_before_any_async_call():
+    async def main():
+        store = _store()
+        put = PutOp(namespace=("cases", "A1"), key="note", value={"text": "hi"})
+        await asyncio.to_thread(store.batch, [put])
+        return await asyncio.to_thread(store.batch, [GetOp(namespace=("cases", "A1"), key="note")])
+
+    [item] = asyncio.run(main())
+    assert item.value == {"text": "hi"}
+
+
+def test_sync_batch_on_the_event_loop_thread_is_rejected():
+    async def main():
+        store = _store()
+        with pytest.raises(asyncio.InvalidStateError):
+            store.batch([GetOp(namespace=("cases", "A1"), key="note")])
+        assert await store.abatch([GetOp(namespace=("cases", "A1"), key="note")]) == [None]
+
+    asyncio.run(main())
@@ -0,0 +1,101 @@
+import math
+import random
+
+import pytest
+
+from services.agents.policy_index import BM25Index, PolicySearchIndex, analyze, stem
+
+FIELDS = {"name": 3.0, "description": 1.0}
+DOCS = {
+    "T1": {"name": "Structuring", "description": "Cash deposits split to stay under reporting thresholds"},
+    "T2": {"name": "Trade based laundering", "description": "Over and under invoicing of shipped goods"},
+    "T3": {"name": "Funnel accounts", "description": "Many cash deposits in one region, withdrawals in another"},
+    "T4": {"name": "Shell companies", "description": "Layering through companies with no business activity"},
+}
+
+
+def _reference_scores(docs, query, k1=1.2, b=0.75):
+    """BM25F written out directly from the definition"""
+    tfs = {}
+    for key, doc in docs.items():
+        tf = {}
+        for field, boost in FIELDS.items():
+            for term in analyze(doc.get(field, "")):
+                tf[term] = tf.get(term, 0.0) + boost
+        tfs[key] = tf
+    n = len(docs)
+    avg = sum(sum(tf.values()) for tf in tfs.values()) / n
+    scores = {}
+    for term in set(analyze(query)):
+        df = sum(term in tf for tf in tfs.values())
+        if not df:
+            continue
+        idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+        for key, tf in tfs.items():
+            if term in tf:
+                norm = k1 * (1 - b + b * sum(tf.values()) / avg)
+                scores[key] = scores.get(key, 0.0) + idf * tf[term] * (k1 + 1) / (tf[term] + norm)
+    return scores
+
+
+def _index(docs):
+    index = BM25Index(FIELDS)
+    for key, doc in docs.items():
+        index.add(key, {**doc, "key": key})
+    return index
+
+
+def _scores(index, query):
+    return {doc["key"]: score for score, doc in index.search(query, limit=10)}
+
+
+@pytest.mark.parametrize("query", ["structured deposits", "cash deposit withdrawals", "shell company layering"])
+def test_bm25_matches_reference_formula(query):
+    expected = _reference_scores(DOCS, query)
+    assert _scores(_index(DOCS), query) == pytest.approx(expected)
+
+
+def test_stemming_links_query_and_document_forms():
+    assert stem("structured") == stem("structuring") == stem("structure")
+    assert stem("transferred") == stem("transfers") == stem("transfer")
+    assert stem("businesses") == stem("business")
+    assert stem("status") == "status" and stem("analysis") == "analysis"
+    assert _index(DOCS).search("structured deposits", limit=1)[0][1]["key"] == "T1"
+
+
+def test_incremental_updates_match_a_rebuilt_index():
+    rng = random.Random(1)
+    docs = dict(DOCS)
+    index = _index(docs)
+    for _ in range(30):
+        key = rng.choice(["T1", "T2", "T3", "T4", "T5"])
+        if key in docs and rng.random() < 0.4:
+            del docs[key]
+            index.remove(key)
+        else:
+            donor = DOCS[rng.choice(list(DOCS))]
+            docs[key] = {"name": donor["name"], "description": donor["description"] + " revised"}
+            index.add(key, {**docs[key], "key": key})
+    rebuilt = _index(docs)
+    for query in ("cash deposits", "companies layering", "revised invoicing"):
+        assert _scores(index, query) == pytest.approx(_scores(rebuilt, query))
+
+
+def test_change_events_update_the_collection_index():
+    mongomock = pytest.importorskip("mongomock")
+    db = mongomock.MongoClient().db
+    db.typology_library.insert_many([{"typology_id": key, **doc} for key, doc in DOCS.items()])
+    index = PolicySearchIndex()
+    assert index.load("typology_library", db) == 4
+    _id = db.typology_library.find_one({"typology_id": "T4"})["_id"]
+
+    index._apply_change("typology_library", {
+        "operationType": "update", "documentKey": {"_id": _id},
+        "fullDocument": {"_id": _id, "typology_id": "T4", "name": "Nominee directors"},
+    })
+    assert [hit["typology_id"] for hit in index.search("typology_library", "nominee")] == ["T4"]
+    assert index.search("typology_library", "shell companies") == []
+
+    index._apply_change("typology_library", {"operationType": "delete", "documentKey": {"_id": _id}})
+    assert index.search("typology_library", "nominee") == []
+    assert index.metrics()["documents"]["typology_library"] == 3
@@ -0,0 +1,114 @@
+import random
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from services.core import batch_resolution
+from services.core.batch_resolution import (
+    PAIRS_COLLECTION, RUNS_COLLECTION, cluster_pairs, run_batch_resolution, write_plan_digest
+)
+
+# Spread indices: with these, set iteration order depends on the order pairs arrive in
+PAIRS = [(866, 582), (768, 884), (556, 85), (32, 83), (330, 250), (880, 453), (866, 768)]
+N = 1000
+
+
+def test_cluster_pairs_is_independent_of_pair_order():
+    expected = cluster_pairs(N, *zip(*PAIRS))
+    assert list(expected.items()) == [
+        (32, [32, 83]), (85, [85, 556]), (250, [250, 330]), (453, [453, 880]), (582, [582, 768, 866, 884]),
+    ]
+    rng = random.Random(3)
+    for _ in range(50):
+        pairs = PAIRS[:]
+        rng.shuffle(pairs)
+        pairs = [(b, a) if rng.random() < 0.5 else (a, b) for a, b in pairs]
+        clusters = cluster_pairs(N, *zip(*pairs))
+        assert list(clusters.items()) == list(expected.items())
+        assert write_plan_digest(clusters, {11, 12}) == write_plan_digest(expected, [12, 11])
+
+
+def _entities():
+    """N entities sorted by entityId; the ones at PAIRS indices form the clusters of PAIRS"""
+    cluster_of = {}
+    for root, members in cluster_pairs(N, *zip(*PAIRS)).items():
+        cluster_of.update({member: root for member in members})
+    docs = []
+    for k in range(N):
+        c = cluster_of.get(k, k)
+        docs.append({
+            "entityId": f"E{k:04d}",
+            "entityType": "individual",
+            "name": {"full": f"Person{c} Surname{c}"},
+            "identifiers": [{"type": "passport", "value": f"P{c:05d}"}],
+            "contactInfo": [{"type": "email", "value": f"p{c}@example.com"}],
+            "dateOfBirth": f"19{50 + c % 50}-0{1 + c % 9}-{1 + c % 28:02d}",
+            "nationality": "US",
+            "createdAt": datetime(2020, 1, 1 + k % 28),
+        })
+    return docs
+
+
+def _bulk_write(self, ops, ordered=True, **kwargs):
+    """mongomock's bulk_write does not accept the UpdateOne of current pymongo; apply ops one by one"""
+    modified = sum(self.update_one(op._filter, op._doc, upsert=bool(op._upsert)).modified_count for op in ops)
+    return SimpleNamespace(modified_count=modified)
+
+
+class _ListCursor(list):
+    """Cursor stand-in that ignores sort hints, so arrival order is whatever the list holds"""
+
+    def sort(self, *args, **kwargs):
+        return self
+
+    def allow_disk_use(self, *args, **kwargs):
+        return self
+
+
+def _resolution(db):
+    return {e["entityId"]: (e.get("resolution") or {}).get("master_entity_id")
+            for e in db.entities.find({}, {"_id": 0, "entityId": 1, "resolution": 1})}
+
+
+def test_resumed_run_writes_the_same_resolution_as_a_clean_run(monkeypatch):
+    mongomock = pytest.importorskip("mongomock")
+    collection = mongomock.collection.Collection
+    monkeypatch.setattr(collection, "bulk_write", _bulk_write, raising=False)
+    monkeypatch.setattr(batch_resolution, "_WRITE_CHUNK", 2)
+
+    clean = mongomock.MongoClient().db
+    clean.entities.insert_many(_entities())
+    run_batch_resolution(clean, run_id="clean")
+    expected = _resolution(clean)
+    linked = sum(len(members) - 1 for members in cluster_pairs(N, *zip(*PAIRS)).values())
+    assert sum(master is not None for master in expected.values()) == linked
+
+    db = mongomock.MongoClient().db
+    db.entities.insert_many(_entities())
+    calls = {"n": 0}
+
+    def flaky_bulk_write(self, ops, **kwargs):
+        calls["n"] += 1
+        if calls["n"] == 3:
+            raise RuntimeError("connection lost")
+        return _bulk_write(self, ops, **kwargs)
+
+    monkeypatch.setattr(collection, "bulk_write", flaky_bulk_write, raising=False)
+    with pytest.raises(RuntimeError):
+        run_batch_resolution(db, run_id="flaky")
+    assert db[RUNS_COLLECTION].find_one({"_id": "flaky"})["checkpoint"]["written_chunks"] == 2
+
+    # Scored pairs come back in a different order on resume
+    real_find = collection.find
+
+    def reversed_find(self, *args, **kwargs):
+        cursor = real_find(self, *args, **kwargs)
+        if self.name == PAIRS_COLLECTION:
+            return _ListCursor(list(cursor)[::-1])
+        return cursor
+
+    monkeypatch.setattr(collection, "find", reversed_find)
+    result = run_batch_resolution(db, run_id="flaky", resume=True)
+    assert result["status"] == "completed"
+    assert _resolution(db) == expected
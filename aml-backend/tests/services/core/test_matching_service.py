@@ -0,0 +1,80 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import bedrock.embeddings as embeddings
+from repositories.impl.vector_search_repository import VectorSearchRepository
+from services.core import matching_service
+from services.core.matching_service import MatchingService, QueryEmbeddingCache
+
+
+class SlowEmbeddingModel:
+    """Blocking boto3-style predict, as BedrockTitanEmbeddings does"""
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+
+    def predict(self, text):
+        time.sleep(self.seconds)
+        return [0.1, 0.2]
+
+
+class FakeAtlasRepo:
+    async def search_entities(self, request):
+        return {"entities": [{"entity_id": "E2", "search_score": 0.9}]}
+
+
+class FakeEntityRepo:
+    async def find_by_phonetic_codes(self, codes, entity_type=None, limit=None, exclude_ids=None):
+        if "signature" not in codes:
+            return []
+        return [{"_id": "E3", "entityId": "E3", "name": {"full": "Jon Smith"}, "entityType": "individual"}]
+
+
+class FakeVectorRepo:
+    generate_embedding_from_text = VectorSearchRepository.generate_embedding_from_text
+
+    async def find_similar_by_vector(self, query_vector, limit, similarity_threshold):
+        return [{"entity_id": "E4", "similarity_score": 0.8}]
+
+
+def test_slow_embedding_does_not_delay_other_strategies(monkeypatch):
+    monkeypatch.setattr(embeddings, "get_embedding_model", lambda: SlowEmbeddingModel(1.0))
+    monkeypatch.setattr(matching_service, "query_embedding_cache", QueryEmbeddingCache())
+    monkeypatch.setitem(matching_service.STRATEGY_TIMEOUTS_MS, "vector_search", 200)
+    service = MatchingService(FakeEntityRepo(), FakeAtlasRepo(), FakeVectorRepo())
+    entity = SimpleNamespace(entity_id="E1", name="John Smith", identifiers=None, contact=None)
+
+    started = time.perf_counter()
+    matches, metadata = asyncio.run(service.find_potential_matches_with_metadata(entity))
+    elapsed = time.perf_counter() - started
+
+    strategies = metadata["strategies"]
+    assert strategies["vector_search"]["status"] == "timeout"
+    assert strategies["atlas_search"]["status"] == "ok"
+    assert strategies["phonetic"]["status"] == "ok"
+    assert strategies["atlas_search"]["latency_ms"] < 100
+    assert strategies["phonetic"]["latency_ms"] < 100
+    assert metadata["partial"] is True
+    assert {m["entity_id"] for m in matches} == {"E2", "E3"}
+    # The deadline fires while the embedding is still running in its thread
+    assert metadata["total_ms"] < 500
+    assert elapsed < 1.5
+
+
+def test_embedding_cache_shares_in_flight_computation():
+    cache = QueryEmbeddingCache()
+    calls = []
+
+    async def compute(text):
+        calls.append(text)
+        await asyncio.sleep(0.01)
+        return [1.0]
+
+    async def run():
+        return await asyncio.gather(*(cache.get_or_compute("q", compute) for _ in range(5)))
+
+    assert asyncio.run(run()) == [[1.0]] * 5
+    assert calls == ["q"]
+    assert asyncio.run(cache.get_or_compute("q", compute)) == [1.0]
+    assert cache.stats()["hits"] == 1
@@ -0,0 +1,43 @@
+import asyncio
+
+from repositories.interfaces.network_repository import NetworkQueryParams
+from services.network.network_analysis_service import NetworkAnalysisService
+
+
+class _Repo:
+    """Returns fresh styled visualization data, as the cached-network repository does"""
+
+    def __init__(self):
+        self.calls = []
+
+    async def prepare_network_for_visualization(self, params, layout_algorithm="force"):
+        self.calls.append((params.center_entity_id, layout_algorithm))
+        return {
+            "nodes": [{"id": "A", "riskLevel": "high", "x": 0, "y": 0, "color": "#d32f2f"}],
+            "edges": [{"source": "A", "target": "B", "confidence": 0.8, "color": "#1976d2", "thickness": 4.0}],
+            "layout": layout_algorithm,
+        }
+
+
+def _prepare(include_styling):
+    repo = _Repo()
+    result = asyncio.run(NetworkAnalysisService(repo).prepare_network_for_visualization(
+        NetworkQueryParams(center_entity_id="A"), include_styling=include_styling
+    ))
+    return result["visualization_data"], repo
+
+
+def test_visualization_keeps_styling_by_default():
+    data, _ = _prepare(True)
+    assert data["nodes"][0]["color"] == "#d32f2f"
+    assert data["edges"][0]["thickness"] == 4.0
+    assert "legend" in data
+
+
+def test_visualization_without_styling_strips_style_fields():
+    data, repo = _prepare(False)
+    assert data["nodes"] == [{"id": "A", "riskLevel": "high", "x": 0, "y": 0}]
+    assert data["edges"] == [{"source": "A", "target": "B", "confidence": 0.8}]
+    assert "legend" not in data
+    # Styling is per request; the network build (and its cache key) is the same
+    assert repo.calls == [("A", "force")]
@@ -0,0 +1,103 @@
+import random
+
+import pytest
+
+from utils.name_matching import (
+    best_name_match, compare_names, damerau_levenshtein, double_metaphone, jaro_winkler,
+    name_index_fields, soundex, string_similarity,
+)
+
+
+def _osa_distance(a, b):
+    """Unbounded optimal-string-alignment distance (full DP table)"""
+    d = [[i + j if not i * j else 0 for j in range(len(b) + 1)] for i in range(len(a) + 1)]
+    for i in range(1, len(a) + 1):
+        for j in range(1, len(b) + 1):
+            d[i][j] = min(d[i - 1][j] + 1, d[i][j - 1] + 1, d[i - 1][j - 1] + (a[i - 1] != b[j - 1]))
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                d[i][j] = min(d[i][j], d[i - 2][j - 2] + 1)
+    return d[len(a)][len(b)]
+
+
+def _random_pairs(n=400, seed=7):
+    rng = random.Random(seed)
+    for _ in range(n):
+        a = "".join(rng.choice("abcde") for _ in range(rng.randint(0, 9)))
+        b = list(a)
+        for _ in range(rng.randint(0, 4)):
+            op = rng.randrange(3)
+            k = rng.randint(0, len(b))
+            if op == 0:
+                b.insert(k, rng.choice("abcde"))
+            elif b and op == 1:
+                del b[min(k, len(b) - 1)]
+            elif len(b) > 1:
+                k = min(k, len(b) - 2)
+                b[k], b[k + 1] = b[k + 1], b[k]
+        yield a, "".join(b)
+
+
+@pytest.mark.parametrize("word, expected", [
+    ("Robert", "R163"), ("Rupert", "R163"), ("Ashcraft", "A261"),
+    ("Tymczak", "T522"), ("Pfister", "P236"), ("Honeyman", "H555"), ("", ""),
+])
+def test_soundex(word, expected):
+    assert soundex(word) == expected
+
+
+@pytest.mark.parametrize("word, expected", [
+    ("Smith", ("SM0", "XMT")), ("Schmidt", ("XMT", "SMT")), ("Jose", ("JS", "HS")),
+    ("Xavier", ("SF", "SFR")), ("Knight", ("NT", "")), ("Katherine", ("K0RN", "KTRN")),
+])
+def test_double_metaphone(word, expected):
+    assert double_metaphone(word) == expected
+
+
+@pytest.mark.parametrize("a, b, expected", [
+    ("martha", "marhta", 0.9611), ("dwayne", "duane", 0.84), ("dixon", "dicksonx", 0.8133),
+])
+def test_jaro_winkler_reference_values(a, b, expected):
+    assert jaro_winkler(a, b) == pytest.approx(expected, abs=1e-4)
+
+
+def test_jaro_winkler_bound_only_prunes_scores_below_min_score():
+    for a, b in _random_pairs():
+        full = jaro_winkler(a, b)
+        bounded = jaro_winkler(a, b, min_score=0.8)
+        assert bounded == full or (bounded == 0.0 and full < 0.8)
+
+
+def test_damerau_levenshtein_matches_full_table():
+    for a, b in _random_pairs():
+        expected = _osa_distance(a, b)
+        assert damerau_levenshtein(a, b) == expected
+        for bound in range(4):
+            assert damerau_levenshtein(a, b, max_distance=bound) == min(expected, bound + 1)
+
+
+def test_string_similarity_bound_only_prunes_scores_below_min_score():
+    for a, b in _random_pairs():
+        full = string_similarity(a, b)
+        bounded = string_similarity(a, b, min_score=0.7)
+        assert bounded == full or (bounded == 0.0 and full < 0.7)
+
+
+def test_compare_names_is_order_and_noise_insensitive():
+    assert compare_names("Santos Maria", "Maria Santos")["method"] == "exact"
+    assert compare_names("Mr. José Müller Ltd", "jose muller")["score"] == 1.0
+
+
+def test_compare_names_joined_names_and_phonetic_floor():
+    joined = compare_names("Mary Ann Smith", "Maryann Smith")
+    assert (joined["score"], joined["method"]) == (1.0, "joined_name")
+    phonetic = compare_names("Jon Smith", "John Smyth")
+    assert phonetic["score"] >= 0.85 and phonetic["phonetic_overlap"] == 1.0
+    assert compare_names("Jon", "Anna")["score"] < 0.5
+
+
+def test_name_index_fields_and_alias_match():
+    fields = name_index_fields("Maria Santos", ["M. Santos"])
+    assert fields["signature"] == "maria santos"
+    assert fields["double_metaphone"] == ["MR", "SNTS"]
+    match = best_name_match("Maria Santos", {"full": "Mario Santo", "aliases": ["Maria Santos"]})
+    assert match["score"] == 1.0 and match["via_alias"] and match["matched_name"] == "Maria Santos"
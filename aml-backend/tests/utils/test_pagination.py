@@ -0,0 +1,65 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+
+from utils import pagination
+from utils.pagination import CountCache, InvalidCursorError, decode_cursor, encode_cursor, keyset_condition
+
+
+@pytest.mark.parametrize("sort_value", [datetime(2024, 5, 1, 12, 30), 42.5, "risk", None, ObjectId()])
+def test_cursor_round_trip(sort_value):
+    doc_id = ObjectId()
+    token = encode_cursor(sort_value, doc_id)
+    assert "=" not in token
+    assert decode_cursor(token) == (sort_value, doc_id)
+
+
+@pytest.mark.parametrize("token", ["", "not-a-cursor", encode_cursor(1, 2)[:-3]])
+def test_invalid_cursor(token):
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(token)
+
+
+def test_keyset_pages_match_skip_pages_with_tied_sort_values():
+    mongomock = pytest.importorskip("mongomock")
+    coll = mongomock.MongoClient().db.transactions
+    start = datetime(2024, 1, 1)
+    coll.insert_many([{"timestamp": start + timedelta(hours=k // 3), "n": k} for k in range(25)])
+    order = [("timestamp", -1), ("_id", -1)]
+    expected = [doc["n"] for doc in coll.find().sort(order)]
+
+    seen, token = [], None
+    while True:
+        query = keyset_condition("timestamp", token) if token else {}
+        page = list(coll.find(query).sort(order).limit(4))
+        if not page:
+            break
+        seen += [doc["n"] for doc in page]
+        token = encode_cursor(page[-1]["timestamp"], page[-1]["_id"])
+    assert seen == expected
+
+
+def test_count_cache_ttl_lru_and_invalidation(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(pagination.time, "monotonic", lambda: now[0])
+    cache = CountCache(ttl_seconds=30, max_entries=2)
+    calls = []
+
+    def get(collection, query, value):
+        async def compute():
+            calls.append((collection, value))
+            return value
+        return asyncio.run(cache.get_or_compute(CountCache.make_key(collection, query), compute))
+
+    assert get("entities", {"a": 1, "b": 2}, 10) == 10
+    assert get("entities", {"b": 2, "a": 1}, 11) == 10        # key is order-insensitive
+    now[0] = 30
+    assert get("entities", {"a": 1, "b": 2}, 12) == 12        # expired
+    get("transactions", {}, 5)
+    get("relationships", {}, 7)                               # evicts the oldest (entities)
+    assert get("entities", {"a": 1, "b": 2}, 13) == 13
+    cache.invalidate("relationships")
+    assert get("relationships", {}, 8) == 8
+    assert (cache.hits, cache.misses) == (1, 6)
@@ -0,0 +1,43 @@
+"""
+Fast JSON encoding for large API payloads
+
+Uses orjson when it is installed (several times faster than the stdlib encoder
+on the large node/edge lists returned by the network endpoints) and falls back
+to compact stdlib json otherwise, so the dependency stays optional.
+"""
+
+import json
+from datetime import datetime
+from typing import Any
+
+from bson import ObjectId
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Serialise to UTF-8 JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, default=_default, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+class FastJSONResponse(Response):
+    """JSONResponse that skips FastAPI's jsonable_encoder pass and encodes via dumps()"""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,621 @@
+"""
+Name matching - phonetic codes, edit-distance kernels and explainable name scores
+
+Write time: `name_index_fields` turns an entity name (plus aliases) into the
+indexed `phonetic_codes` sub-document:
+
+    {"double_metaphone": [...], "soundex": [...], "tokens": [...],
+     "signature": "maria santos", "version": 2}
+
+Query time: candidates blocked on those codes are scored locally with
+`compare_names`, which aligns tokens with a bounded Jaro-Winkler, reports a
+bounded Damerau-Levenshtein distance and phonetic agreement, and returns the
+breakdown alongside the score so screening results are explainable.
+"""
+
+import unicodedata
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+
+NAME_INDEX_VERSION = 2
+
+_NOISE_TOKENS = frozenset({
+    "mr", "mrs", "ms", "miss", "dr", "prof", "sir", "the", "and", "of",
+    "ltd", "limited", "llc", "inc", "incorporated", "corp", "corporation", "co",
+    "company", "plc", "sa", "ag", "gmbh", "bv", "nv", "srl", "spa", "holdings",
+})
+
+
+# ==================== NORMALISATION ====================
+
+def name_tokens(value: Any) -> List[str]:
+    """Lower-case, accent-free name tokens without titles / legal suffixes"""
+    if not value:
+        return []
+    text = unicodedata.normalize("NFKD", str(value))
+    text = "".join(ch if ch.isalnum() else " " for ch in text if not unicodedata.combining(ch)).lower()
+    return [token for token in text.split() if token not in _NOISE_TOKENS]
+
+
+def split_name(name: Any) -> Tuple[str, List[str]]:
+    """(full name, aliases) from a name string or an entity `name` sub-document"""
+    if isinstance(name, dict):
+        full = name.get("full") or " ".join(
+            str(name[part]) for part in ("first", "middle", "last") if name.get(part)
+        )
+        return str(full or ""), [str(alias) for alias in name.get("aliases") or [] if alias]
+    return str(name or ""), []
+
+
+# ==================== PHONETIC CODES ====================
+
+_SOUNDEX_CODES = str.maketrans("bfpvcgjkqsxzdtlmnr", "111122222222334556")
+
+
+def soundex(token: str) -> str:
+    """American Soundex (H/W do not separate equal codes)"""
+    letters = "".join(ch for ch in token.lower() if "a" <= ch <= "z")
+    if not letters:
+        return ""
+    digits = letters.translate(_SOUNDEX_CODES)
+    code, previous = [], digits[0] if digits[0].isdigit() else ""
+    for raw, mapped in zip(letters[1:], digits[1:]):
+        if mapped.isdigit():
+            if mapped != previous:
+                code.append(mapped)
+            previous = mapped
+        elif raw not in "hw":
+            previous = ""
+    return (letters[0].upper() + "".join(code) + "000")[:4]
+
+
+def double_metaphone(word: str) -> Tuple[str, str]:
+    """
+    Lawrence Philips' Double Metaphone: (primary, alternate) codes of up to 4
+    characters; alternate is "" when it equals the primary.
+    """
+    value = unicodedata.normalize("NFKD", word.upper().replace("Ç", "S").replace("Ñ", "N"))
+    value = "".join(ch for ch in value if "A" <= ch <= "Z")
+    length = len(value)
+    if not length:
+        return "", ""
+    last = length - 1
+    primary: List[str] = []
+    secondary: List[str] = []
+    slavo_germanic = any(marker in value for marker in ("W", "K", "CZ", "WITZ"))
+
+    def at(start: int, *subs: str) -> bool:
+        return start >= 0 and any(value.startswith(sub, start) for sub in subs)
+
+    def vowel(pos: int) -> bool:
+        return 0 <= pos < length and value[pos] in "AEIOUY"
+
+    def add(main: str, alternate: Optional[str] = None) -> None:
+        primary.append(main)
+        secondary.append(main if alternate is None else alternate)
+
+    current = 0
+    if at(0, "GN", "KN", "PN", "WR", "PS"):
+        current = 1
+    if value[0] == "X":
+        add("S")
+        current = 1
+
+    while current < length and (len("".join(primary)) < 4 or len("".join(secondary)) < 4):
+        ch = value[current]
+
+        if ch in "AEIOUY":
+            if current == 0:
+                add("A")
+            current += 1
+
+        elif ch == "B":
+            add("P")
+            current += 2 if at(current + 1, "B") else 1
+
+        elif ch == "C":
+            if (current > 1 and not vowel(current - 2) and at(current - 1, "ACH")
+                    and not at(current + 2, "I")
+                    and (not at(current + 2, "E") or at(current - 2, "BACHER", "MACHER"))):
+                add("K")
+                current += 2
+            elif current == 0 and at(current, "CAESAR"):
+                add("S")
+                current += 2
+            elif at(current, "CHIA"):
+                add("K")
+                current += 2
+            elif at(current, "CH"):
+                if current > 0 and at(current, "CHAE"):
+                    add("K", "X")
+                elif (current == 0 and (at(current + 1, "HARAC", "HARIS") or at(current + 1, "HOR", "HYM", "HIA", "HEM"))
+                      and not at(0, "CHORE")):
+                    add("K")
+                elif (at(0, "VAN ", "VON ", "SCH") or at(current - 2, "ORCHES", "ARCHIT", "ORCHID")
+                      or at(current + 2, "T", "S")
+                      or ((at(current - 1, "A", "O", "U", "E") or current == 0)
+                          and at(current + 2, "L", "R", "N", "M", "B", "H", "F", "V", "W", " "))):
+                    add("K")
+                elif current > 0:
+                    add("K") if at(0, "MC") else add("X", "K")
+                else:
+                    add("X")
+                current += 2
+            elif at(current, "CZ") and not at(current - 2, "WICZ"):
+                add("S", "X")
+                current += 2
+            elif at(current + 1, "CIA"):
+                add("X")
+                current += 3
+            elif at(current, "CC") and not (current == 1 and value[0] == "M"):
+                if at(current + 2, "I", "E", "H") and not at(current + 2, "HU"):
+                    if (current == 1 and value[0] == "A") or at(current - 1, "UCCEE", "UCCES"):
+                        add("KS")
+                    else:
+                        add("X")
+                    current += 3
+                else:
+                    add("K")
+                    current += 2
+            elif at(current, "CK", "CG", "CQ"):
+                add("K")
+                current += 2
+            elif at(current, "CI", "CE", "CY"):
+                add("S", "X") if at(current, "CIO", "CIE", "CIA") else add("S")
+                current += 2
+            else:
+                add("K")
+                if at(current + 1, " C", " Q", " G"):
+                    current += 3
+                elif at(current + 1, "C", "K", "Q") and not at(current + 1, "CE", "CI"):
+                    current += 2
+                else:
+                    current += 1
+
+        elif ch == "D":
+            if at(current, "DG"):
+                if at(current + 2, "I", "E", "Y"):
+                    add("J")
+                    current += 3
+                else:
+                    add("TK")
+                    current += 2
+            else:
+                add("T")
+                current += 2 if at(current, "DT", "DD") else 1
+
+        elif ch == "F":
+            add("F")
+            current += 2 if at(current + 1, "F") else 1
+
+        elif ch == "G":
+            if at(current + 1, "H"):
+                if current > 0 and not vowel(current - 1):
+                    add("K")
+                elif current == 0:
+                    add("J") if at(current + 2, "I") else add("K")
+                elif ((current > 1 and at(current - 2, "B", "H", "D"))
+                      or (current > 2 and at(current - 3, "B", "H", "D"))
+                      or (current > 3 and at(current - 4, "B", "H"))):
+                    pass
+                elif current > 2 and at(current - 1, "U") and at(current - 3, "C", "G", "L", "R", "T"):
+                    add("F")
+                elif current > 0 and value[current - 1] != "I":
+                    add("K")
+                current += 2
+            elif at(current + 1, "N"):
+                if current == 1 and vowel(0) and not slavo_germanic:
+                    add("KN", "N")
+                elif not at(current + 2, "EY") and not at(current + 1, "Y") and not slavo_germanic:
+                    add("N", "KN")
+                else:
+                    add("KN")
+                current += 2
+            elif at(current + 1, "LI") and not slavo_germanic:
+                add("KL", "L")
+                current += 2
+            elif current == 0 and (at(current + 1, "Y") or at(current + 1, "ES", "EP", "EB", "EL", "EY", "IB",
+                                                                "IL", "IN", "IE", "EI", "ER")):
+                add("K", "J")
+                current += 2
+            elif ((at(current + 1, "ER") or at(current + 1, "Y")) and not at(0, "DANGER", "RANGER", "MANGER")
+                  and not at(current - 1, "E", "I") and not at(current - 1, "RGY", "OGY")):
+                add("K", "J")
+                current += 2
+            elif at(current + 1, "E", "I", "Y") or at(current - 1, "AGGI", "OGGI"):
+                if at(0, "VAN ", "VON ", "SCH") or at(current + 1, "ET"):
+                    add("K")
+                elif at(current + 1, "IER "):
+                    add("J")
+                else:
+                    add("J", "K")
+                current += 2
+            else:
+                add("K")
+                current += 2 if at(current + 1, "G") else 1
+
+        elif ch == "H":
+            if (current == 0 or vowel(current - 1)) and vowel(current + 1):
+                add("H")
+                current += 2
+            else:
+                current += 1
+
+        elif ch == "J":
+            if at(current, "JOSE") or at(0, "SAN "):
+                if (current == 0 and at(current + 4, " ")) or at(0, "SAN "):
+                    add("H")
+                else:
+                    add("J", "H")
+                current += 1
+                continue
+            if current == 0:
+                add("J", "A")
+            elif vowel(current - 1) and not slavo_germanic and at(current + 1, "A", "O"):
+                add("J", "H")
+            elif current == last:
+                add("J", "")
+            elif not at(current + 1, "L", "T", "K", "S", "N", "M", "B", "Z") and not at(current - 1, "S", "K", "L"):
+                add("J")
+            current += 2 if at(current + 1, "J") else 1
+
+        elif ch == "K":
+            add("K")
+            current += 2 if at(current + 1, "K") else 1
+
+        elif ch == "L":
+            if at(current + 1, "L"):
+                if ((current == length - 3 and at(current - 1, "ILLO", "ILLA", "ALLE"))
+                        or ((at(last - 1, "AS", "OS") or at(last, "A", "O")) and at(current - 1, "ALLE"))):
+                    add("L", "")
+                else:
+                    add("L")
+                current += 2
+            else:
+                add("L")
+                current += 1
+
+        elif ch == "M":
+            add("M")
+            if (at(current - 1, "UMB") and (current + 1 == last or at(current + 2, "ER"))) or at(current + 1, "M"):
+                current += 2
+            else:
+                current += 1
+
+        elif ch == "N":
+            add("N")
+            current += 2 if at(current + 1, "N") else 1
+
+        elif ch == "P":
+            if at(current + 1, "H"):
+                add("F")
+                current += 2
+            else:
+                add("P")
+                current += 2 if at(current + 1, "P", "B") else 1
+
+        elif ch == "Q":
+            add("K")
+            current += 2 if at(current + 1, "Q") else 1
+
+        elif ch == "R":
+            if current == last and not slavo_germanic and at(current - 2, "IE") and not at(current - 4, "ME", "MA"):
+                add("", "R")
+            else:
+                add("R")
+            current += 2 if at(current + 1, "R") else 1
+
+        elif ch == "S":
+            if at(current - 1, "ISL", "YSL"):
+                current += 1
+            elif current == 0 and at(current, "SUGAR"):
+                add("X", "S")
+                current += 1
+            elif at(current, "SH"):
+                add("S") if at(current + 1, "HEIM", "HOEK", "HOLM", "HOLZ") else add("X")
+                current += 2
+            elif at(current, "SIO", "SIA", "SIAN"):
+                add("S") if slavo_germanic else add("S", "X")
+                current += 3
+            elif (current == 0 and at(current + 1, "M", "N", "L", "W")) or at(current + 1, "Z"):
+                add("S", "X")
+                current += 2 if at(current + 1, "Z") else 1
+            elif at(current, "SC"):
+                if at(current + 2, "H"):
+                    if at(current + 3, "OO", "ER", "EN", "UY", "ED", "EM"):
+                        add("X", "SK") if at(current + 3, "ER", "EN") else add("SK")
+                    elif current == 0 and not vowel(3) and not at(3, "W"):
+                        add("X", "S")
+                    else:
+                        add("X")
+                elif at(current + 2, "I", "E", "Y"):
+                    add("S")
+                else:
+                    add("SK")
+                current += 3
+            else:
+                if current == last and at(current - 2, "AI", "OI"):
+                    add("", "S")
+                else:
+                    add("S")
+                current += 2 if at(current + 1, "S", "Z") else 1
+
+        elif ch == "T":
+            if at(current, "TION", "TIA", "TCH"):
+                add("X")
+                current += 3
+            elif at(current, "TH", "TTH"):
+                if at(current + 2, "OM", "AM") or at(0, "VAN ", "VON ", "SCH"):
+                    add("T")
+                else:
+                    add("0", "T")
+                current += 2
+            else:
+                add("T")
+                current += 2 if at(current + 1, "T", "D") else 1
+
+        elif ch == "V":
+            add("F")
+            current += 2 if at(current + 1, "V") else 1
+
+        elif ch == "W":
+            if at(current, "WR"):
+                add("R")
+                current += 2
+                continue
+            if current == 0 and (vowel(current + 1) or at(current, "WH")):
+                add("A", "F") if vowel(current + 1) else add("A")
+            if ((current == last and vowel(current - 1)) or at(current - 1, "EWSKI", "EWSKY", "OWSKI", "OWSKY")
+                    or at(0, "SCH")):
+                add("", "F")
+                current += 1
+            elif at(current, "WICZ", "WITZ"):
+                add("TS", "FX")
+                current += 4
+            else:
+                current += 1
+
+        elif ch == "X":
+            if not (current == last and (at(current - 3, "IAU", "EAU") or at(current - 2, "AU", "OU"))):
+                add("KS")
+            current += 2 if at(current + 1, "C", "X") else 1
+
+        elif ch == "Z":
+            if at(current + 1, "H"):
+                add("J")
+                current += 2
+                continue
+            if at(current + 1, "ZO", "ZI", "ZA") or (slavo_germanic and current > 0 and value[current - 1] != "T"):
+                add("S", "TS")
+            else:
+                add("S")
+            current += 2 if at(current + 1, "Z") else 1
+
+        else:
+            current += 1
+
+    main, alternate = "".join(primary)[:4], "".join(secondary)[:4]
+    return main, (alternate if alternate != main else "")
+
+
+@lru_cache(maxsize=65536)
+def token_codes(token: str) -> Tuple[str, ...]:
+    """Double Metaphone primary (+ alternate) codes for one token (cached)"""
+    main, alternate = double_metaphone(token)
+    return tuple(code for code in (main, alternate) if code)
+
+
+def name_index_fields(name: Any, aliases: Optional[List[str]] = None) -> Dict[str, Any]:
+    """The indexed `phonetic_codes` sub-document for an entity name (and aliases)"""
+    full, embedded_aliases = split_name(name)
+    aliases = embedded_aliases + [alias for alias in aliases or [] if alias]
+    tokens = name_tokens(full)
+    all_tokens = list(dict.fromkeys(tokens + [t for alias in aliases for t in name_tokens(alias)]))
+    # Initials would put every "M." in one block, so they get no phonetic codes
+    coded = [token for token in all_tokens if len(token) > 1]
+    return {
+        "double_metaphone": sorted({code for token in coded for code in token_codes(token)}),
+        "soundex": sorted({soundex(token) for token in coded if soundex(token)}),
+        "tokens": all_tokens,
+        "signature": " ".join(sorted(tokens)),
+        "version": NAME_INDEX_VERSION,
+    }
+
+
+# ==================== EDIT-DISTANCE KERNELS ====================
+
+def jaro_winkler(a: str, b: str, min_score: float = 0.0, prefix_scale: float = 0.1) -> float:
+    """
+    Jaro-Winkler similarity. Returns 0.0 early when the length-based upper
+    bound cannot reach `min_score` (bounded screening).
+    """
+    if a == b:
+        return 1.0 if a else 0.0
+    len_a, len_b = len(a), len(b)
+    if not len_a or not len_b:
+        return 0.0
+    # Best case: every character of the shorter string matches, no transpositions, full prefix bonus
+    shorter = min(len_a, len_b)
+    jaro_bound = (shorter / len_a + shorter / len_b + 1) / 3
+    if jaro_bound + min(4, shorter) * prefix_scale * (1 - jaro_bound) < min_score:
+        return 0.0
+
+    window = max(max(len_a, len_b) // 2 - 1, 0)
+    matched_b = [False] * len_b
+    a_matches = []
+    for i, ch in enumerate(a):
+        for j in range(max(0, i - window), min(i + window + 1, len_b)):
+            if not matched_b[j] and b[j] == ch:
+                matched_b[j] = True
+                a_matches.append(ch)
+                break
+    matches = len(a_matches)
+    if not matches:
+        return 0.0
+    b_matches = [b[j] for j in range(len_b) if matched_b[j]]
+    transpositions = sum(x != y for x, y in zip(a_matches, b_matches)) / 2
+    jaro = (matches / len_a + matches / len_b + (matches - transpositions) / matches) / 3
+
+    prefix = 0
+    for x, y in zip(a[:4], b[:4]):
+        if x != y:
+            break
+        prefix += 1
+    return jaro + prefix * prefix_scale * (1 - jaro)
+
+
+def damerau_levenshtein(a: str, b: str, max_distance: Optional[int] = None) -> int:
+    """
+    Optimal-string-alignment Damerau-Levenshtein distance. With
+    `max_distance`, only the diagonal band of that width is computed and
+    max_distance + 1 is returned as soon as the bound is exceeded.
+    """
+    if a == b:
+        return 0
+    len_a, len_b = len(a), len(b)
+    bound = max_distance if max_distance is not None else max(len_a, len_b)
+    if abs(len_a - len_b) > bound:
+        return bound + 1
+    if not len_a or not len_b:
+        return max(len_a, len_b)
+
+    beyond = bound + 1
+    before_previous = [beyond] * (len_b + 1)
+    previous = [j if j <= bound else beyond for j in range(len_b + 1)]
+    for i in range(1, len_a + 1):
+        current = [beyond] * (len_b + 1)
+        if i <= bound:
+            current[0] = i
+        row_min = current[0]
+        ch = a[i - 1]
+        for j in range(max(1, i - bound), min(len_b, i + bound) + 1):
+            value = previous[j - 1] + (ch != b[j - 1])
+            if previous[j] + 1 < value:
+                value = previous[j] + 1
+            if current[j - 1] + 1 < value:
+                value = current[j - 1] + 1
+            if i > 1 and j > 1 and ch == b[j - 2] and a[i - 2] == b[j - 1] and before_previous[j - 2] + 1 < value:
+                value = before_previous[j - 2] + 1
+            current[j] = value if value < beyond else beyond
+            if value < row_min:
+                row_min = value
+        if row_min > bound:
+            return beyond
+        before_previous, previous = previous, current
+    return previous[len_b]
+
+
+def string_similarity(a: str, b: str, min_score: float = 0.0) -> float:
+    """
+    Mean of Jaro-Winkler and normalised edit similarity. Jaro-Winkler alone
+    rates near-anagrams ("anna" / "nana") above 0.9; the edit term pulls them
+    back while keeping single typos and transpositions high. Edits beyond half
+    the length contribute nothing, which bounds the distance kernel.
+    """
+    if a == b:
+        return 1.0 if a else 0.0
+    longest = max(len(a), len(b))
+    # The edit term is at most 1, so the mean cannot reach min_score unless JW reaches 2*min_score - 1
+    jw = jaro_winkler(a, b, min_score=2 * min_score - 1)
+    if not jw:
+        return 0.0
+    bound = longest // 2
+    distance = damerau_levenshtein(a, b, max_distance=bound)
+    return (jw + (1 - distance / longest if distance <= bound else 0.0)) / 2
+
+
+# ==================== NAME COMPARISON ====================
+
+_UNMATCHED_TOKEN_WEIGHT = 0.5  # missing middle names / extra surnames count half
+_PHONETIC_FLOOR = 0.85         # sound-alike tokens score at least this
+_ALTERNATE_CODE_MIN = 0.3      # alternate-code agreement ("jon" ~ "anna") also needs spelling support
+
+
+def compare_names(query: Any, candidate: Any, min_score: float = 0.0) -> Dict[str, Any]:
+    """
+    Explainable similarity between two names.
+
+    Tokens are aligned greedily by `string_similarity` (token order does not
+    matter); tokens whose primary Double Metaphone codes agree are floored at
+    0.85, as are tokens agreeing through an alternate code whose spellings are
+    at least 0.3 similar ("schmidt" ~ "smith" but not "jon" ~ "anna").
+    Unaligned tokens count at half weight. When the token counts differ the
+    names are also compared with spaces removed ("Mary Ann" / "Maryann") and
+    the better score wins.
+    """
+    a, b = name_tokens(query), name_tokens(candidate)
+    result: Dict[str, Any] = {"score": 0.0, "method": "none", "aligned_tokens": [],
+                              "unmatched_tokens": [], "edit_distance": None, "phonetic_overlap": 0.0}
+    if not a or not b:
+        return result
+
+    signature_a, signature_b = " ".join(sorted(a)), " ".join(sorted(b))
+    distance = damerau_levenshtein(signature_a, signature_b, max_distance=3)
+    result["edit_distance"] = distance if distance <= 3 else None
+    if signature_a == signature_b:
+        result.update(score=1.0, method="exact", phonetic_overlap=1.0,
+                      aligned_tokens=[{"query": t, "candidate": t, "similarity": 1.0, "phonetic": "primary"}
+                                      for t in sorted(a)])
+        return result
+
+    codes_a = {token: token_codes(token) for token in a}
+    codes_b = {token: token_codes(token) for token in b}
+    candidates = []
+    for i, x in enumerate(a):
+        for j, y in enumerate(b):
+            similarity = string_similarity(x, y)
+            x_codes, y_codes = codes_a[x], codes_b[y]
+            if x_codes and y_codes and x_codes[0] == y_codes[0]:
+                phonetic = "primary"
+            elif set(x_codes) & set(y_codes) and similarity >= _ALTERNATE_CODE_MIN:
+                phonetic = "alternate"
+            else:
+                phonetic = None
+            if phonetic:
+                similarity = max(similarity, _PHONETIC_FLOOR)
+            candidates.append((similarity, phonetic, i, j))
+    candidates.sort(key=lambda item: (-item[0], item[2], item[3]))
+
+    used_a, used_b = set(), set()
+    matched_weight = total_weight = 0.0
+    phonetic_pairs = 0
+    for similarity, phonetic, i, j in candidates:
+        if i in used_a or j in used_b:
+            continue
+        used_a.add(i)
+        used_b.add(j)
+        weight = max(len(a[i]), len(b[j]))
+        matched_weight += similarity * weight
+        total_weight += weight
+        phonetic_pairs += phonetic is not None
+        result["aligned_tokens"].append({"query": a[i], "candidate": b[j], "similarity": round(similarity, 4),
+                                         "phonetic": phonetic})
+    unmatched = [a[i] for i in range(len(a)) if i not in used_a] + [b[j] for j in range(len(b)) if j not in used_b]
+    total_weight += _UNMATCHED_TOKEN_WEIGHT * sum(len(token) for token in unmatched)
+    token_score = matched_weight / total_weight if total_weight else 0.0
+    full_score = 0.0
+    if len(a) != len(b):
+        full_score = string_similarity("".join(a), "".join(b), min_score=max(min_score, token_score))
+
+    result.update(
+        score=round(max(token_score, full_score), 4),
+        method="token_alignment" if token_score >= full_score else "joined_name",
+        unmatched_tokens=unmatched,
+        phonetic_overlap=round(phonetic_pairs / len(used_a), 4) if used_a else 0.0,
+    )
+    return result
+
+
+def best_name_match(query: Any, candidate_name: Any, aliases: Optional[List[str]] = None,
+                    min_score: float = 0.0) -> Dict[str, Any]:
+    """compare_names against a candidate's full name and each alias; best wins"""
+    full, embedded_aliases = split_name(candidate_name)
+    aliases = embedded_aliases + [alias for alias in aliases or [] if alias]
+    best = compare_names(query, full, min_score)
+    best["matched_name"] = full
+    for alias in aliases:
+        result = compare_names(query, alias, min_score)
+        if result["score"] > best["score"]:
+            best = {**result, "matched_name": alias, "via_alias": True}
+    return best
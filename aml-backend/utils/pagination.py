@@ -0,0 +1,126 @@
+"""
+Pagination helpers - keyset continuation tokens and a short-TTL count cache
+
+Keyset (cursor) pagination replaces $skip for deep pages: each page resumes
+after the last (sort value, _id) pair seen, so page N costs the same as page 1.
+Tokens are opaque url-safe base64 strings; callers should never parse them.
+
+Totals come from CountCache, a per-filter TTL cache shared across repository
+instances, so paging through a listing does not re-run a full $count per page.
+"""
+
+import base64
+import json
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from bson import ObjectId
+
+
+COUNT_MODES = ("exact", "cached", "estimated")
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a continuation token cannot be decoded"""
+    pass
+
+
+# ==================== CONTINUATION TOKENS ====================
+
+def _encode_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, ObjectId):
+        return {"t": "oid", "v": str(value)}
+    if isinstance(value, datetime):
+        return {"t": "dt", "v": value.isoformat()}
+    return {"t": "raw", "v": value}
+
+
+def _decode_value(data: Dict[str, Any]) -> Any:
+    if data["t"] == "oid":
+        return ObjectId(data["v"])
+    if data["t"] == "dt":
+        return datetime.fromisoformat(data["v"])
+    return data["v"]
+
+
+def encode_cursor(sort_value: Any, doc_id: Any) -> str:
+    """Build an opaque continuation token from the last document of a page"""
+    payload = json.dumps({"s": _encode_value(sort_value), "i": _encode_value(doc_id)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> Tuple[Any, Any]:
+    """Decode a continuation token into (sort_value, _id)"""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return _decode_value(data["s"]), _decode_value(data["i"])
+    except Exception as e:
+        raise InvalidCursorError(f"Invalid pagination cursor: {e}")
+
+
+def keyset_condition(sort_field: str, token: str) -> Dict[str, Any]:
+    """Match documents strictly after the cursor for a {sort_field: -1, _id: -1} ordering"""
+    sort_value, doc_id = decode_cursor(token)
+    return {
+        "$or": [
+            {sort_field: {"$lt": sort_value}},
+            {sort_field: sort_value, "_id": {"$lt": doc_id}}
+        ]
+    }
+
+
+# ==================== COUNT CACHE ====================
+
+class CountCache:
+    """Bounded TTL cache for pagination totals keyed by (collection, filter)"""
+
+    def __init__(self, ttl_seconds: float = 30.0, max_entries: int = 1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, int]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(collection_name: str, query: Dict[str, Any]) -> str:
+        return collection_name + ":" + json.dumps(query, sort_keys=True, default=str)
+
+    async def get_or_compute(self, key: str, compute: Callable[[], Awaitable[int]]) -> int:
+        """Return the cached count for key, recomputing it once the TTL has elapsed"""
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry and now - entry[0] < self.ttl_seconds:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+        self.misses += 1
+        value = await compute()
+        self._entries[key] = (now, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return value
+
+    def invalidate(self, collection_name: Optional[str] = None) -> None:
+        """Drop cached counts (all, or for one collection) after writes"""
+        if collection_name is None:
+            self._entries.clear()
+            return
+        prefix = collection_name + ":"
+        for key in [k for k in self._entries if k.startswith(prefix)]:
+            del self._entries[key]
+
+
+def _ttl_from_env() -> float:
+    try:
+        return float(os.getenv("COUNT_CACHE_TTL_SECONDS", "30"))
+    except (TypeError, ValueError):
+        return 30.0
+
+
+count_cache = CountCache(ttl_seconds=_ttl_from_env())
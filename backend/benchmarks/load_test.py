@@ -0,0 +1,123 @@
+"""
+Load test: requests/sec and latency for the fraud backend routes.
+
+Drives a running API with N concurrent keep-alive HTTP clients for a fixed
+duration and reports requests/sec, latency percentiles and errors. When the
+server exposes /health/db-pool the connection pool counters (connections
+open/in use, checkout wait) are fetched afterwards.
+
+Run it against the previous build (one MongoClient per request) and the
+current build (process-wide pooled clients) with the same arguments to
+compare; --label tags each run in the output.
+
+Usage (from backend/):
+    python -m benchmarks.load_test --url http://localhost:8000 --concurrency 32 --duration 30 \
+        --path /customers/?limit=5 --path /transactions/?limit=5 --label pooled
+"""
+
+import argparse
+import http.client
+import json
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+DEFAULT_PATHS = ["/customers/?limit=5", "/transactions/?limit=5", "/fraud-patterns/?limit=5"]
+
+
+def _connect(url):
+    parts = urlsplit(url)
+    connection_class = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+    return connection_class(parts.hostname, parts.port, timeout=30)
+
+
+def worker(url, paths, deadline, offset):
+    latencies, errors = [], 0
+    connection = _connect(url)
+    i = offset
+    while time.perf_counter() < deadline:
+        path = paths[i % len(paths)]
+        i += 1
+        start = time.perf_counter()
+        try:
+            connection.request("GET", path)
+            response = connection.getresponse()
+            response.read()
+            if response.status >= 400:
+                errors += 1
+            else:
+                latencies.append(time.perf_counter() - start)
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            connection.close()
+            connection = _connect(url)
+    connection.close()
+    return latencies, errors
+
+
+def fetch_pool_metrics(url):
+    connection = _connect(url)
+    try:
+        connection.request("GET", "/health/db-pool")
+        response = connection.getresponse()
+        body = response.read()
+        return json.loads(body) if response.status == 200 else None
+    except (OSError, http.client.HTTPException, ValueError):
+        return None
+    finally:
+        connection.close()
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--path", action="append", dest="paths", help="GET path to hit (repeatable)")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds")
+    parser.add_argument("--warmup", type=float, default=2.0, help="seconds of unmeasured load first")
+    parser.add_argument("--label", default="run")
+    args = parser.parse_args()
+    paths = args.paths or DEFAULT_PATHS
+
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        if args.warmup > 0:
+            deadline = time.perf_counter() + args.warmup
+            list(pool.map(lambda n: worker(args.url, paths, deadline, n), range(args.concurrency)))
+
+        started = time.perf_counter()
+        deadline = started + args.duration
+        results = list(pool.map(lambda n: worker(args.url, paths, deadline, n), range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies = [latency for worker_latencies, _ in results for latency in worker_latencies]
+    errors = sum(worker_errors for _, worker_errors in results)
+
+    print(f"[{args.label}] {args.concurrency} clients x {args.duration:.0f}s against {args.url} ({', '.join(paths)})")
+    print(f"  requests/sec : {len(latencies) / elapsed:10.1f}")
+    print(f"  ok / errors  : {len(latencies)} / {errors}")
+    if latencies:
+        print(f"  latency ms   : p50 {percentile(latencies, 50) * 1000:.1f}  "
+              f"p95 {percentile(latencies, 95) * 1000:.1f}  "
+              f"p99 {percentile(latencies, 99) * 1000:.1f}  "
+              f"mean {statistics.fmean(latencies) * 1000:.1f}")
+
+    metrics = fetch_pool_metrics(args.url)
+    if metrics is None:
+        print("  pool metrics : unavailable (/health/db-pool not served by this build)")
+        return
+    for name, client in metrics.get("clients", {}).items():
+        print(f"  {'pool[' + name + ']':<13}: open {client['connections_open']}  in use {client['connections_in_use']} "
+              f"(max {client['max_connections_in_use']})  checkouts {client['checkouts']}  "
+              f"wait avg {client['checkout_wait_ms_avg']} ms / max {client['checkout_wait_ms_max']} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,31 +8,42 @@ class MongoDBAccess:
     This class handles the connection to the database and provides methods to interact with collections and documents.  
     """ 
 
-    def __init__(self, uri: str):
+    def __init__(self, uri: str = None, client: MongoClient = None, **client_options):
         """ 
         Constructor function to initialize the database connection.  
         
         Args:  
             uri (str): The connection string URI for the MongoDB database.  
+            client (MongoClient): An existing (process-wide) client to reuse instead of opening a new one.  
+            **client_options: Extra MongoClient options (pool sizes, timeouts) when a new client is opened.  
         
         Returns:  
             None  
         """
         self.uri = uri
+        # Only close clients this instance opened itself
+        self._owns_client = client is None
 
         try:
-            self.client = MongoClient(self.uri)
+            self.client = client if client is not None else MongoClient(self.uri, **client_options)
         except Exception as e:
             raise Exception(
                 "The following error occurred: ", e)
 
+    def close(self):
+        """ 
+        Closes the database connection if it is owned by this instance.  
+        """
+        if self._owns_client and getattr(self, "client", None) is not None:
+            self.client.close()
+
     def __del__(self):
         """ 
         Destructor function to close the database connection.  
         
         This method is called when the object is about to be destroyed.  
         """
-        self.client.close()
+        self.close()
 
     def get_client(self):
         """ 
@@ -0,0 +1,96 @@
+import threading
+from typing import Dict
+
+from pymongo import monitoring
+
+
+class PoolMetricsListener(monitoring.ConnectionPoolListener):
+    """
+    Connection pool counters for one MongoClient (or Motor client).
+
+    Registered through ``event_listeners`` when the process-wide clients are
+    created, so pool checkout waits and connections in use can be read without
+    touching driver internals.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self.open = 0
+        self.in_use = 0
+        self.max_in_use = 0
+        self.checkouts = 0
+        self.checkout_failures = 0
+        self.checkout_wait_ms_total = 0.0
+        self.checkout_wait_ms_max = 0.0
+        self.pool_clears = 0
+
+    # ==================== POOL EVENTS ====================
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self.pool_clears += 1
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        with self._lock:
+            self.open += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.open -= 1
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self.checkout_failures += 1
+            self._record_wait(event)
+
+    def connection_checked_out(self, event):
+        with self._lock:
+            self.checkouts += 1
+            self.in_use += 1
+            self.max_in_use = max(self.max_in_use, self.in_use)
+            self._record_wait(event)
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.in_use -= 1
+
+    def _record_wait(self, event) -> None:
+        # ``duration`` (seconds) is reported by pymongo >= 4.9
+        duration = getattr(event, "duration", None)
+        if duration is not None:
+            wait_ms = duration * 1000
+            self.checkout_wait_ms_total += wait_ms
+            self.checkout_wait_ms_max = max(self.checkout_wait_ms_max, wait_ms)
+
+    # ==================== SNAPSHOT ====================
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            attempts = self.checkouts + self.checkout_failures
+            return {
+                "client": self.name,
+                "connections_open": self.open,
+                "connections_in_use": self.in_use,
+                "max_connections_in_use": self.max_in_use,
+                "checkouts": self.checkouts,
+                "checkout_failures": self.checkout_failures,
+                "checkout_wait_ms_avg": round(self.checkout_wait_ms_total / attempts, 3) if attempts else None,
+                "checkout_wait_ms_max": round(self.checkout_wait_ms_max, 3),
+                "pool_clears": self.pool_clears,
+            }
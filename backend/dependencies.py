@@ -5,6 +5,9 @@ import os
 from dotenv import load_dotenv
 import logging
 
+from db.mongo_db import MongoDBAccess
+from db.pool_metrics import PoolMetricsListener
+
 # Load environment variables
 load_dotenv()
 
@@ -12,30 +15,103 @@ logger = logging.getLogger(__name__)
 
 # MongoDB connection
 MONGODB_URI = os.getenv("MONGODB_URI", "mongodb://localhost:27017")
-DB_NAME = os.getenv("DB_NAME")
+DB_NAME = os.getenv("DB_NAME", "fsi-threatsight360")
+
+def _safe_int(env_var, default):
+    try:
+        return int(os.getenv(env_var, default))
+    except (TypeError, ValueError):
+        return default
+
+# Connection pool settings shared by the sync and async clients (one of each per process)
+MONGODB_POOL_OPTIONS = {
+    "maxPoolSize": _safe_int("MONGODB_MAX_POOL_SIZE", 100),
+    "minPoolSize": _safe_int("MONGODB_MIN_POOL_SIZE", 0),
+    "maxIdleTimeMS": _safe_int("MONGODB_MAX_IDLE_TIME_MS", 300000),
+    "waitQueueTimeoutMS": _safe_int("MONGODB_WAIT_QUEUE_TIMEOUT_MS", 10000),
+    "serverSelectionTimeoutMS": _safe_int("MONGODB_SERVER_SELECTION_TIMEOUT_MS", 30000),
+    "connectTimeoutMS": _safe_int("MONGODB_CONNECT_TIMEOUT_MS", 20000),
+    "socketTimeoutMS": _safe_int("MONGODB_SOCKET_TIMEOUT_MS", 0) or None,  # 0 = no timeout
+}
+
+# Pool listeners (checkout wait, connections in use) for each client
+_pool_listeners = {
+    "sync": PoolMetricsListener("sync"),
+    "async": PoolMetricsListener("async"),
+}
 
 # Create client instances
 _mongo_client = None
 _motor_client = None
+_db_access = None
 
 def get_mongo_client():
     """Get synchronous MongoDB client"""
     global _mongo_client
     if _mongo_client is None:
-        _mongo_client = MongoClient(MONGODB_URI)
+        _mongo_client = MongoClient(
+            MONGODB_URI,
+            event_listeners=[_pool_listeners["sync"]],
+            **MONGODB_POOL_OPTIONS
+        )
     return _mongo_client
 
 def get_motor_client():
     """Get asynchronous MongoDB client"""
     global _motor_client
     if _motor_client is None:
-        _motor_client = AsyncIOMotorClient(MONGODB_URI)
+        _motor_client = AsyncIOMotorClient(
+            MONGODB_URI,
+            event_listeners=[_pool_listeners["async"]],
+            **MONGODB_POOL_OPTIONS
+        )
     return _motor_client
 
 def get_database():
     """Get database from motor client for async operations"""
     return get_motor_client()[DB_NAME]
 
+def get_db_access():
+    """Get MongoDBAccess wrapping the process-wide sync client"""
+    global _db_access
+    if _db_access is None:
+        _db_access = MongoDBAccess(client=get_mongo_client())
+    return _db_access
+
+def get_db():
+    """Route dependency for MongoDBAccess (shared client, nothing to close per request)"""
+    return get_db_access()
+
+def get_pool_metrics():
+    """Connection pool counters for both clients"""
+    return {
+        "pool_options": MONGODB_POOL_OPTIONS,
+        "clients": {name: listener.snapshot() for name, listener in _pool_listeners.items()},
+    }
+
+def init_connections():
+    """Create both clients up front (application startup)"""
+    get_mongo_client()
+    get_motor_client()
+    logger.info(f"MongoDB clients ready (maxPoolSize={MONGODB_POOL_OPTIONS['maxPoolSize']}, "
+                f"minPoolSize={MONGODB_POOL_OPTIONS['minPoolSize']})")
+
+async def close_connections():
+    """Stop services holding the clients, then close both clients (application shutdown)"""
+    global _mongo_client, _motor_client, _db_access, _fraud_detection_service, _risk_model_service
+    if _risk_model_service is not None:
+        await _risk_model_service.stop()
+    _risk_model_service = None
+    _fraud_detection_service = None
+    _db_access = None
+    if _motor_client is not None:
+        _motor_client.close()
+        _motor_client = None
+    if _mongo_client is not None:
+        _mongo_client.close()
+        _mongo_client = None
+    logger.info("MongoDB clients closed")
+
 # Access to specific collections
 async def get_customers_collection():
     db = get_database()
@@ -54,10 +130,19 @@ async def get_model_performance_collection():
     return db.model_performance
 
 # Import services
+from services.fraud_detection import FraudDetectionService
 from services.risk_model_service import RiskModelService
 
 # Service instances
 _risk_model_service = None
+_fraud_detection_service = None
+
+def get_fraud_detection_service():
+    """Fraud detection service bound to the shared MongoDBAccess"""
+    global _fraud_detection_service
+    if _fraud_detection_service is None:
+        _fraud_detection_service = FraudDetectionService(db_client=get_db_access(), db_name=DB_NAME)
+    return _fraud_detection_service
 
 async def get_risk_model_service():
     global _risk_model_service
@@ -65,4 +150,4 @@ async def get_risk_model_service():
         client = get_mongo_client()  # We'll continue using the sync client for the service
         _risk_model_service = RiskModelService(client)
         await _risk_model_service.start()
-    return _risk_model_service
\ No newline at end of file
+    return _risk_model_service
@@ -2,6 +2,7 @@ from fastapi import FastAPI, Request, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi import APIRouter
 from dotenv import load_dotenv
+from contextlib import asynccontextmanager
 import os
 import logging
 from datetime import datetime
@@ -23,8 +24,28 @@ logger = logging.getLogger(__name__)
 # Load environment variables
 load_dotenv()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open one sync and one async MongoDB client for the process and start background services"""
+    from dependencies import DB_NAME, close_connections, get_database, get_mongo_client, init_connections
+    from services.pattern_index import get_pattern_index
+    from services.transaction_embedder import get_transaction_embedder
+
+    init_connections()
+    # Load the fraud pattern embedding matrix and keep it in sync with the collection
+    get_pattern_index().start(get_database(), get_mongo_client()[DB_NAME])
+    # Embed newly stored transactions in the background
+    get_transaction_embedder().start(get_database())
+    try:
+        yield
+    finally:
+        await get_transaction_embedder().stop()
+        await get_pattern_index().stop()
+        await close_connections()
+
 # Create FastAPI app
 app = FastAPI(
+    lifespan=lifespan,
     title="ThreatSight 360",
     description="Fraud Detection API for Financial Services",
     version="1.0.0",
@@ -52,8 +73,8 @@ async def test_cors():
     logger = logging.getLogger(__name__)
     
     try:
-        from pymongo import MongoClient
         from pymongo.errors import ConnectionFailure
+        from dependencies import get_mongo_client
         import os
         
         # Log the current environment
@@ -69,8 +90,8 @@ async def test_cors():
             masked_uri = f"{prefix[0]}:***@{parts[1]}"
         logger.info(f"MONGODB_URI={masked_uri}")
         
-        # Try a direct MongoDB connection
-        client = MongoClient(mongo_uri, serverSelectionTimeoutMS=5000)
+        # Ping through the shared client
+        client = get_mongo_client()
         client.admin.command('ping')  # Check connection
         
         # Try to access the database
@@ -92,6 +113,13 @@ async def test_cors():
         logger.error(traceback.format_exc())
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
+# Connection pool counters for the shared MongoDB clients
+@app.get("/health/db-pool", tags=["Health"])
+async def db_pool_metrics():
+    from dependencies import get_pool_metrics
+    
+    return get_pool_metrics()
+
 # Simple endpoint that doesn't use MongoDB
 @app.get("/simple-test/", tags=["Health"])
 async def simple_test():
@@ -6,6 +6,7 @@ import os
 
 from models.customer import CustomerModel, CustomerResponse
 from db.mongo_db import MongoDBAccess
+from dependencies import get_db
 
 # Environment variables
 MONGODB_URI = os.getenv("MONGODB_URI", "mongodb://localhost:27017")
@@ -18,25 +19,6 @@ router = APIRouter(
     responses={404: {"description": "Not found"}},
 )
 
-# Dependency to get MongoDB client
-def get_db():
-    import logging
-    logger = logging.getLogger(__name__)
-    
-    # Re-read environment variables to ensure we have the most current values
-    from dotenv import load_dotenv
-    load_dotenv()
-    
-    # Get the MongoDB URI from environment
-    mongodb_uri = os.getenv("MONGODB_URI")
-    # Connect to MongoDB without logging the URI
-    db = MongoDBAccess(mongodb_uri)
-    try:
-        yield db
-    finally:
-        # Clean up and close connection when done
-        del db
-
 @router.post("/", response_description="Add new customer", response_model=CustomerResponse)
 async def create_customer(customer: CustomerModel = Body(...), db: MongoDBAccess = Depends(get_db)):
     customer = jsonable_encoder(customer)
@@ -9,7 +9,9 @@ from bson import ObjectId, json_util
 
 from models.fraud_pattern import FraudPatternModel, FraudPatternResponse
 from db.mongo_db import MongoDBAccess
-from bedrock.embeddings import get_embedding
+from dependencies import get_db
+from bedrock.embeddings import get_batch_embeddings, get_embedding
+from services.pattern_index import get_pattern_index
 
 # Custom JSON encoder for MongoDB ObjectId
 class MongoJSONEncoder(json.JSONEncoder):
@@ -32,25 +34,6 @@ router = APIRouter(
     responses={404: {"description": "Not found"}},
 )
 
-# Dependency to get MongoDB client
-def get_db():
-    import logging
-    logger = logging.getLogger(__name__)
-    
-    # Re-read environment variables to ensure we have the most current values
-    from dotenv import load_dotenv
-    load_dotenv()
-    
-    # Get the MongoDB URI from environment
-    mongodb_uri = os.getenv("MONGODB_URI")
-    # Connect to MongoDB without logging the URI
-    db = MongoDBAccess(mongodb_uri)
-    try:
-        yield db
-    finally:
-        # Clean up and close connection when done
-        del db
-
 @router.post("/", response_description="Add new fraud pattern", response_model=FraudPatternResponse)
 async def create_fraud_pattern(pattern: FraudPatternModel = Body(...), db: MongoDBAccess = Depends(get_db)):
     pattern_json = jsonable_encoder(pattern)
@@ -236,144 +219,59 @@ async def similar_patterns_search(
     """
     Perform a similarity search using vector embeddings to find fraud patterns similar to the input text.
     
-    This endpoint generates embeddings using the Amazon Titan embedding model and
-    then performs a vector search in MongoDB to find similar patterns.
+    The query text is embedded with the Amazon Titan embedding model and scored
+    against the in-process fraud pattern embedding matrix (see
+    services/pattern_index.py). Send ``{"texts": [...]}`` to search for several
+    texts at once; all of them are scored in a single matrix product.
     """
-    if "text" not in query:
-        raise HTTPException(status_code=400, detail="Query must include 'text' field")
+    if "text" not in query and not query.get("texts"):
+        raise HTTPException(status_code=400, detail="Query must include 'text' or 'texts' field")
+    
+    texts = [query["text"]] if "text" in query else list(query["texts"])
+    collection = db.get_collection(
+        db_name=DB_NAME,
+        collection_name=PATTERN_COLLECTION
+    )
     
-    query_text = query["text"]
+    def fallback(debug_info: str, error: Optional[str] = None) -> Dict[str, Any]:
+        # Return patterns sorted by severity rather than failing the UI
+        patterns = []
+        for doc in collection.find({}, {"vector_embedding": 0}).sort("severity", -1).limit(limit):
+            if "_id" in doc and isinstance(doc["_id"], ObjectId):
+                doc["_id"] = str(doc["_id"])
+            patterns.append(doc)
+        response = {"results": patterns, "debug_info": debug_info}
+        if error:
+            response["error"] = error
+        return response
     
     try:
-        # Log the request
-        logger.info(f"Vector search request received - query: {query_text[:50]}...")
+        logger.info(f"Pattern similarity request received - {len(texts)} queries, first: {texts[0][:50]}...")
         
-        # Get the collection and check if it exists
-        collection = db.get_collection(
-            db_name=DB_NAME,
-            collection_name=PATTERN_COLLECTION
-        )
-        
-        # List collections to verify
-        db_instance = db.get_client()[DB_NAME]
-        collections = db_instance.list_collection_names()
-        logger.info(f"Available collections: {collections}")
-        
-        # Verify we can access the patterns collection
-        count = collection.count_documents({})
-        logger.info(f"Pattern collection contains {count} documents")
-        
-        # For debugging purposes, fetch a sample pattern
-        sample_pattern = collection.find_one()
-        if sample_pattern:
-            logger.info(f"Sample pattern found: {sample_pattern.get('pattern_name', 'unknown')}")
-        
-        # Uncomment this block if you want to skip vector embedding for debugging
-        # # In development, return the first few patterns if we can't do a vector search
-        # # This helps with CORS debugging
-        # query_embedding_available = False  # Set to false for testing only
-        # if not query_embedding_available:
-        #     logger.warning("Vector embeddings not available, returning sample patterns")
-        #     patterns = list(collection.find().limit(limit))
-        #     return {"results": patterns, "debug_info": "Using fallback pattern retrieval, no vector search"}
-            
         try:
-            # Generate embeddings for the query text using Titan model
-            query_embedding = await get_embedding(query_text)
-            logger.info(f"Generated embedding - vector size: {len(query_embedding)}")
+            # Generate embeddings for the query texts using Titan model
+            query_embeddings = await get_batch_embeddings(texts)
         except Exception as embed_error:
             logger.error(f"Embedding generation failed: {str(embed_error)}")
-            # Return a fallback response rather than failing completely
-            patterns = list(collection.find().limit(limit))
-            return {
-                "results": patterns, 
-                "error": f"Embedding generation failed: {str(embed_error)}",
-                "debug_info": "Using fallback pattern retrieval, embedding generation failed"
-            }
-        
-        # Check if vector search index exists
-        has_vector_index = False
-        indexes = collection.index_information()
-        logger.info(f"Available indexes on fraud patterns collection: {list(indexes.keys())}")
+            return fallback(
+                "Using fallback pattern retrieval, embedding generation failed",
+                f"Embedding generation failed: {str(embed_error)}"
+            )
         
-        # Look for both the pattern and transaction vector indexes
-        for index_name, index_info in indexes.items():
-            logger.info(f"Examining index: {index_name}, info: {index_info}")
-            if (index_name.startswith("vector_") or 
-                "vector_index" in index_name or
-                index_name == "pattern_vector_index"):
-                has_vector_index = True
-                logger.info(f"Found vector index on fraud patterns: {index_name}")
-                # Store actual index name
-                vector_index_name = index_name
-                break
+        pattern_index = get_pattern_index()
+        matches = pattern_index.search(query_embeddings, k=limit)
+        if not len(pattern_index):
+            logger.warning("No fraud patterns with embeddings - returning patterns by severity")
+            return fallback("No pattern embeddings available, patterns sorted by severity")
         
-        if has_vector_index:
-            try:
-                # Use vector search with MongoDB Atlas
-                pipeline = [
-                    {
-                        "$vectorSearch": {
-                            "index": "vector_index",  # Must match your actual index name
-                            "path": "vector_embedding",
-                            "queryVector": query_embedding,
-                            "numCandidates": limit * 10,  # Scan more candidates for better results
-                            "limit": limit
-                        }
-                    }
-                ]
-                patterns = list(collection.aggregate(pipeline))
-                logger.info(f"Vector search found {len(patterns)} matches")
-            except Exception as vector_error:
-                logger.error(f"Vector search failed: {str(vector_error)}")
-                # Fallback to returning recent patterns
-                patterns = list(collection.find().limit(limit))
-                return {
-                    "results": patterns,
-                    "error": f"Vector search failed: {str(vector_error)}",
-                    "debug_info": "Using fallback pattern retrieval, vector search failed"
-                }
-        else:
-            # Instead of fallback, create a vector index for demonstration purposes
-            logger.warning("Vector search index not found - creating a simple 'example_index' for demonstration")
-            try:
-                # For demo purposes, we'll create a simple index if it doesn't exist
-                # Note: In production, indexes should be created through proper deployment processes
-                collection.create_index([("severity", 1)], name="severity_1")
-                
-                # Now try to do a simple query to get patterns with similar context
-                # Get patterns sorted by severity for demonstration
-                patterns = list(collection.find().sort("severity", -1).limit(limit))
-                
-                # Simply convert the ObjectId to string for each document
-                for pattern in patterns:
-                    if "_id" in pattern and isinstance(pattern["_id"], ObjectId):
-                        pattern["_id"] = str(pattern["_id"])
-                
-                logger.info(f"Found {len(patterns)} patterns for demo")
-            except Exception as demo_error:
-                logger.error(f"Demo fallback failed: {str(demo_error)}")
-                # Last resort - get some patterns and convert ids to strings
-                patterns = []
-                for doc in collection.find().limit(limit):
-                    if "_id" in doc and isinstance(doc["_id"], ObjectId):
-                        doc["_id"] = str(doc["_id"])
-                    patterns.append(doc)
-                
-        # Convert any ObjectId to string in the results
-        serializable_patterns = []
-        for pattern in patterns:
-            # Create a new dict with string IDs instead of ObjectId
-            serializable_pattern = {}
-            for key, value in pattern.items():
-                if key == "_id" and isinstance(value, ObjectId):
-                    serializable_pattern[key] = str(value)
-                else:
-                    serializable_pattern[key] = value
-            serializable_patterns.append(serializable_pattern)
-            
-        logger.info(f"Returning {len(serializable_patterns)} patterns with serialized IDs")
-        return {"results": serializable_patterns, "debug_info": "Search completed successfully"}
+        results = [[{**pattern, "score": score} for score, pattern in hits] for hits in matches]
+        if "text" in query:
+            logger.info(f"Pattern similarity found {len(results[0])} matches")
+            return {"results": results[0], "debug_info": "Search completed successfully"}
+        return {
+            "results_by_query": [{"text": text, "results": hits} for text, hits in zip(texts, results)],
+            "debug_info": "Search completed successfully"
+        }
     
     except Exception as e:
         import traceback
@@ -383,25 +281,7 @@ async def similar_patterns_search(
         
         # Try to get some patterns anyway to not completely fail the UI
         try:
-            collection = db.get_collection(db_name=DB_NAME, collection_name=PATTERN_COLLECTION)
-            fallback_patterns = []
-            
-            # Safely convert ObjectId to strings to avoid JSON serialization errors
-            for doc in collection.find().limit(limit):
-                serializable_doc = {}
-                for key, value in doc.items():
-                    if key == "_id" and isinstance(value, ObjectId):
-                        serializable_doc[key] = str(value)
-                    else:
-                        serializable_doc[key] = value
-                fallback_patterns.append(serializable_doc)
-                
-            logger.info(f"Using {len(fallback_patterns)} fallback patterns")
-            return {
-                "results": fallback_patterns,
-                "error": error_msg,
-                "debug_info": "Using fallback patterns due to error"
-            }
+            return fallback("Using fallback patterns due to error", error_msg)
         except:
             # If all else fails, return a helpful error
             raise HTTPException(
@@ -410,4 +290,9 @@ async def similar_patterns_search(
                     "error": error_msg,
                     "suggestion": "Check MongoDB connection and vector search configuration"
                 }
-            )
\ No newline at end of file
+            )
+
+@router.get("/index/metrics", response_description="Pattern embedding index counters")
+async def pattern_index_metrics():
+    """Size, reload and search counters of the in-process pattern embedding matrix."""
+    return get_pattern_index().metrics()
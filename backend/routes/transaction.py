@@ -8,7 +8,10 @@ from datetime import datetime, timedelta
 
 from models.transaction import TransactionModel, TransactionResponse
 from db.mongo_db import MongoDBAccess
+from dependencies import get_db, get_fraud_detection_service
 from services.fraud_detection import FraudDetectionService
+from services.similarity_ranker import get_similarity_ranker
+from services.transaction_embedder import get_transaction_embedder
 
 # Set up logging
 logger = logging.getLogger(__name__)
@@ -24,30 +27,6 @@ router = APIRouter(
     responses={404: {"description": "Not found"}},
 )
 
-# Dependency to get MongoDB client
-def get_db():
-    import logging
-    logger = logging.getLogger(__name__)
-    
-    # Re-read environment variables to ensure we have the most current values
-    from dotenv import load_dotenv
-    load_dotenv()
-    
-    # Get the MongoDB URI from environment
-    mongodb_uri = os.getenv("MONGODB_URI")
-    # Connect to MongoDB without logging the URI
-    db = MongoDBAccess(mongodb_uri)
-    try:
-        yield db
-    finally:
-        # Clean up and close connection when done
-        del db
-
-# Dependency to get fraud detection service
-def get_fraud_detection_service(db: MongoDBAccess = Depends(get_db)):
-    service = FraudDetectionService(db_client=db, db_name=DB_NAME)
-    return service
-
 @router.post("/", response_description="Add new transaction", response_model=TransactionResponse)
 async def create_transaction(
     transaction: TransactionModel = Body(...), 
@@ -71,6 +50,9 @@ async def create_transaction(
         document=transaction_dict
     )
     
+    # Queue for embedding when no change stream picks the insert up (non-blocking)
+    get_transaction_embedder().submit(transaction_dict)
+    
     created_transaction = db.get_collection(
         db_name=DB_NAME,
         collection_name=TRANSACTION_COLLECTION
@@ -81,6 +63,7 @@ async def create_transaction(
 @router.post("/evaluate", response_description="Evaluate transaction for fraud without storing it")
 async def evaluate_transaction(
     transaction: Dict[str, Any] = Body(...),
+    mode: Optional[str] = Query(None, description="'full' or 'tiered' (defaults to EVALUATION_MODE)"),
     fraud_service: FraudDetectionService = Depends(get_fraud_detection_service)
 ):
     """
@@ -89,191 +72,51 @@ async def evaluate_transaction(
     
     Supports both customer_id (legacy) and entity_id (new) fields.
     If entity_id is provided, it will be used as customer_id for compatibility.
+    
+    In tiered mode the vector similarity search only runs when the rule checks are
+    uncertain (or sampled); the tier reached is reported under "evaluation".
     """
+    if mode not in (None, "full", "tiered"):
+        raise HTTPException(status_code=400, detail=f"Invalid evaluation mode: {mode}")
+    
     # Support both entity_id and customer_id for backward compatibility
     if "entity_id" in transaction and not transaction.get("customer_id"):
         transaction["customer_id"] = transaction["entity_id"]
     
-    # Find similar transactions using vector search
-    similar_transactions, similarity_risk_score, calculation_breakdown = await fraud_service.find_similar_transactions(transaction)
-    
-    # Perform fraud detection (traditional rules-based)
-    risk_assessment = await fraud_service.evaluate_transaction(transaction)
-    
-    # Smart filtering based on the transaction scenario
-    display_transactions = []
+    # Rules-based fraud detection first, then vector search when needed
+    evaluation = await fraud_service.evaluate_transaction_tiered(transaction, mode=mode)
+    risk_assessment = evaluation["risk_assessment"]
+    similar_transactions = evaluation["similar_transactions"]
+    similarity_risk_score = evaluation["similarity_risk_score"]
+    calculation_breakdown = evaluation["calculation_breakdown"]
     
     # Check if this is a normal or unusual transaction based on risk_assessment
     is_unusual = risk_assessment.get("level", "medium") in ["medium", "high"] or len(risk_assessment.get("flags", [])) > 0
     
-    if is_unusual:
-        # For unusual transactions, prioritize medium and high risk transactions in results
-        # First, categorize transactions by risk level
-        high_risk = [t for t in similar_transactions if t.get("risk_assessment", {}).get("level") == "high"]
-        medium_risk = [t for t in similar_transactions if t.get("risk_assessment", {}).get("level") == "medium"]
-        low_risk = [t for t in similar_transactions if t.get("risk_assessment", {}).get("level") == "low"]
-        
-        # Build display list prioritizing medium and high risk
-        display_transactions = high_risk + medium_risk + low_risk
-    else:
-        # For normal transactions, prioritize low risk transactions
-        # First, categorize transactions by risk level
-        low_risk = [t for t in similar_transactions if t.get("risk_assessment", {}).get("level") == "low"]
-        medium_risk = [t for t in similar_transactions if t.get("risk_assessment", {}).get("level") == "medium"]
-        high_risk = [t for t in similar_transactions if t.get("risk_assessment", {}).get("level") == "high"]
-        
-        # Build display list prioritizing low risk
-        display_transactions = low_risk + medium_risk + high_risk
-    
-    # Limit to top 5 after reordering
-    display_transactions = display_transactions[:5] if len(display_transactions) > 5 else display_transactions
+    # Smart filtering (high risk first for unusual transactions, low risk first otherwise),
+    # then recalculate the similarity risk score from the top 5 displayed transactions only
+    ranking = get_similarity_ranker().rank(similar_transactions, transaction.get("amount", 0), is_unusual)
+    display_transactions = ranking["display"]
     
     # Log the filtering results for debugging
+    counts = ranking["level_counts"]
     logger.info(f"Transaction evaluation - Is unusual: {is_unusual}, " +
-               f"High risk matches shown: {len([t for t in display_transactions if t.get('risk_assessment', {}).get('level') == 'high'])}, " +
-               f"Medium risk matches shown: {len([t for t in display_transactions if t.get('risk_assessment', {}).get('level') == 'medium'])}, " +
-               f"Low risk matches shown: {len([t for t in display_transactions if t.get('risk_assessment', {}).get('level') == 'low'])}")
+               f"High risk matches shown: {counts['high']}, " +
+               f"Medium risk matches shown: {counts['medium']}, " +
+               f"Low risk matches shown: {counts['low']}")
     
-    # Recalculate similarity risk score based only on displayed transactions
-    recalculated_similarity_risk_score = similarity_risk_score  # Default to original value
+    # Default to the original value when nothing is displayed
+    recalculated_similarity_risk_score = similarity_risk_score
     
     if display_transactions:
-        # Get current transaction amount for amount comparisons
-        current_amount = transaction.get("amount", 0)
-        
-        # Score categories for different risk levels
-        high_risk_scores = []
-        medium_risk_scores = []
-        low_risk_scores = []
-        
-        # Process displayed transactions only
-        for idx, t in enumerate(display_transactions):
-            # Get the similarity score
-            similarity = t.get("score", 0.5)  # Default to 0.5 if not available
-            
-            # Apply a stronger position weight for the filtered top 5 transactions
-            # First result gets full weight, last (5th) gets 0.6 weight
-            position_weight = 1.0 - (idx * 0.1)  # Creates weights: 1.0, 0.9, 0.8, 0.7, 0.6
-            weighted_similarity = similarity * position_weight
-            
-            # Get risk information
-            risk_assessment = t.get("risk_assessment", {})
-            risk_level = risk_assessment.get("level", "unknown")
-            risk_score = risk_assessment.get("score", 50) / 100.0  # Normalize to 0-1 range
-            risk_flags = risk_assessment.get("flags", [])
-            
-            # Get amount for comparison
-            similar_amount = t.get("amount", 0)
-            
-            # Calculate amount similarity (if both amounts are valid)
-            amount_similarity = 1.0
-            if similar_amount > 0 and current_amount > 0:
-                # Calculate ratio of smaller to larger amount (gives 0.0-1.0)
-                amount_ratio = min(current_amount, similar_amount) / max(current_amount, similar_amount)
-                
-                # Strong weight for very similar amounts
-                if amount_ratio > 0.95:  # Very similar
-                    amount_similarity = 1.0
-                elif amount_ratio > 0.8:  # Somewhat similar
-                    amount_similarity = 0.8
-                elif amount_ratio > 0.5:  # Moderately different
-                    amount_similarity = 0.6
-                else:  # Very different
-                    amount_similarity = 0.4
-            
-            # Adjust similarity score based on amount
-            final_similarity = weighted_similarity * 0.7 + amount_similarity * 0.3
-            
-            # Create score object with relevant information
-            score_entry = {
-                "similarity": final_similarity,
-                "risk_score": risk_score,
-                "flags": len(risk_flags),
-                "position": idx + 1,
-                "raw_similarity": similarity,
-                "position_weight": position_weight,
-                "weighted_similarity": weighted_similarity,
-                "amount_similarity": amount_similarity
-            }
-            
-            # Categorize by risk level
-            if risk_level == "high":
-                high_risk_scores.append(score_entry)
-            elif risk_level == "medium":
-                medium_risk_scores.append(score_entry)
-            elif risk_level == "low":
-                low_risk_scores.append(score_entry)
-            else:
-                # Put unknown in medium risk by default
-                medium_risk_scores.append(score_entry)
-        
-        # Calculate final risk score based on displayed transactions
-        if high_risk_scores:
-            # With high risk matches, focus on them using weighted average
-            total_weight = 0
-            weighted_sum = 0
-            
-            for score in high_risk_scores:
-                # Higher similarity and more flags = higher weight
-                weight = score["similarity"] * (1 + score["flags"] * 0.1)
-                weighted_sum += score["risk_score"] * weight
-                total_weight += weight
-                
-            # Calculate weighted risk and add premium for multiple high-risk matches
-            high_risk_factor = min(1.0, weighted_sum / max(1, total_weight))
-            high_risk_boost = min(0.2, len(high_risk_scores) * 0.05)  # Up to 0.2 boost
-            recalculated_similarity_risk_score = min(1.0, high_risk_factor + high_risk_boost)
-            
-        elif low_risk_scores and not medium_risk_scores:
-            # Only low risk matches - likely safe
-            avg_similarity = sum(s["similarity"] for s in low_risk_scores) / len(low_risk_scores)
-            recalculated_similarity_risk_score = max(0.05, 1.0 - (avg_similarity ** 1.5))
-            
-        else:
-            # Mixed risk or medium risk - use weighted calculation across all scores
-            all_scores = high_risk_scores + medium_risk_scores + low_risk_scores
-            
-            if all_scores:
-                # Calculate weighted average of all risk scores
-                total_weight = 0
-                weighted_sum = 0
-                
-                for score in all_scores:
-                    # Balance between similarity and risk factors
-                    weight = score["similarity"] * (1 + 0.2 * score["flags"])
-                    weighted_sum += score["risk_score"] * weight
-                    total_weight += weight
-                    
-                # Normalize to get final score
-                if total_weight > 0:
-                    recalculated_similarity_risk_score = weighted_sum / total_weight
-                else:
-                    recalculated_similarity_risk_score = 0.5
-            else:
-                # Fallback if no categorized scores
-                recalculated_similarity_risk_score = 0.5
-        
-        # Ensure score is in bounds
-        recalculated_similarity_risk_score = max(0.0, min(1.0, recalculated_similarity_risk_score))
-        logger.info(f"Recalculated similarity risk score (top 5 only): {recalculated_similarity_risk_score:.3f} (original: {similarity_risk_score:.3f})")
-        
-        # Log detailed weight information for debugging
-        logger.info(f"Position weights applied to top 5: " + 
-                   ", ".join([f"{i+1}: {1.0 - (i * 0.1):.1f}" for i in range(min(5, len(display_transactions)))]))
-        
-        # Log transaction risk score contributions
-        contribution_log = "Transaction risk contributions:\n"
-        for risk_type, scores in [("High risk", high_risk_scores), ("Medium risk", medium_risk_scores), ("Low risk", low_risk_scores)]:
-            if scores:
-                contribution_log += f"{risk_type} transactions ({len(scores)}):\n"
-                for score in scores:
-                    contribution_log += (f"  Pos {score['position']}: raw_sim={score['raw_similarity']:.2f}, " +
-                                       f"pos_weight={score['position_weight']:.1f}, " +
-                                       f"amount_sim={score['amount_similarity']:.1f}, " +
-                                       f"final_sim={score['similarity']:.2f}, " +
-                                       f"risk={score['risk_score']:.2f}, " +
-                                       f"flags={score['flags']}\n")
-        logger.info(contribution_log)
+        recalculated_similarity_risk_score = ranking["similarity_risk_score"]
+        logger.info(f"Recalculated similarity risk score (top 5 only, {ranking['scheme']} weighting): " +
+                   f"{recalculated_similarity_risk_score:.3f} (original: {similarity_risk_score:.3f})")
+        logger.debug("Transaction risk contributions: " + "; ".join(
+            f"pos {e['position']} {e['level']}: raw_sim={e['raw_similarity']:.2f}, " +
+            f"pos_weight={e['position_weight']:.1f}, amount_sim={e['amount_similarity']:.1f}, " +
+            f"final_sim={e['similarity']:.2f}, risk={e['risk_score']:.2f}, flags={e['flags']}"
+            for e in ranking["entries"]))
     
     # Return the risk assessment with similar transactions
     return {
@@ -286,9 +129,19 @@ async def evaluate_transaction(
         "similar_transactions": display_transactions,
         "similar_transactions_count": len(similar_transactions),  # Include total count for context
         "similarity_risk_score": recalculated_similarity_risk_score,
-        "vector_search_calculation": calculation_breakdown  # Include calculation breakdown for transparency
+        "vector_search_calculation": calculation_breakdown,  # Include calculation breakdown for transparency
+        "evaluation": evaluation["tier"]  # Tier reached and time saved by an early exit
     }
 
+@router.get("/evaluate/metrics", response_description="Tiered evaluation counters")
+async def get_evaluation_metrics(
+    fraud_service: FraudDetectionService = Depends(get_fraud_detection_service)
+):
+    """
+    Early exits, similarity escalations and estimated time saved by tiered evaluation.
+    """
+    return fraud_service.tier_metrics()
+
 @router.get("/", response_description="List transactions", response_model=List[TransactionResponse])
 async def list_transactions(
     db: MongoDBAccess = Depends(get_db), 
@@ -415,4 +268,10 @@ async def get_transactions_by_flag(
         "timestamp": {"$gte": start_date}
     }).sort("timestamp", -1).skip(skip).limit(limit))
     
-    return transactions
\ No newline at end of file
+    return transactions
+@router.get("/embedding/metrics", response_description="Embed-on-write pipeline counters")
+async def get_embedding_metrics():
+    """
+    Background transaction embedding lag (insert to vector written) and throughput.
+    """
+    return get_transaction_embedder().metrics()
@@ -3,11 +3,14 @@ import os
 from typing import Dict, List, Any, Tuple, Optional
 from datetime import datetime, timedelta
 import math
+import random
+import time
 from pymongo import MongoClient
 from bson import ObjectId
 
 from db.mongo_db import MongoDBAccess
-from bedrock.embeddings import get_embedding
+from bedrock.embeddings import get_batch_embeddings, get_embedding
+from services.pattern_index import get_pattern_index
 
 # Set up logging
 logger = logging.getLogger(__name__)
@@ -19,6 +22,12 @@ VELOCITY_TIME_WINDOW_MINUTES = int(os.getenv("VELOCITY_TIME_WINDOW_MINUTES", 60)
 VELOCITY_THRESHOLD = int(os.getenv("VELOCITY_THRESHOLD", 5))  # Number of transactions in window that's suspicious
 SIMILARITY_THRESHOLD = float(os.getenv("SIMILARITY_THRESHOLD", 0.75))  # Threshold for vector similarity matching
 
+# Tiered evaluation: rule checks first, vector similarity only when the rule outcome is uncertain
+EVALUATION_MODE = os.getenv("EVALUATION_MODE", "full")  # "full" (always run similarity) or "tiered"
+TIERED_UNCERTAIN_MIN_SCORE = float(os.getenv("TIERED_UNCERTAIN_MIN_SCORE", 25.0))  # Rule scores below this exit early
+TIERED_UNCERTAIN_MAX_SCORE = float(os.getenv("TIERED_UNCERTAIN_MAX_SCORE", 100.0))  # Rule scores above this exit early
+TIERED_SAMPLE_RATE = float(os.getenv("TIERED_SAMPLE_RATE", 0.05))  # Share of early exits still sent to similarity
+
 # Risk score weights
 WEIGHT_AMOUNT = float(os.getenv("WEIGHT_AMOUNT", 0.25))
 WEIGHT_LOCATION = float(os.getenv("WEIGHT_LOCATION", 0.25))
@@ -45,6 +54,8 @@ class FraudDetectionService:
         self.customer_collection = "customers"  # Updated to match the correct collection name
         self.transaction_collection = "transactions"
         self.fraud_pattern_collection = "fraud_patterns"
+        self.tier_stats = {"evaluations": 0, "tier_1_exits": 0, "tier_2": 0, "sampled": 0,
+                           "similarity_ms_total": 0.0, "estimated_time_saved_ms": 0.0}
         
         logger.info(f"Initialized FraudDetectionService with database: {self.db_name}")
     
@@ -232,6 +243,123 @@ class FraudDetectionService:
         logger.info(f"Transaction evaluated with risk score: {risk_score:.2f}, level: {risk_level}")
         return risk_assessment
     
+    async def evaluate_transaction_tiered(self, transaction: Dict[str, Any], mode: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Evaluate a transaction with rule checks first and vector similarity as a second tier.
+        
+        In "full" mode the similarity tier always runs. In "tiered" mode it runs only when
+        the rule score lands in the uncertain band, the rules raised any flag, or the
+        sample rate picks the transaction; otherwise the evaluation exits after tier 1.
+        
+        Args:
+            transaction: Transaction data to evaluate
+            mode: "full" or "tiered" (defaults to EVALUATION_MODE)
+            
+        Returns:
+            Dict with risk_assessment, similar_transactions, similarity_risk_score,
+            calculation_breakdown and the tier reached ("tier")
+        """
+        mode = mode or EVALUATION_MODE
+        
+        started = time.perf_counter()
+        risk_assessment = await self.evaluate_transaction(transaction)
+        rule_ms = (time.perf_counter() - started) * 1000
+        
+        reason = "full_mode" if mode != "tiered" else self._similarity_escalation_reason(risk_assessment)
+        self.tier_stats["evaluations"] += 1
+        
+        if reason is None:
+            # Early exit: rules are confident, skip the embedding call and $vectorSearch
+            saved_ms = self._average_similarity_ms()
+            self.tier_stats["tier_1_exits"] += 1
+            self.tier_stats["estimated_time_saved_ms"] += saved_ms or 0.0
+            return {
+                "risk_assessment": risk_assessment,
+                "similar_transactions": [],
+                "similarity_risk_score": None,
+                "calculation_breakdown": {
+                    "method": "Skipped (tiered evaluation)",
+                    "steps": [
+                        f"Rule score {risk_assessment.get('score')} is outside the uncertain band "
+                        f"[{TIERED_UNCERTAIN_MIN_SCORE}, {TIERED_UNCERTAIN_MAX_SCORE}) with no risk flags",
+                        "Vector similarity search was not run"
+                    ],
+                    "high_risk_matches": 0,
+                    "medium_risk_matches": 0,
+                    "low_risk_matches": 0,
+                    "total_matches": 0,
+                    "components": {}
+                },
+                "tier": {
+                    "mode": mode,
+                    "tier_reached": 1,
+                    "escalation_reason": None,
+                    "rule_ms": round(rule_ms, 2),
+                    "similarity_ms": None,
+                    "estimated_time_saved_ms": round(saved_ms, 2) if saved_ms is not None else None
+                }
+            }
+        
+        started = time.perf_counter()
+        similar_transactions, similarity_risk_score, calculation_breakdown = await self.find_similar_transactions(transaction)
+        similarity_ms = (time.perf_counter() - started) * 1000
+        self.tier_stats["tier_2"] += 1
+        self.tier_stats["similarity_ms_total"] += similarity_ms
+        if reason == "sampled":
+            self.tier_stats["sampled"] += 1
+        
+        return {
+            "risk_assessment": risk_assessment,
+            "similar_transactions": similar_transactions,
+            "similarity_risk_score": similarity_risk_score,
+            "calculation_breakdown": calculation_breakdown,
+            "tier": {
+                "mode": mode,
+                "tier_reached": 2,
+                "escalation_reason": reason,
+                "rule_ms": round(rule_ms, 2),
+                "similarity_ms": round(similarity_ms, 2),
+                "estimated_time_saved_ms": 0.0
+            }
+        }
+    
+    def _similarity_escalation_reason(self, risk_assessment: Dict[str, Any]) -> Optional[str]:
+        """
+        Decide whether a tiered evaluation needs the vector similarity tier.
+        
+        Returns:
+            The escalation reason, or None to exit after the rule checks
+        """
+        score = risk_assessment.get("score", 50.0)
+        if TIERED_UNCERTAIN_MIN_SCORE <= score < TIERED_UNCERTAIN_MAX_SCORE:
+            return "uncertain_band"
+        if risk_assessment.get("flags"):
+            return "rule_flags"
+        if random.random() < TIERED_SAMPLE_RATE:
+            return "sampled"
+        return None
+    
+    def _average_similarity_ms(self) -> Optional[float]:
+        """Average latency of the similarity tier so far (None until it has run once)"""
+        if not self.tier_stats["tier_2"]:
+            return None
+        return self.tier_stats["similarity_ms_total"] / self.tier_stats["tier_2"]
+    
+    def tier_metrics(self) -> Dict[str, Any]:
+        """Counters for tiered evaluation (early exits, escalations, estimated time saved)"""
+        evaluations = self.tier_stats["evaluations"]
+        average_similarity_ms = self._average_similarity_ms()
+        return {
+            **self.tier_stats,
+            "similarity_ms_total": round(self.tier_stats["similarity_ms_total"], 2),
+            "estimated_time_saved_ms": round(self.tier_stats["estimated_time_saved_ms"], 2),
+            "mode": EVALUATION_MODE,
+            "uncertain_band": [TIERED_UNCERTAIN_MIN_SCORE, TIERED_UNCERTAIN_MAX_SCORE],
+            "sample_rate": TIERED_SAMPLE_RATE,
+            "early_exit_rate": round(self.tier_stats["tier_1_exits"] / evaluations, 4) if evaluations else None,
+            "average_similarity_ms": round(average_similarity_ms, 2) if average_similarity_ms is not None else None
+        }
+    
     def _check_amount_anomaly(self, transaction: Dict[str, Any], customer: Dict[str, Any]) -> Tuple[bool, float]:
         """
         Check if transaction amount is anomalous compared to customer's history.
@@ -466,48 +594,18 @@ class FraudDetectionService:
             # Generate embedding for transaction
             transaction_embedding = await get_embedding(description)
             
-            # Query fraud patterns collection for vector similarity
-            # Check if vector search index exists
-            collection = self.db_client.get_collection(
-                db_name=self.db_name,
-                collection_name=self.fraud_pattern_collection
-            )
+            # Score against the in-process pattern embedding matrix
+            matches = get_pattern_index().search([transaction_embedding], k=3)[0]
+            matching_patterns = [{**pattern, "score": score} for score, pattern in matches]
+            has_vector_index = bool(matching_patterns)
             
-            # Check if vector search is available
-            has_vector_index = False
-            for index in collection.index_information().values():
-                if index.get("name", "").startswith("vector_"):
-                    has_vector_index = True
-                    break
-            
-            matching_patterns = []
-            if has_vector_index:
-                # Use vector search
-                pipeline = [
-                    {
-                        "$vectorSearch": {
-                            "index": "vector_index",  # Must match the actual index name
-                            "path": "vector_embedding",
-                            "queryVector": transaction_embedding,
-                            "numCandidates": 10,
-                            "limit": 3
-                        }
-                    },
-                    {
-                        "$project": {
-                            "_id": 1,
-                            "pattern_name": 1,
-                            "description": 1,
-                            "severity": 1,
-                            "indicators": 1,
-                            "score": {"$meta": "vectorSearchScore"}
-                        }
-                    }
-                ]
-                matching_patterns = list(collection.aggregate(pipeline))
-            else:
+            if not has_vector_index:
                 # Fall back to basic query
                 # Find patterns where there's an intersection with the flags
+                collection = self.db_client.get_collection(
+                    db_name=self.db_name,
+                    collection_name=self.fraud_pattern_collection
+                )
                 matching_patterns = list(collection.find({
                     "indicators": {"$in": flags}
                 }).limit(3))
@@ -541,6 +639,29 @@ class FraudDetectionService:
             logger.error(f"Error checking pattern match: {str(e)}")
             return False, 0.0
             
+    async def match_fraud_patterns(self, transactions: List[Dict[str, Any]], k: int = 3) -> List[List[Dict[str, Any]]]:
+        """
+        Most similar fraud patterns for each of several transactions.
+        
+        All transactions are scored against the pattern embedding matrix in one
+        matrix product.
+        
+        Args:
+            transactions: Transactions to match
+            k: Patterns to return per transaction
+            
+        Returns:
+            For each transaction, its top-k patterns (best first) with a ``score``
+        """
+        if not transactions:
+            return []
+        texts = [self._create_transaction_text_representation_for_new(t) for t in transactions]
+        embeddings = await get_batch_embeddings(texts)
+        return [
+            [{**pattern, "score": score} for score, pattern in matches]
+            for matches in get_pattern_index().search(embeddings, k=k)
+        ]
+    
     async def find_similar_transactions(self, transaction: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], float, Dict]:
         """
         Find similar historical transactions using vector search.
@@ -0,0 +1,221 @@
+import asyncio
+import logging
+import os
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from pymongo.errors import OperationFailure
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+PATTERN_COLLECTION = "fraud_patterns"
+PATTERN_INDEX_REFRESH_SECONDS = int(os.getenv("PATTERN_INDEX_REFRESH_SECONDS", 300))  # Reload interval when change streams are unavailable
+_CHANGE_STREAMS_UNSUPPORTED = 40573  # Standalone server (no replica set)
+_MAX_BACKOFF_SECONDS = 30
+
+
+class PatternEmbeddingIndex:
+    """
+    In-process matrix of fraud pattern embeddings.
+
+    Fraud patterns are few and change rarely, so instead of one embedding probe
+    plus one ``$vectorSearch`` per lookup they are held as a row-normalised
+    float32 matrix. Similarity for one or many query vectors is a single matrix
+    product followed by a top-k selection. The matrix is rebuilt whenever the
+    ``fraud_patterns`` collection changes (change stream), or polled on a
+    standalone server.
+
+    Scores use the same scale as Atlas ``vectorSearchScore`` for cosine
+    similarity, ``(1 + cosine) / 2``, so ``SIMILARITY_THRESHOLD`` keeps its meaning.
+    """
+
+    def __init__(self, collection_name: str = PATTERN_COLLECTION):
+        self.collection_name = collection_name
+        self._matrix = np.zeros((0, 0), dtype=np.float32)
+        self._patterns: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"reloads": 0, "searches": 0, "queries": 0, "skipped_patterns": 0, "stream_restarts": 0}
+
+    # ==================== LOADING ====================
+
+    def load(self, db) -> int:
+        """
+        (Re)build the embedding matrix from the collection (sync).
+
+        Args:
+            db: pymongo Database holding the fraud patterns
+
+        Returns:
+            Number of patterns in the index
+        """
+        rows, patterns, skipped = [], [], 0
+        dimensions = None
+        for doc in db[self.collection_name].find({"vector_embedding.0": {"$exists": True}}):
+            embedding = doc.pop("vector_embedding")
+            if dimensions is None:
+                dimensions = len(embedding)
+            if len(embedding) != dimensions:
+                skipped += 1
+                continue
+            if "_id" in doc:
+                doc["_id"] = str(doc["_id"])
+            rows.append(embedding)
+            patterns.append(doc)
+
+        matrix = np.asarray(rows, dtype=np.float32).reshape(len(rows), dimensions or 0)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix = matrix / np.where(norms == 0, 1.0, norms)
+
+        with self._lock:
+            self._matrix, self._patterns = matrix, patterns
+            self._loaded = True
+        self.stats["reloads"] += 1
+        self.stats["skipped_patterns"] = skipped
+        if skipped:
+            logger.warning(f"Pattern index skipped {skipped} patterns with embeddings not of dimension {dimensions}")
+        logger.info(f"Pattern index loaded {len(patterns)} fraud pattern embeddings")
+        return len(patterns)
+
+    def ensure_loaded(self) -> None:
+        """
+        Load on first use when the background follower is not running (scripts, workers).
+
+        With the follower started, loading happens off the event loop in its task;
+        until the first load succeeds searches return no matches instead of
+        blocking the loop on a synchronous load.
+        """
+        if not self._loaded and self._task is None:
+            from dependencies import DB_NAME, get_mongo_client
+            self.load(get_mongo_client()[DB_NAME])
+
+    def __len__(self) -> int:
+        return len(self._patterns)
+
+    # ==================== SEARCH ====================
+
+    def search(self, query_vectors: Sequence[Sequence[float]], k: int = 5) -> List[List[Tuple[float, Dict[str, Any]]]]:
+        """
+        Top-k most similar patterns for each query vector.
+
+        Args:
+            query_vectors: One or more embeddings (same model/dimension as the patterns)
+            k: Patterns to return per query
+
+        Returns:
+            For each query, a list of (score, pattern) pairs, best first
+        """
+        self.ensure_loaded()
+        with self._lock:
+            matrix, patterns = self._matrix, self._patterns
+        queries = np.asarray(query_vectors, dtype=np.float32)
+        if queries.ndim == 1:
+            queries = queries[None, :]
+        self.stats["searches"] += 1
+        self.stats["queries"] += len(queries)
+        if not patterns or k <= 0:
+            return [[] for _ in range(len(queries))]
+        if queries.shape[1] != matrix.shape[1]:
+            raise ValueError(f"Query embedding dimension {queries.shape[1]} does not match "
+                             f"pattern embedding dimension {matrix.shape[1]}")
+
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        cosine = (queries / np.where(norms == 0, 1.0, norms)) @ matrix.T  # (queries, patterns)
+        scores = (1.0 + cosine) / 2.0
+
+        k = min(k, len(patterns))
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        top, top_scores = np.take_along_axis(top, order, axis=1), np.take_along_axis(top_scores, order, axis=1)
+
+        return [
+            [(float(score), patterns[index]) for index, score in zip(row_indices, row_scores)]
+            for row_indices, row_scores in zip(top.tolist(), top_scores.tolist())
+        ]
+
+    # ==================== CHANGE STREAM ====================
+
+    def start(self, db, sync_db) -> None:
+        """
+        Load the index and follow the collection (call from the event loop).
+
+        Args:
+            db: motor database used for the change stream
+            sync_db: pymongo database used for (re)loads
+        """
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._follow(db, sync_db))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _follow(self, db, sync_db) -> None:
+        backoff = 1
+        await self._safe_load(sync_db)
+        while True:
+            try:
+                async with db[self.collection_name].watch() as stream:
+                    backoff = 1
+                    async for change in stream:
+                        # Patterns are few: rebuild the whole matrix rather than patching rows
+                        logger.info(f"Fraud pattern {change.get('operationType')}; reloading pattern index")
+                        await self._safe_load(sync_db)
+            except asyncio.CancelledError:
+                raise
+            except OperationFailure as e:
+                if e.code == _CHANGE_STREAMS_UNSUPPORTED:
+                    logger.warning(f"Change streams unavailable; pattern index reloads every {PATTERN_INDEX_REFRESH_SECONDS}s")
+                    await self._poll(sync_db)
+                    return
+                backoff = await self._restart_after(sync_db, e, backoff)
+            except Exception as e:
+                backoff = await self._restart_after(sync_db, e, backoff)
+
+    async def _poll(self, sync_db) -> None:
+        if PATTERN_INDEX_REFRESH_SECONDS <= 0:
+            return
+        while True:
+            await asyncio.sleep(PATTERN_INDEX_REFRESH_SECONDS)
+            await self._safe_load(sync_db)
+
+    async def _restart_after(self, sync_db, error: Exception, backoff: int) -> int:
+        self.stats["stream_restarts"] += 1
+        logger.warning(f"Pattern index change stream interrupted ({error}); reloading in {backoff}s")
+        await asyncio.sleep(backoff)
+        # Changes may have been missed while the cursor was down
+        await self._safe_load(sync_db)
+        return min(backoff * 2, _MAX_BACKOFF_SECONDS)
+
+    async def _safe_load(self, sync_db) -> None:
+        try:
+            await asyncio.to_thread(self.load, sync_db)
+        except Exception as e:
+            logger.error(f"Pattern index load failed: {str(e)}")
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "loaded": self._loaded,
+            "patterns": len(self._patterns),
+            "dimensions": int(self._matrix.shape[1]) if self._patterns else None,
+            "following": self._task is not None and not self._task.done(),
+        }
+
+
+# Singleton instance shared by routes and the fraud detection service
+_pattern_index: Optional[PatternEmbeddingIndex] = None
+
+
+def get_pattern_index() -> PatternEmbeddingIndex:
+    """Get or create the process-wide pattern embedding index."""
+    global _pattern_index
+    if _pattern_index is None:
+        _pattern_index = PatternEmbeddingIndex()
+    return _pattern_index
@@ -0,0 +1,232 @@
+import logging
+import os
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+LEVEL_CODES = {"low": 0, "medium": 1, "high": 2}
+LEVEL_NAMES = ("low", "medium", "high")
+_UNKNOWN_LEVEL = 3
+_EXCLUDED = 3  # Display priority of candidates that are never displayed (unknown level, padding)
+
+# Display order of level codes (low, medium, high) for unusual and normal transactions
+_UNUSUAL_ORDER = np.array([2, 1, 0, _EXCLUDED], dtype=np.int64)  # high, medium, low first
+_NORMAL_ORDER = np.array([0, 1, 2, _EXCLUDED], dtype=np.int64)  # low, medium, high first
+
+
+class WeightingScheme:
+    """
+    Weights used to re-score displayed similar transactions.
+
+    Args:
+        name: Scheme name (reported in results)
+        position_decay: Weight lost per display position after ``full_weight_positions``
+        full_weight_positions: Leading positions that keep a weight of 1.0
+        min_position_weight: Floor for the position weight
+        similarity_mix: Share of the position-weighted vector score in the final similarity
+        amount_buckets: (amount ratio above, amount similarity) pairs, checked in order
+        amount_floor: Amount similarity when no bucket matches
+        high_flag_weight: Extra weight per flag for high-risk matches
+        mixed_flag_weight: Extra weight per flag in the mixed-risk average
+        high_boost_per_match: Score premium per high-risk match
+        high_boost_cap: Maximum high-risk premium
+        low_floor: Minimum score when only low-risk transactions match
+        low_exponent: Curve applied to the average similarity of low-risk matches
+    """
+
+    def __init__(self, name: str, position_decay: float = 0.1, full_weight_positions: int = 0,
+                 min_position_weight: float = 0.0, similarity_mix: float = 0.7,
+                 amount_buckets: Sequence = ((0.95, 1.0), (0.8, 0.8), (0.5, 0.6)), amount_floor: float = 0.4,
+                 high_flag_weight: float = 0.1, mixed_flag_weight: float = 0.2,
+                 high_boost_per_match: float = 0.05, high_boost_cap: float = 0.2,
+                 low_floor: float = 0.05, low_exponent: float = 1.5):
+        self.name = name
+        self.position_decay = position_decay
+        self.full_weight_positions = full_weight_positions
+        self.min_position_weight = min_position_weight
+        self.similarity_mix = similarity_mix
+        self.amount_buckets = tuple(amount_buckets)
+        self.amount_floor = amount_floor
+        self.high_flag_weight = high_flag_weight
+        self.mixed_flag_weight = mixed_flag_weight
+        self.high_boost_per_match = high_boost_per_match
+        self.high_boost_cap = high_boost_cap
+        self.low_floor = low_floor
+        self.low_exponent = low_exponent
+
+    def position_weights(self, n: int) -> np.ndarray:
+        """Weight for each of the first ``n`` display positions"""
+        decayed = np.maximum(np.arange(n) - self.full_weight_positions, 0) * self.position_decay
+        return np.maximum(self.min_position_weight, 1.0 - decayed)
+
+    def amount_similarity(self, ratio: np.ndarray) -> np.ndarray:
+        """Bucketed amount similarity for min/max amount ratios (NaN = amounts not comparable)"""
+        conditions = [np.isnan(ratio)] + [ratio > threshold for threshold, _ in self.amount_buckets]
+        choices = [1.0] + [value for _, value in self.amount_buckets]
+        return np.select(conditions, choices, default=self.amount_floor)
+
+
+# Named schemes selectable by SIMILARITY_RANKING_SCHEME
+WEIGHTING_SCHEMES = {
+    # Top-5 display weighting used by /transactions/evaluate: 1.0, 0.9, 0.8, 0.7, 0.6
+    "linear": WeightingScheme("linear"),
+    # Candidate weighting used for the full vector search result: first 5 at 1.0, then -0.05 down to 0.5
+    "plateau": WeightingScheme("plateau", position_decay=0.05, full_weight_positions=5, min_position_weight=0.5),
+}
+SIMILARITY_RANKING_SCHEME = os.getenv("SIMILARITY_RANKING_SCHEME", "linear")
+
+
+class SimilarityRanker:
+    """
+    Smart filter and re-score step for vector search candidates.
+
+    Candidates are turned into arrays (vector score, amount, risk level code,
+    risk score, flags count) once, then reordered by risk level (high risk first
+    for unusual transactions, low risk first otherwise), cut to the display
+    limit and re-scored in a single vectorised pass. ``rank_batch`` pads many
+    candidate lists into one (queries x candidates) matrix, so batch scoring
+    paths share the same arithmetic as the single-transaction route.
+    """
+
+    def __init__(self, scheme: Optional[WeightingScheme] = None, display_limit: int = 5):
+        if scheme is None:
+            scheme = WEIGHTING_SCHEMES.get(SIMILARITY_RANKING_SCHEME)
+            if scheme is None:
+                logger.warning(f"Unknown similarity ranking scheme '{SIMILARITY_RANKING_SCHEME}', using 'linear'")
+                scheme = WEIGHTING_SCHEMES["linear"]
+        self.scheme = scheme
+        self.display_limit = display_limit
+
+    def rank(self, candidates: List[Dict[str, Any]], amount: float, is_unusual: bool) -> Dict[str, Any]:
+        """
+        Reorder, cut and re-score the similar transactions of one transaction.
+
+        Args:
+            candidates: Vector search results (with "score", "amount", "risk_assessment")
+            amount: Amount of the transaction being evaluated
+            is_unusual: Whether the rule checks found the transaction unusual
+
+        Returns:
+            Dict with "display" (reordered candidates), "similarity_risk_score"
+            (None when nothing is displayed), "level_counts" and "entries"
+            (per displayed candidate re-scoring details)
+        """
+        return self.rank_batch([candidates], [amount], [is_unusual])[0]
+
+    def rank_batch(self, candidate_lists: Sequence[List[Dict[str, Any]]], amounts: Sequence[float],
+                   unusual: Sequence[bool]) -> List[Dict[str, Any]]:
+        """
+        Rank the similar transactions of many transactions in one pass.
+
+        Args:
+            candidate_lists: Vector search results per transaction
+            amounts: Amount of each transaction being evaluated
+            unusual: Rule outcome (unusual or not) per transaction
+
+        Returns:
+            One ranking result per transaction (see ``rank``)
+        """
+        queries = len(candidate_lists)
+        width = max((len(candidates) for candidates in candidate_lists), default=0)
+        if queries == 0:
+            return []
+
+        score = np.full((queries, width), 0.5)
+        candidate_amount = np.zeros((queries, width))
+        level = np.full((queries, width), _UNKNOWN_LEVEL, dtype=np.int64)
+        risk = np.full((queries, width), 0.5)
+        flags = np.zeros((queries, width))
+        for q, candidates in enumerate(candidate_lists):
+            for i, candidate in enumerate(candidates):
+                assessment = candidate.get("risk_assessment", {})
+                score[q, i] = candidate.get("score", 0.5)
+                candidate_amount[q, i] = candidate.get("amount", 0) or 0
+                level[q, i] = LEVEL_CODES.get(assessment.get("level"), _UNKNOWN_LEVEL)
+                risk[q, i] = assessment.get("score", 50) / 100.0
+                flags[q, i] = len(assessment.get("flags", []))
+
+        # Stable reorder by level priority; unknown levels and padding sort last and are dropped
+        order_table = np.where(np.asarray(unusual, dtype=bool)[:, None], _UNUSUAL_ORDER, _NORMAL_ORDER)
+        priority = np.take_along_axis(order_table, level, axis=1)
+        keys = priority * width + np.arange(width)
+        limit = min(self.display_limit, width)
+        order = np.argsort(keys, axis=1, kind="stable")[:, :limit]
+        shown = np.take_along_axis(priority, order, axis=1) != _EXCLUDED
+
+        score, candidate_amount, level, risk, flags = (
+            np.take_along_axis(values, order, axis=1)
+            for values in (score, candidate_amount, level, risk, flags)
+        )
+
+        # Position and amount weighted similarity
+        position_weight = self.scheme.position_weights(limit)[None, :]
+        weighted = score * position_weight
+        current_amount = np.asarray(amounts, dtype=float)[:, None]
+        comparable = (candidate_amount > 0) & (current_amount > 0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ratio = np.where(comparable, np.minimum(current_amount, candidate_amount)
+                             / np.maximum(current_amount, candidate_amount), np.nan)
+        amount_similarity = self.scheme.amount_similarity(ratio)
+        similarity = weighted * self.scheme.similarity_mix + amount_similarity * (1.0 - self.scheme.similarity_mix)
+
+        # Risk score per transaction from the displayed matches
+        high = shown & (level == 2)
+        low = shown & (level == 0)
+        n_high, n_low, n_shown = high.sum(axis=1), low.sum(axis=1), shown.sum(axis=1)
+
+        high_weight = np.where(high, similarity * (1 + flags * self.scheme.high_flag_weight), 0.0)
+        high_factor = np.minimum(1.0, (risk * high_weight).sum(axis=1) / np.maximum(1, high_weight.sum(axis=1)))
+        high_score = np.minimum(1.0, high_factor + np.minimum(self.scheme.high_boost_cap,
+                                                              n_high * self.scheme.high_boost_per_match))
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            low_average = np.where(low, similarity, 0.0).sum(axis=1) / n_low
+            low_score = np.maximum(self.scheme.low_floor, 1.0 - low_average ** self.scheme.low_exponent)
+
+            mixed_weight = np.where(shown, similarity * (1 + flags * self.scheme.mixed_flag_weight), 0.0)
+            mixed_total = mixed_weight.sum(axis=1)
+            mixed_score = np.where(mixed_total > 0, (risk * mixed_weight).sum(axis=1) / mixed_total, 0.5)
+
+        risk_score = np.select([n_high > 0, n_low == n_shown], [high_score, low_score], default=mixed_score)
+        risk_score = np.clip(risk_score, 0.0, 1.0)
+
+        results = []
+        for q, candidates in enumerate(candidate_lists):
+            count = int(n_shown[q])
+            row = order[q, :count].tolist()
+            displayed_levels = level[q, :count].tolist()
+            results.append({
+                "display": [candidates[i] for i in row],
+                "similarity_risk_score": float(risk_score[q]) if count else None,
+                "level_counts": {name: displayed_levels.count(code) for code, name in enumerate(LEVEL_NAMES)},
+                "scheme": self.scheme.name,
+                "entries": [
+                    {
+                        "position": p + 1,
+                        "level": LEVEL_NAMES[displayed_levels[p]],
+                        "raw_similarity": float(score[q, p]),
+                        "position_weight": float(position_weight[0, p]),
+                        "amount_similarity": float(amount_similarity[q, p]),
+                        "similarity": float(similarity[q, p]),
+                        "risk_score": float(risk[q, p]),
+                        "flags": int(flags[q, p]),
+                    }
+                    for p in range(count)
+                ],
+            })
+        return results
+
+
+# Singleton instance for the default scheme
+_similarity_ranker: Optional[SimilarityRanker] = None
+
+
+def get_similarity_ranker() -> SimilarityRanker:
+    """Get or create the ranker for SIMILARITY_RANKING_SCHEME."""
+    global _similarity_ranker
+    if _similarity_ranker is None:
+        _similarity_ranker = SimilarityRanker()
+    return _similarity_ranker
@@ -0,0 +1,254 @@
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from pymongo import UpdateOne
+from pymongo.errors import OperationFailure
+
+from bedrock.embeddings import get_embedding_model
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+TRANSACTION_COLLECTION = "transactions"
+EMBED_BATCH_SIZE = int(os.getenv("TRANSACTION_EMBED_BATCH_SIZE", 16))  # Vectors written per bulk_write
+EMBED_BATCH_WAIT_MS = int(os.getenv("TRANSACTION_EMBED_BATCH_WAIT_MS", 200))  # Max wait to fill a batch
+EMBED_WORKERS = int(os.getenv("TRANSACTION_EMBED_WORKERS", 2))  # Batches in flight
+EMBED_CONCURRENCY = int(os.getenv("TRANSACTION_EMBED_CONCURRENCY", 4))  # Embedding calls in flight
+EMBED_QUEUE_SIZE = int(os.getenv("TRANSACTION_EMBED_QUEUE_SIZE", 1000))
+EMBED_SWEEP_SECONDS = int(os.getenv("TRANSACTION_EMBED_SWEEP_SECONDS", 300))  # Catch-up for missed inserts
+EMBED_SWEEP_LIMIT = int(os.getenv("TRANSACTION_EMBED_SWEEP_LIMIT", 500))
+_CHANGE_STREAMS_UNSUPPORTED = 40573  # Standalone server (no replica set)
+_MAX_BACKOFF_SECONDS = 30
+_STATS_WINDOW_SECONDS = 60
+
+
+class TransactionEmbeddingPipeline:
+    """
+    Background embed-on-write stage for stored transactions.
+
+    New transactions reach the queue from a change stream on ``transactions``
+    (or, without change streams, from a non-blocking ``submit`` hand-off after
+    the insert). Workers take micro-batches off the queue, embed them with a
+    bounded number of concurrent Bedrock calls (off the event loop) and write
+    ``vector_embedding`` back with one unordered ``bulk_write`` per batch, so
+    new transactions become visible to ``transaction_vector_index``.
+
+    A periodic sweep re-queues transactions still missing an embedding
+    (missed while the stream was down, dropped on a full queue, failed calls).
+    """
+
+    def __init__(self, collection_name: str = TRANSACTION_COLLECTION):
+        self.collection_name = collection_name
+        self.mode = "stopped"
+        self._queue: Optional[asyncio.Queue] = None
+        self._pending = set()
+        self._tasks: List[asyncio.Task] = []
+        self._lags_ms = deque(maxlen=1000)
+        self._writes = deque()  # (monotonic time, vectors written) within the stats window
+        self.stats = {"queued": 0, "embedded": 0, "failed": 0, "dropped": 0, "batches": 0,
+                      "swept": 0, "stream_restarts": 0, "last_write_at": None}
+
+    # ==================== LIFECYCLE ====================
+
+    def start(self, db) -> None:
+        """
+        Start following inserts and the embedding workers (call from the event loop).
+
+        Args:
+            db: motor database holding the transactions
+        """
+        if self._tasks:
+            return
+        from dependencies import get_fraud_detection_service
+        self._text_for = get_fraud_detection_service()._create_transaction_text_representation
+        self._collection = db[self.collection_name]
+        self._queue = asyncio.Queue(maxsize=EMBED_QUEUE_SIZE)
+        self._embed_slots = asyncio.Semaphore(EMBED_CONCURRENCY)
+        self._tasks = [asyncio.create_task(self._follow()), asyncio.create_task(self._sweep_loop())]
+        self._tasks += [asyncio.create_task(self._work()) for _ in range(EMBED_WORKERS)]
+
+    async def stop(self) -> None:
+        # Whatever is still queued is picked up by the sweep on the next start
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._pending.clear()
+        self.mode = "stopped"
+
+    def submit(self, transaction: Dict[str, Any]) -> bool:
+        """
+        Hand a just-inserted transaction to the pipeline without waiting.
+
+        Ignored while the change stream delivers inserts; a full queue drops the
+        document, leaving it to the next sweep.
+
+        Returns:
+            True if the transaction was queued
+        """
+        if self.mode not in ("poll", "connecting") or self._queue is None:
+            return False
+        return self._enqueue(transaction, inserted_at=time.time())
+
+    def _enqueue(self, transaction: Dict[str, Any], inserted_at: Optional[float]) -> bool:
+        if transaction.get("_id") is None or transaction.get("vector_embedding") \
+                or transaction["_id"] in self._pending:
+            return False
+        try:
+            self._queue.put_nowait((transaction, inserted_at))
+        except asyncio.QueueFull:
+            self.stats["dropped"] += 1
+            return False
+        self._pending.add(transaction["_id"])
+        self.stats["queued"] += 1
+        return True
+
+    # ==================== INSERT FEED ====================
+
+    async def _follow(self) -> None:
+        pipeline = [{"$match": {"operationType": "insert",
+                                "fullDocument.vector_embedding": {"$exists": False}}}]
+        backoff = 1
+        self.mode = "connecting"
+        while True:
+            try:
+                async with self._collection.watch(pipeline) as stream:
+                    self.mode = "change_stream"
+                    backoff = 1
+                    async for change in stream:
+                        cluster_time = change.get("clusterTime")
+                        self._enqueue(change["fullDocument"], cluster_time.time if cluster_time else time.time())
+            except asyncio.CancelledError:
+                raise
+            except OperationFailure as e:
+                if e.code == _CHANGE_STREAMS_UNSUPPORTED:
+                    logger.warning("Change streams unavailable; transaction embeddings use insert hand-off and sweeps")
+                    self.mode = "poll"
+                    return
+                backoff = await self._restart_after(e, backoff)
+            except Exception as e:
+                backoff = await self._restart_after(e, backoff)
+
+    async def _restart_after(self, error: Exception, backoff: int) -> int:
+        self.mode = "connecting"
+        self.stats["stream_restarts"] += 1
+        logger.warning(f"Transaction embedding change stream interrupted ({error}); restarting in {backoff}s")
+        await asyncio.sleep(backoff)
+        # Inserts may have been missed while the cursor was down
+        await self._sweep()
+        return min(backoff * 2, _MAX_BACKOFF_SECONDS)
+
+    async def _sweep_loop(self) -> None:
+        while True:
+            await self._sweep()
+            if EMBED_SWEEP_SECONDS <= 0:
+                return
+            await asyncio.sleep(EMBED_SWEEP_SECONDS)
+
+    async def _sweep(self) -> None:
+        try:
+            cursor = self._collection.find({"vector_embedding": {"$exists": False}}) \
+                .sort("_id", -1).limit(EMBED_SWEEP_LIMIT)
+            async for transaction in cursor:
+                if self._queue.full():
+                    break
+                # Backfilled documents have no meaningful insert time, so no lag sample
+                if self._enqueue(transaction, inserted_at=None):
+                    self.stats["swept"] += 1
+        except Exception as e:
+            logger.error(f"Transaction embedding sweep failed: {str(e)}")
+
+    # ==================== EMBEDDING ====================
+
+    async def _work(self) -> None:
+        while True:
+            batch = [await self._queue.get()]
+            deadline = time.monotonic() + EMBED_BATCH_WAIT_MS / 1000
+            while len(batch) < EMBED_BATCH_SIZE:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                await self._embed_batch(batch)
+            except Exception as e:
+                self.stats["failed"] += len(batch)
+                logger.error(f"Transaction embedding batch of {len(batch)} failed: {str(e)}")
+            finally:
+                for transaction, _ in batch:
+                    self._pending.discard(transaction["_id"])
+
+    async def _embed_one(self, model, text: str) -> Optional[List[float]]:
+        async with self._embed_slots:
+            try:
+                return await asyncio.to_thread(model.predict, text)
+            except Exception as e:
+                logger.error(f"Error generating transaction embedding: {str(e)}")
+                return None
+
+    async def _embed_batch(self, batch) -> None:
+        model = get_embedding_model()
+        embeddings = await asyncio.gather(*(self._embed_one(model, self._text_for(transaction))
+                                            for transaction, _ in batch))
+
+        operations, embedded = [], []
+        for (transaction, inserted_at), embedding in zip(batch, embeddings):
+            if not embedding:
+                self.stats["failed"] += 1
+                continue
+            operations.append(UpdateOne(
+                {"_id": transaction["_id"], "vector_embedding": {"$exists": False}},
+                {"$set": {"vector_embedding": embedding}}
+            ))
+            embedded.append(inserted_at)
+        if not operations:
+            return
+
+        await self._collection.bulk_write(operations, ordered=False)
+        now = time.time()
+        self._lags_ms.extend((now - inserted_at) * 1000 for inserted_at in embedded if inserted_at is not None)
+        self._writes.append((time.monotonic(), len(operations)))
+        self.stats["embedded"] += len(operations)
+        self.stats["batches"] += 1
+        self.stats["last_write_at"] = datetime.now(timezone.utc).isoformat()
+
+    # ==================== METRICS ====================
+
+    def metrics(self) -> Dict[str, Any]:
+        cutoff = time.monotonic() - _STATS_WINDOW_SECONDS
+        while self._writes and self._writes[0][0] < cutoff:
+            self._writes.popleft()
+        lags = sorted(self._lags_ms)
+        return {
+            **self.stats,
+            "mode": self.mode,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "in_flight": len(self._pending),
+            "embedded_per_second": round(sum(count for _, count in self._writes) / _STATS_WINDOW_SECONDS, 2),
+            "lag_ms": {
+                "samples": len(lags),
+                "p50": round(lags[len(lags) // 2], 1) if lags else None,
+                "p95": round(lags[min(len(lags) - 1, int(len(lags) * 0.95))], 1) if lags else None,
+                "max": round(lags[-1], 1) if lags else None,
+            },
+        }
+
+
+# Singleton instance started with the application
+_transaction_embedder: Optional[TransactionEmbeddingPipeline] = None
+
+
+def get_transaction_embedder() -> TransactionEmbeddingPipeline:
+    """Get or create the process-wide transaction embedding pipeline."""
+    global _transaction_embedder
+    if _transaction_embedder is None:
+        _transaction_embedder = TransactionEmbeddingPipeline()
+    return _transaction_embedder
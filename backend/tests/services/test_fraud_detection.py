@@ -0,0 +1,68 @@
+import asyncio
+
+import pytest
+
+from services import fraud_detection
+from services.fraud_detection import FraudDetectionService
+
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setattr(fraud_detection, "TIERED_UNCERTAIN_MIN_SCORE", 25.0)
+    monkeypatch.setattr(fraud_detection, "TIERED_UNCERTAIN_MAX_SCORE", 100.0)
+    monkeypatch.setattr(fraud_detection, "TIERED_SAMPLE_RATE", 0.0)
+    service = FraudDetectionService(db_client=None, db_name="test")
+    service.similarity_calls = 0
+
+    async def evaluate_transaction(transaction):
+        return {"score": transaction["rule_score"], "level": "low", "flags": transaction.get("flags", [])}
+
+    async def find_similar_transactions(transaction):
+        service.similarity_calls += 1
+        return [{"score": 0.9}], 0.4, {"method": "vector"}
+
+    service.evaluate_transaction = evaluate_transaction
+    service.find_similar_transactions = find_similar_transactions
+    return service
+
+
+def _evaluate(service, mode="tiered", **transaction):
+    return asyncio.run(service.evaluate_transaction_tiered(transaction, mode=mode))
+
+
+@pytest.mark.parametrize("transaction, reason", [
+    ({"rule_score": 10}, None),
+    ({"rule_score": 25}, "uncertain_band"),
+    ({"rule_score": 99.9}, "uncertain_band"),
+    ({"rule_score": 100}, None),
+    ({"rule_score": 5, "flags": ["unusual_location"]}, "rule_flags"),
+])
+def test_tiered_escalation(service, transaction, reason):
+    result = _evaluate(service, **transaction)
+    assert result["tier"]["escalation_reason"] == reason
+    assert result["tier"]["tier_reached"] == (1 if reason is None else 2)
+    assert service.similarity_calls == (0 if reason is None else 1)
+    if reason is None:
+        assert result["similar_transactions"] == [] and result["similarity_risk_score"] is None
+
+
+def test_full_mode_always_runs_similarity(service):
+    result = _evaluate(service, mode="full", rule_score=10)
+    assert result["tier"]["escalation_reason"] == "full_mode" and result["similarity_risk_score"] == 0.4
+
+
+def test_sampling_escalates_clear_transactions(service, monkeypatch):
+    monkeypatch.setattr(fraud_detection, "TIERED_SAMPLE_RATE", 1.0)
+    assert _evaluate(service, rule_score=10)["tier"]["escalation_reason"] == "sampled"
+    assert service.tier_metrics()["sampled"] == 1
+
+
+def test_early_exits_report_time_saved_from_similarity_latency(service):
+    assert _evaluate(service, rule_score=10)["tier"]["estimated_time_saved_ms"] is None   # nothing measured yet
+    _evaluate(service, rule_score=50)
+    service.tier_stats["similarity_ms_total"] = 120.0
+    assert _evaluate(service, rule_score=10)["tier"]["estimated_time_saved_ms"] == 120.0
+    metrics = service.tier_metrics()
+    assert (metrics["evaluations"], metrics["tier_1_exits"], metrics["tier_2"]) == (3, 2, 1)
+    assert metrics["early_exit_rate"] == pytest.approx(2 / 3, abs=1e-4)
+    assert metrics["estimated_time_saved_ms"] == 120.0
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from services.pattern_index import PatternEmbeddingIndex
+
+
+def _patterns(rng, count=40, dims=16):
+    return [{"pattern_id": f"P{k}", "vector_embedding": rng.normal(size=dims).tolist()} for k in range(count)]
+
+
+def _db(docs):
+    mongomock = pytest.importorskip("mongomock")
+    db = mongomock.MongoClient().db
+    if docs:
+        db.fraud_patterns.insert_many([dict(doc) for doc in docs])
+    return db
+
+
+def _brute_force(docs, query, k):
+    """Atlas-scale cosine score, (1 + cos) / 2, per pattern"""
+    scored = []
+    for doc in docs:
+        v = np.asarray(doc["vector_embedding"])
+        cosine = float(v @ query / (np.linalg.norm(v) * np.linalg.norm(query)))
+        scored.append(((1 + cosine) / 2, doc["pattern_id"]))
+    return sorted(scored, reverse=True)[:k]
+
+
+def test_matrix_search_matches_brute_force_cosine():
+    rng = np.random.default_rng(4)
+    docs = _patterns(rng)
+    index = PatternEmbeddingIndex()
+    assert index.load(_db(docs)) == 40
+    queries = rng.normal(size=(6, 16))
+    for query, hits in zip(queries, index.search(queries, k=5)):
+        expected = _brute_force(docs, query, 5)
+        assert [p["pattern_id"] for _, p in hits] == [pid for _, pid in expected]
+        assert [s for s, _ in hits] == pytest.approx([s for s, _ in expected], abs=1e-5)
+    # A single vector is a batch of one; k larger than the index returns everything
+    assert len(index.search(queries[0].tolist(), k=100)[0]) == 40
+
+
+def test_load_skips_mismatched_dimensions_and_zero_vectors_are_safe():
+    rng = np.random.default_rng(5)
+    docs = _patterns(rng, count=3, dims=4) + [{"pattern_id": "bad", "vector_embedding": [1.0, 2.0]},
+                                              {"pattern_id": "zero", "vector_embedding": [0.0] * 4}]
+    index = PatternEmbeddingIndex()
+    assert index.load(_db(docs)) == 4
+    assert index.metrics()["skipped_patterns"] == 1
+    [hits] = index.search([0.0, 0.0, 0.0, 0.0], k=4)
+    assert all(score == pytest.approx(0.5) for score, _ in hits)
+    with pytest.raises(ValueError):
+        index.search([1.0, 2.0])
+
+
+def test_empty_index_returns_no_matches():
+    index = PatternEmbeddingIndex()
+    index.load(_db([]))
+    assert index.search([[1.0, 0.0], [0.0, 1.0]]) == [[], []]
@@ -0,0 +1,117 @@
+import random
+
+import pytest
+
+from services.similarity_ranker import WEIGHTING_SCHEMES, SimilarityRanker
+
+
+def _inline_route_scoring(similar_transactions, current_amount, is_unusual):
+    """The smart filter and re-score that /transactions/evaluate ran inline before SimilarityRanker"""
+    order = ("high", "medium", "low") if is_unusual else ("low", "medium", "high")
+    display = [t for level in order for t in similar_transactions
+               if t.get("risk_assessment", {}).get("level") == level][:5]
+    if not display:
+        return display, None
+
+    high_risk_scores, medium_risk_scores, low_risk_scores = [], [], []
+    for idx, t in enumerate(display):
+        similarity = t.get("score", 0.5)
+        weighted_similarity = similarity * (1.0 - (idx * 0.1))
+        risk_assessment = t.get("risk_assessment", {})
+        risk_level = risk_assessment.get("level", "unknown")
+        similar_amount = t.get("amount", 0)
+        amount_similarity = 1.0
+        if similar_amount > 0 and current_amount > 0:
+            amount_ratio = min(current_amount, similar_amount) / max(current_amount, similar_amount)
+            if amount_ratio > 0.95:
+                amount_similarity = 1.0
+            elif amount_ratio > 0.8:
+                amount_similarity = 0.8
+            elif amount_ratio > 0.5:
+                amount_similarity = 0.6
+            else:
+                amount_similarity = 0.4
+        score_entry = {
+            "similarity": weighted_similarity * 0.7 + amount_similarity * 0.3,
+            "risk_score": risk_assessment.get("score", 50) / 100.0,
+            "flags": len(risk_assessment.get("flags", [])),
+        }
+        if risk_level == "high":
+            high_risk_scores.append(score_entry)
+        elif risk_level == "low":
+            low_risk_scores.append(score_entry)
+        else:
+            medium_risk_scores.append(score_entry)
+
+    if high_risk_scores:
+        total_weight = weighted_sum = 0
+        for score in high_risk_scores:
+            weight = score["similarity"] * (1 + score["flags"] * 0.1)
+            weighted_sum += score["risk_score"] * weight
+            total_weight += weight
+        high_risk_factor = min(1.0, weighted_sum / max(1, total_weight))
+        result = min(1.0, high_risk_factor + min(0.2, len(high_risk_scores) * 0.05))
+    elif low_risk_scores and not medium_risk_scores:
+        avg_similarity = sum(s["similarity"] for s in low_risk_scores) / len(low_risk_scores)
+        result = max(0.05, 1.0 - (avg_similarity ** 1.5))
+    else:
+        total_weight = weighted_sum = 0
+        for score in high_risk_scores + medium_risk_scores + low_risk_scores:
+            weight = score["similarity"] * (1 + 0.2 * score["flags"])
+            weighted_sum += score["risk_score"] * weight
+            total_weight += weight
+        result = weighted_sum / total_weight if total_weight > 0 else 0.5
+    return display, max(0.0, min(1.0, result))
+
+
+def _candidates(rng):
+    candidates = []
+    for _ in range(rng.randint(0, 12)):
+        candidate = {"score": round(rng.random(), 3), "amount": rng.choice([0, rng.uniform(1, 5000)])}
+        assessment = {"flags": ["flag"] * rng.randint(0, 3)}
+        level = rng.choice(["low", "medium", "high", "unknown", None])
+        if level:
+            assessment["level"] = level
+        if rng.random() < 0.9:
+            assessment["score"] = rng.randint(0, 100)
+        if rng.random() < 0.95:
+            candidate["risk_assessment"] = assessment
+        if rng.random() < 0.1:
+            del candidate["score"]
+        candidates.append(candidate)
+    return candidates
+
+
+def _cases(n=3000, seed=11):
+    rng = random.Random(seed)
+    return [(_candidates(rng), rng.choice([0, rng.uniform(1, 5000)]), rng.random() < 0.5) for _ in range(n)]
+
+
+def test_linear_scheme_matches_the_previous_inline_scoring():
+    ranker = SimilarityRanker(WEIGHTING_SCHEMES["linear"])
+    for candidates, amount, unusual in _cases():
+        expected_display, expected_score = _inline_route_scoring(candidates, amount, unusual)
+        ranking = ranker.rank(candidates, amount, unusual)
+        assert [id(t) for t in ranking["display"]] == [id(t) for t in expected_display]
+        if expected_score is None:
+            assert ranking["similarity_risk_score"] is None
+        else:
+            assert ranking["similarity_risk_score"] == pytest.approx(expected_score, abs=1e-12)
+
+
+def test_rank_batch_matches_rank_per_transaction():
+    ranker = SimilarityRanker(WEIGHTING_SCHEMES["linear"])
+    cases = _cases(n=200, seed=3)
+    batch = ranker.rank_batch(*zip(*cases))
+    for (candidates, amount, unusual), result in zip(cases, batch):
+        single = ranker.rank(candidates, amount, unusual)
+        assert [id(t) for t in result["display"]] == [id(t) for t in single["display"]]
+        assert result["similarity_risk_score"] == pytest.approx(single["similarity_risk_score"], abs=1e-12)
+        assert result["level_counts"] == single["level_counts"]
+
+
+def test_position_weights_per_scheme():
+    assert WEIGHTING_SCHEMES["linear"].position_weights(5).tolist() == pytest.approx([1.0, 0.9, 0.8, 0.7, 0.6])
+    # Candidate weighting in FraudDetectionService.find_similar_transactions
+    plateau = [1.0 if idx < 5 else max(0.5, 1.0 - ((idx - 5) * 0.05)) for idx in range(20)]
+    assert WEIGHTING_SCHEMES["plateau"].position_weights(20).tolist() == pytest.approx(plateau)
@@ -109,6 +109,11 @@ function reorderEntityForDisplay(entity) {
     ordered.behavioralEmbedding = truncateEmbedding(entity.behavioralEmbedding);
   }
   
+  // Add embeddingDimensions (returned instead of raw vectors by the detail view)
+  if (entity.embeddingDimensions) {
+    ordered.embeddingDimensions = entity.embeddingDimensions;
+  }
+  
   // Add timestamps
   if (entity.created_date || entity.createdAt) {
     ordered.created_date = entity.created_date || entity.createdAt;
@@ -145,6 +150,10 @@ function SimilarProfilesSection({ entity }) {
   const [filters, setFilters] = useState({});
   const [embeddingType, setEmbeddingType] = useState('identifier'); // 'identifier' or 'behavioral'
 
+  // Entity detail omits raw vectors by default and reports their dimensions instead
+  const identifierDimensions = entity?.identifierEmbedding?.length || entity?.embeddingDimensions?.identifier || 0;
+  const behavioralDimensions = entity?.behavioralEmbedding?.length || entity?.embeddingDimensions?.behavioral || 0;
+
   const handleVectorSearch = async () => {
     if (!entity?.entityId) {
       setError('Entity ID is required for vector search');
@@ -252,25 +261,25 @@ function SimilarProfilesSection({ entity }) {
           {isLoading ? 'Searching...' : `Find Similar Profiles (${embeddingType === 'identifier' ? 'Identifier' : 'Behavioral'})`}
         </Button>
 
-        {entity?.identifierEmbedding && embeddingType === 'identifier' && (
+        {identifierDimensions > 0 && embeddingType === 'identifier' && (
           <Body style={{ color: palette.green.dark2, fontSize: '12px' }}>
-            ✓ Identifier embeddings available ({entity.identifierEmbedding.length} dimensions)
+            ✓ Identifier embeddings available ({identifierDimensions} dimensions)
           </Body>
         )}
         
-        {entity?.behavioralEmbedding && embeddingType === 'behavioral' && (
+        {behavioralDimensions > 0 && embeddingType === 'behavioral' && (
           <Body style={{ color: palette.green.dark2, fontSize: '12px' }}>
-            ✓ Behavioral embeddings available ({entity.behavioralEmbedding.length} dimensions)
+            ✓ Behavioral embeddings available ({behavioralDimensions} dimensions)
           </Body>
         )}
         
-        {embeddingType === 'identifier' && !entity?.identifierEmbedding && (
+        {embeddingType === 'identifier' && identifierDimensions === 0 && (
           <Body style={{ color: palette.yellow.dark2, fontSize: '12px' }}>
             ⚠ No identifier embeddings found for this entity
           </Body>
         )}
         
-        {embeddingType === 'behavioral' && !entity?.behavioralEmbedding && (
+        {embeddingType === 'behavioral' && behavioralDimensions === 0 && (
           <Body style={{ color: palette.yellow.dark2, fontSize: '12px' }}>
             ⚠ No behavioral embeddings found for this entity
           </Body>
@@ -101,7 +101,7 @@ export default function InvestigationAnalytics() {
     return (
       <Card style={{ padding: spacing[4], textAlign: 'center' }}>
         <Body style={{ fontFamily: FONT, color: palette.gray.dark1 }}>
-          Computing analytics via MongoDB aggregation pipeline...
+          Loading materialised analytics...
         </Body>
       </Card>
     );
@@ -130,7 +130,7 @@ export default function InvestigationAnalytics() {
       <div>
         <H3 style={{ fontFamily: FONT, margin: 0, marginBottom: 4 }}>Investigation Analytics</H3>
         <Body style={{ fontSize: '12px', fontFamily: FONT, color: palette.gray.dark1 }}>
-          Real-time analytics computed using MongoDB aggregation pipelines
+          Counters maintained on every finalized case, reconciled by a MongoDB aggregation pipeline
         </Body>
       </div>
 
@@ -266,8 +266,8 @@ export default function InvestigationAnalytics() {
       {/* Show Pipeline */}
       {aggregation_pipeline && (
         <ExpandableCard
-          title="View Aggregation Pipeline"
-          description="The MongoDB $facet pipeline powering these analytics"
+          title="View Reconcile Pipeline"
+          description="The MongoDB $facet pipeline that periodically rebuilds these counters"
         >
           <Code language="json" style={{ maxHeight: 400, overflow: 'auto' }}>
             {aggregation_pipeline}
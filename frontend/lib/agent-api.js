@@ -84,6 +84,25 @@ export async function launchInvestigation(alertData, onEvent, signal) {
   await readSSEStream(response, onEvent);
 }
 
+/**
+ * Reattach to a queued or running investigation and replay missed events
+ * @param {string} threadId - thread_id from the alert_ingested event
+ * @param {number} afterSeq - last `seq` received (0 replays the whole run)
+ * @param {Function} onEvent - callback for each SSE event
+ * @param {AbortSignal} [signal] - optional AbortSignal to cancel the stream
+ */
+export async function reattachInvestigation(threadId, afterSeq, onEvent, signal) {
+  const params = new URLSearchParams({ after: String(afterSeq || 0) });
+  const url = `${AML_API_URL}/agents/investigate/${threadId}/stream?${params}`;
+
+  const response = await fetch(url, { signal });
+  if (!response.ok) {
+    throw new Error(`Investigation reattach failed: ${response.status}`);
+  }
+
+  await readSSEStream(response, onEvent);
+}
+
 /**
  * Resume an investigation after human review
  * @param {Object} resumeData - { thread_id, decision, analyst_notes }
@@ -161,10 +180,12 @@ export async function fetchTypologies() {
 }
 
 /**
- * Fetch investigation analytics (aggregation pipeline results)
+ * Fetch investigation analytics (materialised counters, optional 7d/30d series)
  */
-export async function fetchInvestigationAnalytics() {
-  const url = `${AML_API_URL}/agents/investigations/analytics`;
+export async function fetchInvestigationAnalytics({ series, includePipeline = true } = {}) {
+  const params = new URLSearchParams({ include_pipeline: String(includePipeline) });
+  if (series) params.set('series', series);
+  const url = `${AML_API_URL}/agents/investigations/analytics?${params}`;
   const response = await fetch(url);
   if (!response.ok) throw new Error(`Failed to fetch analytics: ${response.status}`);
   return response.json();